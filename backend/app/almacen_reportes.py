@@ -0,0 +1,206 @@
+# app/almacen_reportes.py
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+logger = logging.getLogger("app.almacen_reportes")
+
+from .database import conexion
+from .storage import get_storage
+
+# Carpeta donde se guardan los reportes generados (única definición para toda la app)
+REPORTS_DIR = Path(__file__).parent.parent / "reportes"
+
+# Límites del almacén: al superarse se eliminan primero los vencidos y luego los menos usados
+REPORTES_MAX_ARCHIVOS = int(os.environ.get("REPORTES_MAX_ARCHIVOS", "50"))
+REPORTES_MAX_MB = int(os.environ.get("REPORTES_MAX_MB", "200"))
+REPORTES_RETENCION_DIAS = int(os.environ.get("REPORTES_RETENCION_DIAS", "7"))
+
+BUCKET_REPORTES = "reportes"
+
+_indice = OrderedDict()  # nombre -> {"tamano", "creado"}; del menos al más usado
+_lock = threading.Lock()
+_cargado = False
+
+
+def _nombre_valido(nombre_archivo):
+    # Solo nombres simples de archivo .xlsx, nunca rutas
+    return Path(nombre_archivo).name == nombre_archivo and nombre_archivo.endswith(".xlsx")
+
+
+def _agregar(nombre_archivo, stat):
+    """Agrega o refresca un archivo en el índice (llamar con _lock)"""
+    _indice[nombre_archivo] = {
+        "tamano": stat.st_size,
+        "creado": stat.st_mtime,
+    }
+    _indice.move_to_end(nombre_archivo)
+
+
+def cargar():
+    """Crea la carpeta y construye el índice a partir de los archivos existentes (una sola vez)"""
+    global _cargado
+    with _lock:
+        if _cargado:
+            return
+        os.makedirs(REPORTS_DIR, exist_ok=True)
+        archivos = []
+        with os.scandir(REPORTS_DIR) as entradas:
+            for entrada in entradas:
+                if entrada.is_file() and _nombre_valido(entrada.name):
+                    archivos.append((entrada.name, entrada.stat()))
+        # Sin historial de uso, el más antiguo se considera el menos usado
+        for nombre, stat in sorted(archivos, key=lambda a: a[1].st_mtime):
+            _agregar(nombre, stat)
+        _cargado = True
+    logger.info(f"Almacén de reportes: {len(archivos)} archivos en {REPORTS_DIR}")
+
+
+def ruta_nueva(nombre_archivo):
+    """Ruta donde debe escribirse un reporte nuevo"""
+    cargar()
+    return REPORTS_DIR / nombre_archivo
+
+
+def registrar(nombre_archivo):
+    """
+    Agrega al índice un reporte recién escrito y aplica los límites del almacén.
+    Retorna los archivos eliminados: quien llama ya tiene una conexión abierta y borra
+    sus registros con limpiar_registros en ella, sin pedir otra al pool.
+    """
+    cargar()
+    stat = (REPORTS_DIR / nombre_archivo).stat()
+    with _lock:
+        _agregar(nombre_archivo, stat)
+    return _eliminar_archivos(conservar=nombre_archivo)
+
+
+def ruta(nombre_archivo):
+    """
+    Ruta de un reporte guardado, o None si no existe. La búsqueda es en el índice;
+    solo se revisa el disco si el archivo no está indexado (p. ej. lo generó otro worker).
+    """
+    cargar()
+    if not _nombre_valido(nombre_archivo):
+        return None
+    with _lock:
+        if nombre_archivo in _indice:
+            _indice.move_to_end(nombre_archivo)
+            return REPORTS_DIR / nombre_archivo
+
+    archivo = REPORTS_DIR / nombre_archivo
+    try:
+        stat = archivo.stat()
+    except FileNotFoundError:
+        return None
+    with _lock:
+        _agregar(nombre_archivo, stat)
+    return archivo
+
+
+def existe(nombre_archivo):
+    return ruta(nombre_archivo) is not None
+
+
+def _seleccionar_para_eliminar(conservar):
+    """Nombres a eliminar según retención, número de archivos y tamaño (llamar con _lock)"""
+    limite = time.time() - REPORTES_RETENCION_DIAS * 86400
+    eliminar = [n for n, e in _indice.items() if e["creado"] < limite and n != conservar]
+    vencidos = set(eliminar)
+
+    archivos = len(_indice) - len(eliminar)
+    tamano = sum(e["tamano"] for n, e in _indice.items() if n not in vencidos)
+    maximo_bytes = REPORTES_MAX_MB * 1024 * 1024
+    # El índice está ordenado del menos al más usado
+    for nombre, entrada in _indice.items():
+        if archivos <= REPORTES_MAX_ARCHIVOS and tamano <= maximo_bytes:
+            break
+        if nombre in vencidos or nombre == conservar:
+            continue
+        eliminar.append(nombre)
+        archivos -= 1
+        tamano -= entrada["tamano"]
+    return eliminar
+
+
+def _eliminar_archivos(conservar=None):
+    """Quita del índice y del disco los reportes vencidos y, si aún se superan los límites, los menos usados"""
+    cargar()
+    with _lock:
+        eliminar = _seleccionar_para_eliminar(conservar)
+        for nombre in eliminar:
+            del _indice[nombre]
+
+    for nombre in eliminar:
+        try:
+            (REPORTS_DIR / nombre).unlink()
+        except FileNotFoundError:
+            pass
+
+    if eliminar:
+        logger.info(f"Almacén de reportes: eliminados {len(eliminar)} archivos")
+    return eliminar
+
+
+def purgar(conservar=None):
+    """
+    Elimina los reportes vencidos y, si aún se superan los límites, los menos usados.
+    También borra sus registros en la tabla reportes y sus copias en Supabase Storage.
+    Usa su propia conexión: solo para llamarse sin otra abierta (p. ej. al iniciar).
+    Retorna la lista de archivos eliminados.
+    """
+    eliminados = _eliminar_archivos(conservar)
+    en_storage = []
+    try:
+        with conexion() as db:
+            en_storage = limpiar_registros(db.cursor(), eliminados)
+            db.commit()
+    except Exception as e:
+        logger.warning(f"No se pudieron limpiar los registros de reportes: {str(e)}")
+    eliminar_de_storage(en_storage)
+    return eliminados
+
+
+def limpiar_registros(cursor, eliminados):
+    """
+    Borra los registros de reportes eliminados o vencidos con el cursor de quien llama.
+    Retorna los nombres que también tienen copia en Supabase: quien llama los pasa a
+    eliminar_de_storage después de su commit, para no borrar objetos cuyos registros
+    sobreviven a un rollback ni esperar a Storage con la transacción abierta.
+    """
+    limite = datetime.now() - timedelta(days=REPORTES_RETENCION_DIAS)
+    cursor.execute("""
+        DELETE FROM reportes
+        WHERE nombre_archivo = ANY(%s) OR fecha_generacion < %s
+        RETURNING nombre_archivo, tipo
+    """, (list(eliminados), limite))
+    borrados = cursor.fetchall()
+    return sorted({f["nombre_archivo"] for f in borrados if f["tipo"] == "excel_completo_supabase"})
+
+
+def eliminar_de_storage(nombres):
+    """Elimina de Supabase Storage los reportes cuyos registros ya se borraron"""
+    storage = get_storage()
+    if not nombres or storage is None:
+        return
+    try:
+        storage.eliminar(BUCKET_REPORTES, nombres)
+        logger.info(f"Eliminados {len(nombres)} reportes de Supabase Storage")
+    except Exception as e:
+        logger.warning(f"No se pudieron eliminar reportes de Supabase Storage: {str(e)}")
+
+
+def estadisticas():
+    cargar()
+    with _lock:
+        return {
+            "archivos": len(_indice),
+            "bytes": sum(e["tamano"] for e in _indice.values()),
+            "max_archivos": REPORTES_MAX_ARCHIVOS,
+            "max_bytes": REPORTES_MAX_MB * 1024 * 1024,
+            "retencion_dias": REPORTES_RETENCION_DIAS,
+        }
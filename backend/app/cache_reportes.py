@@ -0,0 +1,97 @@
+# app/cache_reportes.py
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+logger = logging.getLogger("app.cache_reportes")
+
+from . import almacen_reportes
+from .condicional import version_tablas
+
+# Tipos con que se registra cada reporte en la tabla reportes, en orden de preferencia
+TIPOS_REGISTRO = {
+    "excel": ["excel"],
+    "completo": ["excel_completo_supabase", "excel_completo_local"],
+}
+
+# Tipo con que se registra una copia local (p. ej. la que guarda /reportes/excel/stream)
+TIPO_REGISTRO_LOCAL = {
+    "excel": "excel",
+    "completo": "excel_completo_local",
+}
+
+# Una URL firmada que vence antes de este margen ya no se reutiliza
+MARGEN_EXPIRACION = timedelta(hours=1)
+
+_MEMO_MAX = 32
+_memo = OrderedDict()  # clave -> resultado
+_lock = threading.Lock()
+
+
+def version_datos(cursor, tablas=("empleados", "sucursales")):
+    """Versión combinada de las tablas, mantenida por triggers (migraciones 003 y 007)"""
+    return version_tablas(cursor, tablas)[0]
+
+
+def clave_reporte(tipo, version):
+    """Clave del reporte: mismo tipo y misma versión de datos producen el mismo archivo"""
+    return hashlib.sha256(f"{tipo}|{version}".encode()).hexdigest()[:32]
+
+
+def _vigente(resultado):
+    if not almacen_reportes.existe(resultado["archivo"]):
+        return False
+    expiracion = resultado.get("expiracion")
+    if expiracion is not None:
+        ahora = datetime.now(expiracion.tzinfo) if expiracion.tzinfo else datetime.now()
+        if expiracion - ahora < MARGEN_EXPIRACION:
+            return False
+    return True
+
+
+def buscar(cursor, tipo, clave):
+    """Retorna el resultado de un reporte ya generado con la misma clave, o None"""
+    with _lock:
+        resultado = _memo.get(clave)
+        if resultado is not None:
+            _memo.move_to_end(clave)
+    if resultado is not None and _vigente(resultado):
+        return {**resultado, "cache": True}
+
+    # Otro worker (o un proceso anterior) pudo haberlo generado
+    cursor.execute("""
+        SELECT id, nombre_archivo, tipo, url_descarga, expiracion
+        FROM reportes
+        WHERE version_datos = %s AND tipo = ANY(%s)
+        ORDER BY fecha_generacion DESC
+    """, (clave, TIPOS_REGISTRO[tipo]))
+    filas = sorted(cursor.fetchall(), key=lambda f: TIPOS_REGISTRO[tipo].index(f["tipo"]))
+    for fila in filas:
+        resultado = {
+            "success": True,
+            "archivo": fila["nombre_archivo"],
+            "id": fila["id"],
+            "url": fila["url_descarga"] or f"/reportes/excel/download/{fila['nombre_archivo']}",
+            "expiracion": fila["expiracion"],
+        }
+        if _vigente(resultado):
+            registrar(clave, resultado)
+            return {**resultado, "cache": True}
+    return None
+
+
+def registrar(clave, resultado):
+    with _lock:
+        _memo[clave] = resultado
+        _memo.move_to_end(clave)
+        while len(_memo) > _MEMO_MAX:
+            _memo.popitem(last=False)
+
+
+def invalidar(archivo=None):
+    """Olvida los resultados en memoria (todos, o los que apuntan a `archivo`)"""
+    with _lock:
+        for clave in [c for c, r in _memo.items() if archivo is None or r["archivo"] == archivo]:
+            del _memo[clave]
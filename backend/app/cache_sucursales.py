@@ -0,0 +1,156 @@
+# app/cache_sucursales.py
+import os
+import time
+import threading
+import logging
+
+logger = logging.getLogger("app.cache_sucursales")
+
+from .database import conexion
+
+# Edad máxima de la copia en memoria aunque la versión no haya cambiado (seguridad)
+SUCURSALES_CACHE_TTL = float(os.environ.get("SUCURSALES_CACHE_TTL", "300"))
+# Cada cuánto se consulta versiones_datos para ver si otro worker cambió la tabla
+SUCURSALES_CACHE_VERIFICAR = float(os.environ.get("SUCURSALES_CACHE_VERIFICAR", "2"))
+
+# _lock protege el estado y nunca se tiene durante una consulta; _lock_carga solo ordena
+# las recargas para que varios hilos no lean la tabla completa a la vez
+_lock = threading.Lock()
+_lock_carga = threading.Lock()
+_filas = None  # id -> fila; None si hay que cargar
+_version = None
+_cargado = 0.0
+_verificado = 0.0
+_aciertos = 0
+_cargas = 0
+
+# Las funciones de lectura aceptan el cursor de la solicitud (get_db): pedir una segunda
+# conexión al pool mientras la solicitud ya tiene una puede agotarlo bajo carga
+
+
+def _con_cursor(cursor, funcion):
+    if cursor is not None:
+        return funcion(cursor)
+    with conexion() as db:
+        return funcion(db.cursor())
+
+
+def _version_actual(cursor):
+    cursor.execute("SELECT version FROM versiones_datos WHERE tabla = 'sucursales'")
+    fila = cursor.fetchone()
+    return fila["version"] if fila else None
+
+
+def _leer_tabla(cursor):
+    # Versión antes que filas: si cambia entre las dos, la siguiente verificación recarga
+    version = _version_actual(cursor)
+    cursor.execute("SELECT * FROM sucursales ORDER BY id")
+    return version, {fila["id"]: dict(fila) for fila in cursor.fetchall()}
+
+
+def _recargar(cursor, solicitada):
+    """Lee la tabla completa, salvo que otro hilo la haya recargado después de `solicitada`"""
+    global _filas, _version, _cargado, _verificado, _cargas
+    with _lock_carga:
+        with _lock:
+            if _filas is not None and _cargado >= solicitada:
+                return _filas, _version
+        version, filas = _con_cursor(cursor, _leer_tabla)
+        with _lock:
+            _filas, _version = filas, version
+            _cargado = _verificado = time.monotonic()
+            _cargas += 1
+    logger.debug(f"Cache de sucursales cargada: {len(filas)} filas, versión {version}")
+    return filas, version
+
+
+def _vigentes(cursor=None, version_minima=None):
+    """
+    Filas en memoria y su versión, recargándolas si vencieron o si la versión de la tabla
+    cambió. Con `version_minima` (la que ya leyó la solicitud) se recarga si la copia es
+    más vieja; sin ella la versión se consulta a lo más cada SUCURSALES_CACHE_VERIFICAR
+    segundos. Los triggers de las migraciones 003 y 007 la incrementan con cualquier
+    escritura, de cualquier worker o proceso.
+    """
+    global _verificado, _aciertos
+    ahora = time.monotonic()
+    with _lock:
+        filas, version = _filas, _version
+        vencida = filas is None or ahora - _cargado > SUCURSALES_CACHE_TTL
+        verificar = not vencida and version_minima is None and ahora - _verificado > SUCURSALES_CACHE_VERIFICAR
+        if verificar:
+            # Solo un hilo consulta la versión en cada intervalo; los demás usan la copia
+            _verificado = ahora
+
+    if not vencida:
+        if version_minima is not None:
+            vigente = version is not None and version >= version_minima
+        elif verificar:
+            vigente = _con_cursor(cursor, _version_actual) == version
+        else:
+            vigente = True
+        if vigente:
+            with _lock:
+                _aciertos += 1
+            return filas, version
+    return _recargar(cursor, ahora)
+
+
+def listar(cursor=None, version_minima=None):
+    filas, _ = _vigentes(cursor, version_minima)
+    return [dict(fila) for fila in filas.values()]
+
+
+def obtener(sucursal_id, cursor=None, version_minima=None):
+    """Fila de la sucursal o None; una sucursal que aún no está en memoria se busca en la base"""
+    filas, _ = _vigentes(cursor, version_minima)
+    fila = filas.get(sucursal_id)
+    if fila is not None:
+        return dict(fila)
+
+    def buscar(cursor):
+        cursor.execute("SELECT * FROM sucursales WHERE id = %s", (sucursal_id,))
+        return cursor.fetchone()
+
+    fila = _con_cursor(cursor, buscar)
+    if fila is None:
+        return None
+    guardar(fila)
+    return dict(fila)
+
+
+def existe(sucursal_id, cursor=None):
+    return obtener(sucursal_id, cursor) is not None
+
+
+def guardar(fila):
+    """Escritura a través: el router de sucursales la llama después de su commit"""
+    global _filas
+    with _lock:
+        # Se reemplaza el diccionario en lugar de modificarlo: otros hilos pueden estar recorriéndolo
+        if _filas is not None:
+            _filas = {**_filas, fila["id"]: dict(fila)}
+
+
+def quitar(sucursal_id):
+    global _filas
+    with _lock:
+        if _filas is not None and sucursal_id in _filas:
+            _filas = {i: fila for i, fila in _filas.items() if i != sucursal_id}
+
+
+def invalidar():
+    global _filas
+    with _lock:
+        _filas = None
+
+
+def estadisticas():
+    with _lock:
+        return {
+            "filas": len(_filas) if _filas is not None else None,
+            "version": _version,
+            "edad_segundos": round(time.monotonic() - _cargado, 1) if _filas is not None else None,
+            "aciertos": _aciertos,
+            "cargas": _cargas,
+        }
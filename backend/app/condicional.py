@@ -0,0 +1,84 @@
+# app/condicional.py
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime
+
+import psycopg2
+from fastapi import Depends, HTTPException, Request, Response, status
+
+from .database import get_db
+
+# El navegador guarda la respuesta pero la revalida siempre (If-None-Match) antes de usarla
+CACHE_CONTROL = "private, no-cache"
+
+
+def _versiones(cursor, tablas):
+    cursor.execute(
+        "SELECT tabla, version, actualizado FROM versiones_datos WHERE tabla = ANY(%s) ORDER BY tabla",
+        (list(tablas),)
+    )
+    return cursor.fetchall()
+
+
+def _combinar(filas):
+    version = ";".join(f"{fila['tabla']}:{fila['version']}" for fila in filas)
+    actualizado = max((fila["actualizado"] for fila in filas), default=None)
+    return version, actualizado
+
+
+def version_tablas(cursor, tablas):
+    """
+    Versión y fecha del último cambio de las tablas, mantenidas por triggers (migraciones 003 y 007).
+    Retorna (version, actualizado); una sola consulta sobre una tabla de pocas filas.
+    """
+    return _combinar(_versiones(cursor, tablas))
+
+
+def version_leida(request, tabla):
+    """
+    Versión de `tabla` con la que la dependencia calculó el ETag de esta solicitud, o None.
+    Los handlers que sirven de una caché la usan para no responder con datos más viejos que el ETag.
+    """
+    return getattr(request.state, "versiones_datos", {}).get(tabla)
+
+
+def _etag(version, request):
+    # La misma versión con otros filtros u otra ruta es otra representación
+    variante = f"{version}|{request.url.path}?{request.url.query}"
+    return f'W/"{hashlib.sha256(variante.encode()).hexdigest()[:24]}"'
+
+
+def _coincide(if_none_match, etag):
+    """Comparación débil de If-None-Match contra el ETag actual"""
+    if if_none_match.strip() == "*":
+        return True
+    actual = etag.removeprefix("W/")
+    return any(candidato.strip().removeprefix("W/") == actual for candidato in if_none_match.split(","))
+
+
+def condicional(*tablas):
+    """
+    Dependencia para GET de listados y detalles: calcula el ETag a partir de la versión de
+    `tablas` y responde 304 antes de que el handler ejecute su consulta si el cliente ya
+    tiene esa versión. Si no, agrega ETag, Last-Modified y Cache-Control a la respuesta y
+    retorna esas cabeceras (para los handlers que arman su propia Response).
+
+    Solo se valida con If-None-Match. If-Modified-Since no se respeta: la fecha tiene
+    resolución de segundos y una escritura que confirma tarde puede quedar con una fecha
+    anterior a la que el cliente ya vio, lo que daría un 304 con datos viejos.
+    """
+    def dependencia(request: Request, response: Response, db: psycopg2.extensions.connection = Depends(get_db)):
+        filas = _versiones(db.cursor(), tablas)
+        request.state.versiones_datos = {fila["tabla"]: fila["version"] for fila in filas}
+        version, actualizado = _combinar(filas)
+        cabeceras = {"ETag": _etag(version, request), "Cache-Control": CACHE_CONTROL}
+        if actualizado is not None:
+            cabeceras["Last-Modified"] = format_datetime(actualizado.astimezone(timezone.utc), usegmt=True)
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None and _coincide(if_none_match, cabeceras["ETag"]):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabeceras)
+
+        response.headers.update(cabeceras)
+        return cabeceras
+    return dependencia
@@ -0,0 +1,12 @@
+# app/constantes.py
+
+# Orden oficial de las tallas, usado por reportes y estadísticas
+TALLAS = ["XS", "S", "M", "L", "XL", "XXL", "XXXL"]
+
+# Valor que usa el frontend para empleados que todavía no eligen talla
+TALLA_POR_DEFINIR = "Por definir"
+
+
+def normalizar_talla(talla):
+    """Agrupa valores nulos o desconocidos como 'Por definir'"""
+    return talla if talla in TALLAS else TALLA_POR_DEFINIR
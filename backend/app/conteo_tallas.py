@@ -0,0 +1,97 @@
+# app/conteo_tallas.py
+"""
+Reconstrucción y verificación de la tabla conteo_tallas (migración 005).
+
+Los triggers la mantienen al día con cada INSERT/UPDATE/DELETE sobre empleados; esto es
+para repararla o comprobarla a mano:
+
+    python -m app.conteo_tallas verificar
+    python -m app.conteo_tallas reconstruir
+"""
+import sys
+import argparse
+import logging
+
+logger = logging.getLogger("app.conteo_tallas")
+
+from .database import conexion
+
+# Conteo real a partir de empleados, con la misma agrupación que los triggers
+CONTEO_REAL = """
+    SELECT sucursal_id,
+           normalizar_talla(talla) AS talla,
+           COALESCE(requiere_playera_administrativa, false) AS administrativa,
+           CASE WHEN COALESCE(requiere_playera_administrativa, false)
+                THEN normalizar_talla(talla_administrativa) ELSE 'Por definir' END AS talla_administrativa,
+           COUNT(*) AS cantidad
+    FROM empleados
+    WHERE sucursal_id IS NOT NULL
+    GROUP BY 1, 2, 3, 4
+"""
+
+
+def reconstruir(db):
+    """
+    Vuelve a calcular la tabla desde empleados en una transacción. El lock SHARE impide
+    escrituras en empleados mientras tanto (las lecturas siguen) para no perder cambios.
+    """
+    cursor = db.cursor()
+    try:
+        cursor.execute("LOCK TABLE empleados IN SHARE MODE")
+        cursor.execute("DELETE FROM conteo_tallas")
+        cursor.execute(f"""
+            INSERT INTO conteo_tallas (sucursal_id, talla, administrativa, talla_administrativa, cantidad)
+            {CONTEO_REAL}
+        """)
+        filas = cursor.rowcount
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    logger.info(f"conteo_tallas reconstruida: {filas} filas")
+    return filas
+
+
+def verificar(db):
+    """Diferencias entre conteo_tallas y el conteo real; lista vacía si coinciden"""
+    cursor = db.cursor()
+    cursor.execute(f"""
+        WITH calculado AS ({CONTEO_REAL}),
+        guardado AS (SELECT * FROM conteo_tallas WHERE cantidad <> 0)
+        SELECT COALESCE(r.sucursal_id, g.sucursal_id) AS sucursal_id,
+               COALESCE(r.talla, g.talla) AS talla,
+               COALESCE(r.administrativa, g.administrativa) AS administrativa,
+               COALESCE(r.talla_administrativa, g.talla_administrativa) AS talla_administrativa,
+               COALESCE(r.cantidad, 0) AS cantidad_real,
+               COALESCE(g.cantidad, 0) AS cantidad_guardada
+        FROM calculado r
+        FULL JOIN guardado g USING (sucursal_id, talla, administrativa, talla_administrativa)
+        WHERE COALESCE(r.cantidad, 0) <> COALESCE(g.cantidad, 0)
+        ORDER BY 1, 2, 3, 4
+    """)
+    diferencias = [dict(fila) for fila in cursor.fetchall()]
+    db.rollback()
+    return diferencias
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("accion", choices=["verificar", "reconstruir"])
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    with conexion() as db:
+        if args.accion == "reconstruir":
+            print(f"Reconstruida con {reconstruir(db)} filas")
+            return 0
+
+        diferencias = verificar(db)
+    for d in diferencias:
+        print(f"sucursal {d['sucursal_id']} talla {d['talla']} administrativa={d['administrativa']} "
+              f"({d['talla_administrativa']}): real {d['cantidad_real']}, guardado {d['cantidad_guardada']}")
+    print("conteo_tallas coincide con empleados" if not diferencias else f"{len(diferencias)} diferencias")
+    return 1 if diferencias else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
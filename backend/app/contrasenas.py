@@ -0,0 +1,93 @@
+# app/contrasenas.py
+import os
+import asyncio
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from passlib.context import CryptContext
+
+logger = logging.getLogger("app.contrasenas")
+
+# Configuración para hashear contraseñas
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# bcrypt libera el GIL, así que cada hilo usa un núcleo: no conviene más hilos que núcleos
+HASH_WORKERS = int(os.environ.get("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Operaciones que pueden esperar turno además de las que están en ejecución; las demás se rechazan
+HASH_COLA_MAX = int(os.environ.get("HASH_COLA_MAX", "32"))
+
+_executor = None
+_lock = threading.Lock()
+_en_vuelo = 0
+_rechazadas = 0
+
+
+class HashSaturadoError(RuntimeError):
+    """El pool de hashing tiene su cola llena"""
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="hash")
+        return _executor
+
+
+def _liberar(_future):
+    global _en_vuelo
+    with _lock:
+        _en_vuelo -= 1
+
+
+def _enviar(funcion, *args):
+    """
+    Encola `funcion` en el pool de hashing; si ya hay HASH_WORKERS + HASH_COLA_MAX
+    operaciones en curso lanza HashSaturadoError de inmediato en lugar de esperar.
+    """
+    global _en_vuelo, _rechazadas
+    executor = _get_executor()
+    with _lock:
+        if _en_vuelo >= HASH_WORKERS + HASH_COLA_MAX:
+            _rechazadas += 1
+            raise HashSaturadoError("Demasiadas operaciones de contraseña en curso")
+        _en_vuelo += 1
+    try:
+        future = executor.submit(funcion, *args)
+    except BaseException:
+        # p. ej. RuntimeError si el pool ya se cerró: el lugar reservado no se usará
+        _liberar(None)
+        raise
+    future.add_done_callback(_liberar)
+    return future
+
+
+async def verify_password(plain_password, hashed_password):
+    return await asyncio.wrap_future(_enviar(pwd_context.verify, plain_password, hashed_password))
+
+
+async def get_password_hash(password):
+    return await asyncio.wrap_future(_enviar(pwd_context.hash, password))
+
+
+def get_password_hash_sync(password):
+    """Para código síncrono (handlers sync, inicio de la app): espera el resultado en el hilo actual"""
+    return _enviar(pwd_context.hash, password).result()
+
+
+def estadisticas_hash():
+    with _lock:
+        return {
+            "workers": HASH_WORKERS,
+            "cola_max": HASH_COLA_MAX,
+            "en_vuelo": _en_vuelo,
+            "rechazadas": _rechazadas,
+        }
+
+
+def cerrar_hash():
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
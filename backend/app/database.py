@@ -1,9 +1,18 @@
 import os
+import time
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from fastapi import HTTPException, status
 from supabase import create_client, Client
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import logging
 
+from .pool import PoolConexiones, PoolAgotadoError
+from .metricas import registrar_consulta
+from .diagnostico_db import registrar_sentencia
+
 logger = logging.getLogger("app.database")
 
 # Configuración de Supabase
@@ -21,18 +30,94 @@ def get_supabase_client() -> Client:
     
     return create_client(SUPABASE_URL, SUPABASE_KEY)
 
+class CursorMedido(RealDictCursor):
+    """
+    RealDictCursor que mide cada sentencia (duración, filas y texto normalizado). Todas las
+    conexiones del pool lo usan, así que los cursores que obtienen los handlers desde
+    get_db quedan medidos sin cambiarlos. Ver app/diagnostico_db.py.
+    """
+
+    def _registrar(self, query, inicio):
+        duracion = time.perf_counter() - inicio
+        registrar_consulta(duracion)
+        registrar_sentencia(query, duracion, self.rowcount)
+
+    def execute(self, query, vars=None):
+        inicio = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            self._registrar(query, inicio)
+
+    def executemany(self, query, vars_list):
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            self._registrar(query, inicio)
+
+    def copy_expert(self, sql, file, size=8192):
+        inicio = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            self._registrar(sql, inicio)
+
+# Pool de conexiones del proceso, se crea la primera vez que se necesita
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> PoolConexiones:
+    """Retorna el pool de conexiones del proceso, creándolo si todavía no existe"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                if not DATABASE_URL:
+                    logger.error("Variable de entorno DATABASE_URL no configurada")
+                    raise ValueError("Falta URL de la base de datos")
+                _pool = PoolConexiones(DATABASE_URL, cursor_factory=CursorMedido)
+    return _pool
+
+def cerrar_pool():
+    """Cierra todas las conexiones del pool (al apagar la aplicación)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.cerrar()
+            _pool = None
+
+def estadisticas_pool():
+    """Estadísticas del pool de conexiones (esperas, checkouts, timeouts, etc.)"""
+    if _pool is None:
+        return {"iniciado": False}
+    return {"iniciado": True, **_pool.estadisticas()}
+
+@contextmanager
+def conexion():
+    """Toma prestada una conexión del pool y la devuelve al terminar (para uso fuera de Depends)"""
+    pool = get_pool()
+    conn = pool.obtener()
+    try:
+        yield conn
+    finally:
+        pool.devolver(conn)
+
 def get_db():
-    """Obtiene una conexión directa a la base de datos PostgreSQL con manejo de contexto"""
-    if not DATABASE_URL:
-        logger.error("Variable de entorno DATABASE_URL no configurada")
-        raise ValueError("Falta URL de la base de datos")
-    
-    conn = psycopg2.connect(DATABASE_URL)
-    conn.cursor_factory = RealDictCursor  # Para obtener resultados como diccionarios similares a sqlite3.Row
+    """Obtiene una conexión del pool de PostgreSQL con manejo de contexto"""
+    try:
+        pool = get_pool()
+        conn = pool.obtener()
+    except PoolAgotadoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Base de datos saturada, intente de nuevo: {str(e)}"
+        )
+    # Las conexiones del pool usan RealDictCursor para obtener resultados como diccionarios similares a sqlite3.Row
     try:
         yield conn
     finally:
-        conn.close()
+        pool.devolver(conn)
 
 def normalizar_texto(texto):
     """Convierte un texto a formato con la primera letra en mayúscula y el resto en minúscula"""
@@ -73,27 +158,62 @@ def normalizar_fecha(fecha_str):
         pass
     return fecha_str
 
+# Archivos .sql idempotentes que se aplican en orden al iniciar (índices, tablas auxiliares, etc.)
+MIGRACIONES_DIR = Path(__file__).parent.parent / "migraciones"
+# Clave arbitraria para que solo un worker aplique migraciones a la vez
+_MIGRACIONES_LOCK_ID = 7310420
+
+def aplicar_migraciones(conn):
+    """Ejecuta los archivos de migraciones/ que todavía no están registrados en la tabla migraciones"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT pg_advisory_lock(%s)", (_MIGRACIONES_LOCK_ID,))
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS migraciones (
+                nombre TEXT PRIMARY KEY,
+                aplicada TIMESTAMP NOT NULL DEFAULT now()
+            )
+        """)
+        cursor.execute("SELECT nombre FROM migraciones")
+        aplicadas = {fila['nombre'] for fila in cursor.fetchall()}
+        conn.commit()
+
+        for archivo in sorted(MIGRACIONES_DIR.glob("*.sql")):
+            if archivo.name in aplicadas:
+                continue
+            logger.info(f"Aplicando migración {archivo.name}")
+            try:
+                cursor.execute(archivo.read_text(encoding="utf-8"))
+                cursor.execute("INSERT INTO migraciones (nombre) VALUES (%s)", (archivo.name,))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+    finally:
+        cursor.execute("SELECT pg_advisory_unlock(%s)", (_MIGRACIONES_LOCK_ID,))
+        conn.commit()
+
 def init_db():
     """
     Inicializa la base de datos si es necesario
-    Esta función no creará tablas ya que Supabase ya las tiene creadas
-    Pero podemos usarla para verificar la conexión y crear usuarios por defecto si no existen
+    Las tablas principales ya existen en Supabase; aquí solo se aplican las migraciones
+    auxiliares (índices, etc.), se verifica la conexión y se crean usuarios por defecto si no existen
     """
     logger.info("Verificando conexión con Supabase y usuario por defecto")
     try:
-        conn = psycopg2.connect(DATABASE_URL)
-        conn.cursor_factory = RealDictCursor
-        cursor = conn.cursor()
-        
-        # Verificar si ya existen usuarios
-        cursor.execute("SELECT COUNT(*) FROM usuarios")
-        result = cursor.fetchone()
-        if result and result['count'] == 0:
-            logger.info("Creando usuario administrador por defecto")
-            _crear_usuarios_default(cursor)
-            conn.commit()
+        # Crear el pool aquí abre las conexiones mínimas antes de la primera solicitud
+        with conexion() as conn:
+            aplicar_migraciones(conn)
+            cursor = conn.cursor()
+            
+            # Verificar si ya existen usuarios
+            cursor.execute("SELECT COUNT(*) FROM usuarios")
+            result = cursor.fetchone()
+            if result and result['count'] == 0:
+                logger.info("Creando usuario administrador por defecto")
+                _crear_usuarios_default(cursor)
+                conn.commit()
         
-        conn.close()
         logger.info("Conexión a Supabase verificada correctamente")
     except Exception as e:
         logger.error(f"Error al inicializar la conexión con Supabase: {str(e)}")
@@ -101,9 +221,8 @@ def init_db():
 
 def _crear_usuarios_default(cursor):
     """Crea usuarios por defecto si no existen"""
-    from passlib.context import CryptContext
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-    admin_password = pwd_context.hash("admin123")
+    from .contrasenas import get_password_hash_sync
+    admin_password = get_password_hash_sync("admin123")
     
     cursor.execute(
         "INSERT INTO usuarios (username, password, rol, sucursal_id) VALUES (%s, %s, %s, %s)",
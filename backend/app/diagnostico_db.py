@@ -0,0 +1,161 @@
+# app/diagnostico_db.py
+import os
+import re
+import time
+import threading
+import logging
+from collections import deque
+from contextvars import ContextVar
+from functools import lru_cache
+
+logger = logging.getLogger("app.diagnostico_db")
+
+# "produccion" deshabilita los endpoints de depuración
+ENTORNO = os.environ.get("ENTORNO", "produccion")
+DEBUG_HABILITADO = ENTORNO != "produccion"
+# Sentencias más lentas que esto se registran con WARNING
+DB_CONSULTA_LENTA_MS = float(os.environ.get("DB_CONSULTA_LENTA_MS", "200"))
+# Solicitudes con más consultas que esto se señalan (posible N+1)
+DB_PRESUPUESTO_CONSULTAS = int(os.environ.get("DB_PRESUPUESTO_CONSULTAS", "20"))
+
+_HISTORIAL = 100
+_MAX_SENTENCIAS = 500
+
+_LITERAL_TEXTO = re.compile(r"'(?:[^']|'')*'")
+_LITERAL_NUMERO = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LISTA = re.compile(r"\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))+\s*\)")
+_ESPACIOS = re.compile(r"\s+")
+
+# Consultas de la solicitud en curso (None fuera de una solicitud, p. ej. en trabajos)
+_solicitud = ContextVar("consultas_solicitud", default=None)
+
+_lock = threading.Lock()
+_por_sentencia = {}  # sql normalizado -> {"veces", "tiempo", "max", "filas"}
+_lentas = deque(maxlen=_HISTORIAL)
+_excedidas = deque(maxlen=_HISTORIAL)
+
+
+def _texto_composable(query):
+    """
+    Texto de un psycopg2.sql.Composable sin pedir una conexión: las partes SQL tal cual, los
+    identificadores entre comillas y los literales como ? (de todos modos se normalizan)
+    """
+    partes = getattr(query, "seq", None)
+    if partes is not None:
+        return "".join(_texto_composable(parte) for parte in partes)
+    # Identifier antes que SQL: también tiene un atributo `string` (obsoleto)
+    if hasattr(query, "strings"):
+        return ".".join('"%s"' % nombre.replace('"', '""') for nombre in query.strings)
+    if hasattr(query, "string"):
+        return query.string
+    if hasattr(query, "wrapped"):
+        return "?"
+    if hasattr(query, "name"):
+        return "%s" if query.name is None else "%%(%s)s" % query.name
+    return str(query)
+
+
+def normalizar_sql(query):
+    """Texto de la sentencia sin literales ni espacios repetidos, para agrupar las iguales"""
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    elif not isinstance(query, str):
+        # psycopg2.sql.Composed y similares no son hashables: se convierten antes de la caché
+        query = _texto_composable(query)
+    return _normalizar(query)
+
+
+@lru_cache(maxsize=2048)
+def _normalizar(query):
+    sql = _LITERAL_TEXTO.sub("?", query)
+    sql = _LITERAL_NUMERO.sub("?", sql)
+    sql = _ESPACIOS.sub(" ", sql).strip()
+    sql = _LISTA.sub("(...)", sql)
+    return sql[:500]
+
+
+def iniciar_solicitud():
+    """Empieza a contar las consultas de la solicitud actual; retorna (token, estadísticas)"""
+    estadisticas = {"consultas": 0, "tiempo": 0.0, "sentencias": {}}
+    return _solicitud.set(estadisticas), estadisticas
+
+
+def terminar_solicitud(token, method, path):
+    """Deja de contar y señala la solicitud si excedió el presupuesto de consultas"""
+    estadisticas = _solicitud.get()
+    _solicitud.reset(token)
+    if estadisticas is None or estadisticas["consultas"] <= DB_PRESUPUESTO_CONSULTAS:
+        return estadisticas
+
+    repetidas = sorted(estadisticas["sentencias"].items(), key=lambda s: s[1], reverse=True)[:5]
+    logger.warning(
+        f"{method} {path} ejecutó {estadisticas['consultas']} consultas "
+        f"(presupuesto {DB_PRESUPUESTO_CONSULTAS}); más repetida: {repetidas[0][1]}x {repetidas[0][0]}"
+    )
+    with _lock:
+        _excedidas.append({
+            "momento": time.time(),
+            "method": method,
+            "path": path,
+            "consultas": estadisticas["consultas"],
+            "tiempo_ms": round(estadisticas["tiempo"] * 1000, 1),
+            "repetidas": [{"sql": sql, "veces": veces} for sql, veces in repetidas],
+        })
+    return estadisticas
+
+
+def registrar_sentencia(query, duracion, filas):
+    """Lo llama el cursor de la base de datos después de cada sentencia"""
+    sql = normalizar_sql(query)
+
+    estadisticas = _solicitud.get()
+    if estadisticas is not None:
+        estadisticas["consultas"] += 1
+        estadisticas["tiempo"] += duracion
+        estadisticas["sentencias"][sql] = estadisticas["sentencias"].get(sql, 0) + 1
+
+    duracion_ms = duracion * 1000
+    with _lock:
+        datos = _por_sentencia.get(sql)
+        if datos is None and len(_por_sentencia) < _MAX_SENTENCIAS:
+            datos = _por_sentencia[sql] = {"veces": 0, "tiempo": 0.0, "max": 0.0, "filas": 0}
+        if datos is not None:
+            datos["veces"] += 1
+            datos["tiempo"] += duracion
+            datos["max"] = max(datos["max"], duracion)
+            datos["filas"] += max(filas or 0, 0)
+        if duracion_ms >= DB_CONSULTA_LENTA_MS:
+            _lentas.append({"momento": time.time(), "sql": sql, "duracion_ms": round(duracion_ms, 1), "filas": filas})
+
+    if duracion_ms >= DB_CONSULTA_LENTA_MS:
+        logger.warning(f"Consulta lenta ({duracion_ms:.1f} ms, {filas} filas): {sql}")
+
+
+def resumen(limite=50):
+    """Sentencias con más tiempo acumulado, consultas lentas y solicitudes que excedieron el presupuesto"""
+    with _lock:
+        sentencias = sorted(_por_sentencia.items(), key=lambda s: s[1]["tiempo"], reverse=True)[:limite]
+        return {
+            "umbral_lenta_ms": DB_CONSULTA_LENTA_MS,
+            "presupuesto_consultas": DB_PRESUPUESTO_CONSULTAS,
+            "sentencias": [
+                {
+                    "sql": sql,
+                    "veces": d["veces"],
+                    "tiempo_total_ms": round(d["tiempo"] * 1000, 1),
+                    "tiempo_promedio_ms": round(d["tiempo"] * 1000 / d["veces"], 2),
+                    "tiempo_max_ms": round(d["max"] * 1000, 1),
+                    "filas": d["filas"],
+                }
+                for sql, d in sentencias
+            ],
+            "lentas": list(reversed(_lentas)),
+            "excedidas": list(reversed(_excedidas)),
+        }
+
+
+def reiniciar():
+    with _lock:
+        _por_sentencia.clear()
+        _lentas.clear()
+        _excedidas.clear()
@@ -0,0 +1,218 @@
+# app/importacion.py
+import csv
+import io
+import tempfile
+import logging
+from datetime import datetime
+
+logger = logging.getLogger("app.importacion")
+
+from .normalizacion import normalizar_texto_cache, normalizar_fecha_cache
+from .models import es_puesto_administrativo
+from .constantes import TALLA_POR_DEFINIR
+
+# Columnas del extracto mensual de RH (data.csv) que usamos
+COL_NOMINA = "N. Nómina"
+COL_NOMBRE = "Nombre"
+COL_PDV = "PDV"
+
+# Columnas de la tabla de staging en el orden en que se escriben para COPY
+COLUMNAS_STAGING = [
+    ("numero_nomina", "INTEGER"),
+    ("nombre", "TEXT"),
+    ("sucursal_id", "INTEGER"),
+    ("puesto_hc", "TEXT"),
+    ("puesto_homologado", "TEXT"),
+    ("fecha_ingreso", "DATE"),
+    ("fecha_ingreso_puesto", "DATE"),
+    ("cumpleanos", "TEXT"),
+    ("ubicacion_hc", "TEXT"),
+    ("sexo", "TEXT"),
+    ("email", "TEXT"),
+    ("cemex_id", "TEXT"),
+    ("asesor_rh", "TEXT"),
+    ("prcrt", "TEXT"),
+    ("categoria", "TEXT"),
+    ("area_nom", "TEXT"),
+    ("requiere_playera_administrativa", "BOOLEAN"),
+]
+CAMPOS_STAGING = [nombre for nombre, _ in COLUMNAS_STAGING]
+
+# Columnas que vienen de RH y se sobrescriben al actualizar; talla y talla_administrativa
+# las captura el manager y nunca se tocan
+CAMPOS_RH = [c for c in CAMPOS_STAGING if c not in ("numero_nomina", "requiere_playera_administrativa")]
+
+# Filas en memoria antes de que el buffer de COPY pase a disco
+_BUFFER_MAX_BYTES = 8 * 1024 * 1024
+
+
+class ErrorImportacion(ValueError):
+    """El archivo no tiene el formato esperado"""
+
+
+def _texto(fila, columna):
+    return (fila.get(columna) or "").strip()
+
+
+def _fecha(fila, columna):
+    valor = normalizar_fecha_cache(_texto(fila, columna))
+    if not valor:
+        return None
+    # Validar que realmente sea una fecha; normalizar_fecha devuelve el texto original si no la reconoce
+    datetime.strptime(valor, "%Y-%m-%d")
+    return valor
+
+
+def normalizar_fila(fila, sucursales_por_pdv):
+    """
+    Convierte una fila del CSV de RH en los valores de la tabla de staging.
+    Lanza ValueError con el motivo si la fila debe rechazarse.
+    """
+    nomina = _texto(fila, COL_NOMINA)
+    if not nomina:
+        raise ValueError("Número de nómina vacío")
+    try:
+        numero_nomina = int(nomina)
+    except ValueError:
+        raise ValueError(f"Número de nómina inválido: {nomina}")
+
+    nombre = normalizar_texto_cache(_texto(fila, COL_NOMBRE))
+    if not nombre:
+        raise ValueError("Nombre vacío")
+
+    pdv = _texto(fila, COL_PDV).upper()
+    sucursal_id = sucursales_por_pdv.get(pdv)
+    if sucursal_id is None:
+        raise ValueError(f"PDV sin sucursal registrada: {pdv or '(vacío)'}")
+
+    try:
+        fecha_ingreso = _fecha(fila, "Fing")
+        fecha_ingreso_puesto = _fecha(fila, "Fingpto")
+    except ValueError:
+        raise ValueError(f"Fecha inválida: {_texto(fila, 'Fing')} / {_texto(fila, 'Fingpto')}")
+
+    puesto_homologado = normalizar_texto_cache(_texto(fila, "Puesto Homologado"))
+
+    return [
+        numero_nomina,
+        nombre,
+        sucursal_id,
+        normalizar_texto_cache(_texto(fila, "Puesto HC")),
+        puesto_homologado,
+        fecha_ingreso,
+        fecha_ingreso_puesto,
+        _texto(fila, "Cumpleaños"),
+        normalizar_texto_cache(_texto(fila, "Ubicación HC")),
+        _texto(fila, "Sexo").upper(),
+        _texto(fila, "Email"),
+        _texto(fila, "CemexID"),
+        normalizar_texto_cache(_texto(fila, "ASESORRH")),
+        _texto(fila, "PRCRT"),
+        normalizar_texto_cache(_texto(fila, "Categoría")),
+        normalizar_texto_cache(_texto(fila, "Areanom")),
+        es_puesto_administrativo(puesto_homologado),
+    ]
+
+
+def _sucursales_por_pdv(cursor):
+    cursor.execute("SELECT id, pdv FROM sucursales WHERE pdv IS NOT NULL")
+    return {fila["pdv"].strip().upper(): fila["id"] for fila in cursor.fetchall()}
+
+
+def importar_empleados_csv(db, archivo_binario, encoding="latin-1"):
+    """
+    Importa el extracto de RH leyendo el archivo en streaming.
+
+    Los textos se normalizan con memo (los valores de zona, puesto, asesor, etc. se repiten mucho).
+    Las filas válidas se escriben en un buffer CSV, se cargan con COPY a una tabla
+    temporal y se fusionan con empleados en dos sentencias (UPDATE por número de
+    nómina e INSERT de los nuevos) con la tabla bloqueada, todo en una sola transacción.
+    Retorna los conteos y la lista de filas rechazadas con su motivo.
+    """
+    cursor = db.cursor()
+    sucursales_por_pdv = _sucursales_por_pdv(cursor)
+
+    texto = io.TextIOWrapper(archivo_binario, encoding=encoding, newline="")
+    lector = csv.DictReader(texto)
+    if not lector.fieldnames or COL_NOMINA not in lector.fieldnames or COL_PDV not in lector.fieldnames:
+        raise ErrorImportacion(
+            f"El archivo no tiene las columnas esperadas ({COL_NOMINA}, {COL_NOMBRE}, {COL_PDV}...); "
+            f"verifique la codificación ({encoding})"
+        )
+
+    rechazos = []
+    filas_validas = {}  # numero_nomina -> (numero de fila, valores); la última aparición gana
+    procesadas = 0
+
+    # La fila 1 es el encabezado
+    for numero_fila, fila in enumerate(lector, start=2):
+        procesadas += 1
+        try:
+            valores = normalizar_fila(fila, sucursales_por_pdv)
+        except ValueError as e:
+            rechazos.append({"fila": numero_fila, "nomina": _texto(fila, COL_NOMINA), "motivo": str(e)})
+            continue
+
+        anterior = filas_validas.get(valores[0])
+        if anterior is not None:
+            rechazos.append({
+                "fila": anterior[0],
+                "nomina": str(valores[0]),
+                "motivo": f"Duplicado, se usó la fila {numero_fila}"
+            })
+        filas_validas[valores[0]] = (numero_fila, valores)
+
+    with tempfile.SpooledTemporaryFile(max_size=_BUFFER_MAX_BYTES, mode="w+", newline="") as buffer:
+        escritor = csv.writer(buffer)
+        for _, valores in filas_validas.values():
+            escritor.writerow(valores)
+        buffer.seek(0)
+
+        definicion = ", ".join(f"{nombre} {tipo}" for nombre, tipo in COLUMNAS_STAGING)
+        cursor.execute(f"CREATE TEMP TABLE empleados_staging ({definicion}) ON COMMIT DROP")
+        cursor.copy_expert(
+            f"COPY empleados_staging ({', '.join(CAMPOS_STAGING)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    cursor.execute("ANALYZE empleados_staging")
+
+    # Dos importaciones simultáneas insertarían la misma nómina (el índice de numero_nomina
+    # no es único): el merge se serializa. El modo no se bloquea con las lecturas, solo
+    # con otras escrituras a empleados, y se libera con el commit
+    cursor.execute("LOCK TABLE empleados IN SHARE ROW EXCLUSIVE MODE")
+
+    asignaciones = ", ".join(f"{campo} = s.{campo}" for campo in CAMPOS_RH)
+    cursor.execute(f"""
+        UPDATE empleados e
+        SET {asignaciones},
+            requiere_playera_administrativa =
+                COALESCE(e.requiere_playera_administrativa, false) OR s.requiere_playera_administrativa
+        FROM empleados_staging s
+        WHERE e.numero_nomina = s.numero_nomina
+    """)
+    actualizadas = cursor.rowcount
+
+    columnas = ", ".join(CAMPOS_STAGING)
+    columnas_s = ", ".join(f"s.{campo}" for campo in CAMPOS_STAGING)
+    cursor.execute(f"""
+        INSERT INTO empleados ({columnas}, talla, talla_administrativa)
+        SELECT {columnas_s}, %s,
+               CASE WHEN s.requiere_playera_administrativa THEN %s END
+        FROM empleados_staging s
+        WHERE NOT EXISTS (SELECT 1 FROM empleados e WHERE e.numero_nomina = s.numero_nomina)
+    """, (TALLA_POR_DEFINIR, TALLA_POR_DEFINIR))
+    insertadas = cursor.rowcount
+
+    db.commit()
+    logger.info(
+        f"Importación terminada: {procesadas} filas, {insertadas} insertadas, "
+        f"{actualizadas} actualizadas, {len(rechazos)} rechazadas"
+    )
+
+    return {
+        "procesadas": procesadas,
+        "insertadas": insertadas,
+        "actualizadas": actualizadas,
+        "rechazadas": len(rechazos),
+        "rechazos": sorted(rechazos, key=lambda r: r["fila"]),
+    }
@@ -7,28 +7,31 @@ from pathlib import Path
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import os
-from passlib.context import CryptContext
 import logging 
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 import dotenv
 
 # Cargar variables de entorno
 dotenv.load_dotenv()
 
-# Configurar el logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()  
-    ]
-)
+from .registro import configurar_logging, detener_logging, MiddlewareRegistro
+from .metricas import MiddlewareMetricas, exportar as exportar_metricas
+from . import diagnostico_db, cache_sucursales
+
+# Configurar el logging: los registros se escriben desde un hilo aparte (ver app/registro.py)
+configurar_logging()
 
 logger = logging.getLogger("app")
 
-from .database import init_db, get_db
-from .routes import sucursales, empleados, usuarios, reportes
+from .database import init_db, get_db, cerrar_pool, estadisticas_pool
+from .trabajos import cerrar_trabajos
+from .storage import cerrar_subidas
+from .contrasenas import cerrar_hash, estadisticas_hash
+from .sesiones import verificar_configuracion, requiere_monitoreo
+from .motor_etiquetas import cerrar_etiquetas
+from . import almacen_reportes
+from .routes import sucursales, empleados, usuarios, reportes, estadisticas
 
 
 app = FastAPI(title="API Uniformes Promexma")
@@ -50,29 +53,6 @@ async def validation_exception_handler(request, exc):
         content={"detail": errors_detail},
     )
 
-@app.middleware("http")
-async def log_requests(request, call_next):
-    logger.debug(f"Solicitud entrante: {request.method} {request.url}")
-    
-    # Intentar obtener y loguear el cuerpo de la solicitud para depuración
-    try:
-        body = await request.body()
-        if body:
-            body_str = body.decode()
-            # No logueamos contraseñas completas
-            if "password" in body_str:
-                body_str = "[CONTENIDO SENSIBLE OCULTO]"
-            logger.debug(f"Cuerpo de la solicitud: {body_str}")
-            # Necesitamos reestablecer el cuerpo para que FastAPI pueda acceder a él
-            request._body = body
-    except Exception as e:
-        logger.error(f"Error al procesar cuerpo de la solicitud: {str(e)}")
-
-    response = await call_next(request)
-    
-    logger.debug(f"Respuesta: {response.status_code}")
-    return response
-
 origins = [
     "https://uniformes-promexma.vercel.app",
     "http://localhost:5173",
@@ -90,30 +70,78 @@ app.add_middleware(
     max_age=86400,  # Añadir esto (tiempo de caché en segundos)
 )
 
+# Se agregan al final para que sean los middlewares más externos y midan la solicitud completa
+app.add_middleware(MiddlewareMetricas)
+app.add_middleware(MiddlewareRegistro)
+
 
 # Incluir rutas
 app.include_router(sucursales.router)
 app.include_router(empleados.router)
 app.include_router(usuarios.router)
 app.include_router(reportes.router)
-
-# Crear carpeta para reportes si no existe
-REPORTS_DIR = Path(__file__).parent.parent / "reportes"
-os.makedirs(REPORTS_DIR, exist_ok=True)
-
+app.include_router(estadisticas.router)
 
 @app.get("/test-cors")
 def test_cors():
     return {"message": "CORS is working!"}
 
 
+# Métricas y estado interno: solo con MONITOREO_TOKEN o sesión de administrador
+@app.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(requiere_monitoreo)])
+def metricas():
+    """Métricas de este worker en formato de texto de Prometheus"""
+    return PlainTextResponse(exportar_metricas(), media_type="text/plain; version=0.0.4")
+
+
+if diagnostico_db.DEBUG_HABILITADO:
+    # Solo fuera de producción (ENTORNO): expone el texto de las consultas
+    @app.get("/debug/consultas")
+    def debug_consultas(limite: int = 50, reiniciar: bool = False):
+        """Sentencias con más tiempo acumulado, consultas lentas y solicitudes sobre el presupuesto"""
+        resumen = diagnostico_db.resumen(limite)
+        if reiniciar:
+            diagnostico_db.reiniciar()
+        return resumen
+
+
+@app.get("/db/pool", dependencies=[Depends(requiere_monitoreo)])
+def estado_pool():
+    """Estadísticas del pool de conexiones de este worker"""
+    return estadisticas_pool()
+
+
+@app.get("/cache/sucursales", dependencies=[Depends(requiere_monitoreo)])
+def estado_cache_sucursales():
+    """Filas, versión y aciertos de la copia en memoria de sucursales de este worker"""
+    return cache_sucursales.estadisticas()
+
+
+@app.get("/hash/estado", dependencies=[Depends(requiere_monitoreo)])
+def estado_hash():
+    """Ocupación del pool de hashing de contraseñas de este worker"""
+    return estadisticas_hash()
+
+
 # Inicializar la base de datos al inicio
 @app.on_event("startup")
 def startup():
     logger.info("Iniciando aplicación y verificando conexión a Supabase")
+    verificar_configuracion()
     init_db()
+    # Indexar los reportes existentes y aplicar la retención
+    almacen_reportes.purgar()
     logger.info("Aplicación iniciada correctamente")
 
+@app.on_event("shutdown")
+def shutdown():
+    cerrar_trabajos()
+    cerrar_subidas()
+    cerrar_hash()
+    cerrar_etiquetas()
+    cerrar_pool()
+    detener_logging()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
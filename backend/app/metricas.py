@@ -0,0 +1,193 @@
+# app/metricas.py
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from .diagnostico_db import iniciar_solicitud, terminar_solicitud
+
+# Las métricas son por proceso: con varios workers cada uno expone las suyas
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BUCKETS_BYTES = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BUCKETS_FASES = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Primer segmento de la ruta que se usa como etiqueta; el resto cae en "otros"
+ROUTERS = {"sucursales", "empleados", "usuarios", "reportes", "estadisticas"}
+
+_registro = []
+
+
+def _etiquetas_texto(nombres, valores, extra=""):
+    partes = [f'{n}="{str(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+        _registro.append(self)
+
+    def _clave(self, etiquetas):
+        return tuple(etiquetas.get(n, "") for n in self.etiquetas)
+
+    def exportar(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        with self._lock:
+            for clave, valor in sorted(self._valores.items()):
+                lineas.append(f"{self.nombre}{_etiquetas_texto(self.etiquetas, clave)} {valor}")
+        return lineas
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def inc(self, valor=1, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+
+class Medidor(_Metrica):
+    tipo = "gauge"
+
+    def inc(self, valor=1, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def dec(self, valor=1, **etiquetas):
+        self.inc(-valor, **etiquetas)
+
+    def set(self, valor, **etiquetas):
+        with self._lock:
+            self._valores[self._clave(etiquetas)] = valor
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(buckets)
+
+    def observar(self, valor, **etiquetas):
+        clave = self._clave(etiquetas)
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._valores.get(clave)
+            if serie is None:
+                # Conteos por bucket (no acumulados) + suma + total
+                serie = self._valores[clave] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exportar(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        with self._lock:
+            series = sorted((clave, ([*s[0]], s[1], s[2])) for clave, s in self._valores.items())
+        for clave, (conteos, suma, total) in series:
+            acumulado = 0
+            for limite, conteo in zip(self.buckets, conteos):
+                acumulado += conteo
+                etiquetas = _etiquetas_texto(self.etiquetas, clave, f'le="{limite}"')
+                lineas.append(f"{self.nombre}_bucket{etiquetas} {acumulado}")
+            etiquetas = _etiquetas_texto(self.etiquetas, clave, 'le="+Inf"')
+            lineas.append(f"{self.nombre}_bucket{etiquetas} {total}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas_texto(self.etiquetas, clave)} {suma}")
+            lineas.append(f"{self.nombre}_count{_etiquetas_texto(self.etiquetas, clave)} {total}")
+        return lineas
+
+
+def exportar():
+    """Todas las métricas en el formato de texto de Prometheus"""
+    lineas = []
+    for metrica in _registro:
+        lineas.extend(metrica.exportar())
+    return "\n".join(lineas) + "\n"
+
+
+SOLICITUDES = Contador(
+    "http_solicitudes_total", "Solicitudes atendidas", ("router", "method", "status"))
+DURACION = Histograma(
+    "http_duracion_segundos", "Duración de las solicitudes", ("router",))
+EN_CURSO = Medidor(
+    "http_solicitudes_en_curso", "Solicitudes en proceso")
+TAMANO_RESPUESTA = Histograma(
+    "http_respuesta_bytes", "Tamaño del cuerpo de las respuestas", ("router",), BUCKETS_BYTES)
+CONSULTAS_POR_SOLICITUD = Histograma(
+    "db_consultas_por_solicitud", "Consultas SQL ejecutadas por solicitud", ("router",), BUCKETS_CONSULTAS)
+TIEMPO_DB_POR_SOLICITUD = Histograma(
+    "db_tiempo_por_solicitud_segundos", "Tiempo en la base de datos por solicitud", ("router",))
+CONSULTAS = Histograma(
+    "db_consulta_segundos", "Duración de cada consulta SQL (incluye trabajos en segundo plano)")
+FASES_REPORTE = Histograma(
+    "reporte_fase_segundos", "Duración de cada fase de la construcción de reportes", ("tipo", "fase"), BUCKETS_FASES)
+
+
+def registrar_consulta(duracion):
+    """Lo llama el cursor de la base de datos después de cada sentencia"""
+    CONSULTAS.observar(duracion)
+
+
+@contextmanager
+def medir_fase(tipo, fase):
+    """Mide la duración de una fase de construcción de un reporte"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        FASES_REPORTE.observar(time.perf_counter() - inicio, tipo=tipo, fase=fase)
+
+
+def router_de(path):
+    segmento = path.split("/", 2)[1] if path.count("/") else ""
+    return segmento if segmento in ROUTERS else "otros"
+
+
+class MiddlewareMetricas:
+    """Middleware ASGI que mide cada solicitud por router y sus consultas a la base de datos"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        router = router_de(scope["path"])
+        estado = {"status": 500, "bytes": 0}
+        # Los handlers síncronos corren en el threadpool con una copia del contexto,
+        # pero comparten el mismo diccionario de estadísticas
+        token, estadisticas = iniciar_solicitud()
+
+        async def send_con_medicion(mensaje):
+            if mensaje["type"] == "http.response.start":
+                estado["status"] = mensaje["status"]
+            elif mensaje["type"] == "http.response.body":
+                estado["bytes"] += len(mensaje.get("body", b""))
+            await send(mensaje)
+
+        EN_CURSO.inc()
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_con_medicion)
+        finally:
+            duracion = time.perf_counter() - inicio
+            EN_CURSO.dec()
+            terminar_solicitud(token, scope["method"], scope["path"])
+            SOLICITUDES.inc(router=router, method=scope["method"], status=estado["status"])
+            DURACION.observar(duracion, router=router)
+            TAMANO_RESPUESTA.observar(estado["bytes"], router=router)
+            CONSULTAS_POR_SOLICITUD.observar(estadisticas["consultas"], router=router)
+            TIEMPO_DB_POR_SOLICITUD.observar(estadisticas["tiempo"], router=router)
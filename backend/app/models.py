@@ -1,9 +1,37 @@
 # app/models.py
 from pydantic import BaseModel, validator, field_validator
-from typing import Optional, Union, Any
+from typing import Optional, Union, Any, List
 from datetime import date, datetime
 
 
+# Lista de puestos que requieren playera administrativa
+PUESTOS_ADMINISTRATIVOS = [
+    'gerente de tienda',
+    'vendedor de calle',
+    'jefe de tienda',
+    'vendedor mostrador',
+    'jefe de tienda sr.'
+]
+
+def es_puesto_administrativo(puesto):
+    """Indica si un puesto homologado requiere playera administrativa"""
+    if not puesto:
+        return False
+    
+    # Verificar el puesto homologado de manera insensible a mayúsculas/minúsculas
+    puesto_lower = puesto.lower()
+    
+    # Verificar coincidencias exactas
+    if puesto_lower in PUESTOS_ADMINISTRATIVOS:
+        return True
+    
+    # Verificar coincidencias parciales (por si hay variaciones)
+    return ('gerente' in puesto_lower and 'tienda' in puesto_lower) or \
+           ('vendedor' in puesto_lower and 'calle' in puesto_lower) or \
+           ('jefe' in puesto_lower and 'tienda' in puesto_lower) or \
+           ('vendedor' in puesto_lower and 'mostrador' in puesto_lower)
+
+
 class MensajeRespuesta(BaseModel):
     message: str
 
@@ -42,29 +70,8 @@ class EmpleadoBase(BaseModel):
     
     @field_validator('puesto_homologado')
     def validar_puesto_homologado(cls, v, info):
-        # Lista de puestos que requieren playera administrativa
-        puestos_administrativos = [
-            'gerente de tienda',
-            'vendedor de calle',
-            'jefe de tienda',
-            'vendedor mostrador',
-            'jefe de tienda sr.'
-        ]
-        
-        # Verificar el puesto homologado de manera insensible a mayúsculas/minúsculas
-        if v:
-            puesto_lower = v.lower()
-            
-            # Verificar coincidencias exactas
-            if puesto_lower in puestos_administrativos:
-                info.data['requiere_playera_administrativa'] = True
-            
-            # Verificar coincidencias parciales (por si hay variaciones)
-            elif ('gerente' in puesto_lower and 'tienda' in puesto_lower) or \
-                 ('vendedor' in puesto_lower and 'calle' in puesto_lower) or \
-                 ('jefe' in puesto_lower and 'tienda' in puesto_lower) or \
-                 ('vendedor' in puesto_lower and 'mostrador' in puesto_lower):
-                info.data['requiere_playera_administrativa'] = True
+        if v and es_puesto_administrativo(v):
+            info.data['requiere_playera_administrativa'] = True
         
         return v
     
@@ -85,6 +92,17 @@ class Empleado(EmpleadoBase):
     class Config:
         orm_mode = True
 
+class TallaActualizacion(BaseModel):
+    """Cambio parcial de tallas: los campos omitidos conservan su valor"""
+    talla: Optional[str] = None
+    talla_administrativa: Optional[str] = None
+
+class TallaLoteItem(TallaActualizacion):
+    id: int
+
+class TallaLote(BaseModel):
+    items: List[TallaLoteItem]
+
 class SucursalBase(BaseModel):
     nombre: str
     manager: str
@@ -113,6 +131,24 @@ class SucursalUpdate(BaseModel):
     numero_seguimiento: Optional[str] = None
 
 
+class EnvioSucursalItem(BaseModel):
+    id: int
+    is_empaquetado: Optional[bool] = None
+    numero_seguimiento: Optional[str] = None
+
+class EnvioLote(BaseModel):
+    """
+    Estado de envío para varias sucursales: las de `items` (con valores propios opcionales)
+    o, si no hay items, todas las de la zona/región indicada. Los valores generales se aplican
+    a las sucursales cuyo item no trae el suyo.
+    """
+    items: List[EnvioSucursalItem] = []
+    zona: Optional[str] = None
+    region: Optional[str] = None
+    is_empaquetado: Optional[bool] = None
+    numero_seguimiento: Optional[str] = None
+
+
 class SucursalCreate(SucursalBase):
     pass
 
@@ -0,0 +1,266 @@
+# app/motor_etiquetas.py
+import os
+import math
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger("app.motor_etiquetas")
+
+from .constantes import TALLAS, TALLA_POR_DEFINIR
+from .pdf_streaming import Lienzo, dividir_texto, generar_pdf
+
+# Playeras de seguridad por empleado y capacidad de cada caja (misma regla que el frontend)
+PLAYERAS_OPERATIVO = 3
+PLAYERAS_ADMINISTRATIVO = 1
+PLAYERAS_POR_CAJA = 12
+
+# Etiquetas de 105 x 148.5 mm, 2 x 2 por hoja A4
+ETIQUETAS_POR_FILA = 2
+ETIQUETAS_POR_COLUMNA = 2
+ETIQUETAS_POR_PAGINA = ETIQUETAS_POR_FILA * ETIQUETAS_POR_COLUMNA
+ANCHO_ETIQUETA = 210 / ETIQUETAS_POR_FILA
+ALTO_ETIQUETA = 297 / ETIQUETAS_POR_COLUMNA
+
+REMITENTE = (
+    "Rodrigo Isai Reyna R.",
+    "Constitución 444 pte Col Centro, Monterrey, NL",
+    "CP 64000  Tel: 8126220306",
+)
+
+# Procesos para dibujar rangos de páginas en paralelo; con 0 se dibujan en el hilo de la
+# solicitud salvo que se pida paralelo=True (entonces uno por núcleo)
+ETIQUETAS_PROCESOS = int(os.environ.get("ETIQUETAS_PROCESOS", "0"))
+# Páginas que dibuja cada tarea cuando se usan procesos
+ETIQUETAS_PAGINAS_POR_TAREA = int(os.environ.get("ETIQUETAS_PAGINAS_POR_TAREA", "25"))
+
+_executor = None
+_lock = threading.Lock()
+
+
+def consultar_envios(cursor, ids=None, zona=None, region=None, empaquetado=None):
+    """
+    Sucursales a etiquetar con el resumen de playeras de seguridad por talla, leído de conteo_tallas.
+    Retorna una lista de dicts con los datos de la sucursal, `empleados`, `playeras` y `tallas`.
+    """
+    condiciones = []
+    valores = []
+    if ids:
+        condiciones.append("s.id = ANY(%s)")
+        valores.append(list(ids))
+    if zona is not None:
+        condiciones.append("s.zona = %s")
+        valores.append(zona)
+    if region is not None:
+        condiciones.append("s.region = %s")
+        valores.append(region)
+    if empaquetado is not None:
+        condiciones.append("COALESCE(s.is_empaquetado, false) = %s")
+        valores.append(empaquetado)
+    filtro = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+    cursor.execute(f"""
+        SELECT id, nombre, manager, direccion, telefono, numero_seguimiento
+        FROM sucursales s
+        {filtro}
+        ORDER BY s.id
+    """, valores)
+    sucursales = {fila["id"]: {**fila, "empleados": 0, "playeras": 0, "tallas": {}} for fila in cursor.fetchall()}
+    if not sucursales:
+        return []
+
+    # conteo_tallas (migración 005) ya tiene los empleados agrupados por sucursal y talla
+    cursor.execute("""
+        SELECT sucursal_id, talla,
+               SUM(cantidad) AS empleados,
+               SUM(cantidad * CASE WHEN administrativa THEN %s ELSE %s END) AS playeras
+        FROM conteo_tallas
+        WHERE sucursal_id = ANY(%s)
+        GROUP BY sucursal_id, talla
+    """, (PLAYERAS_ADMINISTRATIVO, PLAYERAS_OPERATIVO, list(sucursales)))
+    for fila in cursor.fetchall():
+        sucursal = sucursales[fila["sucursal_id"]]
+        sucursal["empleados"] += int(fila["empleados"])
+        # Sin talla definida no se envían playeras
+        if fila["talla"] and fila["talla"] != TALLA_POR_DEFINIR:
+            sucursal["playeras"] += int(fila["playeras"])
+            sucursal["tallas"][fila["talla"]] = sucursal["tallas"].get(fila["talla"], 0) + int(fila["playeras"])
+
+    for sucursal in sucursales.values():
+        orden = {talla: i for i, talla in enumerate(TALLAS)}
+        sucursal["tallas"] = dict(sorted(sucursal["tallas"].items(), key=lambda t: orden.get(t[0], len(orden))))
+    return list(sucursales.values())
+
+
+def playeras_seguridad(cantidad, administrativa):
+    """Playeras de seguridad que se envían para `cantidad` empleados con talla definida"""
+    return cantidad * (PLAYERAS_ADMINISTRATIVO if administrativa else PLAYERAS_OPERATIVO)
+
+
+def cajas(playeras):
+    """Cajas necesarias para un envío; una sucursal sin playeras recibe igual una caja"""
+    return math.ceil(playeras / PLAYERAS_POR_CAJA) or 1
+
+
+def etiquetas(envios):
+    """Una etiqueta por caja: (sucursal, número de caja, total de cajas, playeras en la caja)"""
+    for sucursal in envios:
+        total_cajas = cajas(sucursal["playeras"])
+        for caja in range(1, total_cajas + 1):
+            if caja < total_cajas:
+                en_caja = PLAYERAS_POR_CAJA
+            else:
+                en_caja = sucursal["playeras"] - (total_cajas - 1) * PLAYERAS_POR_CAJA
+            yield sucursal, caja, total_cajas, en_caja
+
+
+def dibujar_etiqueta(lienzo, etiqueta, x, y, contenido=True):
+    """Dibuja una etiqueta con el mismo diseño que el generador del frontend"""
+    sucursal, caja, total_cajas, en_caja = etiqueta
+    ancho, alto = ANCHO_ETIQUETA, ALTO_ETIQUETA
+    izquierda = x + 5
+    derecha = x + ancho - 5
+    disponible = ancho - 10
+
+    actual = y + 10
+    lienzo.texto(x + ancho / 2, actual, "ETIQUETA DE ENVÍO", 16, negrita=True, alinear="centro")
+    actual += 8
+    if total_cajas > 1:
+        lienzo.texto(x + ancho / 2, actual + 3, f"CAJA {caja}/{total_cajas}", 14, negrita=True, alinear="centro")
+        actual += 10
+    lienzo.linea(izquierda, actual, derecha, actual, 0.8)
+    actual += 6
+
+    # Destinatario
+    lienzo.texto(izquierda, actual, "DESTINATARIO:", 12, negrita=True)
+    actual += 5
+    lienzo.texto(izquierda, actual, sucursal["nombre"] or "Sucursal", 16, negrita=True)
+    actual += 5
+    if sucursal["manager"]:
+        lienzo.texto(izquierda, actual, sucursal["manager"], 12)
+        actual += 5
+    direccion = sucursal["direccion"] or "Dirección no especificada"
+    for linea in dividir_texto(direccion, disponible, 12)[:3]:
+        lienzo.texto(izquierda, actual, linea, 12)
+        actual += 5
+    if sucursal["telefono"]:
+        lienzo.texto(izquierda, actual, f"Tel: {sucursal['telefono']}", 10, negrita=True)
+        actual += 6
+    lienzo.linea(izquierda, actual, derecha, actual, 0.5)
+    actual += 5
+
+    # Remitente
+    lienzo.texto(izquierda, actual, "REMITENTE:", 12, negrita=True)
+    actual += 5
+    lienzo.texto(izquierda, actual, REMITENTE[0], 11, negrita=True)
+    actual += 4
+    lienzo.texto(izquierda, actual, REMITENTE[1], 9)
+    actual += 4
+    lienzo.texto(izquierda, actual, REMITENTE[2], 9)
+    actual += 8
+
+    # Contenido, solo si queda espacio
+    if contenido and sucursal["empleados"] > 0 and (y + alto - 20) - actual > 25:
+        lienzo.linea(izquierda, actual, derecha, actual, 0.5)
+        actual += 5
+        lienzo.texto(izquierda, actual, "CONTENIDO:", 12, negrita=True)
+        actual += 7
+        partes = [f"Empleados: {sucursal['empleados']}"]
+        if total_cajas > 1:
+            partes += [f"Playeras: {en_caja}", f"(Total: {sucursal['playeras']})"]
+        elif sucursal["playeras"] > 0:
+            partes.append(f"Playeras: {sucursal['playeras']}")
+        lienzo.texto(izquierda, actual, " • ".join(partes), 12)
+        actual += 7
+
+        # El desglose por talla va solo en la primera caja
+        if sucursal["tallas"] and caja == 1:
+            lienzo.texto(izquierda, actual, "TALLAS:", 12, negrita=True)
+            actual += 8
+            ancho_columna = 20
+            maximo_columnas = int(disponible // ancho_columna) - 1
+            lienzo.rectangulo(izquierda + 2, actual - 4, disponible - 4, 14, 0.3, relleno=0.97)
+            columna_x = izquierda + 5
+            for i, (talla, cantidad) in enumerate(sucursal["tallas"].items()):
+                if i > 0 and i % maximo_columnas == 0:
+                    actual += 6
+                    columna_x = izquierda + 5
+                    # Máximo 2 filas
+                    if i // maximo_columnas >= 2:
+                        break
+                lienzo.texto(columna_x, actual, talla, 11, negrita=True)
+                lienzo.texto(columna_x + 8, actual, f"({cantidad})", 11)
+                columna_x += ancho_columna
+
+    if sucursal["numero_seguimiento"]:
+        seguimiento_y = y + alto - 12
+        lienzo.linea(izquierda, seguimiento_y - 4, derecha, seguimiento_y - 4, 0.5)
+        lienzo.texto(x + ancho / 2, seguimiento_y, f"SEGUIMIENTO: {sucursal['numero_seguimiento']}",
+                     11, negrita=True, alinear="centro")
+
+    margen = 2
+    lienzo.rectangulo(x + margen, y + margen, ancho - 2 * margen, alto - 2 * margen, 1)
+
+
+def _paginas_de(lista_etiquetas):
+    for inicio in range(0, len(lista_etiquetas), ETIQUETAS_POR_PAGINA):
+        yield lista_etiquetas[inicio:inicio + ETIQUETAS_POR_PAGINA]
+
+
+def dibujar_paginas(paginas, contenido=True):
+    """Flujos de contenido (comprimidos) de una lista de páginas de hasta 4 etiquetas"""
+    resultado = []
+    for pagina in paginas:
+        lienzo = Lienzo()
+        for posicion, etiqueta in enumerate(pagina):
+            fila, columna = divmod(posicion, ETIQUETAS_POR_FILA)
+            dibujar_etiqueta(lienzo, etiqueta, columna * ANCHO_ETIQUETA, fila * ALTO_ETIQUETA, contenido)
+        resultado.append(lienzo.contenido())
+    return resultado
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            # Con fork los hijos heredarían del worker los hilos, el pool de conexiones y los
+            # locks tomados en ese instante; forkserver (o spawn donde no existe) arranca limpio
+            metodo = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _executor = ProcessPoolExecutor(
+                max_workers=ETIQUETAS_PROCESOS or os.cpu_count(),
+                mp_context=multiprocessing.get_context(metodo)
+            )
+        return _executor
+
+
+def _flujos(paginas, contenido, paralelo):
+    if not paralelo:
+        for pagina in paginas:
+            yield from dibujar_paginas([pagina], contenido)
+        return
+
+    # Rangos de páginas en paralelo; map entrega los resultados en orden
+    rangos = [paginas[i:i + ETIQUETAS_PAGINAS_POR_TAREA] for i in range(0, len(paginas), ETIQUETAS_PAGINAS_POR_TAREA)]
+    for flujos in _get_executor().map(dibujar_paginas, rangos, [contenido] * len(rangos)):
+        yield from flujos
+
+
+def generar_etiquetas_pdf(envios, contenido=True, paralelo=None):
+    """
+    Genera el PDF de etiquetas de envío (una por caja, 4 por hoja) y lo entrega por
+    bloques conforme se dibujan las páginas. Con `paralelo` los rangos de páginas se
+    dibujan en el pool de procesos; por omisión solo si ETIQUETAS_PROCESOS > 0.
+    """
+    paralelo = ETIQUETAS_PROCESOS > 0 if paralelo is None else paralelo
+    paginas = list(_paginas_de(list(etiquetas(envios))))
+    logger.info(f"Generando {len(paginas)} páginas de etiquetas para {len(envios)} sucursales")
+    yield from generar_pdf(_flujos(paginas, contenido, paralelo))
+
+
+def cerrar_etiquetas():
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
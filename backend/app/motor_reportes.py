@@ -0,0 +1,342 @@
+# app/motor_reportes.py
+import os
+import math
+import logging
+from collections import Counter
+import pandas as pd
+
+logger = logging.getLogger("app.motor_reportes")
+
+from .constantes import TALLAS, TALLA_POR_DEFINIR
+from .xlsx_streaming import letra_columna
+
+# Columnas del detalle completo, en el orden en que aparecen en el Excel
+COLUMNAS_DETALLE = [
+    "id", "nombre", "numero_nomina", "puesto_hc", "puesto_homologado", "talla",
+    "talla_administrativa", "requiere_playera_administrativa", "fecha_ingreso",
+    "fecha_ingreso_puesto", "cumpleanos", "ubicacion_hc", "sexo", "email", "cemex_id",
+    "asesor_rh", "prcrt", "categoria", "area_nom", "sucursal", "manager", "zona",
+    "region", "gerencia", "pdv", "ubicacion_pdv",
+]
+COLUMNAS_DETALLE_BASICO = ["id", "nombre", "talla", "sucursal", "manager", "zona", "region"]
+
+# Columnas de los resúmenes por sucursal (mismos nombres que generaban los alias SQL)
+COLUMNAS_TALLA = [talla.lower() for talla in TALLAS] + ["por_definir"]
+
+_ORDEN_TALLA = {talla: i for i, talla in enumerate(TALLAS)}
+
+# Ancho de columna: texto más largo + margen, limitado a un máximo
+ANCHO_MARGEN = 2
+ANCHO_MAXIMO = 50
+# Filas que se miden como máximo por hoja al calcular anchos (0 = todas)
+ANCHOS_MUESTRA = int(os.environ.get("REPORTES_ANCHOS_MUESTRA", "5000"))
+
+# Una sola consulta. El FULL JOIN trae las sucursales sin empleados (id nulo) y los empleados
+# cuyo sucursal_id no existe (sucursal_id nulo): estos solo cuentan en los resúmenes por talla
+# y por puesto, que como antes se calculan sobre toda la tabla empleados
+_CONSULTA_DATOS = """
+    SELECT
+        e.id,
+        e.nombre,
+        e.numero_nomina,
+        e.puesto_hc,
+        e.puesto_homologado,
+        e.talla,
+        e.talla_administrativa,
+        e.requiere_playera_administrativa,
+        e.fecha_ingreso,
+        e.fecha_ingreso_puesto,
+        e.cumpleanos,
+        e.ubicacion_hc,
+        e.sexo,
+        e.email,
+        e.cemex_id,
+        e.asesor_rh,
+        e.prcrt,
+        e.categoria,
+        e.area_nom,
+        s.nombre as sucursal,
+        s.manager,
+        s.zona,
+        s.region,
+        s.gerencia,
+        s.pdv,
+        s.ubicacion_pdv,
+        s.id AS sucursal_id
+    FROM sucursales s
+    FULL JOIN empleados e ON e.sucursal_id = s.id
+    ORDER BY s.nombre, s.id, e.nombre
+"""
+
+
+def consultar_datos(cursor):
+    """
+    Obtiene en un solo recorrido todos los empleados con su sucursal.
+    Retorna (DataFrame de empleados, nombres de sucursal en el orden de la consulta).
+    El DataFrame incluye la columna sucursal_id, nula para empleados sin sucursal existente.
+    """
+    cursor.execute(_CONSULTA_DATOS)
+    filas = cursor.fetchall()
+    empleados = [fila for fila in filas if fila["id"] is not None]
+    # ORDER BY s.nombre: se conserva la intercalación de la base y no la de Python
+    sucursales = list(dict.fromkeys(fila["sucursal"] for fila in filas if fila["sucursal_id"] is not None))
+    logger.debug(f"Obtenidos {len(empleados)} empleados de {len(sucursales)} sucursales")
+    return pd.DataFrame.from_records(empleados, columns=COLUMNAS_DETALLE + ["sucursal_id"]), sucursales
+
+
+def _con_sucursal(df, columnas):
+    """Detalle: como antes, solo los empleados cuya sucursal existe"""
+    return df.loc[df["sucursal_id"].notna(), columnas].reset_index(drop=True)
+
+
+def _categoria(talla):
+    """Versión escalar de _categoria_talla"""
+    if talla in _ORDEN_TALLA:
+        return talla.lower()
+    if talla is None or talla == TALLA_POR_DEFINIR:
+        return "por_definir"
+    return "otra"
+
+
+def _administrativos(df):
+    return df[df["requiere_playera_administrativa"].eq(True)]
+
+
+def _categoria_talla(serie):
+    """Columna de resumen para cada talla: xs..xxxl, por_definir (incluye nulos) u otra"""
+    categoria = serie.str.lower().where(serie.isin(TALLAS), "otra")
+    return categoria.mask(serie.isna() | serie.eq(TALLA_POR_DEFINIR), "por_definir")
+
+
+def resumen_por_talla(df, columna):
+    """Cantidad de empleados por talla, en el orden oficial de tallas (las demás al final)"""
+    conteo = df[columna].value_counts(dropna=False, sort=False).rename_axis(columna).reset_index(name="cantidad")
+    orden = conteo[columna].map(_ORDEN_TALLA).fillna(len(TALLAS))
+    return conteo.iloc[orden.argsort(kind="stable")].reset_index(drop=True)
+
+
+def tallas_por_sucursal(df, columna, sucursales, columna_total="total"):
+    """Tabla sucursal x talla con los conteos de `columna` y el total de empleados por sucursal"""
+    categoria = _categoria_talla(df[columna])
+    conteos = df.groupby([df["sucursal"], categoria]).size()
+    tabla = conteos.unstack(fill_value=0) if len(conteos) else pd.DataFrame()
+    tabla = tabla.reindex(index=sucursales, columns=COLUMNAS_TALLA, fill_value=0)
+    tabla[columna_total] = df.groupby("sucursal").size().reindex(sucursales, fill_value=0)
+    tabla.index.name = "sucursal"
+    return tabla.reset_index()
+
+
+def resumen_por_puesto(df):
+    """Cantidad de empleados por puesto homologado, de mayor a menor"""
+    puestos = df["puesto_homologado"].dropna()
+    return puestos.value_counts().rename_axis("puesto_homologado").reset_index(name="cantidad")
+
+
+def hojas_reporte_basico(df, sucursales):
+    """Hojas del reporte básico (/reportes/excel)"""
+    return {
+        "Detalle": _con_sucursal(df, COLUMNAS_DETALLE_BASICO),
+        "Resumen": resumen_por_talla(df, "talla"),
+        "Por Sucursal": tallas_por_sucursal(df, "talla", sucursales),
+    }
+
+
+def hojas_reporte_completo(df, sucursales):
+    """Hojas del reporte completo (/reportes/supabase/excel)"""
+    administrativos = _administrativos(df)
+    # Como en la consulta original, solo aparecen las sucursales que tienen administrativos
+    con_administrativos = set(administrativos["sucursal"])
+    sucursales_admin = [s for s in sucursales if s in con_administrativos]
+    return {
+        "Detalle Completo": _con_sucursal(df, COLUMNAS_DETALLE),
+        "Resumen Tallas": resumen_por_talla(df, "talla"),
+        "Resumen Tallas Adm": resumen_por_talla(administrativos, "talla_administrativa"),
+        "Tallas Por Sucursal": tallas_por_sucursal(df, "talla", sucursales),
+        "Tallas Adm Por Sucursal": tallas_por_sucursal(
+            administrativos, "talla_administrativa", sucursales_admin, "total_administrativos"
+        ),
+        "Por Puesto": resumen_por_puesto(df),
+    }
+
+
+def _ancho(longitud):
+    return min(longitud + ANCHO_MARGEN, ANCHO_MAXIMO)
+
+
+def anchos_columnas(df, muestra=ANCHOS_MUESTRA):
+    """
+    Ancho de cada columna de `df` según su propio contenido, en una pasada por columna.
+    Si la hoja tiene más de `muestra` filas se miden filas espaciadas uniformemente.
+    """
+    if muestra and len(df) > muestra:
+        df = df.iloc[::math.ceil(len(df) / muestra)]
+    anchos = []
+    for columna in df.columns:
+        valores = df[columna].dropna()
+        largo = int(valores.astype(str).str.len().max()) if len(valores) else 0
+        anchos.append(_ancho(max(largo, len(str(columna)))))
+    return anchos
+
+
+class MedidorAnchos:
+    """Lleva el texto más largo de cada columna mientras se recorren las filas"""
+
+    def __init__(self, columnas):
+        self.maximos = [len(str(columna)) for columna in columnas]
+
+    def observar(self, valores):
+        for i, valor in enumerate(valores):
+            if valor is not None:
+                largo = len(str(valor))
+                if largo > self.maximos[i]:
+                    self.maximos[i] = largo
+
+    def anchos(self):
+        return [_ancho(maximo) for maximo in self.maximos]
+
+
+def escribir_excel(hojas, ruta_archivo, ajustar_anchos=False):
+    """Escribe cada DataFrame de `hojas` en su propia hoja del archivo Excel"""
+    with pd.ExcelWriter(ruta_archivo) as writer:
+        for nombre_hoja, df_hoja in hojas.items():
+            df_hoja.to_excel(writer, sheet_name=nombre_hoja, index=False)
+
+            if ajustar_anchos:
+                # Cada hoja se ajusta con sus propias columnas
+                worksheet = writer.sheets[nombre_hoja]
+                for i, ancho in enumerate(anchos_columnas(df_hoja)):
+                    worksheet.column_dimensions[letra_columna(i)].width = ancho
+
+
+class ResumenIncremental:
+    """
+    Acumula los mismos resúmenes que hojas_reporte_completo fila por fila, para poder
+    generarlos mientras el detalle se transmite sin guardarlo en memoria.
+    Ocupa O(sucursales x tallas), independiente del número de empleados.
+    """
+
+    def __init__(self):
+        self.sucursales = {}  # dict como conjunto ordenado: conserva el ORDER BY de la consulta
+        self.tallas = {}
+        self.tallas_adm = {}
+        self.por_sucursal = {}
+        self.adm_por_sucursal = {}
+        self.puestos = Counter()
+
+    def agregar(self, fila):
+        sucursal = fila["sucursal"]
+        con_sucursal = fila["sucursal_id"] is not None
+        if con_sucursal:
+            self.sucursales.setdefault(sucursal, None)
+        if fila["id"] is None:
+            # Sucursal sin empleados (fila del FULL JOIN)
+            return
+
+        # Los empleados sin sucursal existente cuentan en los resúmenes por talla y por puesto
+        talla = fila["talla"]
+        self.tallas[talla] = self.tallas.get(talla, 0) + 1
+        if con_sucursal:
+            conteo = self.por_sucursal.setdefault(sucursal, Counter())
+            conteo[_categoria(talla)] += 1
+            conteo["total"] += 1
+
+        if fila["requiere_playera_administrativa"] is True:
+            talla_adm = fila["talla_administrativa"]
+            self.tallas_adm[talla_adm] = self.tallas_adm.get(talla_adm, 0) + 1
+            if con_sucursal:
+                conteo_adm = self.adm_por_sucursal.setdefault(sucursal, Counter())
+                conteo_adm[_categoria(talla_adm)] += 1
+                conteo_adm["total"] += 1
+
+        if fila["puesto_homologado"] is not None:
+            self.puestos[fila["puesto_homologado"]] += 1
+
+    # Los métodos filas_* son generadores: solo leen los contadores cuando se iteran,
+    # es decir, después de que el detalle ya se recorrió por completo
+
+    def filas_resumen_tallas(self, administrativas=False):
+        conteos = self.tallas_adm if administrativas else self.tallas
+        for talla in sorted(conteos, key=lambda t: _ORDEN_TALLA.get(t, len(TALLAS))):
+            yield (talla, conteos[talla])
+
+    def filas_por_sucursal(self, administrativas=False):
+        conteos = self.adm_por_sucursal if administrativas else self.por_sucursal
+        # Las sucursales sin administrativos no aparecen en la hoja administrativa
+        sucursales = [s for s in self.sucursales if s in conteos] if administrativas else self.sucursales
+        for sucursal in sucursales:
+            conteo = conteos.get(sucursal, Counter())
+            yield (sucursal, *(conteo[c] for c in COLUMNAS_TALLA), conteo["total"])
+
+    def filas_por_puesto(self):
+        yield from self.puestos.most_common()
+
+
+def _detalle_por_bloques(cursor, primer_bloque, columnas, resumen, tamano_bloque):
+    filas = primer_bloque
+    while filas:
+        for fila in filas:
+            resumen.agregar(fila)
+            if fila["id"] is not None and fila["sucursal_id"] is not None:
+                yield tuple(fila[c] for c in columnas)
+        filas = cursor.fetchmany(tamano_bloque)
+
+
+def _hoja_detalle(nombre, cursor, columnas, resumen, tamano_bloque):
+    """
+    Los anchos van antes de las filas en el XLSX, así que el detalle se mide con su
+    primer bloque (muestra) y el resto se transmite sin medir.
+    """
+    primer_bloque = cursor.fetchmany(tamano_bloque)
+    medidor = MedidorAnchos(columnas)
+    for fila in primer_bloque:
+        if fila["id"] is not None and fila["sucursal_id"] is not None:
+            medidor.observar(fila[c] for c in columnas)
+    filas = _detalle_por_bloques(cursor, primer_bloque, columnas, resumen, tamano_bloque)
+    return (nombre, columnas, filas, medidor.anchos())
+
+
+def _hoja_resumen(nombre, columnas, generar):
+    """
+    Los resúmenes solo están completos después de recorrer el detalle; generar_xlsx
+    llama a la función de anchos justo antes de escribir la hoja, y en ese momento
+    se materializan sus filas (son pocas: una por sucursal, talla o puesto).
+    """
+    filas = []
+
+    def anchos():
+        filas.extend(generar())
+        medidor = MedidorAnchos(columnas)
+        for fila in filas:
+            medidor.observar(fila)
+        return medidor.anchos()
+
+    return (nombre, columnas, filas, anchos)
+
+
+def hojas_streaming(cursor, tipo, tamano_bloque=2000):
+    """
+    Hojas del reporte `tipo` ('excel' o 'completo') para xlsx_streaming.generar_xlsx.
+    `cursor` debe ser un cursor del lado del servidor: el detalle se lee en bloques de
+    `tamano_bloque` filas y los resúmenes se acumulan durante ese mismo recorrido.
+    """
+    cursor.execute(_CONSULTA_DATOS)
+    resumen = ResumenIncremental()
+    columnas_sucursal = ["sucursal"] + COLUMNAS_TALLA
+
+    if tipo == "excel":
+        return [
+            _hoja_detalle("Detalle", cursor, COLUMNAS_DETALLE_BASICO, resumen, tamano_bloque),
+            _hoja_resumen("Resumen", ["talla", "cantidad"], resumen.filas_resumen_tallas),
+            _hoja_resumen("Por Sucursal", columnas_sucursal + ["total"], resumen.filas_por_sucursal),
+        ]
+
+    return [
+        _hoja_detalle("Detalle Completo", cursor, COLUMNAS_DETALLE, resumen, tamano_bloque),
+        _hoja_resumen("Resumen Tallas", ["talla", "cantidad"], resumen.filas_resumen_tallas),
+        _hoja_resumen("Resumen Tallas Adm", ["talla_administrativa", "cantidad"],
+                      lambda: resumen.filas_resumen_tallas(True)),
+        _hoja_resumen("Tallas Por Sucursal", columnas_sucursal + ["total"], resumen.filas_por_sucursal),
+        _hoja_resumen("Tallas Adm Por Sucursal", columnas_sucursal + ["total_administrativos"],
+                      lambda: resumen.filas_por_sucursal(True)),
+        _hoja_resumen("Por Puesto", ["puesto_homologado", "cantidad"], resumen.filas_por_puesto),
+    ]
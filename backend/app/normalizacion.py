@@ -0,0 +1,66 @@
+# app/normalizacion.py
+import os
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+from .database import normalizar_texto, normalizar_fecha
+
+# Los extractos de RH repiten pocas zonas, gerencias, puestos y asesores miles de veces,
+# así que cada valor distinto se normaliza una sola vez
+NORMALIZACION_CACHE = int(os.environ.get("NORMALIZACION_CACHE", "65536"))
+
+
+@lru_cache(maxsize=NORMALIZACION_CACHE)
+def normalizar_texto_cache(texto):
+    """normalizar_texto con memo LRU para valores repetidos"""
+    return normalizar_texto(texto)
+
+
+@lru_cache(maxsize=NORMALIZACION_CACHE)
+def normalizar_fecha_cache(fecha_str):
+    """normalizar_fecha con memo LRU para valores repetidos"""
+    return normalizar_fecha(fecha_str)
+
+
+def _como_serie(valores):
+    if isinstance(valores, pd.Series):
+        return valores
+    # pyarrow.Array / ChunkedArray y similares
+    if hasattr(valores, "to_pandas"):
+        return valores.to_pandas()
+    return pd.Series(valores, dtype=object)
+
+
+def _por_valor_unico(valores, funcion, vacio):
+    """
+    Aplica `funcion` una vez por valor distinto y reconstruye la columna con un take.
+    Los nulos (None/NaN) se convierten en `vacio`, igual que la versión escalar con None.
+    """
+    serie = _como_serie(valores)
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+    # El valor para nulos va al final: el código -1 de factorize lo toma directamente
+    tabla = np.empty(len(unicos) + 1, dtype=object)
+    tabla[:-1] = [funcion(valor) for valor in unicos]
+    tabla[-1] = vacio
+    return pd.Series(tabla[codigos], index=serie.index, name=serie.name, dtype=object)
+
+
+def normalizar_texto_columna(valores):
+    """Versión por columna de normalizar_texto (Series, Arrow o lista); mismo resultado valor por valor"""
+    return _por_valor_unico(valores, normalizar_texto_cache, normalizar_texto(None))
+
+
+def normalizar_fecha_columna(valores):
+    """Versión por columna de normalizar_fecha (Series, Arrow o lista); mismo resultado valor por valor"""
+    return _por_valor_unico(valores, normalizar_fecha_cache, normalizar_fecha(None))
+
+
+def normalizar_dataframe(df, columnas_texto=(), columnas_fecha=()):
+    """Retorna una copia de `df` con las columnas indicadas normalizadas"""
+    df = df.copy()
+    for columna in columnas_texto:
+        df[columna] = normalizar_texto_columna(df[columna])
+    for columna in columnas_fecha:
+        df[columna] = normalizar_fecha_columna(df[columna])
+    return df
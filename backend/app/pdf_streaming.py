@@ -0,0 +1,172 @@
+# app/pdf_streaming.py
+import zlib
+import unicodedata
+
+# Tamaño A4 en puntos y conversión desde milímetros (las coordenadas de Lienzo van en mm)
+ANCHO_A4 = 595.28
+ALTO_A4 = 841.89
+PUNTOS_POR_MM = 72 / 25.4
+
+# Fuentes estándar de PDF: no se incrustan, todos los visores las traen
+FUENTES = {False: ("F1", "Helvetica"), True: ("F2", "Helvetica-Bold")}
+
+# Anchos (milésimas del tamaño de fuente) de los caracteres 32-126 de Helvetica y Helvetica-Bold
+_ANCHOS = {
+    False: [
+        278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+        556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+        1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+        667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+        333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+        556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+    ],
+    True: [
+        278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+        556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+        975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+        667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+        333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+        611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+    ],
+}
+_ANCHO_DEFECTO = 556
+
+
+def _ancho_caracter(caracter, negrita):
+    codigo = ord(caracter)
+    if 32 <= codigo <= 126:
+        return _ANCHOS[negrita][codigo - 32]
+    # Letras acentuadas: el ancho de la letra base
+    base = unicodedata.normalize("NFD", caracter)[0]
+    if base != caracter and 32 <= ord(base) <= 126:
+        return _ANCHOS[negrita][ord(base) - 32]
+    return _ANCHO_DEFECTO
+
+
+def ancho_texto(texto, tamano, negrita=False):
+    """Ancho del texto en milímetros con la fuente y tamaño (puntos) indicados"""
+    milesimas = sum(_ancho_caracter(c, negrita) for c in texto)
+    return milesimas * tamano / 1000 / PUNTOS_POR_MM
+
+
+def dividir_texto(texto, ancho_maximo, tamano, negrita=False):
+    """Parte el texto en líneas que caben en `ancho_maximo` mm, cortando entre palabras"""
+    lineas, actual = [], ""
+    for palabra in texto.split():
+        candidata = f"{actual} {palabra}" if actual else palabra
+        if actual and ancho_texto(candidata, tamano, negrita) > ancho_maximo:
+            lineas.append(actual)
+            actual = palabra
+        else:
+            actual = candidata
+    if actual:
+        lineas.append(actual)
+    return lineas
+
+
+def _cadena(texto):
+    # WinAnsiEncoding ~ cp1252; lo que no cabe se reemplaza por '?'
+    datos = texto.encode("cp1252", "replace")
+    return b"(" + datos.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _num(valor):
+    return f"{valor:.2f}".rstrip("0").rstrip(".")
+
+
+class Lienzo:
+    """
+    Operaciones de dibujo de una página A4. Las coordenadas van en milímetros desde la
+    esquina superior izquierda y la `y` del texto es su línea base, como en jsPDF.
+    """
+
+    def __init__(self):
+        self._ops = []
+
+    def _x(self, x):
+        return _num(x * PUNTOS_POR_MM)
+
+    def _y(self, y):
+        return _num(ALTO_A4 - y * PUNTOS_POR_MM)
+
+    def texto(self, x, y, texto, tamano, negrita=False, alinear="izquierda"):
+        if alinear == "centro":
+            x -= ancho_texto(texto, tamano, negrita) / 2
+        fuente = FUENTES[negrita][0]
+        self._ops.append(
+            b"BT /" + fuente.encode() + f" {_num(tamano)} Tf {self._x(x)} {self._y(y)} Td ".encode()
+            + _cadena(texto) + b" Tj ET"
+        )
+
+    def linea(self, x1, y1, x2, y2, grosor):
+        self._ops.append(
+            f"{_num(grosor * PUNTOS_POR_MM)} w {self._x(x1)} {self._y(y1)} m {self._x(x2)} {self._y(y2)} l S".encode()
+        )
+
+    def rectangulo(self, x, y, ancho, alto, grosor, relleno=None):
+        """`relleno` es un gris entre 0 (negro) y 1 (blanco); sin él solo se dibuja el borde"""
+        rect = f"{self._x(x)} {self._y(y + alto)} {_num(ancho * PUNTOS_POR_MM)} {_num(alto * PUNTOS_POR_MM)} re"
+        if relleno is None:
+            self._ops.append(f"{_num(grosor * PUNTOS_POR_MM)} w {rect} S".encode())
+        else:
+            self._ops.append(f"q {_num(relleno)} g {_num(grosor * PUNTOS_POR_MM)} w {rect} B Q".encode())
+
+    def contenido(self):
+        """Flujo de contenido de la página, comprimido"""
+        return zlib.compress(b"\n".join(self._ops), 6)
+
+
+def generar_pdf(paginas):
+    """
+    Escribe un PDF a partir de los flujos de contenido comprimidos de cada página
+    (Lienzo.contenido()) y entrega los bytes conforme avanza: cada página se emite en
+    cuanto llega, sin tener el documento completo en memoria. El árbol de páginas, la
+    tabla xref y el trailer van al final.
+    """
+    offsets = {}
+    posicion = 0
+
+    def objeto(numero, cuerpo):
+        nonlocal posicion
+        offsets[numero] = posicion
+        datos = f"{numero} 0 obj\n".encode() + cuerpo + b"\nendobj\n"
+        posicion += len(datos)
+        return datos
+
+    # 1: catálogo, 2: árbol de páginas, 3-4: fuentes; las páginas empiezan en 5
+    encabezado = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    posicion = len(encabezado)
+    bloque = [encabezado]
+    for negrita in (False, True):
+        clave, nombre = FUENTES[negrita]
+        bloque.append(objeto(3 + negrita, (
+            f"<< /Type /Font /Subtype /Type1 /BaseFont /{nombre} /Encoding /WinAnsiEncoding >>"
+        ).encode()))
+    yield b"".join(bloque)
+
+    recursos = "<< /Font << /F1 3 0 R /F2 4 0 R >> >>"
+    paginas_ids = []
+    siguiente = 5
+    for contenido in paginas:
+        flujo = objeto(siguiente, f"<< /Length {len(contenido)} /Filter /FlateDecode >>\nstream\n".encode()
+                       + contenido + b"\nendstream")
+        pagina = objeto(siguiente + 1, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {ANCHO_A4} {ALTO_A4}] "
+            f"/Resources {recursos} /Contents {siguiente} 0 R >>"
+        ).encode())
+        paginas_ids.append(siguiente + 1)
+        siguiente += 2
+        yield flujo + pagina
+
+    kids = " ".join(f"{n} 0 R" for n in paginas_ids)
+    final = [
+        objeto(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(paginas_ids)} >>".encode()),
+        objeto(1, b"<< /Type /Catalog /Pages 2 0 R >>"),
+    ]
+    inicio_xref = posicion
+    total = siguiente
+    xref = [f"xref\n0 {total}\n".encode(), b"0000000000 65535 f \n"]
+    for numero in range(1, total):
+        xref.append(f"{offsets[numero]:010d} 00000 n \n".encode())
+    trailer = f"trailer\n<< /Size {total} /Root 1 0 R >>\nstartxref\n{inicio_xref}\n%%EOF\n".encode()
+    yield b"".join(final + xref + [trailer])
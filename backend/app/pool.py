@@ -0,0 +1,220 @@
+# app/pool.py
+import os
+import threading
+import time
+import logging
+from collections import deque
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.extras import RealDictCursor
+
+logger = logging.getLogger("app.pool")
+
+# Configuración del pool (por proceso: con varios workers de uvicorn el total de
+# conexiones abiertas contra Supabase es DB_POOL_MAX * número de workers)
+DB_POOL_MIN = int(os.environ.get("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.environ.get("DB_POOL_MAX", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))  # segundos esperando una conexión libre
+DB_POOL_RECYCLE = float(os.environ.get("DB_POOL_RECYCLE", "1800"))  # edad máxima de una conexión en segundos
+DB_POOL_PING_IDLE = float(os.environ.get("DB_POOL_PING_IDLE", "30"))  # hacer SELECT 1 si estuvo inactiva más de esto
+
+
+class PoolAgotadoError(Exception):
+    """Se agotó el tiempo de espera para obtener una conexión del pool"""
+
+
+class PoolConexiones:
+    """
+    Pool de conexiones PostgreSQL con verificación al entregar, reciclaje de
+    conexiones viejas y estadísticas de uso.
+
+    No usamos psycopg2.pool.ThreadedConnectionPool porque cierra las conexiones
+    libres por encima de `minconn`, hace un reset() en cada devolución y no
+    permite esperar a que se libere una conexión.
+    """
+
+    def __init__(self, dsn, minconn=DB_POOL_MIN, maxconn=DB_POOL_MAX,
+                 timeout=DB_POOL_TIMEOUT, recycle=DB_POOL_RECYCLE, ping_idle=DB_POOL_PING_IDLE,
+                 cursor_factory=RealDictCursor):
+        self.dsn = dsn
+        self.cursor_factory = cursor_factory
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_idle = ping_idle
+
+        self._cond = threading.Condition()
+        self._libres = deque()  # (conn, creada, ultimo_uso); LIFO para reutilizar las conexiones calientes
+        self._creacion = {}  # id(conn) -> momento en que se abrió, para las que están en uso
+        self._abiertas = 0
+        self._cerrado = False
+
+        self._stats = {
+            "checkouts": 0,
+            "esperas": 0,
+            "timeouts": 0,
+            "tiempo_espera_total": 0.0,
+            "creadas": 0,
+            "recicladas": 0,
+            "descartadas": 0,
+            "pings": 0,
+        }
+
+        # Calentar el pool abriendo las conexiones mínimas
+        for _ in range(minconn):
+            conn = self._conectar()
+            ahora = time.monotonic()
+            with self._cond:
+                self._abiertas += 1
+                self._libres.append((conn, ahora, ahora))
+        logger.info(f"Pool de conexiones iniciado (min={minconn}, max={maxconn})")
+
+    def _conectar(self):
+        conn = psycopg2.connect(self.dsn, cursor_factory=self.cursor_factory)
+        with self._cond:
+            self._stats["creadas"] += 1
+        return conn
+
+    def obtener(self):
+        """Obtiene una conexión sana del pool, esperando hasta `timeout` segundos si está lleno"""
+        inicio = time.monotonic()
+        limite = inicio + self.timeout
+        espero = False
+
+        while True:
+            with self._cond:
+                if self._cerrado:
+                    raise PoolAgotadoError("El pool de conexiones está cerrado")
+                while not self._libres and self._abiertas >= self.maxconn:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        self._stats["timeouts"] += 1
+                        logger.warning(f"Timeout esperando conexión del pool ({self.timeout}s)")
+                        raise PoolAgotadoError("No hay conexiones disponibles en el pool")
+                    if not espero:
+                        espero = True
+                        self._stats["esperas"] += 1
+                    self._cond.wait(restante)
+
+                if self._libres:
+                    conn, creada, ultimo_uso = self._libres.pop()
+                else:
+                    # Reservamos el lugar antes de conectar para no pasarnos de maxconn
+                    self._abiertas += 1
+                    conn = None
+
+            if conn is None:
+                try:
+                    conn = self._conectar()
+                except Exception:
+                    self._liberar_lugar()
+                    raise
+                creada = ultimo_uso = time.monotonic()
+            elif not self._esta_sana(conn, creada, ultimo_uso):
+                continue
+
+            with self._cond:
+                self._creacion[id(conn)] = creada
+                self._stats["checkouts"] += 1
+                self._stats["tiempo_espera_total"] += time.monotonic() - inicio
+            return conn
+
+    def _esta_sana(self, conn, creada, ultimo_uso):
+        """Verifica una conexión libre antes de entregarla; si no sirve la cierra y libera su lugar"""
+        ahora = time.monotonic()
+
+        if conn.closed:
+            self._cerrar(conn, "descartadas")
+            return False
+
+        if self.recycle and ahora - creada > self.recycle:
+            logger.debug("Reciclando conexión vieja del pool")
+            self._cerrar(conn, "recicladas")
+            return False
+
+        if self.ping_idle is not None and ahora - ultimo_uso > self.ping_idle:
+            with self._cond:
+                self._stats["pings"] += 1
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
+                conn.rollback()
+            except psycopg2.Error as e:
+                logger.warning(f"Conexión del pool no responde, descartando: {str(e)}")
+                self._cerrar(conn, "descartadas")
+                return False
+
+        return True
+
+    def devolver(self, conn):
+        """Devuelve la conexión al pool, deshaciendo cualquier transacción pendiente"""
+        with self._cond:
+            creada = self._creacion.pop(id(conn), time.monotonic())
+
+        if conn.closed or self._cerrado:
+            self._cerrar(conn, "descartadas")
+            return
+
+        estado = conn.info.transaction_status
+        if estado == extensions.TRANSACTION_STATUS_UNKNOWN:
+            self._cerrar(conn, "descartadas")
+            return
+        if estado != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                self._cerrar(conn, "descartadas")
+                return
+
+        with self._cond:
+            self._libres.append((conn, creada, time.monotonic()))
+            self._cond.notify()
+
+    def _cerrar(self, conn, motivo):
+        try:
+            conn.close()
+        except Exception as e:
+            logger.debug(f"Error al cerrar conexión descartada: {str(e)}")
+        with self._cond:
+            self._stats[motivo] += 1
+        self._liberar_lugar()
+
+    def _liberar_lugar(self):
+        with self._cond:
+            self._abiertas -= 1
+            self._cond.notify()
+
+    def estadisticas(self):
+        """Estadísticas del pool para dimensionarlo según la carga y el número de workers"""
+        with self._cond:
+            stats = dict(self._stats)
+            libres = len(self._libres)
+            abiertas = self._abiertas
+        stats["tiempo_espera_promedio"] = (
+            stats["tiempo_espera_total"] / stats["checkouts"] if stats["checkouts"] else 0.0
+        )
+        stats.update({
+            "pid": os.getpid(),
+            "min": self.minconn,
+            "max": self.maxconn,
+            "abiertas": abiertas,
+            "en_uso": abiertas - libres,
+            "libres": libres,
+        })
+        return stats
+
+    def cerrar(self):
+        with self._cond:
+            self._cerrado = True
+            libres = list(self._libres)
+            self._libres.clear()
+            self._abiertas -= len(libres)
+            self._cond.notify_all()
+        for conn, _, _ in libres:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        logger.info("Pool de conexiones cerrado")
@@ -0,0 +1,167 @@
+# app/registro.py
+import os
+import re
+import json
+import time
+import uuid
+import queue
+import random
+import atexit
+import logging
+import logging.handlers
+from contextvars import ContextVar
+
+logger = logging.getLogger("app.solicitudes")
+
+# Nivel de los logs de la app y formato de salida ("texto" o "json")
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMATO = os.environ.get("LOG_FORMATO", "texto")
+# Fracción de solicitudes que se registran (los errores y las lentas siempre se registran)
+LOG_MUESTREO = float(os.environ.get("LOG_MUESTREO", "1.0"))
+LOG_LENTO_MS = float(os.environ.get("LOG_LENTO_MS", "1000"))
+# Rutas (prefijos separados por coma) cuyo cuerpo se captura, y cuántos bytes como máximo
+LOG_CUERPO_RUTAS = tuple(r.strip() for r in os.environ.get("LOG_CUERPO_RUTAS", "").split(",") if r.strip())
+LOG_CUERPO_MAX = int(os.environ.get("LOG_CUERPO_MAX", "2048"))
+
+# Id de la solicitud en curso, disponible para cualquier log emitido mientras se atiende
+request_id_actual = ContextVar("request_id", default="-")
+
+_SENSIBLE = re.compile(r'("?[\w-]*(?:password|token)[\w-]*"?\s*[:=]\s*)("[^"]*"|[^,&}\s]*)', re.IGNORECASE)
+
+_listener = None
+
+
+class _FiltroRequestId(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id_actual.get()
+        return True
+
+
+class FormatoJSON(logging.Formatter):
+    """Una línea JSON por registro, con los campos extra de las solicitudes"""
+
+    CAMPOS = ("request_id", "method", "path", "status", "duracion_ms", "bytes", "cuerpo")
+
+    def format(self, record):
+        datos = {
+            "ts": self.formatTime(record),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+        }
+        for campo in self.CAMPOS:
+            if hasattr(record, campo):
+                datos[campo] = getattr(record, campo)
+        if record.exc_info:
+            datos["exc"] = self.formatException(record.exc_info)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+def configurar_logging():
+    """
+    Los registros se encolan y un hilo aparte los escribe: emitir un log desde el
+    event loop o un handler cuesta solo un put en la cola.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    salida = logging.StreamHandler()
+    if LOG_FORMATO == "json":
+        salida.setFormatter(FormatoJSON())
+    else:
+        salida.setFormatter(logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+        ))
+
+    cola = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(cola)
+    handler.addFilter(_FiltroRequestId())
+
+    raiz = logging.getLogger()
+    raiz.handlers = [handler]
+    raiz.setLevel(LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(cola, salida, respect_handler_level=True)
+    _listener.start()
+    atexit.register(detener_logging)
+
+
+def detener_logging():
+    """Vacía la cola de logs pendientes y detiene el hilo escritor"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def ocultar_sensibles(texto):
+    return _SENSIBLE.sub(r'\1"***"', texto)
+
+
+class MiddlewareRegistro:
+    """
+    Middleware ASGI que asigna un id a cada solicitud (o usa el de X-Request-ID), mide
+    su duración y tamaño de respuesta y registra una línea por solicitud muestreada.
+    El cuerpo solo se captura en las rutas de LOG_CUERPO_RUTAS, copiando los primeros
+    LOG_CUERPO_MAX bytes conforme la app lo lee; nunca se lee por adelantado.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = None
+        for nombre, valor in scope.get("headers", ()):
+            if nombre == b"x-request-id":
+                request_id = valor.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex[:16]
+        token = request_id_actual.set(request_id)
+
+        path = scope["path"]
+        cuerpo = bytearray() if LOG_CUERPO_RUTAS and path.startswith(LOG_CUERPO_RUTAS) else None
+        estado = {"status": 500, "bytes": 0}
+        inicio = time.perf_counter()
+
+        async def receive_con_copia():
+            mensaje = await receive()
+            if mensaje["type"] == "http.request" and len(cuerpo) < LOG_CUERPO_MAX:
+                cuerpo.extend(mensaje.get("body", b"")[:LOG_CUERPO_MAX - len(cuerpo)])
+            return mensaje
+
+        async def send_con_medicion(mensaje):
+            if mensaje["type"] == "http.response.start":
+                estado["status"] = mensaje["status"]
+                mensaje.setdefault("headers", [])
+                mensaje["headers"] = list(mensaje["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            elif mensaje["type"] == "http.response.body":
+                estado["bytes"] += len(mensaje.get("body", b""))
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive_con_copia if cuerpo is not None else receive, send_con_medicion)
+        finally:
+            duracion_ms = (time.perf_counter() - inicio) * 1000
+            status = estado["status"]
+            if status >= 500 or duracion_ms >= LOG_LENTO_MS or random.random() < LOG_MUESTREO:
+                extra = {
+                    "method": scope["method"],
+                    "path": path,
+                    "status": status,
+                    "duracion_ms": round(duracion_ms, 1),
+                    "bytes": estado["bytes"],
+                }
+                if cuerpo:
+                    extra["cuerpo"] = ocultar_sensibles(cuerpo.decode("utf-8", "replace"))
+                nivel = logging.WARNING if status >= 500 or duracion_ms >= LOG_LENTO_MS else logging.INFO
+                logger.log(
+                    nivel,
+                    f"{scope['method']} {path} {status} {duracion_ms:.1f}ms {estado['bytes']}B"
+                    + (f" cuerpo={extra['cuerpo']}" if "cuerpo" in extra else ""),
+                    extra=extra
+                )
+            request_id_actual.reset(token)
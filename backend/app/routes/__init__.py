@@ -1,2 +1,2 @@
 # app/routes/__init__.py
-from . import sucursales, empleados, usuarios, reportes
\ No newline at end of file
+from . import sucursales, empleados, usuarios, reportes, estadisticas
\ No newline at end of file
@@ -1,18 +1,25 @@
 # app/routes/empleados.py con modificaciones para manejar objetos date
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, File
+from fastapi.responses import JSONResponse
 from typing import List, Optional
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 import pandas as pd
 from datetime import datetime, date
 from pathlib import Path
 import logging
 import json
+import re
+import os
 
 logger = logging.getLogger("app.empleados")
 
 from ..database import get_db
-from ..models import Empleado, EmpleadoCreate
+from ..condicional import condicional
+from .. import cache_sucursales
+from ..models import Empleado, EmpleadoBase, EmpleadoCreate, TallaActualizacion, TallaLote
+from ..constantes import TALLAS, TALLA_POR_DEFINIR
+from ..importacion import importar_empleados_csv, ErrorImportacion
 
 router = APIRouter(prefix="/empleados", tags=["empleados"])
 
@@ -23,29 +30,170 @@ class DateEncoder(json.JSONEncoder):
             return obj.isoformat()
         return super().default(obj)
 
+# Columnas que se pueden pedir con `fields=`; sirve también como lista blanca para armar el SELECT
+CAMPOS_EMPLEADO = ["id"] + list(EmpleadoBase.model_fields)
+LIMITE_MAXIMO = 1000
+TALLAS_VALIDAS = set(TALLAS) | {TALLA_POR_DEFINIR}
+
+# Búsqueda (GET /empleados/search): índice de trigramas de la migración 006
+BUSQUEDA_LIMITE_MAXIMO = 100
+BUSQUEDA_MAX_TERMINOS = 5
+# Similitud mínima por palabra (0-1) para aceptar una coincidencia aproximada
+BUSQUEDA_UMBRAL = float(os.environ.get("BUSQUEDA_UMBRAL", "0.4"))
+DOCUMENTO_BUSQUEDA = "documento_busqueda_empleado(nombre, numero_nomina, email, cemex_id)"
+# Tipos de coincidencia, de mejor a peor
+COINCIDENCIAS = ["exacta", "prefijo", "contiene", "aproximada"]
+
+def _escapar_like(texto):
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _escapar_regex(texto):
+    return re.sub(r"([\\.^$|?*+()\[\]{}])", r"\\\1", texto)
+
+def _fechas_a_iso(emp):
+    for campo in ('fecha_ingreso', 'fecha_ingreso_puesto'):
+        if isinstance(emp.get(campo), date):
+            emp[campo] = emp[campo].isoformat()
+    return emp
+
 @router.get("/", response_model=List[Empleado])
 def listar_empleados(
+    response: Response,
     sucursal_id: Optional[int] = Query(None),
-    db: psycopg2.extensions.connection = Depends(get_db)
+    talla: Optional[str] = Query(None),
+    requiere_playera_administrativa: Optional[bool] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=LIMITE_MAXIMO, description="Tamaño de página; sin él se devuelven todos"),
+    after_id: Optional[int] = Query(None, description="Cursor: devolver empleados con id mayor a este"),
+    fields: Optional[str] = Query(None, description="Columnas separadas por coma, p. ej. id,nombre,talla,sucursal_id"),
+    db: psycopg2.extensions.connection = Depends(get_db),
+    cabeceras_cache: dict = Depends(condicional("empleados"))
 ):
+    """
+    Lista empleados con filtros aplicados en SQL y paginación por cursor (keyset sobre id).
+    Si hay más resultados, el header X-Next-After-Id trae el valor para `after_id` de la siguiente página.
+    Con If-None-Match y sin cambios en empleados responde 304 sin consultar (ver app/condicional.py).
+    """
+    columnas = "*"
+    if fields:
+        campos = [c.strip() for c in fields.split(",") if c.strip()]
+        invalidos = [c for c in campos if c not in CAMPOS_EMPLEADO]
+        if invalidos:
+            raise HTTPException(status_code=400, detail=f"Campos no válidos: {', '.join(invalidos)}")
+        # El id siempre se incluye porque es el cursor de paginación
+        if "id" not in campos:
+            campos.insert(0, "id")
+        columnas = ", ".join(campos)
+
+    condiciones = []
+    valores = []
+    if sucursal_id is not None:
+        condiciones.append("sucursal_id = %s")
+        valores.append(sucursal_id)
+    if talla is not None:
+        if talla == TALLA_POR_DEFINIR:
+            condiciones.append("(talla = %s OR talla IS NULL)")
+        else:
+            condiciones.append("talla = %s")
+        valores.append(talla)
+    if requiere_playera_administrativa is not None:
+        condiciones.append("COALESCE(requiere_playera_administrativa, false) = %s")
+        valores.append(requiere_playera_administrativa)
+    if after_id is not None:
+        condiciones.append("id > %s")
+        valores.append(after_id)
+
+    query = f"SELECT {columnas} FROM empleados"
+    if condiciones:
+        query += " WHERE " + " AND ".join(condiciones)
+    query += " ORDER BY id"
+    if limit is not None:
+        # Pedimos uno de más para saber si existe una página siguiente
+        query += " LIMIT %s"
+        valores.append(limit + 1)
+
     cursor = db.cursor()
-    if sucursal_id:
-        cursor.execute("SELECT * FROM empleados WHERE sucursal_id = %s", (sucursal_id,))
-    else:
-        cursor.execute("SELECT * FROM empleados")
-    
+    cursor.execute(query, valores)
     empleados = cursor.fetchall()
-    
+
+    headers = {}
+    if limit is not None and len(empleados) > limit:
+        empleados = empleados[:limit]
+        headers["X-Next-After-Id"] = str(empleados[-1]["id"])
+
     # Convertir las fechas a string en formato ISO
     for emp in empleados:
-        if isinstance(emp.get('fecha_ingreso'), date):
-            emp['fecha_ingreso'] = emp['fecha_ingreso'].isoformat() if emp['fecha_ingreso'] else None
-        if isinstance(emp.get('fecha_ingreso_puesto'), date):
-            emp['fecha_ingreso_puesto'] = emp['fecha_ingreso_puesto'].isoformat() if emp['fecha_ingreso_puesto'] else None
-    
+        _fechas_a_iso(emp)
+
+    if fields:
+        # Las filas proyectadas no cumplen el modelo completo, se devuelven tal cual
+        return JSONResponse(content=[dict(emp) for emp in empleados], headers={**cabeceras_cache, **headers})
+
+    response.headers.update(headers)
     return list(empleados)
 
-@router.get("/{empleado_id}", response_model=Empleado)
+@router.get("/search", dependencies=[Depends(condicional("empleados"))])
+def buscar_empleados(
+    q: str = Query(..., min_length=2, max_length=100, description="Nombre, número de nómina, email o CEMEX ID"),
+    sucursal_id: Optional[int] = Query(None),
+    limit: int = Query(20, ge=1, le=BUSQUEDA_LIMITE_MAXIMO),
+    db: psycopg2.extensions.connection = Depends(get_db)
+):
+    """
+    Busca empleados sin distinguir mayúsculas ni acentos. Cada palabra de `q` debe aparecer
+    (como prefijo o subcadena) o parecerse a una palabra del empleado; ambas condiciones
+    usan el índice GIN de trigramas, así que el costo no depende del total de empleados.
+    Se ordena por tipo de coincidencia (COINCIDENCIAS; "prefijo" si cada palabra inicia alguna
+    palabra del empleado) y dentro de cada tipo por similitud.
+    """
+    terminos = q.split()[:BUSQUEDA_MAX_TERMINOS]
+    if not terminos:
+        raise HTTPException(status_code=400, detail="Indique un texto a buscar")
+
+    valores = {
+        "q": q.strip(),
+        "umbral": str(BUSQUEDA_UMBRAL),
+        "coincidencias": COINCIDENCIAS,
+        "limite": limit,
+    }
+    condiciones = []
+    prefijos = []
+    subcadenas = []
+    for i, termino in enumerate(terminos):
+        valores[f"t{i}"] = termino
+        valores[f"t{i}_like"] = _escapar_like(termino)
+        valores[f"t{i}_regex"] = _escapar_regex(termino)
+        # Inicio de cualquier palabra del documento: "APELLIDO APELLIDO, NOMBRE", nómina, email o CEMEX ID
+        prefijos.append(f"{DOCUMENTO_BUSQUEDA} ~ ('(^|[^a-z0-9])' || normalizar_busqueda(%(t{i}_regex)s))")
+        subcadena = f"{DOCUMENTO_BUSQUEDA} LIKE '%%' || normalizar_busqueda(%(t{i}_like)s) || '%%'"
+        subcadenas.append(subcadena)
+        condiciones.append(f"({subcadena} OR normalizar_busqueda(%(t{i})s) <%% {DOCUMENTO_BUSQUEDA})")
+    if sucursal_id is not None:
+        condiciones.append("sucursal_id = %(sucursal_id)s")
+        valores["sucursal_id"] = sucursal_id
+
+    cursor = db.cursor()
+    # Umbral de <% solo para esta transacción
+    cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %(umbral)s, true)", valores)
+    cursor.execute(f"""
+        SELECT * FROM (
+            SELECT id, nombre, numero_nomina, email, cemex_id, sucursal_id, talla, puesto_homologado,
+                   CASE
+                       WHEN numero_nomina::text = %(q)s OR lower(cemex_id) = lower(%(q)s) OR lower(email) = lower(%(q)s)
+                           THEN 'exacta'
+                       WHEN {' AND '.join(prefijos)} THEN 'prefijo'
+                       WHEN {' AND '.join(subcadenas)} THEN 'contiene'
+                       ELSE 'aproximada'
+                   END AS coincidencia,
+                   round(word_similarity(normalizar_busqueda(%(q)s), {DOCUMENTO_BUSQUEDA})::numeric, 3) AS puntaje
+            FROM empleados
+            WHERE {' AND '.join(condiciones)}
+        ) r
+        ORDER BY array_position(%(coincidencias)s, r.coincidencia), r.puntaje DESC, r.nombre, r.id
+        LIMIT %(limite)s
+    """, valores)
+    return [dict(fila) for fila in cursor.fetchall()]
+
+@router.get("/{empleado_id}", response_model=Empleado, dependencies=[Depends(condicional("empleados"))])
 def obtener_empleado(empleado_id: int, db: psycopg2.extensions.connection = Depends(get_db)):
     cursor = db.cursor()
     cursor.execute("SELECT * FROM empleados WHERE id = %s", (empleado_id,))
@@ -65,10 +213,9 @@ def obtener_empleado(empleado_id: int, db: psycopg2.extensions.connection = Depe
 @router.post("/", response_model=Empleado)
 def crear_empleado(empleado: EmpleadoCreate, db: psycopg2.extensions.connection = Depends(get_db)):
     # Verificar que la sucursal existe
-    cursor = db.cursor()
-    cursor.execute("SELECT id FROM sucursales WHERE id = %s", (empleado.sucursal_id,))
-    if not cursor.fetchone():
+    if not cache_sucursales.existe(empleado.sucursal_id, db.cursor()):
         raise HTTPException(status_code=404, detail="Sucursal no encontrada")
+    cursor = db.cursor()
     
     # Crear consulta dinámica basada en los campos proporcionados
     campos = []
@@ -107,13 +254,121 @@ def crear_empleado(empleado: EmpleadoCreate, db: psycopg2.extensions.connection
         logger.error(f"Error al crear empleado: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error al crear empleado: {str(e)}")
 
+@router.post("/importar")
+def importar_empleados(
+    archivo: UploadFile = File(...),
+    encoding: str = Query("latin-1", description="Codificación del CSV; el extracto de RH viene en latin-1"),
+    db: psycopg2.extensions.connection = Depends(get_db)
+):
+    """
+    Importa el extracto mensual de RH (CSV). Los empleados se identifican por número de nómina:
+    los existentes se actualizan (sin tocar sus tallas) y los nuevos se crean con talla 'Por definir'.
+    Retorna el detalle de las filas rechazadas.
+    """
+    try:
+        return importar_empleados_csv(db, archivo.file, encoding=encoding)
+    except (ErrorImportacion, UnicodeDecodeError, LookupError) as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Archivo no válido: {str(e)}")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error al importar empleados: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error al importar empleados: {str(e)}")
+
+def _talla_invalida(cambio):
+    """Mensaje de error del cambio de tallas, o None si es válido"""
+    if cambio.talla is None and cambio.talla_administrativa is None:
+        return "Debe indicar talla o talla_administrativa"
+    for valor in (cambio.talla, cambio.talla_administrativa):
+        if valor is not None and valor not in TALLAS_VALIDAS:
+            return f"Talla no válida: {valor}"
+    return None
+
+@router.patch("/tallas")
+def actualizar_tallas_lote(lote: TallaLote, db: psycopg2.extensions.connection = Depends(get_db)):
+    """
+    Cambia las tallas de varios empleados en una transacción con un solo UPDATE ... FROM (VALUES ...).
+    Retorna el estado de cada elemento en el orden recibido: actualizado, no_encontrado,
+    invalido (con el motivo) o duplicado (el mismo id aparece después en el lote con un cambio válido, que es
+    el que se aplica).
+    """
+    if len(lote.items) > LIMITE_MAXIMO:
+        raise HTTPException(status_code=400, detail=f"El lote admite hasta {LIMITE_MAXIMO} empleados")
+
+    resultados = [{"id": item.id} for item in lote.items]
+    ultimo_por_id = {}
+    for i, item in enumerate(lote.items):
+        error = _talla_invalida(item)
+        if error:
+            resultados[i].update(estado="invalido", detalle=error)
+        else:
+            ultimo_por_id[item.id] = i
+    valores = []
+    for i, item in enumerate(lote.items):
+        if "estado" in resultados[i]:
+            continue
+        if ultimo_por_id[item.id] != i:
+            resultados[i]["estado"] = "duplicado"
+        else:
+            valores.append((item.id, item.talla, item.talla_administrativa))
+
+    actualizados = {}
+    if valores:
+        cursor = db.cursor()
+        try:
+            filas = execute_values(cursor, """
+                UPDATE empleados AS e
+                SET talla = COALESCE(v.talla, e.talla),
+                    talla_administrativa = COALESCE(v.talla_administrativa, e.talla_administrativa)
+                FROM (VALUES %s) AS v (id, talla, talla_administrativa)
+                WHERE e.id = v.id
+                RETURNING e.id, e.talla, e.talla_administrativa
+            """, valores, template="(%s::int, %s::text, %s::text)", page_size=len(valores), fetch=True)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error al actualizar tallas en lote: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error al actualizar tallas: {str(e)}")
+        actualizados = {fila["id"]: fila for fila in filas}
+
+    for resultado in resultados:
+        if "estado" in resultado:
+            continue
+        fila = actualizados.get(resultado["id"])
+        if fila is None:
+            resultado["estado"] = "no_encontrado"
+        else:
+            resultado.update(estado="actualizado", talla=fila["talla"], talla_administrativa=fila["talla_administrativa"])
+
+    return {"actualizados": len(actualizados), "resultados": resultados}
+
+@router.patch("/{empleado_id}/talla", response_model=Empleado)
+def actualizar_talla(empleado_id: int, cambio: TallaActualizacion, db: psycopg2.extensions.connection = Depends(get_db)):
+    """Cambia solo la talla y/o la talla administrativa, sin reescribir el resto del empleado"""
+    error = _talla_invalida(cambio)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+
+    campos = cambio.dict(exclude_none=True)
+    asignaciones = ", ".join(f"{campo} = %s" for campo in campos)
+    cursor = db.cursor()
+    cursor.execute(
+        f"UPDATE empleados SET {asignaciones} WHERE id = %s RETURNING *",
+        list(campos.values()) + [empleado_id]
+    )
+    empleado = cursor.fetchone()
+    db.commit()
+
+    if not empleado:
+        raise HTTPException(status_code=404, detail="Empleado no encontrado")
+    return _fechas_a_iso(dict(empleado))
+
 @router.put("/{empleado_id}", response_model=Empleado)
 def actualizar_empleado(empleado_id: int, empleado: EmpleadoCreate, db: psycopg2.extensions.connection = Depends(get_db)):
     # Verificar que la sucursal existe
-    cursor = db.cursor()
-    cursor.execute("SELECT id FROM sucursales WHERE id = %s", (empleado.sucursal_id,))
-    if not cursor.fetchone():
+    if not cache_sucursales.existe(empleado.sucursal_id, db.cursor()):
         raise HTTPException(status_code=404, detail="Sucursal no encontrada")
+    cursor = db.cursor()
     
     # Crear consulta dinámica para la actualización
     campos = []
@@ -0,0 +1,124 @@
+# app/routes/estadisticas.py
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+import psycopg2
+import logging
+
+logger = logging.getLogger("app.estadisticas")
+
+from ..database import get_db
+from ..constantes import TALLAS, TALLA_POR_DEFINIR, normalizar_talla
+from ..motor_etiquetas import playeras_seguridad, cajas
+
+router = APIRouter(prefix="/estadisticas", tags=["estadisticas"])
+
+
+def _resumen_vacio():
+    return {
+        "total_empleados": 0,
+        "tallas_definidas": 0,
+        "por_definir": 0,
+        "administrativos": 0,
+        "administrativos_definidos": 0,
+        "administrativos_pendientes": 0,
+        "tallas": {talla: 0 for talla in TALLAS + [TALLA_POR_DEFINIR]},
+        "tallas_administrativas": {talla: 0 for talla in TALLAS + [TALLA_POR_DEFINIR]},
+        # Playeras de seguridad a enviar (solo tallas definidas), con la regla de las etiquetas
+        "playeras": 0,
+        "playeras_por_talla": {talla: 0 for talla in TALLAS},
+    }
+
+
+def _acumular(resumen, talla, administrativa, talla_administrativa, cantidad):
+    talla = normalizar_talla(talla)
+    resumen["total_empleados"] += cantidad
+    resumen["tallas"][talla] += cantidad
+    if talla == TALLA_POR_DEFINIR:
+        resumen["por_definir"] += cantidad
+    else:
+        resumen["tallas_definidas"] += cantidad
+        playeras = playeras_seguridad(cantidad, administrativa)
+        resumen["playeras"] += playeras
+        resumen["playeras_por_talla"][talla] += playeras
+
+    if administrativa:
+        talla_administrativa = normalizar_talla(talla_administrativa)
+        resumen["administrativos"] += cantidad
+        resumen["tallas_administrativas"][talla_administrativa] += cantidad
+        if talla_administrativa == TALLA_POR_DEFINIR:
+            resumen["administrativos_pendientes"] += cantidad
+        else:
+            resumen["administrativos_definidos"] += cantidad
+
+
+def _porcentaje(resumen):
+    total = resumen["total_empleados"]
+    resumen["porcentaje_cumplimiento"] = round(resumen["tallas_definidas"] * 100 / total) if total else 0
+    return resumen
+
+
+@router.get("/dashboard")
+def estadisticas_dashboard(
+    sucursal_id: Optional[int] = Query(None, description="Solo esta sucursal (zonas y totales incluidos)"),
+    db: psycopg2.extensions.connection = Depends(get_db)
+):
+    """
+    Totales por sucursal, por zona y globales para el dashboard de administración:
+    empleados, tallas definidas vs 'Por definir', playeras administrativas pendientes,
+    histogramas de tallas y playeras de seguridad (y cajas por sucursal) a enviar.
+    Se lee de conteo_tallas (mantenida por triggers), así que el costo crece con el
+    número de sucursales y no con el de empleados.
+    """
+    filtro = "WHERE s.id = %s" if sucursal_id is not None else ""
+    cursor = db.cursor()
+    cursor.execute(f"""
+        SELECT
+            s.id AS sucursal_id,
+            s.nombre,
+            s.zona,
+            s.region,
+            c.talla,
+            c.administrativa,
+            c.talla_administrativa,
+            COALESCE(c.cantidad, 0) AS cantidad
+        FROM sucursales s
+        LEFT JOIN conteo_tallas c ON c.sucursal_id = s.id AND c.cantidad > 0
+        {filtro}
+        ORDER BY s.nombre, s.id
+    """, (sucursal_id,) if sucursal_id is not None else None)
+    filas = cursor.fetchall()
+
+    sucursales = {}
+    zonas = {}
+    totales = _resumen_vacio()
+
+    for fila in filas:
+        sucursal = sucursales.get(fila["sucursal_id"])
+        if sucursal is None:
+            sucursal = sucursales[fila["sucursal_id"]] = {
+                "id": fila["sucursal_id"],
+                "nombre": fila["nombre"],
+                "zona": fila["zona"],
+                "region": fila["region"],
+                **_resumen_vacio(),
+            }
+        zona = zonas.get(fila["zona"])
+        if zona is None:
+            zona = zonas[fila["zona"]] = {"zona": fila["zona"], "sucursales": 0, **_resumen_vacio()}
+
+        # Las sucursales sin empleados aparecen una vez con cantidad 0
+        if not fila["cantidad"]:
+            continue
+        for resumen in (sucursal, zona, totales):
+            _acumular(resumen, fila["talla"], fila["administrativa"], fila["talla_administrativa"], fila["cantidad"])
+
+    for sucursal in sucursales.values():
+        zonas[sucursal["zona"]]["sucursales"] += 1
+        sucursal["cajas"] = cajas(sucursal["playeras"])
+
+    totales["sucursales"] = len(sucursales)
+    return {
+        "sucursales": [_porcentaje(s) for s in sucursales.values()],
+        "zonas": [_porcentaje(z) for z in sorted(zonas.values(), key=lambda z: z["zona"] or "")],
+        "totales": _porcentaje(totales),
+    }
@@ -1,133 +1,98 @@
 # app/routes/reportes.py
 from fastapi import APIRouter, Depends, HTTPException, status, Response
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 import os
 import logging
 from typing import Optional
 import json
+import uuid
+import threading
+import weakref
 
 logger = logging.getLogger("app.reportes")
 
-from ..database import get_db, get_supabase_client
+from ..database import conexion
+from ..motor_reportes import consultar_datos, hojas_reporte_basico, hojas_reporte_completo, escribir_excel, hojas_streaming
+from ..xlsx_streaming import generar_xlsx
+from ..trabajos import enviar_trabajo_unico, obtener_trabajo, esperar_trabajo, COMPLETADO, ERROR
+from ..storage import subir_en_segundo_plano
+from .. import cache_reportes, almacen_reportes
+from ..metricas import medir_fase
 
 router = APIRouter(prefix="/reportes", tags=["reportes"])
 
-# Crear carpeta para reportes si no existe
-REPORTS_DIR = Path(__file__).parent.parent.parent / "reportes"
-os.makedirs(REPORTS_DIR, exist_ok=True)
+# Filas que se leen por cada FETCH del cursor del lado del servidor en el modo streaming
+REPORTES_STREAM_BLOQUE = int(os.environ.get("REPORTES_STREAM_BLOQUE", "2000"))
+# Descargas en streaming simultáneas: cada una tiene una conexión del pool y un cursor del
+# servidor mientras el cliente descarga, a su ritmo. Las que exceden el límite reciben 503
+REPORTES_STREAMS_MAX = int(os.environ.get("REPORTES_STREAMS_MAX", "2"))
 
-@router.get("/excel")
-async def generar_reporte_excel(db: psycopg2.extensions.connection = Depends(get_db)):
+_streams = threading.BoundedSemaphore(REPORTES_STREAMS_MAX)
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Vigencia de las URLs firmadas de Supabase Storage (24 horas)
+URL_FIRMADA_SEGUNDOS = 86400
+
+# Prefijo del nombre de archivo para cada tipo de reporte
+PREFIJOS_ARCHIVO = {
+    "excel": "reporte_uniformes",
+    "completo": "reporte_completo_uniformes",
+}
+
+def construir_reporte_excel(version_datos=None):
     """
     Genera un reporte Excel con los datos de tallas de empleados y lo guarda localmente.
+    Es bloqueante: se ejecuta en el pool de trabajos, nunca en el event loop.
     """
-    try:
-        # Obtener datos de empleados con nombre de sucursal
+    with conexion() as db:
+        # Una sola consulta; los resúmenes se calculan en memoria a partir del detalle
         cursor = db.cursor()
-        cursor.execute("""
-            SELECT e.id, e.nombre, e.talla, s.nombre as sucursal, s.manager, s.zona, s.region
-            FROM empleados e
-            JOIN sucursales s ON e.sucursal_id = s.id
-            ORDER BY s.nombre, e.nombre
-        """)
-        
-        datos = cursor.fetchall()
-        
-        # Crear DataFrame
-        df = pd.DataFrame(datos)
-        
-        # Obtener resumen por talla
-        cursor.execute("""
-            SELECT talla, COUNT(*) as cantidad
-            FROM empleados
-            GROUP BY talla
-            ORDER BY 
-                CASE 
-                    WHEN talla = 'XS' THEN 1
-                    WHEN talla = 'S' THEN 2
-                    WHEN talla = 'M' THEN 3
-                    WHEN talla = 'L' THEN 4
-                    WHEN talla = 'XL' THEN 5
-                    WHEN talla = 'XXL' THEN 6
-                    WHEN talla = 'XXXL' THEN 7
-                    ELSE 8
-                END
-        """)
-        
-        datos_resumen = cursor.fetchall()
-        df_resumen = pd.DataFrame(datos_resumen)
+        with medir_fase("excel", "consulta"):
+            df, sucursales = consultar_datos(cursor)
+        with medir_fase("excel", "dataframe"):
+            hojas = hojas_reporte_basico(df, sucursales)
         
         # Generar nombre único para el archivo
         fecha_hora = datetime.now().strftime("%Y%m%d_%H%M%S")
         nombre_archivo = f"reporte_uniformes_{fecha_hora}.xlsx"
-        ruta_archivo = REPORTS_DIR / nombre_archivo
+        ruta_archivo = almacen_reportes.ruta_nueva(nombre_archivo)
         
         # Crear archivo Excel con múltiples hojas
-        with pd.ExcelWriter(ruta_archivo) as writer:
-            df.to_excel(writer, sheet_name='Detalle', index=False)
-            df_resumen.to_excel(writer, sheet_name='Resumen', index=False)
-            
-            # Añadir hoja con resumen por sucursal y talla
-            cursor.execute("""
-                SELECT 
-                    s.nombre as sucursal,
-                    COUNT(CASE WHEN e.talla = 'XS' THEN 1 END) as XS,
-                    COUNT(CASE WHEN e.talla = 'S' THEN 1 END) as S,
-                    COUNT(CASE WHEN e.talla = 'M' THEN 1 END) as M,
-                    COUNT(CASE WHEN e.talla = 'L' THEN 1 END) as L,
-                    COUNT(CASE WHEN e.talla = 'XL' THEN 1 END) as XL,
-                    COUNT(CASE WHEN e.talla = 'XXL' THEN 1 END) as XXL,
-                    COUNT(CASE WHEN e.talla = 'XXXL' THEN 1 END) as XXXL,
-                    COUNT(CASE WHEN e.talla = 'Por definir' OR e.talla IS NULL THEN 1 END) as Por_definir,
-                    COUNT(*) as Total
-                FROM sucursales s
-                LEFT JOIN empleados e ON s.id = e.sucursal_id
-                GROUP BY s.nombre
-                ORDER BY s.nombre
-            """)
-            
-            datos_por_sucursal = cursor.fetchall()
-            df_por_sucursal = pd.DataFrame(datos_por_sucursal)
-            df_por_sucursal.to_excel(writer, sheet_name='Por Sucursal', index=False)
+        with medir_fase("excel", "xlsx"):
+            escribir_excel(hojas, ruta_archivo)
+        eliminados = almacen_reportes.registrar(nombre_archivo)
         
         # Registrar el reporte en la base de datos
         cursor.execute("""
-            INSERT INTO reportes (nombre_archivo, fecha_generacion, tipo)
-            VALUES (%s, %s, %s)
+            INSERT INTO reportes (nombre_archivo, fecha_generacion, tipo, version_datos)
+            VALUES (%s, %s, %s, %s)
             RETURNING id
-        """, (nombre_archivo, datetime.now(), 'excel'))
+        """, (nombre_archivo, datetime.now(), 'excel', version_datos))
         
         reporte_id = cursor.fetchone()['id']
+        en_storage = almacen_reportes.limpiar_registros(cursor, eliminados)
         db.commit()
-        
-        return {
-            "success": True,
-            "archivo": nombre_archivo,
-            "id": reporte_id,
-            "url": f"/reportes/excel/download/{nombre_archivo}"
-        }
+    # Fuera de la transacción y con la conexión ya devuelta al pool
+    almacen_reportes.eliminar_de_storage(en_storage)
     
-    except Exception as e:
-        logger.error(f"Error al generar reporte Excel: {str(e)}")
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al generar reporte: {str(e)}"
-        )
+    return {
+        "success": True,
+        "archivo": nombre_archivo,
+        "id": reporte_id,
+        "url": f"/reportes/excel/download/{nombre_archivo}"
+    }
 
-@router.get("/excel/download/{nombre_archivo}")
-async def descargar_reporte_excel(nombre_archivo: str):
-    """
-    Descarga un reporte Excel previamente generado.
-    """
-    ruta_archivo = REPORTS_DIR / nombre_archivo
+def descargar_archivo(nombre_archivo: str):
+    ruta_archivo = almacen_reportes.ruta(nombre_archivo)
     
-    if not ruta_archivo.exists():
+    if ruta_archivo is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="El archivo solicitado no existe"
@@ -139,287 +104,340 @@ async def descargar_reporte_excel(nombre_archivo: str):
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
 
-@router.get("/supabase/excel")
-async def generar_reporte_excel_supabase(db: psycopg2.extensions.connection = Depends(get_db)):
+@router.get("/excel/download/{nombre_archivo}")
+async def descargar_reporte_excel(nombre_archivo: str):
     """
-    Genera un reporte Excel completo con todos los detalles de empleados y lo sube a Supabase Storage para su descarga.
+    Descarga un reporte Excel previamente generado.
     """
-    try:
-        logger.info("Iniciando generación de reporte Excel completo para Supabase Storage")
+    return descargar_archivo(nombre_archivo)
+
+def construir_reporte_completo(version_datos=None):
+    """
+    Genera un reporte Excel completo con todos los detalles de empleados. Retorna en cuanto el
+    archivo está en disco; la subida a Supabase Storage se encola en segundo plano.
+    Es bloqueante: se ejecuta en el pool de trabajos, nunca en el event loop.
+    """
+    with conexion() as db:
+        logger.info("Iniciando generación de reporte Excel completo")
         
-        # Primero generamos el Excel con información más completa
+        # Una sola consulta con el detalle completo; los resúmenes se derivan en memoria
         cursor = db.cursor()
         logger.debug("Consultando datos completos de empleados y sucursales")
-        cursor.execute("""
-            SELECT 
-                e.id, 
-                e.nombre, 
-                e.numero_nomina,
-                e.puesto_hc,
-                e.puesto_homologado,
-                e.talla, 
-                e.talla_administrativa,
-                e.requiere_playera_administrativa,
-                e.fecha_ingreso,
-                e.fecha_ingreso_puesto,
-                e.cumpleanos,
-                e.ubicacion_hc,
-                e.sexo,
-                e.email,
-                e.cemex_id,
-                e.asesor_rh,
-                e.prcrt,
-                e.categoria,
-                e.area_nom,
-                s.nombre as sucursal, 
-                s.manager, 
-                s.zona, 
-                s.region,
-                s.gerencia,
-                s.pdv,
-                s.ubicacion_pdv
-            FROM empleados e
-            JOIN sucursales s ON e.sucursal_id = s.id
-            ORDER BY s.nombre, e.nombre
-        """)
-        
-        datos = cursor.fetchall()
-        logger.debug(f"Obtenidos {len(datos)} registros de empleados con información completa")
-        
-        # Crear DataFrame con los datos completos
-        df = pd.DataFrame(datos)
-        
-        # Resumen por talla estándar
-        logger.debug("Consultando resumen por talla estándar")
-        cursor.execute("""
-            SELECT talla, COUNT(*) as cantidad
-            FROM empleados
-            GROUP BY talla
-            ORDER BY 
-                CASE 
-                    WHEN talla = 'XS' THEN 1
-                    WHEN talla = 'S' THEN 2
-                    WHEN talla = 'M' THEN 3
-                    WHEN talla = 'L' THEN 4
-                    WHEN talla = 'XL' THEN 5
-                    WHEN talla = 'XXL' THEN 6
-                    WHEN talla = 'XXXL' THEN 7
-                    ELSE 8
-                END
-        """)
-        
-        datos_resumen = cursor.fetchall()
-        df_resumen = pd.DataFrame(datos_resumen)
-        
-        # Resumen por talla administrativa
-        logger.debug("Consultando resumen por talla administrativa")
-        cursor.execute("""
-            SELECT 
-                talla_administrativa, 
-                COUNT(*) as cantidad
-            FROM empleados
-            WHERE requiere_playera_administrativa = true
-            GROUP BY talla_administrativa
-            ORDER BY 
-                CASE 
-                    WHEN talla_administrativa = 'XS' THEN 1
-                    WHEN talla_administrativa = 'S' THEN 2
-                    WHEN talla_administrativa = 'M' THEN 3
-                    WHEN talla_administrativa = 'L' THEN 4
-                    WHEN talla_administrativa = 'XL' THEN 5
-                    WHEN talla_administrativa = 'XXL' THEN 6
-                    WHEN talla_administrativa = 'XXXL' THEN 7
-                    ELSE 8
-                END
-        """)
-        
-        datos_resumen_admin = cursor.fetchall()
-        df_resumen_admin = pd.DataFrame(datos_resumen_admin)
-        
-        # Resumen por sucursal para tallas estándar
-        logger.debug("Consultando resumen por sucursal para tallas estándar")
-        cursor.execute("""
-            SELECT 
-                s.nombre as sucursal,
-                COUNT(CASE WHEN e.talla = 'XS' THEN 1 END) as XS,
-                COUNT(CASE WHEN e.talla = 'S' THEN 1 END) as S,
-                COUNT(CASE WHEN e.talla = 'M' THEN 1 END) as M,
-                COUNT(CASE WHEN e.talla = 'L' THEN 1 END) as L,
-                COUNT(CASE WHEN e.talla = 'XL' THEN 1 END) as XL,
-                COUNT(CASE WHEN e.talla = 'XXL' THEN 1 END) as XXL,
-                COUNT(CASE WHEN e.talla = 'XXXL' THEN 1 END) as XXXL,
-                COUNT(CASE WHEN e.talla = 'Por definir' OR e.talla IS NULL THEN 1 END) as Por_definir,
-                COUNT(*) as Total
-            FROM sucursales s
-            LEFT JOIN empleados e ON s.id = e.sucursal_id
-            GROUP BY s.nombre
-            ORDER BY s.nombre
-        """)
-        
-        datos_por_sucursal = cursor.fetchall()
-        df_por_sucursal = pd.DataFrame(datos_por_sucursal)
-        
-        # Resumen por sucursal para tallas administrativas
-        logger.debug("Consultando resumen por sucursal para tallas administrativas")
-        cursor.execute("""
-            SELECT 
-                s.nombre as sucursal,
-                COUNT(CASE WHEN e.talla_administrativa = 'XS' THEN 1 END) as XS,
-                COUNT(CASE WHEN e.talla_administrativa = 'S' THEN 1 END) as S,
-                COUNT(CASE WHEN e.talla_administrativa = 'M' THEN 1 END) as M,
-                COUNT(CASE WHEN e.talla_administrativa = 'L' THEN 1 END) as L,
-                COUNT(CASE WHEN e.talla_administrativa = 'XL' THEN 1 END) as XL,
-                COUNT(CASE WHEN e.talla_administrativa = 'XXL' THEN 1 END) as XXL,
-                COUNT(CASE WHEN e.talla_administrativa = 'XXXL' THEN 1 END) as XXXL,
-                COUNT(CASE WHEN e.talla_administrativa = 'Por definir' OR e.talla_administrativa IS NULL THEN 1 END) as Por_definir,
-                COUNT(CASE WHEN e.requiere_playera_administrativa = true THEN 1 END) as Total_Administrativos
-            FROM sucursales s
-            LEFT JOIN empleados e ON s.id = e.sucursal_id
-            WHERE e.requiere_playera_administrativa = true
-            GROUP BY s.nombre
-            ORDER BY s.nombre
-        """)
-        
-        datos_admin_por_sucursal = cursor.fetchall()
-        df_admin_por_sucursal = pd.DataFrame(datos_admin_por_sucursal)
-        
-        # Resumen por puesto homologado
-        logger.debug("Consultando resumen por puesto homologado")
-        cursor.execute("""
-            SELECT 
-                puesto_homologado, 
-                COUNT(*) as cantidad
-            FROM empleados
-            WHERE puesto_homologado IS NOT NULL
-            GROUP BY puesto_homologado
-            ORDER BY COUNT(*) DESC
-        """)
-        
-        datos_por_puesto = cursor.fetchall()
-        df_por_puesto = pd.DataFrame(datos_por_puesto)
+        with medir_fase("completo", "consulta"):
+            df, sucursales = consultar_datos(cursor)
+        with medir_fase("completo", "dataframe"):
+            hojas = hojas_reporte_completo(df, sucursales)
         
         # Generar nombre único para el archivo
         fecha_hora = datetime.now().strftime("%Y%m%d_%H%M%S")
         nombre_archivo = f"reporte_completo_uniformes_{fecha_hora}.xlsx"
-        ruta_archivo = REPORTS_DIR / nombre_archivo
+        ruta_archivo = almacen_reportes.ruta_nueva(nombre_archivo)
         
         logger.debug(f"Generando archivo Excel completo: {nombre_archivo}")
         # Crear archivo Excel con múltiples hojas
-        with pd.ExcelWriter(ruta_archivo) as writer:
-            df.to_excel(writer, sheet_name='Detalle Completo', index=False)
-            df_resumen.to_excel(writer, sheet_name='Resumen Tallas', index=False)
-            df_resumen_admin.to_excel(writer, sheet_name='Resumen Tallas Adm', index=False)
-            df_por_sucursal.to_excel(writer, sheet_name='Tallas Por Sucursal', index=False)
-            df_admin_por_sucursal.to_excel(writer, sheet_name='Tallas Adm Por Sucursal', index=False)
-            df_por_puesto.to_excel(writer, sheet_name='Por Puesto', index=False)
-            
-            # Ajustar el ancho de las columnas en cada hoja
-            for sheet_name in writer.sheets:
-                worksheet = writer.sheets[sheet_name]
-                for i, col in enumerate(df.columns):
-                    # Establecer un ancho mínimo para cada columna
-                    column_width = max(df[col].astype(str).map(len).max(), len(str(col))) + 2
-                    worksheet.column_dimensions[chr(65 + i)].width = min(column_width, 50)  # A=65 en ASCII, limitar a 50 de ancho máximo
+        with medir_fase("completo", "xlsx"):
+            escribir_excel(hojas, ruta_archivo, ajustar_anchos=True)
+        eliminados = almacen_reportes.registrar(nombre_archivo)
         
         logger.debug("Archivo Excel completo generado correctamente")
         
-        # Intentar subir a Supabase Storage
-        try:
-            logger.debug("Iniciando subida a Supabase Storage")
-            # Obtener cliente de Supabase
-            supabase = get_supabase_client()
-            logger.debug("Cliente Supabase obtenido correctamente")
-            
-            # Leer el archivo Excel
-            with open(ruta_archivo, 'rb') as file:
-                file_contents = file.read()
-            
-            logger.debug(f"Archivo leído, tamaño: {len(file_contents)} bytes")
-            
-            # Subir a Supabase Storage en el bucket 'reportes'
-            bucket_name = 'reportes'
-            
-            try:
-                # Verificar si el bucket existe
-                logger.debug(f"Verificando si existe el bucket '{bucket_name}'")
-                buckets = supabase.storage.list_buckets()
-                bucket_exists = any(bucket.name == bucket_name for bucket in buckets)
-                
-                if not bucket_exists:
-                    logger.debug(f"El bucket '{bucket_name}' no existe, intentando crearlo")
-                    supabase.storage.create_bucket(bucket_name, {'public': False})
-                    logger.info(f"Bucket '{bucket_name}' creado exitosamente")
-            except Exception as e:
-                logger.warning(f"Error al verificar o crear bucket: {str(e)}")
-            
-            # Subir el archivo
-            logger.debug(f"Subiendo archivo '{nombre_archivo}' al bucket '{bucket_name}'")
-            upload_result = supabase.storage.from_(bucket_name).upload(
-                nombre_archivo,
-                file_contents,
-                {"content-type": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"}
-            )
-            
-            logger.debug(f"Archivo subido correctamente, resultado: {upload_result}")
-            
-            # Generar URL firmada que expire en 24 horas
-            logger.debug("Generando URL firmada para descarga")
-            signed_url = supabase.storage.from_(bucket_name).create_signed_url(
-                nombre_archivo,
-                86400  # 24 horas en segundos
-            )
-            
-            url_descarga = signed_url['signedURL']
-            logger.debug(f"URL firmada generada: {url_descarga}")
-            
-            # Registrar en la base de datos
-            expiracion = datetime.now() + timedelta(hours=24)
-            logger.debug("Registrando reporte en la base de datos")
-            cursor.execute("""
-                INSERT INTO reportes (nombre_archivo, fecha_generacion, tipo, url_descarga, expiracion)
-                VALUES (%s, %s, %s, %s, %s)
-                RETURNING id
-            """, (nombre_archivo, datetime.now(), 'excel_completo_supabase', url_descarga, expiracion))
-            
-            reporte_id = cursor.fetchone()['id']
-            db.commit()
-            
-            logger.info(f"Reporte completo registrado con ID: {reporte_id}")
-            
-            return {
-                "success": True,
-                "archivo": nombre_archivo,
-                "id": reporte_id,
-                "url": url_descarga
-            }
-            
-        except Exception as storage_error:
-            # Si falla la subida a Supabase, devolvemos el archivo local
-            logger.error(f"Error al subir a Supabase Storage: {str(storage_error)}")
-            logger.exception("Traceback completo:")
-            
-            # Registrar en la base de datos, pero como reporte local
-            cursor.execute("""
-                INSERT INTO reportes (nombre_archivo, fecha_generacion, tipo)
-                VALUES (%s, %s, %s)
-                RETURNING id
-            """, (nombre_archivo, datetime.now(), 'excel_completo_local'))
-            
-            reporte_id = cursor.fetchone()['id']
-            db.commit()
-            
-            return {
+        # Se registra como reporte local; la subida a Supabase Storage corre en segundo
+        # plano y al terminar actualiza este mismo registro con la URL firmada
+        cursor.execute("""
+            INSERT INTO reportes (nombre_archivo, fecha_generacion, tipo, version_datos)
+            VALUES (%s, %s, %s, %s)
+            RETURNING id
+        """, (nombre_archivo, datetime.now(), 'excel_completo_local', version_datos))
+        
+        reporte_id = cursor.fetchone()['id']
+        en_storage = almacen_reportes.limpiar_registros(cursor, eliminados)
+        db.commit()
+    almacen_reportes.eliminar_de_storage(en_storage)
+    
+    subida = subir_en_segundo_plano(
+        almacen_reportes.BUCKET_REPORTES,
+        nombre_archivo,
+        ruta_archivo,
+        XLSX_MEDIA_TYPE,
+        URL_FIRMADA_SEGUNDOS,
+        lambda url, expiracion: _registrar_subida(reporte_id, nombre_archivo, url, expiracion),
+        fase_metrica="completo"
+    )
+    
+    resultado = {
+        "success": True,
+        "archivo": nombre_archivo,
+        "id": reporte_id,
+        "url": f"/reportes/excel/download/{nombre_archivo}",
+        "url_estado": f"/reportes/{reporte_id}/url"
+    }
+    if subida is None:
+        resultado["warning"] = "Supabase Storage no está configurado, el archivo solo está disponible localmente"
+    return resultado
+
+def _registrar_subida(reporte_id, nombre_archivo, url, expiracion):
+    """Guarda la URL firmada de un reporte cuando termina su subida a Supabase Storage"""
+    with conexion() as db:
+        cursor = db.cursor()
+        cursor.execute("""
+            UPDATE reportes
+            SET tipo = %s, url_descarga = %s, expiracion = %s
+            WHERE id = %s
+        """, ('excel_completo_supabase', url, expiracion, reporte_id))
+        db.commit()
+    # El resultado en memoria todavía apunta al archivo local
+    cache_reportes.invalidar(nombre_archivo)
+
+
+# Tipos de reporte que pueden generarse como trabajo en segundo plano
+TIPOS_REPORTE = {
+    "excel": construir_reporte_excel,
+    "completo": construir_reporte_completo,
+}
+
+def clave_actual(tipo):
+    """Clave del reporte según la versión actual de empleados y sucursales"""
+    with conexion() as db:
+        return cache_reportes.clave_reporte(tipo, cache_reportes.version_datos(db.cursor()))
+
+def construir_con_cache(tipo, clave):
+    """Reutiliza el reporte generado con la misma versión de datos; si no existe, lo construye"""
+    with conexion() as db:
+        resultado = cache_reportes.buscar(db.cursor(), tipo, clave)
+    if resultado:
+        logger.info(f"Reporte {tipo} sin cambios en los datos, se reutiliza {resultado['archivo']}")
+        return resultado
+
+    resultado = TIPOS_REPORTE[tipo](version_datos=clave)
+    cache_reportes.registrar(clave, resultado)
+    return resultado
+
+def enviar_reporte_tipo(tipo):
+    """
+    Encola la generación de un reporte; las solicitudes idénticas mientras se construye
+    se unen al mismo trabajo. Es bloqueante (consulta la versión de datos).
+    """
+    clave = clave_actual(tipo)
+    return enviar_trabajo_unico(clave, tipo, construir_con_cache, tipo, clave)
+
+@router.get("/excel")
+async def generar_reporte_excel():
+    """
+    Genera el reporte Excel básico y espera a que termine.
+    La construcción corre en el pool de trabajos, así que el worker sigue atendiendo otras solicitudes.
+    Si los datos no cambiaron desde el último reporte, se devuelve ese mismo archivo.
+    """
+    try:
+        trabajo_id = await run_in_threadpool(enviar_reporte_tipo, "excel")
+        return await esperar_trabajo(trabajo_id)
+    except Exception as e:
+        logger.error(f"Error al generar reporte Excel: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al generar reporte: {str(e)}"
+        )
+
+@router.get("/supabase/excel")
+async def generar_reporte_excel_supabase():
+    """
+    Genera el reporte Excel completo (con subida a Supabase Storage) y espera a que termine.
+    Si los datos no cambiaron desde el último reporte, se devuelve ese mismo archivo.
+    """
+    try:
+        trabajo_id = await run_in_threadpool(enviar_reporte_tipo, "completo")
+        return await esperar_trabajo(trabajo_id)
+    except Exception as e:
+        logger.error(f"Error al generar reporte Excel completo para Supabase: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al generar reporte completo: {str(e)}"
+        )
+
+def _reservar_stream():
+    """
+    Ocupa un lugar de streaming sin esperar. Retorna la función que lo libera (solo la
+    primera llamada tiene efecto) o None si todos los lugares están ocupados.
+    """
+    if not _streams.acquire(blocking=False):
+        return None
+    liberado = threading.Lock()
+
+    def liberar():
+        if liberado.acquire(blocking=False):
+            _streams.release()
+    return liberar
+
+def _stream_reporte(tipo, nombre_archivo, guardar, liberar):
+    """
+    Genera el XLSX por bloques leyendo el detalle con un cursor del lado del servidor.
+    Con `guardar` también escribe el archivo en el almacén de reportes y lo registra en la tabla reportes
+    con la clave de versión leída antes del detalle, así /reportes/excel y /reportes/supabase/excel
+    lo reutilizan mientras los datos no cambien. Al terminar, o si el cliente se desconecta, libera su lugar de streaming con `liberar`.
+    """
+    ruta_archivo = almacen_reportes.ruta_nueva(nombre_archivo)
+    # Dos descargas del mismo tipo en el mismo segundo comparten nombre_archivo, no la copia parcial
+    ruta_parcial = ruta_archivo.with_name(f"{nombre_archivo}.{uuid.uuid4().hex}.parcial")
+    copia = None
+    terminado = False
+    try:
+        copia = open(ruta_parcial, "wb") if guardar else None
+        with conexion() as db:
+            # La versión se lee antes que el detalle: si los datos cambian a la mitad, la clave
+            # guardada queda vieja (nadie la vuelve a pedir) y nunca más nueva que el archivo
+            clave = cache_reportes.clave_reporte(tipo, cache_reportes.version_datos(db.cursor())) if guardar else None
+            cursor = db.cursor(name=f"reporte_{uuid.uuid4().hex}")
+            yield from generar_xlsx(hojas_streaming(cursor, tipo, REPORTES_STREAM_BLOQUE), copia)
+            cursor.close()
+
+            if guardar:
+                copia.close()
+                os.replace(ruta_parcial, ruta_archivo)
+                eliminados = almacen_reportes.registrar(nombre_archivo)
+                cursor = db.cursor()
+                cursor.execute("""
+                    INSERT INTO reportes (nombre_archivo, fecha_generacion, tipo, version_datos)
+                    VALUES (%s, %s, %s, %s)
+                    RETURNING id
+                """, (nombre_archivo, datetime.now(), cache_reportes.TIPO_REGISTRO_LOCAL[tipo], clave))
+                reporte_id = cursor.fetchone()['id']
+                en_storage = almacen_reportes.limpiar_registros(cursor, eliminados)
+                db.commit()
+                logger.info(f"Reporte {nombre_archivo} transmitido y guardado")
+        if guardar:
+            almacen_reportes.eliminar_de_storage(en_storage)
+            cache_reportes.registrar(clave, {
                 "success": True,
                 "archivo": nombre_archivo,
                 "id": reporte_id,
                 "url": f"/reportes/excel/download/{nombre_archivo}",
-                "warning": "El archivo se generó localmente debido a un error en Supabase Storage"
-            }
+            })
+        terminado = True
+    finally:
+        if copia is not None and not copia.closed:
+            copia.close()
+        if guardar and not terminado and ruta_parcial.exists():
+            ruta_parcial.unlink()
+        liberar()
+
+@router.get("/excel/stream")
+def descargar_reporte_streaming(tipo: str = "completo", guardar: bool = False):
+    """
+    Descarga el reporte mientras se genera, sin armar el libro en memoria: la memoria usada
+    no depende del número de empleados. Con guardar=true además se conserva una copia en el servidor.
+    """
+    if tipo not in PREFIJOS_ARCHIVO:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tipo de reporte no válido, opciones: {', '.join(PREFIJOS_ARCHIVO)}"
+        )
+
+    liberar = _reservar_stream()
+    if liberar is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Hay demasiadas descargas de reportes en curso, intente de nuevo en unos segundos",
+            headers={"Retry-After": "5"}
+        )
+
+    fecha_hora = datetime.now().strftime("%Y%m%d_%H%M%S")
+    nombre_archivo = f"{PREFIJOS_ARCHIVO[tipo]}_{fecha_hora}.xlsx"
+    contenido = _stream_reporte(tipo, nombre_archivo, guardar, liberar)
+    # Si el cliente se va antes de que empiece la respuesta el generador nunca corre su finally
+    weakref.finalize(contenido, liberar)
+    return StreamingResponse(
+        contenido,
+        media_type=XLSX_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{nombre_archivo}"'}
+    )
+
+@router.get("/{reporte_id}/url")
+def url_reporte(reporte_id: int):
+    """
+    URL de descarga de un reporte registrado: la firmada de Supabase Storage cuando ya
+    terminó su subida, o la del archivo local mientras tanto.
+    """
+    with conexion() as db:
+        cursor = db.cursor()
+        cursor.execute("""
+            SELECT id, nombre_archivo, tipo, url_descarga, expiracion
+            FROM reportes
+            WHERE id = %s
+        """, (reporte_id,))
+        reporte = cursor.fetchone()
     
-    except Exception as e:
-        logger.error(f"Error al generar reporte Excel completo para Supabase: {str(e)}")
-        logger.exception("Traceback completo:")
+    if not reporte:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Reporte no encontrado"
+        )
+    
+    return {
+        "id": reporte["id"],
+        "archivo": reporte["nombre_archivo"],
+        "url": reporte["url_descarga"] or f"/reportes/excel/download/{reporte['nombre_archivo']}",
+        "expiracion": reporte["expiracion"],
+        "subido": reporte["tipo"] == "excel_completo_supabase"
+    }
+
+@router.get("/almacen")
+def estado_almacen():
+    """Archivos y espacio ocupado por los reportes guardados en este servidor"""
+    return almacen_reportes.estadisticas()
+
+@router.post("/trabajos", status_code=status.HTTP_202_ACCEPTED)
+def enviar_reporte(tipo: str = "excel"):
+    """
+    Encola la generación de un reporte y retorna inmediatamente el id del trabajo.
+    """
+    if tipo not in TIPOS_REPORTE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tipo de reporte no válido, opciones: {', '.join(TIPOS_REPORTE)}"
+        )
+
+    trabajo_id = enviar_reporte_tipo(tipo)
+    return {
+        "id": trabajo_id,
+        "tipo": tipo,
+        "estado": obtener_trabajo(trabajo_id)["estado"],
+        "url_estado": f"/reportes/trabajos/{trabajo_id}",
+        "url_resultado": f"/reportes/trabajos/{trabajo_id}/resultado"
+    }
+
+@router.get("/trabajos/{trabajo_id}")
+def estado_reporte(trabajo_id: str):
+    """
+    Consulta el estado de un trabajo de reporte (pendiente, en_proceso, completado o error).
+    """
+    trabajo = obtener_trabajo(trabajo_id)
+    if not trabajo:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trabajo no encontrado"
+        )
+    return trabajo
+
+@router.get("/trabajos/{trabajo_id}/resultado")
+def resultado_reporte(trabajo_id: str):
+    """
+    Descarga el archivo generado por un trabajo terminado.
+    """
+    trabajo = obtener_trabajo(trabajo_id)
+    if not trabajo:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trabajo no encontrado"
+        )
+
+    if trabajo["estado"] == ERROR:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al generar reporte completo: {str(e)}"
-        )
\ No newline at end of file
+            detail=f"Error al generar reporte: {trabajo['error']}"
+        )
+    if trabajo["estado"] != COMPLETADO:
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"id": trabajo_id, "estado": trabajo["estado"]}
+        )
+
+    return descargar_archivo(trabajo["resultado"]["archivo"])
@@ -1,6 +1,8 @@
 # app/routes/sucursales.py
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from datetime import datetime
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import logging
@@ -8,27 +10,62 @@ import logging
 logger = logging.getLogger("app.sucursales")
 
 from ..database import get_db
-from ..models import Sucursal, SucursalCreate, SucursalUpdate, MensajeRespuesta
+from ..condicional import condicional, version_leida
+from .. import cache_sucursales
+from ..motor_etiquetas import consultar_envios, generar_etiquetas_pdf
+from ..models import Sucursal, SucursalCreate, SucursalUpdate, MensajeRespuesta, EnvioLote
 
 router = APIRouter(prefix="/sucursales", tags=["sucursales"])
 
-@router.get("/", response_model=List[Sucursal])
-def listar_sucursales(db: psycopg2.extensions.connection = Depends(get_db)):
-    cursor = db.cursor()
-    cursor.execute("SELECT * FROM sucursales")
-    sucursales = cursor.fetchall()
-    return list(sucursales)
+LIMITE_LOTE = 1000
 
-@router.get("/{sucursal_id}", response_model=Sucursal)
-def obtener_sucursal(sucursal_id: int, db: psycopg2.extensions.connection = Depends(get_db)):
-    cursor = db.cursor()
-    cursor.execute("SELECT * FROM sucursales WHERE id = %s", (sucursal_id,))
-    sucursal = cursor.fetchone()
+# Filtro de estado de empaquetado de las etiquetas -> valor de is_empaquetado
+ESTADOS_ENVIO = {"todas": None, "pendientes": False, "empaquetadas": True}
+
+@router.get("/", response_model=List[Sucursal], dependencies=[Depends(condicional("sucursales"))])
+def listar_sucursales(request: Request, db: psycopg2.extensions.connection = Depends(get_db)):
+    # La copia en memoria debe ser al menos tan nueva como la versión del ETag
+    return cache_sucursales.listar(db.cursor(), version_leida(request, "sucursales"))
+
+@router.get("/etiquetas")
+def etiquetas_envio(
+    ids: Optional[str] = Query(None, description="IDs de sucursal separados por coma"),
+    zona: Optional[str] = Query(None),
+    region: Optional[str] = Query(None),
+    estado: str = Query("todas"),
+    contenido: bool = Query(True, description="Incluir el contenido de la caja en la etiqueta"),
+    db: psycopg2.extensions.connection = Depends(get_db)
+):
+    """
+    PDF con las etiquetas de envío (una por caja, 4 por hoja) de las sucursales indicadas.
+    El resumen de tallas se calcula en SQL y el PDF se entrega por partes conforme se dibuja.
+    """
+    if estado not in ESTADOS_ENVIO:
+        raise HTTPException(status_code=400, detail=f"Estado no válido, opciones: {', '.join(ESTADOS_ENVIO)}")
+    try:
+        lista_ids = [int(valor) for valor in ids.split(",") if valor.strip()] if ids else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids debe ser una lista de números separados por coma")
+
+    envios = consultar_envios(db.cursor(), lista_ids, zona, region, ESTADOS_ENVIO[estado])
+    if not envios:
+        raise HTTPException(status_code=404, detail="No hay sucursales que cumplan los filtros")
+
+    nombre_archivo = f"etiquetas_envio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    return StreamingResponse(
+        generar_etiquetas_pdf(envios, contenido),
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{nombre_archivo}"'}
+    )
+
+@router.get("/{sucursal_id}", response_model=Sucursal, dependencies=[Depends(condicional("sucursales"))])
+def obtener_sucursal(sucursal_id: int, request: Request, db: psycopg2.extensions.connection = Depends(get_db)):
+    sucursal = cache_sucursales.obtener(sucursal_id, db.cursor(), version_leida(request, "sucursales"))
     
     if not sucursal:
         raise HTTPException(status_code=404, detail="Sucursal no encontrada")
     
-    return dict(sucursal)
+    return sucursal
 
 @router.post("/", response_model=Sucursal)
 def crear_sucursal(sucursal: SucursalCreate, db: psycopg2.extensions.connection = Depends(get_db)):
@@ -56,9 +93,89 @@ def crear_sucursal(sucursal: SucursalCreate, db: psycopg2.extensions.connection
     )
     nueva_sucursal = cursor.fetchone()
     db.commit()
+    cache_sucursales.guardar(nueva_sucursal)
     
     return dict(nueva_sucursal)
 
+@router.patch("/envio")
+def actualizar_envio_lote(lote: EnvioLote, db: psycopg2.extensions.connection = Depends(get_db)):
+    """
+    Marca el empaquetado y/o el número de seguimiento de muchas sucursales con un solo UPDATE
+    y un commit: las de `items` (cada una puede traer sus propios valores) o, sin items, todas
+    las de la zona/región indicada. Los campos nulos no modifican el valor actual.
+    Si un id se repite en `items` se aplica el último y el id se reporta en `duplicados`
+    (como en PATCH /empleados/tallas): varias filas de origen para la misma sucursal harían
+    que PostgreSQL aplique una cualquiera.
+    """
+    if len(lote.items) > LIMITE_LOTE:
+        raise HTTPException(status_code=400, detail=f"El lote admite hasta {LIMITE_LOTE} sucursales")
+    if not lote.items and lote.zona is None and lote.region is None:
+        raise HTTPException(status_code=400, detail="Indique las sucursales (items) o un filtro de zona o región")
+    hay_cambios = lote.is_empaquetado is not None or lote.numero_seguimiento is not None or any(
+        item.is_empaquetado is not None or item.numero_seguimiento is not None for item in lote.items
+    )
+    if not hay_cambios:
+        raise HTTPException(status_code=400, detail="No se proporcionó ningún campo para actualizar")
+
+    ultimo_por_id = {item.id: item for item in lote.items}
+    items = list(ultimo_por_id.values())
+    duplicados = sorted({item.id for item in lote.items if ultimo_por_id[item.id] is not item})
+
+    condiciones = []
+    valores = []
+    if items:
+        # Una fila por sucursal; los valores propios tienen prioridad sobre los generales
+        origen = "FROM unnest(%s::int[], %s::boolean[], %s::text[]) AS v (id, is_empaquetado, numero_seguimiento)"
+        valores += [
+            [item.id for item in items],
+            [item.is_empaquetado for item in items],
+            [item.numero_seguimiento for item in items],
+        ]
+        condiciones.append("s.id = v.id")
+        empaquetado = "COALESCE(v.is_empaquetado, %s, s.is_empaquetado)"
+        seguimiento = "COALESCE(v.numero_seguimiento, %s, s.numero_seguimiento)"
+    else:
+        origen = ""
+        empaquetado = "COALESCE(%s, s.is_empaquetado)"
+        seguimiento = "COALESCE(%s, s.numero_seguimiento)"
+    if lote.zona is not None:
+        condiciones.append("s.zona = %s")
+    if lote.region is not None:
+        condiciones.append("s.region = %s")
+
+    query = f"""
+        UPDATE sucursales AS s
+        SET is_empaquetado = {empaquetado}, numero_seguimiento = {seguimiento}
+        {origen}
+        WHERE {' AND '.join(condiciones)}
+        RETURNING s.*
+    """
+    # Los parámetros van en el orden en que aparecen: SET, FROM, WHERE
+    parametros = [lote.is_empaquetado, lote.numero_seguimiento] + valores
+    parametros += [filtro for filtro in (lote.zona, lote.region) if filtro is not None]
+
+    cursor = db.cursor()
+    try:
+        cursor.execute(query, parametros)
+        actualizadas = cursor.fetchall()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error al actualizar el envío de sucursales: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error al actualizar sucursales: {str(e)}")
+
+    for sucursal in actualizadas:
+        cache_sucursales.guardar(sucursal)
+    ids_actualizadas = {sucursal["id"] for sucursal in actualizadas}
+    return {
+        "actualizadas": len(actualizadas),
+        "sucursales": [dict(sucursal) for sucursal in actualizadas],
+        # Items que no existen o que no cumplen el filtro de zona/región
+        "no_actualizadas": sorted(set(ultimo_por_id) - ids_actualizadas),
+        # Ids repetidos en items: solo se aplicó su último elemento
+        "duplicados": duplicados,
+    }
+
 @router.put("/{sucursal_id}", response_model=Sucursal)
 def actualizar_sucursal(sucursal_id: int, sucursal: SucursalUpdate, db: psycopg2.extensions.connection = Depends(get_db)):
     cursor = db.cursor()
@@ -83,6 +200,7 @@ def actualizar_sucursal(sucursal_id: int, sucursal: SucursalUpdate, db: psycopg2
 
     if not sucursal_actualizada:
         raise HTTPException(status_code=404, detail="Sucursal no encontrada")
+    cache_sucursales.guardar(sucursal_actualizada)
 
     # Devolver la sucursal completa actualizada
     return dict(sucursal_actualizada)
@@ -104,5 +222,6 @@ def eliminar_sucursal(sucursal_id: int, db: psycopg2.extensions.connection = Dep
     
     if cursor.rowcount == 0:
         raise HTTPException(status_code=404, detail="Sucursal no encontrada")
+    cache_sucursales.quitar(sucursal_id)
     
     return {"message": "Sucursal eliminada"}
\ No newline at end of file
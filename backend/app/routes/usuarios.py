@@ -1,30 +1,88 @@
 # app/routes/usuarios.py
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from typing import List
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from passlib.context import CryptContext
-import secrets
 import logging 
 
 logger = logging.getLogger("app.usuarios")
 
-from ..database import get_db
+from ..database import get_db, conexion
+from ..contrasenas import verify_password, get_password_hash, HashSaturadoError
 from ..models import Usuario, UsuarioCreate, UsuarioLogin
+from .. import cache_sucursales
+from ..sesiones import crear_sesion, cerrar_sesion, cerrar_sesiones_usuario, sesion_actual, requiere_rol
 
 router = APIRouter(prefix="/usuarios", tags=["usuarios"])
 
-# Configuración para hashear contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def _saturado():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="El servidor está procesando demasiados inicios de sesión, intente de nuevo en unos segundos",
+        headers={"Retry-After": "1"}
+    )
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+def _validar_usuario_nuevo(usuario):
+    """Lanza HTTPException si el username ya existe o la sucursal no corresponde al rol"""
+    with conexion() as db:
+        cursor = db.cursor()
+        
+        # Verificar que el username no exista ya
+        cursor.execute("SELECT id FROM usuarios WHERE username = %s", (usuario.username,))
+        if cursor.fetchone():
+            logger.warning(f"El nombre de usuario {usuario.username} ya existe")
+            raise HTTPException(
+                status_code=400,
+                detail="El nombre de usuario ya existe"
+            )
+        
+        # Si es un administrador, asegurarse de que no tenga sucursal_id
+        if usuario.rol == "admin":
+            logger.info(f"Usuario {usuario.username} es admin, asignando sucursal_id a None")
+            usuario.sucursal_id = None
+        # Si es un manager, verificar que la sucursal existe
+        elif usuario.rol == "manager" and usuario.sucursal_id is not None:
+            logger.info(f"Usuario {usuario.username} es manager, verificando sucursal_id: {usuario.sucursal_id}")
+            if not cache_sucursales.existe(usuario.sucursal_id, cursor):
+                logger.warning(f"La sucursal con id {usuario.sucursal_id} no existe")
+                raise HTTPException(
+                    status_code=404,
+                    detail="La sucursal no existe"
+                )
+        elif usuario.rol == "manager" and usuario.sucursal_id is None:
+            logger.warning(f"Usuario manager {usuario.username} sin sucursal_id")
+            raise HTTPException(
+                status_code=400,
+                detail="Los usuarios manager requieren una sucursal_id"
+            )
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+def _insertar_usuario(usuario, hashed_password):
+    with conexion() as db:
+        cursor = db.cursor()
+        try:
+            # En PostgreSQL, usamos RETURNING para obtener el ID insertado
+            cursor.execute(
+                "INSERT INTO usuarios (username, password, rol, sucursal_id) VALUES (%s, %s, %s, %s) RETURNING id",
+                (usuario.username, hashed_password, usuario.rol, usuario.sucursal_id)
+            )
+            new_id = cursor.fetchone()['id']
+            db.commit()
+            return new_id
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error al crear usuario {usuario.username}: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error al crear usuario: {str(e)}")
 
 @router.post("/", response_model=Usuario)
-def crear_usuario(usuario: UsuarioCreate, db: psycopg2.extensions.connection = Depends(get_db)):
+async def crear_usuario(
+    usuario: UsuarioCreate,
+    sesion: dict = Depends(requiere_rol("admin"))
+):
+    """
+    Como login: las consultas corren en el threadpool y bcrypt en su pool acotado, sin
+    ocupar un hilo del threadpool (ni una conexión) mientras se calcula el hash.
+    """
     usuario_info = {
         "username": usuario.username,
         "rol": usuario.rol,
@@ -32,76 +90,52 @@ def crear_usuario(usuario: UsuarioCreate, db: psycopg2.extensions.connection = D
     }
     logger.debug(f"Datos recibidos del usuario: {usuario_info}")
     
-    cursor = db.cursor()
-    
-    # Verificar que el username no exista ya
-    cursor.execute("SELECT id FROM usuarios WHERE username = %s", (usuario.username,))
-    if cursor.fetchone():
-        logger.warning(f"El nombre de usuario {usuario.username} ya existe")
-        raise HTTPException(
-            status_code=400,
-            detail="El nombre de usuario ya existe"
-        )
-    
-    # Si es un administrador, asegurarse de que no tenga sucursal_id
-    if usuario.rol == "admin":
-        logger.info(f"Usuario {usuario.username} es admin, asignando sucursal_id a None")
-        usuario.sucursal_id = None
-    # Si es un manager, verificar que la sucursal existe
-    elif usuario.rol == "manager" and usuario.sucursal_id is not None:
-        logger.info(f"Usuario {usuario.username} es manager, verificando sucursal_id: {usuario.sucursal_id}")
-        cursor.execute("SELECT id FROM sucursales WHERE id = %s", (usuario.sucursal_id,))
-        if not cursor.fetchone():
-            logger.warning(f"La sucursal con id {usuario.sucursal_id} no existe")
-            raise HTTPException(
-                status_code=404,
-                detail="La sucursal no existe"
-            )
-    elif usuario.rol == "manager" and usuario.sucursal_id is None:
-        logger.warning(f"Usuario manager {usuario.username} sin sucursal_id")
-        raise HTTPException(
-            status_code=400,
-            detail="Los usuarios manager requieren una sucursal_id"
-        )
+    await run_in_threadpool(_validar_usuario_nuevo, usuario)
         
     try:
-        # Crear el usuario con contraseña hasheada
-        hashed_password = get_password_hash(usuario.password)
-        logger.debug(f"Contraseña hasheada para {usuario.username}")
-        
-        # En PostgreSQL, usamos RETURNING para obtener el ID insertado
-        cursor.execute(
-            "INSERT INTO usuarios (username, password, rol, sucursal_id) VALUES (%s, %s, %s, %s) RETURNING id",
-            (usuario.username, hashed_password, usuario.rol, usuario.sucursal_id)
-        )
-        
-        # Obtener el ID del nuevo usuario
-        new_id = cursor.fetchone()['id']
-        db.commit()
-        
-        # Devolver el usuario creado (sin la contraseña)
-        nuevo_usuario = Usuario(
-            id=new_id,
-            username=usuario.username,
-            rol=usuario.rol,
-            sucursal_id=usuario.sucursal_id
-        )
+        hashed_password = await get_password_hash(usuario.password)
+    except HashSaturadoError:
+        raise _saturado()
+    logger.debug(f"Contraseña hasheada para {usuario.username}")
+    
+    new_id = await run_in_threadpool(_insertar_usuario, usuario, hashed_password)
+    
+    # Devolver el usuario creado (sin la contraseña)
+    nuevo_usuario = Usuario(
+        id=new_id,
+        username=usuario.username,
+        rol=usuario.rol,
+        sucursal_id=usuario.sucursal_id
+    )
 
-        logger.info(f"Usuario creado: {nuevo_usuario.username} con id: {nuevo_usuario.id}")
-        
-        return nuevo_usuario
+    logger.info(f"Usuario creado: {nuevo_usuario.username} con id: {nuevo_usuario.id}")
     
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Error al crear usuario {usuario.username}: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error al crear usuario: {str(e)}")
+    return nuevo_usuario
     
     
+def _buscar_usuario(username):
+    with conexion() as db:
+        cursor = db.cursor()
+        cursor.execute("SELECT * FROM usuarios WHERE username = %s", (username,))
+        return cursor.fetchone()
+
+def _info_sucursal(sucursal_id):
+    sucursal = cache_sucursales.obtener(sucursal_id)
+    if not sucursal:
+        return None
+    return {
+        "id": sucursal_id,
+        "nombre": sucursal["nombre"],
+        "manager": sucursal["manager"]
+    }
+
 @router.post("/login")
-def login(datos: UsuarioLogin, db: psycopg2.extensions.connection = Depends(get_db)):
-    cursor = db.cursor()
-    cursor.execute("SELECT * FROM usuarios WHERE username = %s", (datos.username,))
-    usuario = cursor.fetchone()
+async def login(datos: UsuarioLogin):
+    """
+    Las consultas corren en el threadpool y bcrypt en su propio pool acotado, así que una
+    ola de inicios de sesión no deja sin hilos al resto de las solicitudes.
+    """
+    usuario = await run_in_threadpool(_buscar_usuario, datos.username)
     
     if not usuario:
         raise HTTPException(
@@ -109,7 +143,13 @@ def login(datos: UsuarioLogin, db: psycopg2.extensions.connection = Depends(get_
             detail="Credenciales incorrectas"
         )
     
-    if not verify_password(datos.password, usuario["password"]):
+    try:
+        valida = await verify_password(datos.password, usuario["password"])
+    except HashSaturadoError:
+        logger.warning("Pool de hashing saturado, se rechaza inicio de sesión")
+        raise _saturado()
+    
+    if not valida:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Credenciales incorrectas"
@@ -118,17 +158,10 @@ def login(datos: UsuarioLogin, db: psycopg2.extensions.connection = Depends(get_
     # Si es un manager, obtener información de la sucursal
     sucursal_info = None
     if usuario["rol"] == "manager" and usuario["sucursal_id"]:
-        cursor.execute("SELECT nombre, manager FROM sucursales WHERE id = %s", (usuario["sucursal_id"],))
-        sucursal = cursor.fetchone()
-        if sucursal:
-            sucursal_info = {
-                "id": usuario["sucursal_id"],
-                "nombre": sucursal["nombre"],
-                "manager": sucursal["manager"]
-            }
+        sucursal_info = await run_in_threadpool(_info_sucursal, usuario["sucursal_id"])
     
-    # Crear un token simple (en producción usarías JWT)
-    token = secrets.token_hex(32)
+    # El token identifica la sesión en las siguientes solicitudes (Authorization: Bearer <token>)
+    token, expira = await run_in_threadpool(crear_sesion, usuario)
     
     return {
         "id": usuario["id"],
@@ -136,18 +169,41 @@ def login(datos: UsuarioLogin, db: psycopg2.extensions.connection = Depends(get_
         "rol": usuario["rol"],
         "sucursal_id": usuario["sucursal_id"],
         "sucursal": sucursal_info,
-        "token": token
+        "token": token,
+        "expira": expira
     }
 
+@router.get("/me")
+def usuario_actual(sesion: dict = Depends(sesion_actual)):
+    """Usuario de la sesión actual, sin consultar la base de datos"""
+    return {
+        "id": sesion["usuario_id"],
+        "username": sesion["username"],
+        "rol": sesion["rol"],
+        "sucursal_id": sesion["sucursal_id"]
+    }
+
+@router.post("/logout")
+def logout(sesion: dict = Depends(sesion_actual)):
+    cerrar_sesion(sesion["token"])
+    return {"message": "Sesión cerrada"}
+
 @router.get("/", response_model=List[Usuario])
-def listar_usuarios(db: psycopg2.extensions.connection = Depends(get_db)):
+def listar_usuarios(
+    db: psycopg2.extensions.connection = Depends(get_db),
+    sesion: dict = Depends(requiere_rol("admin"))
+):
     cursor = db.cursor()
     cursor.execute("SELECT id, username, rol, sucursal_id FROM usuarios")
     usuarios = cursor.fetchall()
     return list(usuarios)
 
 @router.delete("/{usuario_id}")
-def eliminar_usuario(usuario_id: int, db: psycopg2.extensions.connection = Depends(get_db)):
+def eliminar_usuario(
+    usuario_id: int,
+    db: psycopg2.extensions.connection = Depends(get_db),
+    sesion: dict = Depends(requiere_rol("admin"))
+):
     cursor = db.cursor()
     cursor.execute("DELETE FROM usuarios WHERE id = %s", (usuario_id,))
     db.commit()
@@ -155,4 +211,5 @@ def eliminar_usuario(usuario_id: int, db: psycopg2.extensions.connection = Depen
     if cursor.rowcount == 0:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     
+    cerrar_sesiones_usuario(usuario_id)
     return {"message": "Usuario eliminado"}
\ No newline at end of file
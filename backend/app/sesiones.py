@@ -0,0 +1,249 @@
+# app/sesiones.py
+import os
+import time
+import hashlib
+import secrets
+import threading
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import Header, HTTPException, status
+
+logger = logging.getLogger("app.sesiones")
+
+from .database import conexion
+
+# "db" (por defecto) o "memoria": con "db" las sesiones sobreviven reinicios y se comparten entre
+# workers; "memoria" solo sirve con un único worker (ver verificar_configuracion)
+SESIONES_BACKEND = os.environ.get("SESIONES_BACKEND", "db")
+# Duración de una sesión y número máximo de sesiones en memoria por proceso
+SESIONES_TTL_HORAS = int(os.environ.get("SESIONES_TTL_HORAS", "12"))
+SESIONES_MAX = int(os.environ.get("SESIONES_MAX", "10000"))
+# Con "db", segundos que un worker confía en su copia en memoria antes de volver a consultar
+# la tabla; es el tiempo máximo que un token cerrado en otro worker sigue siendo aceptado
+SESIONES_VERIFICAR_SEGUNDOS = float(os.environ.get("SESIONES_VERIFICAR_SEGUNDOS", "30"))
+# Con "db", segundos que un token desconocido, vencido o cerrado se rechaza sin consultar la tabla
+SESIONES_RECHAZO_SEGUNDOS = float(os.environ.get("SESIONES_RECHAZO_SEGUNDOS", "30"))
+# Token fijo para que un recolector (p. ej. Prometheus) lea /metrics y los endpoints de estado
+# sin sesión; si no se define, solo un administrador con sesión puede leerlos
+MONITOREO_TOKEN = os.environ.get("MONITOREO_TOKEN")
+
+
+class AlmacenSesionesMemoria:
+    """
+    Sesiones en un diccionario LRU con vencimiento. Validar un token es una búsqueda
+    en el diccionario; al llenarse se descartan las sesiones usadas hace más tiempo.
+    """
+
+    def __init__(self, maximo=SESIONES_MAX):
+        self.maximo = maximo
+        self._sesiones = OrderedDict()  # token -> sesión
+        self._lock = threading.Lock()
+
+    def guardar(self, token, sesion):
+        with self._lock:
+            self._sesiones[token] = sesion
+            self._sesiones.move_to_end(token)
+            while len(self._sesiones) > self.maximo:
+                self._sesiones.popitem(last=False)
+
+    def obtener(self, token):
+        with self._lock:
+            sesion = self._sesiones.get(token)
+            if sesion is None:
+                return None
+            if sesion["expira"] <= time.time():
+                del self._sesiones[token]
+                return None
+            self._sesiones.move_to_end(token)
+            return sesion
+
+    def eliminar(self, token):
+        with self._lock:
+            self._sesiones.pop(token, None)
+
+    def eliminar_usuario(self, usuario_id):
+        with self._lock:
+            for token in [t for t, s in self._sesiones.items() if s["usuario_id"] == usuario_id]:
+                del self._sesiones[token]
+
+
+class AlmacenSesionesDB(AlmacenSesionesMemoria):
+    """
+    Sesiones en la tabla sesiones (migraciones 004 y 008) con la memoria como caché: un
+    worker vuelve a consultar la tabla cuando su copia tiene más de SESIONES_VERIFICAR_SEGUNDOS,
+    así un logout o un usuario eliminado en otro worker deja de valer en ese plazo.
+    Los tokens que la tabla rechaza se recuerdan SESIONES_RECHAZO_SEGUNDOS: repetir un token
+    inválido no vuelve a consultarla. Un token nuevo nunca está en esa lista (es aleatorio).
+    """
+
+    def __init__(self, maximo=SESIONES_MAX, verificar_segundos=SESIONES_VERIFICAR_SEGUNDOS,
+                 rechazo_segundos=SESIONES_RECHAZO_SEGUNDOS):
+        super().__init__(maximo)
+        self.verificar_segundos = verificar_segundos
+        self.rechazo_segundos = rechazo_segundos
+        self._rechazados = OrderedDict()  # token -> instante (monotonic) hasta el que se rechaza
+
+    def _rechazado(self, token):
+        with self._lock:
+            hasta = self._rechazados.get(token)
+            if hasta is None:
+                return False
+            if hasta <= time.monotonic():
+                del self._rechazados[token]
+                return False
+            return True
+
+    def _rechazar(self, token):
+        with self._lock:
+            self._rechazados[token] = time.monotonic() + self.rechazo_segundos
+            self._rechazados.move_to_end(token)
+            while len(self._rechazados) > self.maximo:
+                self._rechazados.popitem(last=False)
+
+    @staticmethod
+    def _hash(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def guardar(self, token, sesion):
+        with conexion() as db:
+            cursor = db.cursor()
+            cursor.execute("""
+                INSERT INTO sesiones (token_hash, usuario_id, username, rol, sucursal_id, expira)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, (self._hash(token), sesion["usuario_id"], sesion["username"], sesion["rol"],
+                  sesion["sucursal_id"], datetime.fromtimestamp(sesion["expira"], tz=timezone.utc)))
+            db.commit()
+        super().guardar(token, {**sesion, "verificada": time.monotonic()})
+
+    def obtener(self, token):
+        sesion = super().obtener(token)
+        if sesion is not None and time.monotonic() - sesion["verificada"] < self.verificar_segundos:
+            return sesion
+        if sesion is None and self._rechazado(token):
+            return None
+
+        with conexion() as db:
+            cursor = db.cursor()
+            cursor.execute("""
+                SELECT usuario_id, username, rol, sucursal_id, expira
+                FROM sesiones
+                WHERE token_hash = %s AND expira > NOW()
+            """, (self._hash(token),))
+            fila = cursor.fetchone()
+        if fila is None:
+            # Desconocida, vencida, o cerrada o eliminada desde otro worker
+            super().eliminar(token)
+            self._rechazar(token)
+            return None
+
+        sesion = {**fila, "expira": fila["expira"].timestamp(), "verificada": time.monotonic()}
+        super().guardar(token, sesion)
+        return sesion
+
+    def eliminar(self, token):
+        super().eliminar(token)
+        self._rechazar(token)
+        with conexion() as db:
+            cursor = db.cursor()
+            cursor.execute("DELETE FROM sesiones WHERE token_hash = %s OR expira <= NOW()", (self._hash(token),))
+            db.commit()
+
+    def eliminar_usuario(self, usuario_id):
+        super().eliminar_usuario(usuario_id)
+        with conexion() as db:
+            cursor = db.cursor()
+            cursor.execute("DELETE FROM sesiones WHERE usuario_id = %s", (usuario_id,))
+            db.commit()
+
+
+_almacen = AlmacenSesionesMemoria() if SESIONES_BACKEND == "memoria" else AlmacenSesionesDB()
+
+
+def verificar_configuracion():
+    """
+    Se llama al iniciar: con varios workers el almacén en memoria da 401 al azar (cada
+    worker conoce solo sus sesiones) y pierde todas en cada reinicio, así que no se permite.
+    """
+    if SESIONES_BACKEND not in ("db", "memoria"):
+        raise RuntimeError(f"SESIONES_BACKEND no válido: {SESIONES_BACKEND!r} (opciones: db, memoria)")
+    workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+    if SESIONES_BACKEND == "memoria" and workers > 1:
+        raise RuntimeError(
+            f"SESIONES_BACKEND=memoria no funciona con {workers} workers (WEB_CONCURRENCY); use SESIONES_BACKEND=db"
+        )
+
+
+def set_almacen(almacen):
+    """Reemplaza el almacén de sesiones del proceso"""
+    global _almacen
+    _almacen = almacen
+
+
+def crear_sesion(usuario):
+    """Crea una sesión para el usuario (fila de la tabla usuarios) y retorna su token"""
+    token = secrets.token_hex(32)
+    expira = datetime.now() + timedelta(hours=SESIONES_TTL_HORAS)
+    _almacen.guardar(token, {
+        "usuario_id": usuario["id"],
+        "username": usuario["username"],
+        "rol": usuario["rol"],
+        "sucursal_id": usuario["sucursal_id"],
+        "expira": expira.timestamp(),
+    })
+    return token, expira
+
+
+def cerrar_sesion(token):
+    _almacen.eliminar(token)
+
+
+def cerrar_sesiones_usuario(usuario_id):
+    _almacen.eliminar_usuario(usuario_id)
+
+
+def _token(authorization):
+    if not authorization:
+        return None
+    esquema, _, token = authorization.partition(" ")
+    if esquema.lower() != "bearer" or not token:
+        return None
+    return token.strip()
+
+
+def sesion_actual(authorization: Optional[str] = Header(None)):
+    """Dependencia: sesión del token en `Authorization: Bearer <token>`, o 401"""
+    token = _token(authorization)
+    sesion = _almacen.obtener(token) if token else None
+    if sesion is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Sesión inválida o expirada",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return {**sesion, "token": token}
+
+
+def requiere_rol(*roles):
+    """Dependencia: como sesion_actual, pero además exige uno de los roles indicados (403 si no)"""
+    def dependencia(authorization: Optional[str] = Header(None)):
+        sesion = sesion_actual(authorization)
+        if sesion["rol"] not in roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="No tiene permisos para esta operación"
+            )
+        return sesion
+    return dependencia
+
+
+def requiere_monitoreo(authorization: Optional[str] = Header(None)):
+    """
+    Dependencia de /metrics y los endpoints de estado: acepta `Authorization: Bearer <MONITOREO_TOKEN>`
+    o la sesión de un administrador (401/403 como requiere_rol)
+    """
+    token = _token(authorization)
+    if MONITOREO_TOKEN and token and secrets.compare_digest(token, MONITOREO_TOKEN):
+        return None
+    return requiere_rol("admin")(authorization)
@@ -0,0 +1,192 @@
+# app/storage.py
+import os
+import time
+import shutil
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+logger = logging.getLogger("app.storage")
+
+from .database import get_supabase_client, SUPABASE_URL, SUPABASE_KEY
+from .metricas import medir_fase
+
+# "supabase" (por defecto) o "local": un directorio que imita el object store, para desarrollo y pruebas
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "supabase")
+STORAGE_LOCAL_DIR = Path(os.environ.get("STORAGE_LOCAL_DIR", Path(__file__).parent.parent / "storage_local"))
+
+# Subidas en segundo plano: hilos dedicados, intentos por archivo y espera base entre intentos (se duplica)
+SUBIDAS_WORKERS = int(os.environ.get("SUBIDAS_WORKERS", "1"))
+SUBIDAS_REINTENTOS = int(os.environ.get("SUBIDAS_REINTENTOS", "3"))
+SUBIDAS_ESPERA = float(os.environ.get("SUBIDAS_ESPERA", "1"))
+
+
+class StorageSupabase:
+    """
+    Cliente de Supabase Storage compartido por todo el proceso. El cliente se crea una
+    sola vez y la existencia de cada bucket se verifica solo la primera vez que se usa.
+    """
+
+    def __init__(self, cliente=None):
+        self._cliente = cliente
+        self._buckets = set()
+        self._lock = threading.Lock()
+
+    def _storage(self):
+        with self._lock:
+            if self._cliente is None:
+                self._cliente = get_supabase_client()
+            return self._cliente.storage
+
+    def asegurar_bucket(self, bucket):
+        if bucket in self._buckets:
+            return
+        storage = self._storage()
+        try:
+            if not any(b.name == bucket for b in storage.list_buckets()):
+                logger.debug(f"El bucket '{bucket}' no existe, intentando crearlo")
+                storage.create_bucket(bucket, options={"public": False})
+                logger.info(f"Bucket '{bucket}' creado exitosamente")
+        except Exception as e:
+            # Sin permisos para listar buckets la subida todavía puede funcionar
+            logger.warning(f"Error al verificar o crear bucket: {str(e)}")
+            return
+        with self._lock:
+            self._buckets.add(bucket)
+
+    def subir(self, bucket, nombre, ruta, content_type):
+        with open(ruta, "rb") as archivo:
+            contenido = archivo.read()
+        self._storage().from_(bucket).upload(
+            nombre, contenido, {"content-type": content_type, "upsert": "true"}
+        )
+
+    def url_firmada(self, bucket, nombre, segundos):
+        return self._storage().from_(bucket).create_signed_url(nombre, segundos)["signedURL"]
+
+    def eliminar(self, bucket, nombres):
+        self._storage().from_(bucket).remove(list(nombres))
+
+
+class StorageLocal:
+    """Object store en un directorio local con la misma interfaz que StorageSupabase"""
+
+    def __init__(self, raiz=STORAGE_LOCAL_DIR):
+        self.raiz = Path(raiz)
+
+    def asegurar_bucket(self, bucket):
+        os.makedirs(self.raiz / bucket, exist_ok=True)
+
+    def subir(self, bucket, nombre, ruta, content_type):
+        shutil.copyfile(ruta, self.raiz / bucket / nombre)
+
+    def url_firmada(self, bucket, nombre, segundos):
+        if not (self.raiz / bucket / nombre).exists():
+            raise FileNotFoundError(f"{bucket}/{nombre}")
+        expira = int(time.time()) + segundos
+        return f"{(self.raiz / bucket / nombre).resolve().as_uri()}?expira={expira}"
+
+    def eliminar(self, bucket, nombres):
+        for nombre in nombres:
+            try:
+                (self.raiz / bucket / nombre).unlink()
+            except FileNotFoundError:
+                pass
+
+
+_storage = None
+_storage_lock = threading.Lock()
+_executor = None
+_aviso_sin_supabase = False
+
+
+def get_storage():
+    """Storage del proceso según STORAGE_BACKEND; None si Supabase no está configurado"""
+    global _storage, _aviso_sin_supabase
+    with _storage_lock:
+        if _storage is None:
+            if STORAGE_BACKEND == "local":
+                _storage = StorageLocal()
+            elif SUPABASE_URL and SUPABASE_KEY:
+                _storage = StorageSupabase()
+            else:
+                # Se consulta en cada reporte: avisar solo la primera vez
+                if not _aviso_sin_supabase:
+                    _aviso_sin_supabase = True
+                    logger.warning("SUPABASE_URL o SUPABASE_KEY no configuradas, los reportes solo se guardan localmente")
+                return None
+        return _storage
+
+
+def set_storage(storage):
+    """Reemplaza el storage del proceso (p. ej. por un StorageLocal en pruebas)"""
+    global _storage
+    with _storage_lock:
+        _storage = storage
+
+
+def _get_executor():
+    global _executor
+    with _storage_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=SUBIDAS_WORKERS, thread_name_prefix="subida")
+        return _executor
+
+
+def subir_con_reintentos(storage, bucket, nombre, ruta, content_type, segundos_url):
+    """Sube el archivo y genera su URL firmada, reintentando con espera exponencial"""
+    for intento in range(1, SUBIDAS_REINTENTOS + 1):
+        try:
+            storage.asegurar_bucket(bucket)
+            storage.subir(bucket, nombre, ruta, content_type)
+            url = storage.url_firmada(bucket, nombre, segundos_url)
+            return url, datetime.now() + timedelta(seconds=segundos_url)
+        except Exception as e:
+            if intento == SUBIDAS_REINTENTOS:
+                raise
+            espera = SUBIDAS_ESPERA * 2 ** (intento - 1)
+            logger.warning(f"Error al subir '{nombre}' (intento {intento}), reintentando en {espera}s: {str(e)}")
+            time.sleep(espera)
+
+
+def _tarea_subida(storage, bucket, nombre, ruta, content_type, segundos_url, al_terminar, fase_metrica):
+    try:
+        if fase_metrica is not None:
+            with medir_fase(fase_metrica, "subida"):
+                url, expiracion = subir_con_reintentos(storage, bucket, nombre, ruta, content_type, segundos_url)
+        else:
+            url, expiracion = subir_con_reintentos(storage, bucket, nombre, ruta, content_type, segundos_url)
+    except Exception as e:
+        logger.error(f"No se pudo subir '{nombre}' a {bucket}: {str(e)}")
+        return None
+    logger.info(f"Archivo '{nombre}' subido a {bucket}")
+    if al_terminar is not None:
+        try:
+            al_terminar(url, expiracion)
+        except Exception as e:
+            logger.error(f"Error al registrar la subida de '{nombre}': {str(e)}")
+    return url
+
+
+def subir_en_segundo_plano(bucket, nombre, ruta, content_type, segundos_url, al_terminar=None, fase_metrica=None):
+    """
+    Encola la subida del archivo y retorna su future (o None si no hay storage configurado).
+    Cuando termina se llama a `al_terminar(url, expiracion)` desde el hilo de subida.
+    Con `fase_metrica` (tipo de reporte) la duración se registra como fase "subida".
+    """
+    storage = get_storage()
+    if storage is None:
+        return None
+    return _get_executor().submit(
+        _tarea_subida, storage, bucket, nombre, ruta, content_type, segundos_url, al_terminar, fase_metrica
+    )
+
+
+def cerrar_subidas():
+    global _executor
+    with _storage_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
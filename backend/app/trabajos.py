@@ -0,0 +1,173 @@
+# app/trabajos.py
+import os
+import uuid
+import asyncio
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+logger = logging.getLogger("app.trabajos")
+
+# Número de trabajos (reportes) que pueden ejecutarse al mismo tiempo en este proceso
+TRABAJOS_WORKERS = int(os.environ.get("TRABAJOS_WORKERS", "2"))
+# Cuántos trabajos terminados se conservan para consultar su estado
+TRABAJOS_HISTORIAL = int(os.environ.get("TRABAJOS_HISTORIAL", "200"))
+
+PENDIENTE = "pendiente"
+EN_PROCESO = "en_proceso"
+COMPLETADO = "completado"
+ERROR = "error"
+
+_executor = None
+_executor_lock = threading.Lock()
+_trabajos = OrderedDict()  # id -> registro del trabajo
+_en_curso = {}  # clave -> id del trabajo pendiente o en proceso con esa clave
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=TRABAJOS_WORKERS, thread_name_prefix="trabajo")
+    return _executor
+
+
+def _ejecutar(trabajo_id, clave, funcion, args, kwargs):
+    try:
+        return _ejecutar_trabajo(trabajo_id, funcion, args, kwargs)
+    finally:
+        if clave is not None:
+            with _lock:
+                if _en_curso.get(clave) == trabajo_id:
+                    del _en_curso[clave]
+
+
+def _ejecutar_trabajo(trabajo_id, funcion, args, kwargs):
+    with _lock:
+        trabajo = _trabajos.get(trabajo_id)
+        if trabajo is not None:
+            trabajo["estado"] = EN_PROCESO
+            trabajo["iniciado"] = datetime.now()
+
+    logger.info(f"Iniciando trabajo {trabajo_id}")
+    try:
+        resultado = funcion(*args, **kwargs)
+    except Exception as e:
+        logger.error(f"Error en trabajo {trabajo_id}: {str(e)}")
+        logger.exception("Traceback completo:")
+        with _lock:
+            if trabajo is not None:
+                trabajo["estado"] = ERROR
+                trabajo["error"] = str(e)
+                trabajo["terminado"] = datetime.now()
+        raise
+
+    with _lock:
+        if trabajo is not None:
+            trabajo["estado"] = COMPLETADO
+            trabajo["resultado"] = resultado
+            trabajo["terminado"] = datetime.now()
+    logger.info(f"Trabajo {trabajo_id} completado")
+    return resultado
+
+
+def _purgar_historial():
+    """Elimina los trabajos terminados más antiguos cuando se supera el historial (llamar con _lock)"""
+    exceso = len(_trabajos) - TRABAJOS_HISTORIAL
+    if exceso <= 0:
+        return
+    for trabajo_id in list(_trabajos):
+        if exceso <= 0:
+            break
+        if _trabajos[trabajo_id]["estado"] in (COMPLETADO, ERROR):
+            del _trabajos[trabajo_id]
+            exceso -= 1
+
+
+def enviar_trabajo(tipo, funcion, *args, **kwargs):
+    """
+    Encola `funcion(*args, **kwargs)` en el pool de workers y retorna el id del trabajo.
+    La función se ejecuta en un hilo aparte, así que puede bloquear (psycopg2, pandas, etc.)
+    sin congelar el event loop.
+    """
+    return _enviar(None, tipo, funcion, args, kwargs)
+
+
+def enviar_trabajo_unico(clave, tipo, funcion, *args, **kwargs):
+    """
+    Igual que enviar_trabajo, pero si ya hay un trabajo pendiente o en proceso con la
+    misma `clave` retorna su id en lugar de encolar otro (single-flight).
+    """
+    return _enviar(clave, tipo, funcion, args, kwargs)
+
+
+def _enviar(clave, tipo, funcion, args, kwargs):
+    with _lock:
+        if clave is not None and clave in _en_curso:
+            trabajo_id = _en_curso[clave]
+            logger.debug(f"Reutilizando trabajo en curso {trabajo_id} ({tipo})")
+            return trabajo_id
+
+        trabajo_id = uuid.uuid4().hex
+        trabajo = {
+            "id": trabajo_id,
+            "tipo": tipo,
+            "clave": clave,
+            "estado": PENDIENTE,
+            "creado": datetime.now(),
+            "iniciado": None,
+            "terminado": None,
+            "resultado": None,
+            "error": None,
+        }
+        _trabajos[trabajo_id] = trabajo
+        if clave is not None:
+            _en_curso[clave] = trabajo_id
+        _purgar_historial()
+        # Se encola dentro del lock para que quien reutilice el trabajo siempre encuentre su future
+        trabajo["_future"] = _get_executor().submit(_ejecutar, trabajo_id, clave, funcion, args, kwargs)
+
+    logger.debug(f"Trabajo {trabajo_id} ({tipo}) encolado")
+    return trabajo_id
+
+
+def obtener_trabajo(trabajo_id):
+    """Retorna una copia del estado público del trabajo, o None si no existe"""
+    with _lock:
+        trabajo = _trabajos.get(trabajo_id)
+        if trabajo is None:
+            return None
+        return {k: v for k, v in trabajo.items() if not k.startswith("_")}
+
+
+async def esperar_trabajo(trabajo_id):
+    """Espera sin bloquear el event loop a que termine el trabajo y retorna su resultado"""
+    with _lock:
+        trabajo = _trabajos.get(trabajo_id)
+    if trabajo is None:
+        raise KeyError(trabajo_id)
+    return await asyncio.wrap_future(trabajo["_future"])
+
+
+def estadisticas_trabajos():
+    with _lock:
+        estados = [t["estado"] for t in _trabajos.values()]
+    return {
+        "workers": TRABAJOS_WORKERS,
+        "pendientes": estados.count(PENDIENTE),
+        "en_proceso": estados.count(EN_PROCESO),
+        "completados": estados.count(COMPLETADO),
+        "errores": estados.count(ERROR),
+    }
+
+
+def cerrar_trabajos():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
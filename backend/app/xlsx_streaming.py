@@ -0,0 +1,197 @@
+# app/xlsx_streaming.py
+import re
+import math
+import numbers
+import zipfile
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+import numpy as np
+
+# Bytes acumulados antes de entregar un bloque a la respuesta
+TAMANO_BLOQUE = 64 * 1024
+
+# Caracteres de control que XML 1.0 no permite
+_CARACTERES_INVALIDOS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '{hojas}'
+    '</Types>'
+)
+_CONTENT_TYPE_HOJA = (
+    '<Override PartName="/xl/worksheets/sheet{n}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>{hojas}</sheets>'
+    '</workbook>'
+)
+_WORKBOOK_HOJA = '<sheet name="{nombre}" sheetId="{n}" r:id="rId{n}"/>'
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '{hojas}'
+    '<Relationship Id="rId{estilos}" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK_RELS_HOJA = (
+    '<Relationship Id="rId{n}" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet{n}.xml"/>'
+)
+# Estilos mínimos: una fuente, sin rellenos ni bordes; el estilo 1 pone en negritas el encabezado
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+_HOJA_INICIO = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+)
+_HOJA_FIN = '</sheetData></worksheet>'
+
+
+class _Salida:
+    """Destino de escritura del zip sin seek: acumula bytes hasta que el generador los entrega"""
+
+    def __init__(self, copia=None):
+        self._partes = []
+        self.tamano = 0
+        self._copia = copia
+
+    def write(self, datos):
+        if datos:
+            self._partes.append(bytes(datos))
+            self.tamano += len(datos)
+            if self._copia is not None:
+                self._copia.write(datos)
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b"".join(self._partes)
+        self._partes = []
+        self.tamano = 0
+        return datos
+
+
+def letra_columna(indice):
+    """0 -> A, 25 -> Z, 26 -> AA"""
+    letras = ""
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _celda(referencia, valor, estilo=""):
+    if valor is None:
+        return ""
+    if isinstance(valor, (bool, np.bool_)):
+        return f'<c r="{referencia}"{estilo} t="b"><v>{int(bool(valor))}</v></c>'
+    if isinstance(valor, numbers.Number):
+        if isinstance(valor, float) and (math.isnan(valor) or math.isinf(valor)):
+            return ""
+        return f'<c r="{referencia}"{estilo}><v>{valor}</v></c>'
+    if isinstance(valor, (datetime, date)):
+        valor = valor.isoformat()
+    texto = escape(_CARACTERES_INVALIDOS.sub("", str(valor)))
+    return f'<c r="{referencia}"{estilo} t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def _fila(numero, letras, valores, estilo=""):
+    celdas = "".join(_celda(f"{letra}{numero}", valor, estilo) for letra, valor in zip(letras, valores))
+    return f'<row r="{numero}">{celdas}</row>'
+
+
+def _anchos_xml(anchos):
+    if not anchos:
+        return ""
+    columnas = "".join(
+        f'<col min="{i}" max="{i}" width="{ancho}" customWidth="1"/>'
+        for i, ancho in enumerate(anchos, start=1) if ancho
+    )
+    return f"<cols>{columnas}</cols>"
+
+
+def generar_xlsx(hojas, copia=None):
+    """
+    Genera un archivo XLSX por bloques de bytes, sin construir el libro en memoria.
+
+    `hojas` es una lista de (nombre, columnas, filas) donde `filas` puede ser cualquier
+    iterable (por ejemplo un cursor del lado del servidor) y opcionalmente un cuarto
+    elemento con los anchos de columna (una lista, o una función que la retorna y que se
+    llama justo antes de escribir la hoja). Las celdas se escriben como texto en línea, así
+    que no hace falta la tabla de cadenas compartidas. Si se pasa `copia` (un archivo
+    abierto en modo binario), cada bloque también se escribe ahí.
+    """
+    hojas = list(hojas)
+    nombres = [escape(str(hoja[0])[:31], {'"': "&quot;"}) for hoja in hojas]
+    salida = _Salida(copia)
+
+    with zipfile.ZipFile(salida, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES.format(
+            hojas="".join(_CONTENT_TYPE_HOJA.format(n=n) for n in range(1, len(hojas) + 1))
+        ))
+        zf.writestr("_rels/.rels", _RELS)
+        zf.writestr("xl/workbook.xml", _WORKBOOK.format(
+            hojas="".join(_WORKBOOK_HOJA.format(nombre=nombre, n=n) for n, nombre in enumerate(nombres, start=1))
+        ))
+        zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS.format(
+            hojas="".join(_WORKBOOK_RELS_HOJA.format(n=n) for n in range(1, len(hojas) + 1)),
+            estilos=len(hojas) + 1
+        ))
+        zf.writestr("xl/styles.xml", _STYLES)
+        yield salida.vaciar()
+
+        for n, hoja in enumerate(hojas, start=1):
+            _, columnas, filas = hoja[:3]
+            anchos = hoja[3] if len(hoja) > 3 else None
+            if callable(anchos):
+                anchos = anchos()
+            letras = [letra_columna(i) for i in range(len(columnas))]
+
+            with zf.open(f"xl/worksheets/sheet{n}.xml", "w", force_zip64=True) as parte:
+                parte.write((_HOJA_INICIO + _anchos_xml(anchos) + "<sheetData>").encode())
+                parte.write(_fila(1, letras, columnas, ' s="1"').encode())
+                for numero, valores in enumerate(filas, start=2):
+                    parte.write(_fila(numero, letras, valores).encode())
+                    if salida.tamano >= TAMANO_BLOQUE:
+                        yield salida.vaciar()
+                parte.write(_HOJA_FIN.encode())
+            yield salida.vaciar()
+
+    yield salida.vaciar()
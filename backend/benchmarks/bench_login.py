@@ -0,0 +1,103 @@
+# benchmarks/bench_login.py
+"""
+Mide el throughput de /usuarios/login con muchos inicios de sesión simultáneos y la
+latencia de una solicitud ajena (GET /test-cors) mientras tanto, comparando bcrypt en
+el threadpool de la app (como antes) contra el pool de hashing acotado.
+
+No necesita base de datos: el usuario se busca en memoria.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_login --logins 200 --concurrencia 50
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+
+from app.main import app
+from app import contrasenas
+from app.routes import usuarios
+from benchmarks.comun import percentil
+
+PASSWORD = "password123"
+
+
+async def _verify_inline(plain_password, hashed_password):
+    # Comportamiento anterior: bcrypt ocupa un hilo del threadpool compartido
+    return await run_in_threadpool(contrasenas.pwd_context.verify, plain_password, hashed_password)
+
+
+async def correr(cliente, logins, concurrencia):
+    latencias, rechazos, sondas = [], 0, []
+    semaforo = asyncio.Semaphore(concurrencia)
+    terminado = asyncio.Event()
+
+    async def un_login():
+        nonlocal rechazos
+        async with semaforo:
+            inicio = time.perf_counter()
+            respuesta = await cliente.post("/usuarios/login", json={"username": "manager", "password": PASSWORD})
+            if respuesta.status_code == 503:
+                rechazos += 1
+            elif respuesta.status_code != 200:
+                raise SystemExit(f"login respondió {respuesta.status_code}: {respuesta.text}")
+            else:
+                latencias.append(time.perf_counter() - inicio)
+
+    async def sonda():
+        while not terminado.is_set():
+            inicio = time.perf_counter()
+            await cliente.get("/test-cors")
+            sondas.append(time.perf_counter() - inicio)
+            await asyncio.sleep(0.01)
+
+    tarea_sonda = asyncio.create_task(sonda())
+    inicio = time.perf_counter()
+    await asyncio.gather(*(un_login() for _ in range(logins)))
+    total = time.perf_counter() - inicio
+    terminado.set()
+    await tarea_sonda
+    return total, latencias, rechazos, sondas
+
+
+def imprimir(nombre, total, latencias, rechazos, sondas):
+    print(f"{nombre}:")
+    print(f"  logins/s:        {len(latencias) / total:8.1f}  ({len(latencias)} ok, {rechazos} rechazados con 503)")
+    print(f"  login p50 / p95: {percentil(latencias, 0.50) * 1000:8.1f} / {percentil(latencias, 0.95) * 1000:.1f} ms")
+    print(f"  sonda p50 / p95: {percentil(sondas, 0.50) * 1000:8.1f} / {percentil(sondas, 0.95) * 1000:.1f} ms"
+          f"  ({len(sondas)} solicitudes GET /test-cors)")
+
+
+async def main_async(args):
+    hash_manager = contrasenas.pwd_context.hash(PASSWORD)
+    usuario = {"id": 2, "username": "manager", "password": hash_manager, "rol": "admin", "sucursal_id": None}
+    usuarios._buscar_usuario = lambda username: usuario if username == "manager" else None
+
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        verify_pool = usuarios.verify_password
+        usuarios.verify_password = _verify_inline
+        imprimir("bcrypt en el threadpool", *await correr(cliente, args.logins, args.concurrencia))
+
+        usuarios.verify_password = verify_pool
+        imprimir(
+            f"pool de hashing ({contrasenas.HASH_WORKERS} hilos, cola {contrasenas.HASH_COLA_MAX})",
+            *await correr(cliente, args.logins, args.concurrencia)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrencia", type=int, default=50)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
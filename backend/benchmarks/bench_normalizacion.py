@@ -0,0 +1,87 @@
+# benchmarks/bench_normalizacion.py
+"""
+Compara la normalización escalar (normalizar_texto / normalizar_fecha fila por fila)
+contra la versión por columna con memo, sobre data.csv repetido N veces.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_normalizacion --escala 100
+"""
+import argparse
+import time
+from pathlib import Path
+import pandas as pd
+
+from app.database import normalizar_texto, normalizar_fecha
+from app.normalizacion import (
+    normalizar_texto_columna,
+    normalizar_fecha_columna,
+    normalizar_texto_cache,
+    normalizar_fecha_cache,
+)
+
+DATA_CSV = Path(__file__).parent.parent / "data" / "data.csv"
+
+COLUMNAS_TEXTO = ["Nombre", "Puesto HC", "Puesto Homologado", "Zona", "Gerencia", "Región",
+                  "Ubicación PDV", "Ubicación HC", "ASESORRH", "Categoría", "Areanom"]
+COLUMNAS_FECHA = ["Fing", "Fingpto"]
+
+
+def cargar(escala):
+    df = pd.read_csv(DATA_CSV, encoding="latin-1", dtype=str, keep_default_na=False)
+    return pd.concat([df] * escala, ignore_index=True)
+
+
+def escalar(df):
+    resultado = {}
+    for columna in COLUMNAS_TEXTO:
+        resultado[columna] = [normalizar_texto(valor) for valor in df[columna]]
+    for columna in COLUMNAS_FECHA:
+        resultado[columna] = [normalizar_fecha(valor) for valor in df[columna]]
+    return resultado
+
+
+def por_columna(df):
+    resultado = {}
+    for columna in COLUMNAS_TEXTO:
+        resultado[columna] = normalizar_texto_columna(df[columna])
+    for columna in COLUMNAS_FECHA:
+        resultado[columna] = normalizar_fecha_columna(df[columna])
+    return resultado
+
+
+def medir(funcion, df, repeticiones):
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        normalizar_texto_cache.cache_clear()
+        normalizar_fecha_cache.cache_clear()
+        inicio = time.perf_counter()
+        resultado = funcion(df)
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escala", type=int, default=100, help="veces que se repite data.csv")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    df = cargar(args.escala)
+    celdas = len(df) * (len(COLUMNAS_TEXTO) + len(COLUMNAS_FECHA))
+    print(f"{len(df)} filas, {celdas} celdas a normalizar")
+
+    t_escalar, r_escalar = medir(escalar, df, args.repeticiones)
+    t_columna, r_columna = medir(por_columna, df, args.repeticiones)
+
+    # Los resultados deben ser idénticos valor por valor
+    for columna in COLUMNAS_TEXTO + COLUMNAS_FECHA:
+        if list(r_columna[columna]) != r_escalar[columna]:
+            raise SystemExit(f"La columna {columna} no coincide con la versión escalar")
+
+    print(f"escalar:     {t_escalar * 1000:9.1f} ms")
+    print(f"por columna: {t_columna * 1000:9.1f} ms  ({t_escalar / t_columna:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
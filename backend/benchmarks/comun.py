@@ -0,0 +1,20 @@
+# benchmarks/comun.py
+"""Utilidades compartidas por los benchmarks"""
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def resumen_latencias(latencias, total_segundos):
+    """p50/p95/p99 en milisegundos y solicitudes por segundo"""
+    return {
+        "n": len(latencias),
+        "p50_ms": round(percentil(latencias, 0.50) * 1000, 2),
+        "p95_ms": round(percentil(latencias, 0.95) * 1000, 2),
+        "p99_ms": round(percentil(latencias, 0.99) * 1000, 2),
+        "rps": round(len(latencias) / total_segundos, 2) if total_segundos else 0.0,
+    }
@@ -0,0 +1,200 @@
+# benchmarks/datos_sinteticos.py
+"""
+Datos sintéticos para los benchmarks, generados a partir de las distribuciones de
+data/data.csv: una sucursal por PDV (zona, gerencia y región más frecuentes del PDV)
+con el mismo número de empleados que en el archivo, y cada empleado con puesto,
+sexo, asesor, categoría y área muestreados con las frecuencias observadas.
+
+Con escala N cada PDV se repite N veces, así que a 100× hay ~7,000 sucursales y
+~50,000 empleados. La misma semilla produce siempre los mismos datos.
+
+data.csv no trae tallas; se usan las proporciones de TALLAS_POR_SEXO.
+"""
+import csv
+import io
+import random
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from app.constantes import TALLA_POR_DEFINIR
+from app.models import es_puesto_administrativo
+
+DATA_CSV = Path(__file__).parent.parent / "data" / "data.csv"
+ESQUEMA_BASE = Path(__file__).parent / "esquema_base.sql"
+
+# Contraseña de todos los usuarios sembrados
+PASSWORD_BENCH = "bench123"
+# Gerentes de sucursal con usuario propio (el resto de las sucursales no tiene)
+USUARIOS_MANAGER = 20
+
+TALLAS_POR_SEXO = {
+    "M": {"S": 4, "M": 22, "L": 30, "XL": 22, "XXL": 10, "XXXL": 4, TALLA_POR_DEFINIR: 8},
+    "F": {"XS": 8, "S": 24, "M": 30, "L": 20, "XL": 8, "XXL": 2, TALLA_POR_DEFINIR: 8},
+}
+
+COLUMNAS_SUCURSAL = ["nombre", "manager", "zona", "gerencia", "region", "pdv", "ubicacion_pdv"]
+COLUMNAS_EMPLEADO = [
+    "numero_nomina", "nombre", "sucursal_id", "talla", "puesto_hc", "puesto_homologado",
+    "fecha_ingreso", "fecha_ingreso_puesto", "cumpleanos", "ubicacion_hc", "sexo", "email",
+    "cemex_id", "asesor_rh", "prcrt", "categoria", "area_nom",
+    "requiere_playera_administrativa", "talla_administrativa",
+]
+
+
+class _Muestreador:
+    """Elige valores con las frecuencias de un Counter"""
+
+    def __init__(self, conteos):
+        self.valores = list(conteos)
+        self.pesos = list(conteos.values())
+
+    def elegir(self, rng):
+        return rng.choices(self.valores, self.pesos)[0]
+
+
+class Distribuciones:
+    """Frecuencias observadas en data.csv"""
+
+    def __init__(self, df):
+        def contar(*columnas):
+            if len(columnas) == 1:
+                return Counter(v for v in df[columnas[0]] if v)
+            return Counter(tuple(fila) for fila in df[list(columnas)].itertuples(index=False))
+
+        # Puesto HC y homologado van juntos para que la combinación sea real
+        self.puestos = _Muestreador(contar("Puesto HC", "Puesto Homologado"))
+        self.sexo = _Muestreador(contar("Sexo"))
+        self.asesores = _Muestreador(contar("ASESORRH", "PRCRT"))
+        self.categorias = _Muestreador(contar("Categoría", "Areanom"))
+        self.cumpleanos = _Muestreador(contar("Cumpleaños"))
+
+        nombres, apellidos = Counter(), Counter()
+        for completo in df["Nombre"]:
+            if "," not in completo:
+                continue
+            apellido, nombre = completo.split(",", 1)
+            apellidos.update(apellido.split())
+            nombres.update(nombre.split())
+        self.nombres = _Muestreador(nombres)
+        self.apellidos = _Muestreador(apellidos)
+
+        # Una plantilla de sucursal por PDV con sus valores más frecuentes y su tamaño
+        self.sucursales = []
+        for pdv, grupo in df.groupby("PDV", sort=True):
+            moda = {c: grupo[c].mode().iloc[0] for c in ("Zona", "Gerencia", "Región", "Ubicación PDV", "Ubicación HC")}
+            self.sucursales.append({
+                "pdv": pdv,
+                "zona": moda["Zona"],
+                "gerencia": moda["Gerencia"],
+                "region": moda["Región"],
+                "ubicacion_pdv": moda["Ubicación PDV"],
+                "ubicacion_hc": moda["Ubicación HC"],
+                "empleados": len(grupo),
+            })
+
+    def nombre(self, rng):
+        return f"{self.apellidos.elegir(rng)} {self.apellidos.elegir(rng)}, {self.nombres.elegir(rng)}"
+
+
+def cargar_distribuciones(ruta=DATA_CSV):
+    df = pd.read_csv(ruta, encoding="latin-1", dtype=str, keep_default_na=False)
+    return Distribuciones(df)
+
+
+def _fecha(rng, desde=date(2005, 1, 1), hasta=date(2025, 4, 1)):
+    return desde + timedelta(days=rng.randrange((hasta - desde).days))
+
+
+def generar_sucursales(dist, escala, rng):
+    """Filas de sucursales (en el orden de COLUMNAS_SUCURSAL) con su número de empleados"""
+    for copia in range(escala):
+        for plantilla in dist.sucursales:
+            sufijo = f" {copia + 1}" if copia else ""
+            fila = (
+                f"{plantilla['ubicacion_pdv']}{sufijo}",
+                dist.nombre(rng),
+                plantilla["zona"],
+                plantilla["gerencia"],
+                plantilla["region"],
+                f"{plantilla['pdv']}{sufijo.replace(' ', '-')}",
+                plantilla["ubicacion_pdv"],
+            )
+            yield fila, plantilla
+
+
+def generar_empleados(dist, sucursales, rng, nomina_inicial=1_000_000):
+    """
+    Filas de empleados (en el orden de COLUMNAS_EMPLEADO) para una lista de
+    (sucursal_id, plantilla) ya insertadas.
+    """
+    nomina = nomina_inicial
+    for sucursal_id, plantilla in sucursales:
+        for _ in range(plantilla["empleados"]):
+            nomina += 1
+            nombre = dist.nombre(rng)
+            sexo = dist.sexo.elegir(rng)
+            tallas = TALLAS_POR_SEXO.get(sexo, TALLAS_POR_SEXO["M"])
+            talla = rng.choices(list(tallas), list(tallas.values()))[0]
+            puesto_hc, puesto_homologado = dist.puestos.elegir(rng)
+            asesor_rh, prcrt = dist.asesores.elegir(rng)
+            categoria, area_nom = dist.categorias.elegir(rng)
+            ingreso = _fecha(rng)
+            administrativa = es_puesto_administrativo(puesto_homologado)
+            apellido, primer_nombre = nombre.split(", ", 1)
+            yield (
+                nomina, nombre, sucursal_id, talla, puesto_hc, puesto_homologado,
+                ingreso, _fecha(rng, desde=ingreso) if rng.random() < 0.5 else ingreso,
+                dist.cumpleanos.elegir(rng), plantilla["ubicacion_hc"], sexo or None,
+                f"{primer_nombre.split()[0]}.{apellido.split()[0]}{nomina}@cemex.com".lower(),
+                f"{primer_nombre[0]}{apellido.split()[0]}{nomina % 1000}".lower(),
+                asesor_rh, prcrt, categoria, area_nom,
+                administrativa, talla if administrativa else None,
+            )
+
+
+def _copy(cursor, tabla, columnas, filas):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    for fila in filas:
+        escritor.writerow(["" if v is None else v for v in fila])
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def sembrar(conn, escala, semilla=42, password_hash=None):
+    """
+    Vacía las tablas principales y las llena con datos sintéticos a la escala indicada.
+    `password_hash` es el hash de PASSWORD_BENCH para los usuarios (admin + gerentes).
+    Retorna un resumen con los conteos y los ids sembrados.
+    """
+    rng = random.Random(semilla)
+    dist = cargar_distribuciones()
+    cursor = conn.cursor()
+    cursor.execute(ESQUEMA_BASE.read_text(encoding="utf-8"))
+    cursor.execute("TRUNCATE empleados, usuarios, reportes, sucursales RESTART IDENTITY CASCADE")
+
+    generadas = list(generar_sucursales(dist, escala, rng))
+    _copy(cursor, "sucursales", COLUMNAS_SUCURSAL, (fila for fila, _ in generadas))
+    # RESTART IDENTITY garantiza ids 1..N en el orden del COPY
+    sucursales = [(i + 1, plantilla) for i, (_, plantilla) in enumerate(generadas)]
+    _copy(cursor, "empleados", COLUMNAS_EMPLEADO, generar_empleados(dist, sucursales, rng))
+
+    usuarios = [("admin", password_hash, "admin", None)]
+    usuarios += [(f"gerente{i}", password_hash, "manager", i) for i in range(1, min(USUARIOS_MANAGER, len(sucursales)) + 1)]
+    _copy(cursor, "usuarios", ["username", "password", "rol", "sucursal_id"], usuarios)
+
+    cursor.execute("ANALYZE sucursales; ANALYZE empleados; ANALYZE usuarios")
+    cursor.execute("SELECT min(id) AS primero, max(id) AS ultimo, count(*) AS total FROM empleados")
+    empleados = cursor.fetchone()
+    conn.commit()
+    return {
+        "escala": escala,
+        "semilla": semilla,
+        "sucursales": len(sucursales),
+        "empleados": empleados["total"],
+        "empleado_ids": (empleados["primero"], empleados["ultimo"]),
+        "usuarios": [u[0] for u in usuarios],
+    }
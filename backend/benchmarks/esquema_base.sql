@@ -0,0 +1,56 @@
+-- Tablas principales tal como existen en Supabase, para levantar la app contra un PostgreSQL
+-- local en los benchmarks. Las migraciones de backend/migraciones se aplican encima con init_db().
+CREATE TABLE IF NOT EXISTS sucursales (
+    id SERIAL PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    manager TEXT NOT NULL,
+    zona TEXT NOT NULL,
+    gerencia TEXT,
+    region TEXT,
+    pdv TEXT,
+    ubicacion_pdv TEXT,
+    telefono TEXT,
+    direccion TEXT,
+    is_empaquetado BOOLEAN DEFAULT false,
+    numero_seguimiento TEXT
+);
+
+CREATE TABLE IF NOT EXISTS empleados (
+    id SERIAL PRIMARY KEY,
+    numero_nomina INTEGER,
+    nombre TEXT NOT NULL,
+    sucursal_id INTEGER NOT NULL REFERENCES sucursales (id),
+    talla TEXT NOT NULL,
+    puesto_hc TEXT,
+    puesto_homologado TEXT,
+    fecha_ingreso DATE,
+    fecha_ingreso_puesto DATE,
+    cumpleanos TEXT,
+    ubicacion_hc TEXT,
+    sexo TEXT,
+    email TEXT,
+    cemex_id TEXT,
+    asesor_rh TEXT,
+    prcrt TEXT,
+    categoria TEXT,
+    area_nom TEXT,
+    requiere_playera_administrativa BOOLEAN DEFAULT false,
+    talla_administrativa TEXT
+);
+
+CREATE TABLE IF NOT EXISTS usuarios (
+    id SERIAL PRIMARY KEY,
+    username TEXT UNIQUE NOT NULL,
+    password TEXT NOT NULL,
+    rol TEXT NOT NULL,
+    sucursal_id INTEGER REFERENCES sucursales (id)
+);
+
+CREATE TABLE IF NOT EXISTS reportes (
+    id SERIAL PRIMARY KEY,
+    nombre_archivo TEXT NOT NULL,
+    fecha_generacion TIMESTAMP NOT NULL,
+    tipo TEXT NOT NULL,
+    url_descarga TEXT,
+    expiracion TIMESTAMP
+);
@@ -0,0 +1,2 @@
+-- Índice para los listados por sucursal con paginación por cursor (WHERE sucursal_id = ? AND id > ? ORDER BY id)
+CREATE INDEX IF NOT EXISTS idx_empleados_sucursal_id ON empleados (sucursal_id, id);
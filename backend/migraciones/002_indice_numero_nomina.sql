@@ -0,0 +1,2 @@
+-- La importación de RH identifica a los empleados por número de nómina
+CREATE INDEX IF NOT EXISTS idx_empleados_numero_nomina ON empleados (numero_nomina);
@@ -0,0 +1,31 @@
+-- Contador de versión por tabla: cualquier escritura en empleados o sucursales lo incrementa.
+-- Permite saber si los datos cambiaron (caché de reportes, ETags) con una consulta de una fila.
+CREATE TABLE IF NOT EXISTS versiones_datos (
+    tabla TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    actualizado TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+INSERT INTO versiones_datos (tabla) VALUES ('empleados'), ('sucursales')
+ON CONFLICT (tabla) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION incrementar_version_datos() RETURNS trigger AS $$
+BEGIN
+    UPDATE versiones_datos SET version = version + 1, actualizado = now() WHERE tabla = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_version_empleados ON empleados;
+CREATE TRIGGER trg_version_empleados
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON empleados
+    FOR EACH STATEMENT EXECUTE FUNCTION incrementar_version_datos();
+
+DROP TRIGGER IF EXISTS trg_version_sucursales ON sucursales;
+CREATE TRIGGER trg_version_sucursales
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON sucursales
+    FOR EACH STATEMENT EXECUTE FUNCTION incrementar_version_datos();
+
+-- Versión de los datos con la que se generó cada reporte
+ALTER TABLE reportes ADD COLUMN IF NOT EXISTS version_datos TEXT;
+CREATE INDEX IF NOT EXISTS idx_reportes_version_datos ON reportes (version_datos);
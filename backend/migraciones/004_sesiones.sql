@@ -0,0 +1,14 @@
+-- Sesiones de usuario (SESIONES_BACKEND=db): permite validar tokens en cualquier worker y tras reinicios.
+-- Se guarda solo el hash del token.
+CREATE TABLE IF NOT EXISTS sesiones (
+    token_hash TEXT PRIMARY KEY,
+    usuario_id INTEGER NOT NULL REFERENCES usuarios (id) ON DELETE CASCADE,
+    username TEXT NOT NULL,
+    rol TEXT NOT NULL,
+    sucursal_id INTEGER,
+    creada TIMESTAMP NOT NULL DEFAULT NOW(),
+    expira TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_sesiones_usuario ON sesiones (usuario_id);
+CREATE INDEX IF NOT EXISTS idx_sesiones_expira ON sesiones (expira);
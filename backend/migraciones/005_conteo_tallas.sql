@@ -0,0 +1,98 @@
+-- Conteo de empleados por sucursal x talla x tipo de playera, mantenido por triggers.
+-- Los resúmenes (dashboard, etiquetas) leen esta tabla en lugar de recorrer empleados.
+-- talla_administrativa solo distingue a los administrativos; para los demás es 'Por definir'.
+-- Las filas que llegan a 0 se conservan hasta la siguiente reconstrucción (app/conteo_tallas.py).
+CREATE TABLE IF NOT EXISTS conteo_tallas (
+    sucursal_id INTEGER NOT NULL,
+    talla TEXT NOT NULL,
+    administrativa BOOLEAN NOT NULL,
+    talla_administrativa TEXT NOT NULL,
+    cantidad INTEGER NOT NULL,
+    PRIMARY KEY (sucursal_id, talla, administrativa, talla_administrativa)
+);
+
+-- Misma regla que constantes.normalizar_talla: nulos y valores desconocidos son 'Por definir'
+CREATE OR REPLACE FUNCTION normalizar_talla(talla TEXT) RETURNS TEXT AS $$
+    SELECT CASE WHEN talla IN ('XS', 'S', 'M', 'L', 'XL', 'XXL', 'XXXL') THEN talla ELSE 'Por definir' END
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Triggers por sentencia con tablas de transición: una importación de miles de filas
+-- hace un solo INSERT ... ON CONFLICT agrupado, no uno por empleado
+CREATE OR REPLACE FUNCTION ajustar_conteo_tallas() RETURNS trigger AS $$
+DECLARE
+    columnas CONSTANT TEXT := 'sucursal_id, talla, requiere_playera_administrativa, talla_administrativa';
+    origen TEXT;
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM conteo_tallas;
+        RETURN NULL;
+    END IF;
+
+    -- Cada tabla de transición solo existe en su evento, por eso la consulta se arma aquí
+    IF TG_OP = 'INSERT' THEN
+        origen := format('SELECT %s, 1 AS delta FROM nuevos', columnas);
+    ELSIF TG_OP = 'DELETE' THEN
+        origen := format('SELECT %s, -1 AS delta FROM viejos', columnas);
+    ELSE
+        origen := format('SELECT %1$s, 1 AS delta FROM nuevos UNION ALL SELECT %1$s, -1 AS delta FROM viejos', columnas);
+    END IF;
+
+    EXECUTE format($sql$
+        INSERT INTO conteo_tallas AS c (sucursal_id, talla, administrativa, talla_administrativa, cantidad)
+        SELECT sucursal_id, talla, administrativa, talla_administrativa, SUM(delta)
+        FROM (
+            SELECT e.sucursal_id,
+                   normalizar_talla(e.talla) AS talla,
+                   COALESCE(e.requiere_playera_administrativa, false) AS administrativa,
+                   CASE WHEN COALESCE(e.requiere_playera_administrativa, false)
+                        THEN normalizar_talla(e.talla_administrativa) ELSE 'Por definir' END AS talla_administrativa,
+                   e.delta
+            FROM (%s) e
+            WHERE e.sucursal_id IS NOT NULL
+        ) cambios
+        GROUP BY sucursal_id, talla, administrativa, talla_administrativa
+        -- Un UPDATE que no cambia talla, tipo ni sucursal se cancela aquí y no escribe nada
+        HAVING SUM(delta) <> 0
+        ON CONFLICT (sucursal_id, talla, administrativa, talla_administrativa)
+        DO UPDATE SET cantidad = c.cantidad + EXCLUDED.cantidad
+    $sql$, origen);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Las tablas de transición no admiten triggers de varios eventos: uno por evento
+DROP TRIGGER IF EXISTS trg_conteo_tallas_insert ON empleados;
+CREATE TRIGGER trg_conteo_tallas_insert
+    AFTER INSERT ON empleados
+    REFERENCING NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE FUNCTION ajustar_conteo_tallas();
+
+DROP TRIGGER IF EXISTS trg_conteo_tallas_update ON empleados;
+CREATE TRIGGER trg_conteo_tallas_update
+    AFTER UPDATE ON empleados
+    REFERENCING OLD TABLE AS viejos NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE FUNCTION ajustar_conteo_tallas();
+
+DROP TRIGGER IF EXISTS trg_conteo_tallas_delete ON empleados;
+CREATE TRIGGER trg_conteo_tallas_delete
+    AFTER DELETE ON empleados
+    REFERENCING OLD TABLE AS viejos
+    FOR EACH STATEMENT EXECUTE FUNCTION ajustar_conteo_tallas();
+
+DROP TRIGGER IF EXISTS trg_conteo_tallas_truncate ON empleados;
+CREATE TRIGGER trg_conteo_tallas_truncate
+    AFTER TRUNCATE ON empleados
+    FOR EACH STATEMENT EXECUTE FUNCTION ajustar_conteo_tallas();
+
+-- Carga inicial; CREATE TRIGGER ya tiene bloqueadas las escrituras en empleados hasta el commit
+DELETE FROM conteo_tallas;
+INSERT INTO conteo_tallas (sucursal_id, talla, administrativa, talla_administrativa, cantidad)
+SELECT sucursal_id,
+       normalizar_talla(talla),
+       COALESCE(requiere_playera_administrativa, false),
+       CASE WHEN COALESCE(requiere_playera_administrativa, false)
+            THEN normalizar_talla(talla_administrativa) ELSE 'Por definir' END,
+       COUNT(*)
+FROM empleados
+WHERE sucursal_id IS NOT NULL
+GROUP BY 1, 2, 3, 4;
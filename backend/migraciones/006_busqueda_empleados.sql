@@ -0,0 +1,20 @@
+-- Búsqueda de empleados por nombre, número de nómina, email y CEMEX ID (GET /empleados/search).
+-- Índice GIN de trigramas sobre un documento normalizado: sirve para LIKE '%texto%' (prefijos y
+-- subcadenas) y para el operador de similitud por palabra <% (coincidencias aproximadas).
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Minúsculas y sin acentos. Se usa translate y no la extensión unaccent porque unaccent()
+-- no es IMMUTABLE y no puede ir en un índice de expresión.
+CREATE OR REPLACE FUNCTION normalizar_busqueda(texto TEXT) RETURNS TEXT AS $$
+    SELECT translate(lower(texto), 'áàäâãéèëêíìïîóòöôõúùüûñç', 'aaaaaeeeeiiiiooooouuuunc')
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+CREATE OR REPLACE FUNCTION documento_busqueda_empleado(
+    nombre TEXT, numero_nomina BIGINT, email TEXT, cemex_id TEXT
+) RETURNS TEXT AS $$
+    SELECT normalizar_busqueda(concat_ws(' ', nombre, numero_nomina::text, email, cemex_id))
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+CREATE INDEX IF NOT EXISTS idx_empleados_busqueda ON empleados
+    USING gin (documento_busqueda_empleado(nombre, numero_nomina, email, cemex_id) gin_trgm_ops);
+
@@ -0,0 +1,39 @@
+-- La migración 003 incrementaba una sola fila por tabla en cada escritura: esa fila queda
+-- bloqueada hasta el commit, así que todas las transacciones que escriben en empleados (o en
+-- sucursales) se esperaban entre sí y una importación larga detenía cualquier CRUD.
+--
+-- Ahora cada conexión incrementa su propia ranura (pg_backend_pid() % 16) y versiones_datos
+-- es una vista con la suma de las ranuras. Dos escritores solo se esperan si caen en la misma
+-- ranura. La suma solo cuenta transacciones confirmadas y nunca disminuye, así que sigue
+-- sirviendo para ETags y cachés (una versión mayor = datos más nuevos).
+CREATE TABLE IF NOT EXISTS versiones_ranuras (
+    tabla TEXT NOT NULL,
+    ranura SMALLINT NOT NULL,
+    version BIGINT NOT NULL DEFAULT 0,
+    actualizado TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp(),
+    PRIMARY KEY (tabla, ranura)
+);
+
+-- La versión acumulada hasta hoy queda en la ranura 0
+INSERT INTO versiones_ranuras (tabla, ranura, version, actualizado)
+SELECT tabla, 0, version, actualizado FROM versiones_datos
+ON CONFLICT (tabla, ranura) DO NOTHING;
+
+DROP TABLE IF EXISTS versiones_datos;
+
+CREATE VIEW versiones_datos AS
+SELECT tabla, SUM(version)::BIGINT AS version, MAX(actualizado) AS actualizado
+FROM versiones_ranuras
+GROUP BY tabla;
+
+-- clock_timestamp() y no now(): now() es el inicio de la transacción y una escritura que
+-- confirma tarde registraría una fecha anterior a la que los clientes ya vieron
+CREATE OR REPLACE FUNCTION incrementar_version_datos() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO versiones_ranuras AS v (tabla, ranura, version, actualizado)
+    VALUES (TG_TABLE_NAME, pg_backend_pid() % 16, 1, clock_timestamp())
+    ON CONFLICT (tabla, ranura) DO UPDATE
+    SET version = v.version + 1, actualizado = GREATEST(v.actualizado, clock_timestamp());
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
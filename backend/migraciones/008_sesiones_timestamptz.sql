@@ -0,0 +1,7 @@
+-- expira se guardaba como TIMESTAMP sin zona a partir de la hora local del servidor de la
+-- aplicación y se comparaba con NOW() de la base: con zonas distintas las sesiones vencían
+-- antes o después de tiempo. Los servidores (Vercel, Supabase) trabajan en UTC, así que los
+-- valores existentes se interpretan como UTC.
+ALTER TABLE sesiones
+    ALTER COLUMN expira TYPE TIMESTAMPTZ USING expira AT TIME ZONE 'UTC',
+    ALTER COLUMN creada TYPE TIMESTAMPTZ USING creada AT TIME ZONE 'UTC';
@@ -0,0 +1,47 @@
+-- Dos lotes concurrentes que tocan las mismas combinaciones de conteo_tallas (p. ej. dos
+-- importaciones o PATCH /empleados/tallas en paralelo) podían bloquear sus filas en orden
+-- distinto y caer en deadlock. Ahora el trigger de la migración 005 inserta (y bloquea) las
+-- filas siempre en el orden de la llave primaria; el resto de la función no cambia.
+CREATE OR REPLACE FUNCTION ajustar_conteo_tallas() RETURNS trigger AS $$
+DECLARE
+    columnas CONSTANT TEXT := 'sucursal_id, talla, requiere_playera_administrativa, talla_administrativa';
+    origen TEXT;
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM conteo_tallas;
+        RETURN NULL;
+    END IF;
+
+    -- Cada tabla de transición solo existe en su evento, por eso la consulta se arma aquí
+    IF TG_OP = 'INSERT' THEN
+        origen := format('SELECT %s, 1 AS delta FROM nuevos', columnas);
+    ELSIF TG_OP = 'DELETE' THEN
+        origen := format('SELECT %s, -1 AS delta FROM viejos', columnas);
+    ELSE
+        origen := format('SELECT %1$s, 1 AS delta FROM nuevos UNION ALL SELECT %1$s, -1 AS delta FROM viejos', columnas);
+    END IF;
+
+    EXECUTE format($sql$
+        INSERT INTO conteo_tallas AS c (sucursal_id, talla, administrativa, talla_administrativa, cantidad)
+        SELECT sucursal_id, talla, administrativa, talla_administrativa, SUM(delta)
+        FROM (
+            SELECT e.sucursal_id,
+                   normalizar_talla(e.talla) AS talla,
+                   COALESCE(e.requiere_playera_administrativa, false) AS administrativa,
+                   CASE WHEN COALESCE(e.requiere_playera_administrativa, false)
+                        THEN normalizar_talla(e.talla_administrativa) ELSE 'Por definir' END AS talla_administrativa,
+                   e.delta
+            FROM (%s) e
+            WHERE e.sucursal_id IS NOT NULL
+        ) cambios
+        GROUP BY sucursal_id, talla, administrativa, talla_administrativa
+        -- Un UPDATE que no cambia talla, tipo ni sucursal se cancela aquí y no escribe nada
+        HAVING SUM(delta) <> 0
+        -- Orden de la llave primaria: todas las transacciones bloquean las filas en el mismo orden
+        ORDER BY sucursal_id, talla, administrativa, talla_administrativa
+        ON CONFLICT (sucursal_id, talla, administrativa, talla_administrativa)
+        DO UPDATE SET cantidad = c.cantidad + EXCLUDED.cantidad
+    $sql$, origen);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
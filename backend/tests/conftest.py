@@ -0,0 +1,70 @@
+# tests/conftest.py
+import pytest
+
+
+class CursorFalso:
+    """
+    Cursor que responde según el SQL ejecutado. `respuestas` es una lista de
+    (fragmento, filas): la primera cuyo fragmento aparece en la consulta define
+    el resultado; `filas` puede ser una función (query, params) -> filas.
+    """
+
+    def __init__(self, conexion):
+        self.conexion = conexion
+        self.rowcount = -1
+        self._filas = []
+
+    def execute(self, query, params=None):
+        query = str(query)
+        self.conexion.ejecutadas.append((query, params))
+        for fragmento, filas in self.conexion.respuestas:
+            if fragmento in query:
+                self._filas = list(filas(query, params) if callable(filas) else filas)
+                break
+        else:
+            self._filas = []
+        self.rowcount = len(self._filas)
+
+    def copy_expert(self, query, archivo):
+        self.conexion.ejecutadas.append((query, None))
+        self.conexion.copiados.append(archivo.read())
+
+    def fetchall(self):
+        filas, self._filas = self._filas, []
+        return filas
+
+    def fetchmany(self, tamano):
+        filas, self._filas = self._filas[:tamano], self._filas[tamano:]
+        return filas
+
+    def fetchone(self):
+        return self._filas.pop(0) if self._filas else None
+
+    def close(self):
+        pass
+
+
+class ConexionFalsa:
+    def __init__(self, respuestas=None):
+        self.respuestas = list(respuestas or [])
+        self.ejecutadas = []
+        self.copiados = []  # contenido recibido por cada copy_expert
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self, name=None):
+        return CursorFalso(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def consultas(self, fragmento):
+        return [q for q, _ in self.ejecutadas if fragmento in q]
+
+
+@pytest.fixture
+def db():
+    return ConexionFalsa()
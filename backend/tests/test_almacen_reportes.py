@@ -0,0 +1,114 @@
+import os
+import time
+
+import pytest
+
+from app import almacen_reportes
+from tests.conftest import ConexionFalsa
+
+
+@pytest.fixture
+def almacen(tmp_path, monkeypatch):
+    monkeypatch.setattr(almacen_reportes, "REPORTS_DIR", tmp_path)
+    monkeypatch.setattr(almacen_reportes, "_indice", almacen_reportes.OrderedDict())
+    monkeypatch.setattr(almacen_reportes, "_cargado", False)
+    monkeypatch.setattr(almacen_reportes, "REPORTES_MAX_ARCHIVOS", 3)
+    monkeypatch.setattr(almacen_reportes, "REPORTES_MAX_MB", 1)
+    monkeypatch.setattr(almacen_reportes, "get_storage", lambda: None)
+
+    def sin_conexion():
+        raise AssertionError("registrar no debe abrir otra conexión")
+
+    monkeypatch.setattr(almacen_reportes, "conexion", sin_conexion)
+    return tmp_path
+
+
+def _escribir(carpeta, nombre, tamano=10, antiguedad=0):
+    archivo = carpeta / nombre
+    archivo.write_bytes(b"x" * tamano)
+    if antiguedad:
+        instante = time.time() - antiguedad
+        os.utime(archivo, (instante, instante))
+    return nombre
+
+
+def test_registrar_elimina_los_menos_usados_sin_abrir_conexion(almacen):
+    for i in range(3):
+        almacen_reportes.registrar(_escribir(almacen, f"r{i}.xlsx"))
+    # Usar r0 lo vuelve el más reciente: el siguiente en salir es r1
+    assert almacen_reportes.ruta("r0.xlsx") is not None
+
+    eliminados = almacen_reportes.registrar(_escribir(almacen, "r3.xlsx"))
+
+    assert eliminados == ["r1.xlsx"]
+    assert not (almacen / "r1.xlsx").exists()
+    assert almacen_reportes.estadisticas()["archivos"] == 3
+
+
+def test_registrar_respeta_el_limite_de_tamano_y_conserva_el_nuevo(almacen):
+    mitad = 600 * 1024
+    almacen_reportes.registrar(_escribir(almacen, "viejo.xlsx", mitad))
+
+    eliminados = almacen_reportes.registrar(_escribir(almacen, "nuevo.xlsx", mitad))
+
+    assert eliminados == ["viejo.xlsx"]
+    assert (almacen / "nuevo.xlsx").exists()
+
+
+def test_vencidos_se_eliminan_primero(almacen):
+    dias = almacen_reportes.REPORTES_RETENCION_DIAS + 1
+    _escribir(almacen, "vencido.xlsx", antiguedad=dias * 86400)
+    _escribir(almacen, "vigente.xlsx")
+
+    eliminados = almacen_reportes.registrar(_escribir(almacen, "nuevo.xlsx"))
+
+    assert eliminados == ["vencido.xlsx"]
+
+
+class _StorageFalso:
+    def __init__(self, db=None):
+        self.db = db
+        self.eliminados = []
+        self.commits_al_eliminar = None
+
+    def eliminar(self, bucket, nombres):
+        self.eliminados.extend(nombres)
+        if self.db is not None:
+            self.commits_al_eliminar = self.db.commits
+
+
+def test_limpiar_registros_usa_el_cursor_del_llamador_y_no_toca_storage(almacen, monkeypatch):
+    storage = _StorageFalso()
+    monkeypatch.setattr(almacen_reportes, "get_storage", lambda: storage)
+    db = ConexionFalsa([("DELETE FROM reportes", [
+        {"nombre_archivo": "r1.xlsx", "tipo": "excel_completo_supabase"},
+        {"nombre_archivo": "r2.xlsx", "tipo": "excel"},
+    ])])
+
+    en_storage = almacen_reportes.limpiar_registros(db.cursor(), ["r1.xlsx", "r2.xlsx"])
+
+    (_, parametros), = [e for e in db.ejecutadas if "DELETE FROM reportes" in e[0]]
+    assert parametros[0] == ["r1.xlsx", "r2.xlsx"]
+    assert en_storage == ["r1.xlsx"]
+    assert db.commits == 0
+    assert storage.eliminados == []
+
+
+def test_purgar_elimina_de_storage_despues_del_commit(almacen, monkeypatch):
+    db = ConexionFalsa([("DELETE FROM reportes", [{"nombre_archivo": "viejo.xlsx", "tipo": "excel_completo_supabase"}])])
+    storage = _StorageFalso(db)
+    monkeypatch.setattr(almacen_reportes, "get_storage", lambda: storage)
+
+    class _Conexion:
+        def __enter__(self):
+            return db
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(almacen_reportes, "conexion", _Conexion)
+
+    almacen_reportes.purgar()
+
+    assert storage.eliminados == ["viejo.xlsx"]
+    assert storage.commits_al_eliminar == 1
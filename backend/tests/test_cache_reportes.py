@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import cache_reportes
+from tests.conftest import ConexionFalsa
+
+
+@pytest.fixture(autouse=True)
+def memo(monkeypatch):
+    existentes = {"local.xlsx", "supabase.xlsx", "vencido.xlsx"}
+    monkeypatch.setattr(cache_reportes, "_memo", cache_reportes.OrderedDict())
+    monkeypatch.setattr(cache_reportes.almacen_reportes, "existe", lambda archivo: archivo in existentes)
+
+
+def _fila(id_, archivo, tipo, url=None, expiracion=None):
+    return {"id": id_, "nombre_archivo": archivo, "tipo": tipo, "url_descarga": url, "expiracion": expiracion}
+
+
+def test_clave_cambia_con_el_tipo_y_la_version():
+    clave = cache_reportes.clave_reporte("excel", "empleados:1;sucursales:1")
+    assert clave == cache_reportes.clave_reporte("excel", "empleados:1;sucursales:1")
+    assert clave != cache_reportes.clave_reporte("excel", "empleados:2;sucursales:1")
+    assert clave != cache_reportes.clave_reporte("completo", "empleados:1;sucursales:1")
+
+
+def test_prefiere_la_copia_en_supabase_vigente():
+    en_una_semana = datetime.now() + timedelta(days=7)
+    db = ConexionFalsa([("FROM reportes", [
+        _fila(1, "local.xlsx", "excel_completo_local"),
+        _fila(2, "supabase.xlsx", "excel_completo_supabase", "https://firmada", en_una_semana),
+    ])])
+
+    resultado = cache_reportes.buscar(db.cursor(), "completo", "k")
+
+    assert resultado["id"] == 2 and resultado["url"] == "https://firmada" and resultado["cache"]
+    (_, parametros), = db.ejecutadas
+    assert parametros == ("k", cache_reportes.TIPOS_REGISTRO["completo"])
+    # La segunda búsqueda sale de la memoria, sin consultar
+    assert cache_reportes.buscar(db.cursor(), "completo", "k")["id"] == 2
+    assert len(db.ejecutadas) == 1
+
+
+def test_descarta_urls_por_vencer_y_archivos_borrados():
+    en_media_hora = datetime.now() + timedelta(minutes=30)
+    db = ConexionFalsa([("FROM reportes", [
+        _fila(1, "vencido.xlsx", "excel_completo_supabase", "https://vieja", en_media_hora),
+        _fila(2, "borrado.xlsx", "excel_completo_local"),
+        _fila(3, "local.xlsx", "excel_completo_local"),
+    ])])
+
+    resultado = cache_reportes.buscar(db.cursor(), "completo", "k")
+
+    assert resultado["id"] == 3
+    assert resultado["url"] == "/reportes/excel/download/local.xlsx"
+
+
+def test_sin_reporte_con_esa_version():
+    assert cache_reportes.buscar(ConexionFalsa().cursor(), "excel", "k") is None
+
+
+def test_invalidar_por_archivo():
+    cache_reportes.registrar("a", {"archivo": "local.xlsx"})
+    cache_reportes.registrar("b", {"archivo": "supabase.xlsx"})
+
+    cache_reportes.invalidar("local.xlsx")
+
+    assert list(cache_reportes._memo) == ["b"]
@@ -0,0 +1,69 @@
+# tests/test_cache_sucursales.py
+import pytest
+
+from app import cache_sucursales
+
+
+@pytest.fixture(autouse=True)
+def cache_limpia(monkeypatch):
+    cache_sucursales.invalidar()
+
+    def sin_conexion():
+        raise AssertionError("La caché no debe pedir otra conexión al pool si recibe un cursor")
+
+    monkeypatch.setattr(cache_sucursales, "conexion", sin_conexion)
+    yield
+    cache_sucursales.invalidar()
+
+
+def _db(db, version, filas):
+    estado = {"version": version, "filas": filas}
+    db.respuestas = [
+        ("versiones_datos", lambda q, p: [{"version": estado["version"]}]),
+        ("FROM sucursales WHERE id", lambda q, p: [f for f in estado["filas"] if f["id"] == p[0]]),
+        ("FROM sucursales", lambda q, p: estado["filas"]),
+    ]
+    return estado
+
+
+def test_carga_con_el_cursor_de_la_solicitud(db):
+    _db(db, 1, [{"id": 1, "nombre": "A"}, {"id": 2, "nombre": "B"}])
+    assert [s["nombre"] for s in cache_sucursales.listar(db.cursor())] == ["A", "B"]
+    assert len(db.consultas("FROM sucursales")) == 1
+
+
+def test_acierto_no_consulta_la_base(db):
+    _db(db, 1, [{"id": 1, "nombre": "A"}])
+    cache_sucursales.listar(db.cursor())
+    antes = len(db.ejecutadas)
+    assert cache_sucursales.obtener(1, db.cursor())["nombre"] == "A"
+    assert len(db.ejecutadas) == antes
+
+
+def test_version_minima_mas_nueva_recarga(db):
+    estado = _db(db, 1, [{"id": 1, "nombre": "A"}])
+    cache_sucursales.listar(db.cursor())
+    estado.update(version=2, filas=[{"id": 1, "nombre": "A2"}])
+
+    # Sin versión mínima la copia sigue vigente hasta la siguiente verificación
+    assert cache_sucursales.listar(db.cursor())[0]["nombre"] == "A"
+    assert cache_sucursales.listar(db.cursor(), version_minima=2)[0]["nombre"] == "A2"
+    assert cache_sucursales.estadisticas()["version"] == 2
+
+
+def test_verificacion_periodica_detecta_cambios(db, monkeypatch):
+    estado = _db(db, 1, [{"id": 1, "nombre": "A"}])
+    monkeypatch.setattr(cache_sucursales, "SUCURSALES_CACHE_VERIFICAR", 0)
+    cache_sucursales.listar(db.cursor())
+    estado.update(version=3, filas=[{"id": 1, "nombre": "B"}])
+    assert cache_sucursales.listar(db.cursor())[0]["nombre"] == "B"
+
+
+def test_obtener_busca_en_la_base_lo_que_no_esta_en_memoria(db):
+    estado = _db(db, 1, [{"id": 1, "nombre": "A"}])
+    cache_sucursales.listar(db.cursor())
+    estado["filas"].append({"id": 7, "nombre": "Nueva"})
+    assert cache_sucursales.obtener(7, db.cursor())["nombre"] == "Nueva"
+    assert cache_sucursales.existe(8, db.cursor()) is False
+    # Quedó en memoria por la escritura a través
+    assert len(cache_sucursales.listar(db.cursor())) == 2
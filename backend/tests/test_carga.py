@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from app.models import es_puesto_administrativo
+from benchmarks import datos_sinteticos
+from benchmarks.carga import comparar
+from benchmarks.comun import percentil, resumen_latencias
+from benchmarks.datos_sinteticos import COLUMNAS_EMPLEADO, COLUMNAS_SUCURSAL, TALLAS_POR_SEXO
+
+
+@pytest.fixture(scope="module")
+def dist():
+    return datos_sinteticos.cargar_distribuciones()
+
+
+def _generar(dist, escala, semilla=42):
+    rng = random.Random(semilla)
+    generadas = list(datos_sinteticos.generar_sucursales(dist, escala, rng))
+    sucursales = [(i + 1, plantilla) for i, (_, plantilla) in enumerate(generadas)]
+    return [fila for fila, _ in generadas], list(datos_sinteticos.generar_empleados(dist, sucursales, rng))
+
+
+def test_la_escala_repite_cada_pdv_con_sus_empleados(dist):
+    sucursales, empleados = _generar(dist, 2)
+    por_pdv = len(dist.sucursales)
+    total = sum(plantilla["empleados"] for plantilla in dist.sucursales)
+
+    assert len(sucursales) == 2 * por_pdv and len(empleados) == 2 * total
+    assert all(len(fila) == len(COLUMNAS_SUCURSAL) for fila in sucursales)
+    assert all(len(fila) == len(COLUMNAS_EMPLEADO) for fila in empleados)
+    # Las copias se distinguen por sufijo en nombre y PDV
+    assert len({fila[5] for fila in sucursales}) == len(sucursales)
+    assert len({fila[0] for fila in empleados}) == len(empleados)
+
+
+def test_misma_semilla_mismos_datos(dist):
+    assert _generar(dist, 1, semilla=7) == _generar(dist, 1, semilla=7)
+    assert _generar(dist, 1, semilla=7)[1] != _generar(dist, 1, semilla=8)[1]
+
+
+def test_empleados_coherentes(dist):
+    _, empleados = _generar(dist, 1)
+    tallas = set().union(*TALLAS_POR_SEXO.values())
+
+    for fila in empleados:
+        empleado = dict(zip(COLUMNAS_EMPLEADO, fila))
+        assert empleado["talla"] in tallas
+        assert empleado["fecha_ingreso_puesto"] >= empleado["fecha_ingreso"]
+        administrativa = es_puesto_administrativo(empleado["puesto_homologado"])
+        assert empleado["requiere_playera_administrativa"] == administrativa
+        assert empleado["talla_administrativa"] == (empleado["talla"] if administrativa else None)
+
+
+def test_percentiles_y_rps():
+    assert percentil([], 0.95) == 0.0
+    resumen = resumen_latencias([0.001 * i for i in range(1, 101)], 2.0)
+    assert resumen == {"n": 100, "p50_ms": 51.0, "p95_ms": 96.0, "p99_ms": 100.0, "rps": 50.0}
+
+
+def _metrica(p95, rps, n=10, **extra):
+    return {"n": n, "p50_ms": p95, "p95_ms": p95, "p99_ms": p95, "rps": rps, **extra}
+
+
+def test_comparar_senala_solo_las_regresiones():
+    base = {"fecha": "2026-01-01", "resultados": {
+        "estable": _metrica(100, 50),
+        "mas_lento": _metrica(100, 50),
+        "menos_rps": _metrica(100, 50),
+        "con_errores": _metrica(100, 50),
+    }}
+    actual = {
+        "estable": _metrica(105, 48),
+        "mas_lento": _metrica(130, 50),
+        "menos_rps": _metrica(100, 30),
+        "con_errores": _metrica(100, 50, errores={"500": 1}),
+        "nuevo": _metrica(999, 1),
+    }
+
+    assert comparar(actual, base, tolerancia=0.2) == ["mas_lento", "menos_rps", "con_errores"]
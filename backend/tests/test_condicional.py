@@ -0,0 +1,100 @@
+# tests/test_condicional.py
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import cache_sucursales
+from app.condicional import _coincide, _etag
+from app.database import get_db
+from app.routes import sucursales
+from tests.conftest import ConexionFalsa
+
+
+class _Url:
+    def __init__(self, path, query=""):
+        self.path, self.query = path, query
+
+
+class _Solicitud:
+    def __init__(self, path, query=""):
+        self.url = _Url(path, query)
+
+
+def test_etag_depende_de_version_ruta_y_filtros():
+    base = _etag("sucursales:1", _Solicitud("/sucursales/"))
+    assert base.startswith('W/"')
+    assert base == _etag("sucursales:1", _Solicitud("/sucursales/"))
+    assert base != _etag("sucursales:2", _Solicitud("/sucursales/"))
+    assert base != _etag("sucursales:1", _Solicitud("/sucursales/1"))
+    assert base != _etag("sucursales:1", _Solicitud("/sucursales/", "zona=N"))
+
+
+@pytest.mark.parametrize("if_none_match, esperado", [
+    ('W/"abc"', True),
+    ('"abc"', True),
+    ('"otro", W/"abc"', True),
+    ("*", True),
+    ('"otro"', False),
+])
+def test_coincide(if_none_match, esperado):
+    assert _coincide(if_none_match, 'W/"abc"') is esperado
+
+
+def _sucursal(nombre):
+    return {"id": 1, "nombre": nombre, "manager": "M", "zona": "NORTE"}
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    estado = {"version": 1, "filas": [_sucursal("A")]}
+    actualizado = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    db = ConexionFalsa([
+        ("FROM versiones_datos WHERE tabla = ANY",
+         lambda q, p: [{"tabla": "sucursales", "version": estado["version"], "actualizado": actualizado}]),
+        ("versiones_datos", lambda q, p: [{"version": estado["version"]}]),
+        ("FROM sucursales", lambda q, p: estado["filas"]),
+    ])
+    monkeypatch.setattr(cache_sucursales, "conexion", lambda: pytest.fail("conexión anidada"))
+    cache_sucursales.invalidar()
+
+    app = FastAPI()
+    app.include_router(sucursales.router)
+    app.dependency_overrides[get_db] = lambda: db
+    yield TestClient(app), db, estado
+    cache_sucursales.invalidar()
+
+
+def test_304_sin_consultar_la_tabla(cliente):
+    cliente, db, _ = cliente
+    primera = cliente.get("/sucursales/")
+    assert primera.status_code == 200
+    lecturas = len(db.consultas("FROM sucursales"))
+
+    segunda = cliente.get("/sucursales/", headers={"If-None-Match": primera.headers["ETag"]})
+    assert segunda.status_code == 304
+    assert segunda.content == b""
+    assert len(db.consultas("FROM sucursales")) == lecturas
+
+
+def test_if_modified_since_solo_no_da_304(cliente):
+    cliente, _, _ = cliente
+    primera = cliente.get("/sucursales/")
+    segunda = cliente.get("/sucursales/", headers={"If-Modified-Since": primera.headers["Last-Modified"]})
+    assert segunda.status_code == 200
+
+
+def test_etag_nuevo_nunca_acompana_datos_viejos(cliente):
+    cliente, _, estado = cliente
+    primera = cliente.get("/sucursales/")
+    # Otro worker escribe: la copia en memoria aún no lo sabe (se verifica cada 2 s)
+    estado.update(version=2, filas=[_sucursal("B")])
+
+    segunda = cliente.get("/sucursales/", headers={"If-None-Match": primera.headers["ETag"]})
+    assert segunda.status_code == 200
+    assert segunda.headers["ETag"] != primera.headers["ETag"]
+    assert segunda.json()[0]["nombre"] == "B"
+
+    detalle = cliente.get("/sucursales/1")
+    assert detalle.json()["nombre"] == "B"
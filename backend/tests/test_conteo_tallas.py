@@ -0,0 +1,66 @@
+from contextlib import contextmanager
+
+import pytest
+
+from app import conteo_tallas
+from tests.conftest import ConexionFalsa
+
+
+def _usar(monkeypatch, db):
+    @contextmanager
+    def conexion():
+        yield db
+
+    monkeypatch.setattr(conteo_tallas, "conexion", conexion)
+
+
+def test_reconstruir_bloquea_borra_e_inserta_en_una_transaccion():
+    db = ConexionFalsa([("INSERT INTO conteo_tallas", [{}] * 3)])
+
+    assert conteo_tallas.reconstruir(db) == 3
+
+    sentencias = [q.split()[0] for q, _ in db.ejecutadas]
+    assert sentencias == ["LOCK", "DELETE", "INSERT"]
+    assert "IN SHARE MODE" in db.ejecutadas[0][0]
+    assert db.commits == 1 and db.rollbacks == 0
+
+
+def test_reconstruir_deshace_si_falla():
+    def falla(query, params):
+        raise RuntimeError("sin conexión")
+
+    db = ConexionFalsa([("INSERT INTO conteo_tallas", falla)])
+
+    with pytest.raises(RuntimeError):
+        conteo_tallas.reconstruir(db)
+    assert db.commits == 0 and db.rollbacks == 1
+
+
+def test_verificar_sin_diferencias_sale_con_0(monkeypatch, capsys):
+    db = ConexionFalsa()
+    _usar(monkeypatch, db)
+
+    assert conteo_tallas.main(["verificar"]) == 0
+    assert "coincide" in capsys.readouterr().out
+    # Solo lectura: nunca confirma
+    assert db.commits == 0 and db.rollbacks == 1
+
+
+def test_verificar_con_diferencias_sale_con_1(monkeypatch, capsys):
+    _usar(monkeypatch, ConexionFalsa([("FULL JOIN guardado", [{
+        "sucursal_id": 4, "talla": "M", "administrativa": False, "talla_administrativa": "Por definir",
+        "cantidad_real": 3, "cantidad_guardada": 2,
+    }])]))
+
+    assert conteo_tallas.main(["verificar"]) == 1
+    salida = capsys.readouterr().out
+    assert "sucursal 4 talla M" in salida and "real 3, guardado 2" in salida and "1 diferencias" in salida
+
+
+def test_reconstruir_desde_la_linea_de_comandos(monkeypatch, capsys):
+    db = ConexionFalsa([("INSERT INTO conteo_tallas", [{}] * 2)])
+    _usar(monkeypatch, db)
+
+    assert conteo_tallas.main(["reconstruir"]) == 0
+    assert "Reconstruida con 2 filas" in capsys.readouterr().out
+    assert db.commits == 1
@@ -0,0 +1,37 @@
+from psycopg2 import sql
+
+from app import diagnostico_db
+from app.diagnostico_db import normalizar_sql
+
+
+def test_normalizar_sql_quita_literales_y_espacios():
+    consulta = "SELECT *\n  FROM empleados WHERE nombre = 'O''Brien' AND id = 42"
+    assert normalizar_sql(consulta) == "SELECT * FROM empleados WHERE nombre = ? AND id = ?"
+
+
+def test_normalizar_sql_agrupa_listas_de_parametros():
+    assert normalizar_sql("SELECT 1 FROM t WHERE id IN (%s, %s, %s)") == "SELECT ? FROM t WHERE id IN (...)"
+
+
+def test_normalizar_sql_acepta_bytes():
+    assert normalizar_sql(b"SELECT  1") == "SELECT ?"
+
+
+def test_normalizar_sql_arma_el_texto_de_composed():
+    consulta = sql.SQL("SELECT * FROM {} WHERE id = {} AND nombre = {}").format(
+        sql.Identifier("public", "empleados"), sql.Literal(7), sql.Placeholder()
+    )
+
+    assert normalizar_sql(consulta) == 'SELECT * FROM "public"."empleados" WHERE id = ? AND nombre = %s'
+
+
+def test_registrar_sentencia_con_composed(monkeypatch):
+    monkeypatch.setattr(diagnostico_db, "_por_sentencia", {})
+    consulta = sql.SQL("DELETE FROM {}").format(sql.Identifier("reportes"))
+
+    diagnostico_db.registrar_sentencia(consulta, 0.001, 3)
+    diagnostico_db.registrar_sentencia(consulta, 0.001, 2)
+
+    (datos,) = diagnostico_db._por_sentencia.values()
+    assert datos["veces"] == 2
+    assert datos["filas"] == 5
@@ -0,0 +1,42 @@
+import re
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.routes import empleados
+from tests.conftest import ConexionFalsa
+
+
+class _Marcadores(dict):
+    def __missing__(self, clave):
+        return f"<{clave}>"
+
+
+def _buscar(q):
+    db = ConexionFalsa()
+    app = FastAPI()
+    app.include_router(empleados.router)
+    app.dependency_overrides[get_db] = lambda: db
+    assert TestClient(app).get("/empleados/search", params={"q": q}).status_code == 200
+    query, valores = db.ejecutadas[-1]
+    # Mismo formato pyformat que psycopg2: falla si queda un % sin escapar
+    return query % _Marcadores(), valores
+
+
+def test_prefijo_por_palabra_del_documento():
+    query, valores = _buscar("jua pér")
+
+    caso_prefijo = re.search(r"WHEN (.*) THEN 'prefijo'", query).group(1)
+    assert caso_prefijo.count("~ ('(^|[^a-z0-9])' || normalizar_busqueda(<t") == 2
+    assert "<t0_regex>" in caso_prefijo and "<t1_regex>" in caso_prefijo
+    assert valores["t0_regex"] == "jua" and valores["t1_regex"] == "pér"
+
+
+def test_terminos_escapados_para_regex():
+    _, valores = _buscar("a.b (c)+ 100%")
+
+    assert valores["t0_regex"] == r"a\.b"
+    assert valores["t1_regex"] == r"\(c\)\+"
+    assert valores["t2_regex"] == "100%"
+    assert valores["t2_like"] == r"100\%"
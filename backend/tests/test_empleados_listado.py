@@ -0,0 +1,91 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import database
+from app.database import get_db
+from app.routes import empleados
+from tests.conftest import ConexionFalsa
+
+
+def _empleado(id_):
+    return {"id": id_, "nombre": f"EMPLEADO {id_}", "sucursal_id": 1, "talla": "M"}
+
+
+@pytest.fixture
+def listado():
+    db = ConexionFalsa([("FROM empleados", lambda query, params: [_empleado(i) for i in range(1, 4)])])
+    app = FastAPI()
+    app.include_router(empleados.router)
+    app.dependency_overrides[get_db] = lambda: db
+    return TestClient(app), db
+
+
+def test_pagina_con_cursor_siguiente(listado):
+    cliente, db = listado
+
+    respuesta = cliente.get("/empleados/", params={"limit": 2, "after_id": 10})
+
+    assert respuesta.status_code == 200
+    assert [e["id"] for e in respuesta.json()] == [1, 2]
+    assert respuesta.headers["X-Next-After-Id"] == "2"
+    (query, valores), = [e for e in db.ejecutadas if "FROM empleados" in e[0]]
+    assert "id > %s" in query and query.endswith("ORDER BY id LIMIT %s")
+    # Se pide una fila de más para saber si hay otra página
+    assert valores == [10, 3]
+
+
+def test_ultima_pagina_sin_cursor(listado):
+    cliente, _ = listado
+
+    respuesta = cliente.get("/empleados/", params={"limit": 3})
+
+    assert len(respuesta.json()) == 3
+    assert "X-Next-After-Id" not in respuesta.headers
+
+
+def test_filtros_en_sql(listado):
+    cliente, db = listado
+
+    cliente.get("/empleados/", params={"sucursal_id": 4, "talla": "Por definir", "requiere_playera_administrativa": "true"})
+
+    (query, valores), = [e for e in db.ejecutadas if "FROM empleados" in e[0]]
+    assert "sucursal_id = %s" in query
+    assert "(talla = %s OR talla IS NULL)" in query
+    assert "COALESCE(requiere_playera_administrativa, false) = %s" in query
+    assert "LIMIT" not in query
+    assert valores == [4, "Por definir", True]
+
+
+def test_proyeccion_incluye_el_id(listado):
+    cliente, db = listado
+
+    respuesta = cliente.get("/empleados/", params={"fields": "nombre, talla"})
+
+    assert respuesta.status_code == 200
+    (query, _), = [e for e in db.ejecutadas if "FROM empleados" in e[0]]
+    assert query.startswith("SELECT id, nombre, talla FROM empleados")
+
+
+def test_proyeccion_rechaza_columnas_desconocidas(listado):
+    cliente, db = listado
+
+    respuesta = cliente.get("/empleados/", params={"fields": "nombre,password"})
+
+    assert respuesta.status_code == 400
+    assert "password" in respuesta.json()["detail"]
+    assert not db.consultas("FROM empleados")
+
+
+def test_migraciones_aplica_solo_las_pendientes_en_orden(tmp_path, monkeypatch):
+    for nombre in ("002_b.sql", "001_a.sql", "003_c.sql"):
+        (tmp_path / nombre).write_text(f"-- {nombre}", encoding="utf-8")
+    monkeypatch.setattr(database, "MIGRACIONES_DIR", tmp_path)
+    db = ConexionFalsa([("SELECT nombre FROM migraciones", [{"nombre": "002_b.sql"}])])
+
+    database.aplicar_migraciones(db)
+
+    assert db.consultas("-- ") == ["-- 001_a.sql", "-- 003_c.sql"]
+    registradas = [params for query, params in db.ejecutadas if query.startswith("INSERT INTO migraciones")]
+    assert registradas == [("001_a.sql",), ("003_c.sql",)]
+    assert db.consultas("pg_advisory_unlock")
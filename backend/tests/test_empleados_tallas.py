@@ -0,0 +1,90 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.routes import empleados
+from tests.conftest import ConexionFalsa
+
+EXISTENTES = {1, 2, 3}
+
+
+@pytest.fixture
+def lote(monkeypatch):
+    """Cliente del router de empleados con un execute_values que simula el UPDATE ... FROM (VALUES ...)"""
+    enviados = []
+
+    def execute_values(cursor, sql, valores, **kwargs):
+        enviados.extend(valores)
+        return [
+            {"id": id_, "talla": talla or "M", "talla_administrativa": talla_adm or "Por definir"}
+            for id_, talla, talla_adm in valores if id_ in EXISTENTES
+        ]
+
+    monkeypatch.setattr(empleados, "execute_values", execute_values)
+    db = ConexionFalsa()
+    app = FastAPI()
+    app.include_router(empleados.router)
+    app.dependency_overrides[get_db] = lambda: db
+    return TestClient(app), enviados, db
+
+
+def test_lote_clasifica_cada_elemento(lote):
+    cliente, enviados, db = lote
+
+    respuesta = cliente.patch("/empleados/tallas", json={"items": [
+        {"id": 1, "talla": "S"},
+        {"id": 2, "talla": "XXL"},
+        {"id": 1, "talla": "L"},
+        {"id": 3, "talla": "GIGANTE"},
+        {"id": 3},
+        {"id": 99, "talla": "M"},
+    ]})
+
+    assert respuesta.status_code == 200
+    datos = respuesta.json()
+    assert [r["estado"] for r in datos["resultados"]] == [
+        "duplicado", "actualizado", "actualizado", "invalido", "invalido", "no_encontrado",
+    ]
+    assert datos["actualizados"] == 2
+    # Del id repetido solo se envía el último cambio válido
+    assert enviados == [(2, "XXL", None), (1, "L", None), (99, "M", None)]
+    assert db.commits == 1
+
+
+def test_lote_solo_invalidos_no_toca_la_base(lote):
+    cliente, enviados, db = lote
+
+    datos = cliente.patch("/empleados/tallas", json={"items": [{"id": 1, "talla": "?"}]}).json()
+
+    assert datos == {"actualizados": 0, "resultados": [{"id": 1, "estado": "invalido", "detalle": "Talla no válida: ?"}]}
+    assert enviados == []
+    assert db.commits == 0
+
+
+def test_lote_rechaza_mas_del_limite(lote, monkeypatch):
+    cliente, _, _ = lote
+    monkeypatch.setattr(empleados, "LIMITE_MAXIMO", 2)
+
+    respuesta = cliente.patch("/empleados/tallas", json={"items": [{"id": i, "talla": "M"} for i in range(3)]})
+
+    assert respuesta.status_code == 400
+
+
+def test_patch_individual_solo_actualiza_el_campo_enviado():
+    fila = {
+        "id": 5, "nombre": "Ana", "numero_nomina": 10, "sucursal_id": 1, "talla": "M",
+        "talla_administrativa": "L", "requiere_playera_administrativa": True,
+    }
+    db = ConexionFalsa([("UPDATE empleados", [fila])])
+    app = FastAPI()
+    app.include_router(empleados.router)
+    app.dependency_overrides[get_db] = lambda: db
+
+    respuesta = TestClient(app).patch("/empleados/5/talla", json={"talla_administrativa": "L"})
+
+    assert respuesta.status_code == 200
+    (consulta, parametros), = db.ejecutadas
+    assert "SET talla_administrativa = %s WHERE" in consulta
+    assert "talla = %s," not in consulta
+    assert parametros == ["L", 5]
@@ -0,0 +1,60 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.routes import estadisticas
+from tests.conftest import ConexionFalsa
+
+
+def _fila(sucursal_id, zona, talla=None, administrativa=False, talla_administrativa="Por definir", cantidad=0):
+    return {
+        "sucursal_id": sucursal_id, "nombre": f"Sucursal {sucursal_id}", "zona": zona, "region": "Norte",
+        "talla": talla, "administrativa": administrativa,
+        "talla_administrativa": talla_administrativa, "cantidad": cantidad,
+    }
+
+
+@pytest.fixture
+def cliente():
+    db = ConexionFalsa([("FROM sucursales s", [
+        _fila(1, "Centro", "M", False, cantidad=4),
+        _fila(1, "Centro", "L", True, "M", cantidad=2),
+        _fila(1, "Centro", "Por definir", True, "Por definir", cantidad=1),
+        _fila(2, "Sur"),
+    ])])
+    app = FastAPI()
+    app.include_router(estadisticas.router)
+    app.dependency_overrides[get_db] = lambda: db
+    return TestClient(app)
+
+
+def test_dashboard_resume_por_sucursal_zona_y_total(cliente):
+    datos = cliente.get("/estadisticas/dashboard").json()
+
+    primera, vacia = datos["sucursales"]
+    assert primera["total_empleados"] == 7
+    assert primera["tallas_definidas"] == 6
+    assert primera["porcentaje_cumplimiento"] == 86
+    assert primera["administrativos_definidos"] == 2
+    assert primera["administrativos_pendientes"] == 1
+    # 4 operativos x 3 + 2 administrativos x 1; sin talla no se envía
+    assert primera["playeras"] == 14
+    assert primera["playeras_por_talla"]["M"] == 12
+    assert primera["playeras_por_talla"]["L"] == 2
+    assert primera["cajas"] == 2
+
+    assert vacia["total_empleados"] == 0
+    assert vacia["cajas"] == 1
+    assert [z["zona"] for z in datos["zonas"]] == ["Centro", "Sur"]
+    assert datos["totales"]["sucursales"] == 2
+    assert datos["totales"]["playeras"] == 14
+
+
+def test_dashboard_filtra_una_sucursal(cliente):
+    assert cliente.get("/estadisticas/dashboard", params={"sucursal_id": 1}).status_code == 200
+
+    db = cliente.app.dependency_overrides[get_db]()
+    consulta, parametros = db.ejecutadas[-1]
+    assert "WHERE s.id = %s" in consulta
+    assert parametros == (1,)
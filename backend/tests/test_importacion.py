@@ -0,0 +1,92 @@
+import csv
+import io
+
+import pytest
+
+from app.importacion import ErrorImportacion, importar_empleados_csv
+from tests.conftest import ConexionFalsa
+
+ENCABEZADO = ["N. Nómina", "Nombre", "PDV", "Puesto Homologado", "Fing", "Fingpto", "Email"]
+
+
+def _csv(filas, encoding="latin-1"):
+    texto = io.StringIO(newline="")
+    escritor = csv.writer(texto)
+    escritor.writerow(ENCABEZADO)
+    escritor.writerows(filas)
+    return io.BytesIO(texto.getvalue().encode(encoding))
+
+
+def _db(actualizadas=0, insertadas=0):
+    return ConexionFalsa([
+        ("FROM sucursales", [{"id": 10, "pdv": " pdv1 "}, {"id": 20, "pdv": "PDV2"}]),
+        ("UPDATE empleados", [{}] * actualizadas),
+        ("INSERT INTO empleados", [{}] * insertadas),
+    ])
+
+
+def _copiadas(db):
+    (contenido,) = db.copiados
+    return list(csv.reader(io.StringIO(contenido)))
+
+
+def test_rechazos_con_su_motivo():
+    db = _db(insertadas=1)
+    resultado = importar_empleados_csv(db, _csv([
+        ["", "Sin nómina", "PDV1", "", "", "", ""],
+        ["12a", "Nómina mala", "PDV1", "", "", "", ""],
+        ["3", "", "PDV1", "", "", "", ""],
+        ["4", "Sin sucursal", "PDV9", "", "", "", ""],
+        ["5", "Fecha mala", "PDV1", "", "31/31/2024", "", ""],
+        ["6", "josé núñez", "pdv2", "Vendedor Mostrador", "2024-01-05", "", "jose@x.mx"],
+    ]))
+
+    assert [(r["fila"], r["motivo"]) for r in resultado["rechazos"]] == [
+        (2, "Número de nómina vacío"),
+        (3, "Número de nómina inválido: 12a"),
+        (4, "Nombre vacío"),
+        (5, "PDV sin sucursal registrada: PDV9"),
+        (6, "Fecha inválida: 31/31/2024 / "),
+    ]
+    assert resultado["procesadas"] == 6 and resultado["rechazadas"] == 5 and resultado["insertadas"] == 1
+    (fila,) = _copiadas(db)
+    assert fila[:3] == ["6", "José Núñez", "20"]
+    assert fila[5] == "2024-01-05"
+
+
+def test_duplicados_gana_la_ultima_fila():
+    db = _db()
+    resultado = importar_empleados_csv(db, _csv([
+        ["7", "Primera", "PDV1", "", "", "", ""],
+        ["8", "Otra", "PDV1", "", "", "", ""],
+        ["7", "Segunda", "PDV2", "", "", "", ""],
+    ]))
+
+    assert resultado["rechazos"] == [{"fila": 2, "nomina": "7", "motivo": "Duplicado, se usó la fila 4"}]
+    assert sorted((f[0], f[1], f[2]) for f in _copiadas(db)) == [("7", "Segunda", "20"), ("8", "Otra", "10")]
+
+
+def test_merge_con_la_tabla_bloqueada_en_una_transaccion():
+    db = _db(actualizadas=1, insertadas=0)
+    resultado = importar_empleados_csv(db, _csv([["9", "Ana", "PDV1", "", "", "", ""]]))
+
+    consultas = [q.strip().split()[0] + " " + q.strip().split()[1] for q, _ in db.ejecutadas]
+    bloqueo = consultas.index("LOCK TABLE")
+    assert "LOCK TABLE empleados IN SHARE ROW EXCLUSIVE MODE" in db.ejecutadas[bloqueo][0]
+    assert bloqueo < consultas.index("UPDATE empleados") < consultas.index("INSERT INTO")
+    assert db.commits == 1
+    assert resultado["actualizadas"] == 1
+
+
+def test_codificacion():
+    # El extracto de RH viene en latin-1; el mismo archivo en UTF-8 no trae la columna "N. Nómina"
+    db = _db(insertadas=1)
+    assert importar_empleados_csv(db, _csv([["1", "Peña", "PDV1", "", "", "", ""]]))["insertadas"] == 1
+    assert _copiadas(db)[0][1] == "Peña"
+
+    with pytest.raises(ErrorImportacion):
+        importar_empleados_csv(_db(), _csv([["1", "Peña", "PDV1", "", "", "", ""]], encoding="utf-8"))
+
+    db = _db(insertadas=1)
+    importar_empleados_csv(db, _csv([["1", "Peña", "PDV1", "", "", "", ""]], encoding="utf-8"), encoding="utf-8")
+    assert _copiadas(db)[0][1] == "Peña"
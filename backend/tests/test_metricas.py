@@ -0,0 +1,69 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import metricas
+
+
+@pytest.fixture(autouse=True)
+def registro(monkeypatch):
+    monkeypatch.setattr(metricas, "_registro", [])
+
+
+def test_contador_y_medidor_en_formato_prometheus():
+    contador = metricas.Contador("x_total", "Ejemplo", ("router", "status"))
+    contador.inc(router="empleados", status=200)
+    contador.inc(2, router="empleados", status=200)
+    medidor = metricas.Medidor("y", "En curso")
+    medidor.inc()
+    medidor.dec()
+
+    assert metricas.exportar().splitlines() == [
+        "# HELP x_total Ejemplo",
+        "# TYPE x_total counter",
+        'x_total{router="empleados",status="200"} 3',
+        "# HELP y En curso",
+        "# TYPE y gauge",
+        "y 0",
+    ]
+
+
+def test_histograma_acumula_buckets():
+    histograma = metricas.Histograma("z_segundos", "Duración", buckets=(0.1, 1))
+    for valor in (0.05, 0.1, 0.5, 3):
+        histograma.observar(valor)
+
+    assert histograma.exportar()[2:] == [
+        'z_segundos_bucket{le="0.1"} 2',
+        'z_segundos_bucket{le="1"} 3',
+        'z_segundos_bucket{le="+Inf"} 4',
+        "z_segundos_sum 3.65",
+        "z_segundos_count 4",
+    ]
+
+
+def test_router_de():
+    assert metricas.router_de("/empleados/12") == "empleados"
+    assert metricas.router_de("/reportes") == "reportes"
+    assert metricas.router_de("/metrics") == "otros"
+    assert metricas.router_de("/") == "otros"
+
+
+def test_middleware_cuenta_por_router_y_estado(monkeypatch):
+    solicitudes = metricas.Contador("s_total", "Solicitudes", ("router", "method", "status"))
+    monkeypatch.setattr(metricas, "SOLICITUDES", solicitudes)
+    app = FastAPI()
+
+    @app.get("/empleados/{id_}")
+    def empleado(id_: int):
+        return {"id": id_}
+
+    app.add_middleware(metricas.MiddlewareMetricas)
+    cliente = TestClient(app)
+
+    cliente.get("/empleados/1")
+    cliente.get("/empleados/2")
+    cliente.get("/no_existe")
+
+    assert solicitudes._valores == {("empleados", "GET", 200): 2, ("otros", "GET", 404): 1}
+    assert metricas.EN_CURSO._valores == {(): 0}
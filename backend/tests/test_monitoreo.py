@@ -0,0 +1,32 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import sesiones
+from app.main import app
+
+RUTAS = ["/metrics", "/db/pool", "/cache/sucursales", "/hash/estado"]
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    almacen = sesiones.AlmacenSesionesMemoria()
+    for token, rol in (("admin", "admin"), ("manager", "manager")):
+        almacen.guardar(token, {"usuario_id": 1, "username": token, "rol": rol,
+                                "sucursal_id": None, "expira": time.time() + 60})
+    monkeypatch.setattr(sesiones, "_almacen", almacen)
+    monkeypatch.setattr(sesiones, "MONITOREO_TOKEN", "secreto")
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("ruta", RUTAS)
+def test_sin_credenciales_no_expone_el_estado(cliente, ruta):
+    assert cliente.get(ruta).status_code == 401
+    assert cliente.get(ruta, headers={"Authorization": "Bearer otro"}).status_code == 401
+    assert cliente.get(ruta, headers={"Authorization": "Bearer manager"}).status_code == 403
+
+
+def test_token_de_monitoreo_o_administrador(cliente):
+    assert cliente.get("/metrics", headers={"Authorization": "Bearer secreto"}).status_code == 200
+    assert cliente.get("/hash/estado", headers={"Authorization": "Bearer admin"}).status_code == 200
@@ -0,0 +1,26 @@
+from app import motor_etiquetas
+
+
+def _envio(sucursal_id, playeras):
+    return {
+        "id": sucursal_id, "nombre": f"Sucursal {sucursal_id}", "manager": "Ana", "direccion": "Centro",
+        "telefono": "81", "numero_seguimiento": None, "empleados": 1, "playeras": playeras,
+        "tallas": {"M": playeras} if playeras else {},
+    }
+
+
+def test_una_etiqueta_por_caja():
+    cajas = [(caja, total, en_caja) for _, caja, total, en_caja in motor_etiquetas.etiquetas([_envio(1, 25), _envio(2, 0)])]
+
+    assert cajas == [(1, 3, 12), (2, 3, 12), (3, 3, 1), (1, 1, 0)]
+
+
+def test_paralelo_genera_el_mismo_pdf():
+    envios = [_envio(i, 30) for i in range(1, 8)]
+    try:
+        en_serie = b"".join(motor_etiquetas.generar_etiquetas_pdf(envios, paralelo=False))
+        en_paralelo = b"".join(motor_etiquetas.generar_etiquetas_pdf(envios, paralelo=True))
+    finally:
+        motor_etiquetas.cerrar_etiquetas()
+
+    assert en_paralelo == en_serie
@@ -0,0 +1,105 @@
+import pandas as pd
+from openpyxl import load_workbook
+
+from app.motor_reportes import (
+    ANCHO_MARGEN, ANCHO_MAXIMO, COLUMNAS_DETALLE, MedidorAnchos, anchos_columnas, consultar_datos,
+    escribir_excel, hojas_reporte_completo, hojas_streaming,
+)
+from tests.conftest import ConexionFalsa
+
+
+def _fila(id_, nombre, talla, sucursal=None, sucursal_id=None, administrativa=False, talla_adm=None, puesto=None):
+    fila = dict.fromkeys(COLUMNAS_DETALLE)
+    fila.update(id=id_, nombre=nombre, talla=talla, sucursal=sucursal, sucursal_id=sucursal_id,
+                requiere_playera_administrativa=administrativa, talla_administrativa=talla_adm,
+                puesto_homologado=puesto)
+    return fila
+
+
+# En el orden del ORDER BY de la base: "Ávila" antes que "Zacatecas" y "centro" al final
+FILAS = [
+    _fila(1, "ANA", "M", "Ávila", 10, administrativa=True, talla_adm="S", puesto="VENDEDOR"),
+    _fila(None, None, None, "Zacatecas", 20),
+    _fila(2, "LUIS", "L", "centro", 30, puesto="CHOFER"),
+    # Empleado cuyo sucursal_id no existe: FULL JOIN sin sucursal
+    _fila(3, "EVA", "M", administrativa=True, talla_adm="XL", puesto="VENDEDOR"),
+]
+SUCURSALES = ["Ávila", "Zacatecas", "centro"]
+
+
+def _cursor():
+    return ConexionFalsa([("FROM sucursales s", FILAS)]).cursor()
+
+
+def _filas_streaming(tipo):
+    hojas = {}
+    for nombre, columnas, filas, anchos in hojas_streaming(_cursor(), tipo, tamano_bloque=2):
+        # Mismo orden que generar_xlsx: el detalle se recorre antes de pedir los resúmenes
+        if callable(anchos):
+            anchos()
+        hojas[nombre] = [tuple(f) for f in filas]
+    return hojas
+
+
+def test_resumenes_por_talla_incluyen_empleados_sin_sucursal():
+    df, sucursales = consultar_datos(_cursor())
+    hojas = hojas_reporte_completo(df, sucursales)
+
+    assert sucursales == SUCURSALES
+    assert hojas["Detalle Completo"]["id"].tolist() == [1, 2]
+    assert list(hojas["Detalle Completo"].columns) == COLUMNAS_DETALLE
+    assert dict(hojas["Resumen Tallas"].values.tolist()) == {"M": 2, "L": 1}
+    assert dict(hojas["Resumen Tallas Adm"].values.tolist()) == {"S": 1, "XL": 1}
+    assert dict(hojas["Por Puesto"].values.tolist()) == {"VENDEDOR": 2, "CHOFER": 1}
+    assert hojas["Tallas Por Sucursal"]["sucursal"].tolist() == SUCURSALES
+    assert hojas["Tallas Por Sucursal"]["total"].tolist() == [1, 0, 1]
+    assert hojas["Tallas Adm Por Sucursal"]["sucursal"].tolist() == ["Ávila"]
+
+
+def test_streaming_da_los_mismos_resumenes():
+    df, sucursales = consultar_datos(_cursor())
+    esperado = hojas_reporte_completo(df, sucursales)
+    hojas = _filas_streaming("completo")
+
+    assert [f[0] for f in hojas["Detalle Completo"]] == [1, 2]
+    for nombre in ("Resumen Tallas", "Resumen Tallas Adm", "Tallas Por Sucursal", "Tallas Adm Por Sucursal", "Por Puesto"):
+        assert hojas[nombre] == [tuple(f) for f in esperado[nombre].values.tolist()], nombre
+
+
+def test_anchos_por_hoja_con_sus_propias_columnas():
+    df = pd.DataFrame({"talla": ["M", "Por definir"], "cantidad": [3, 12345]})
+
+    assert anchos_columnas(df) == [len("Por definir") + ANCHO_MARGEN, len("cantidad") + ANCHO_MARGEN]
+    assert anchos_columnas(pd.DataFrame({"nota": ["x" * 80]})) == [ANCHO_MAXIMO]
+
+
+def test_anchos_con_muestra_de_filas_espaciadas():
+    df = pd.DataFrame({"texto": ["a"] * 9 + ["b" * 20]})
+
+    # Con muestra de 5 se miden las filas 0, 2, 4, 6 y 8
+    assert anchos_columnas(df, muestra=5) == [len("texto") + ANCHO_MARGEN]
+    assert anchos_columnas(df, muestra=0) == [20 + ANCHO_MARGEN]
+
+
+def test_medidor_ignora_nulos_y_coincide_con_anchos_columnas():
+    df = pd.DataFrame({"nombre": ["ANA", "MARISOL"], "nomina": [7, None]})
+    medidor = MedidorAnchos(df.columns)
+    for fila in [("ANA", 7), ("MARISOL", None)]:
+        medidor.observar(fila)
+
+    assert medidor.anchos() == anchos_columnas(df)
+
+
+def test_escribir_excel_ajusta_cada_hoja(tmp_path):
+    ruta = tmp_path / "reporte.xlsx"
+    hojas = {
+        "Detalle": pd.DataFrame({"nombre": ["MARIA DEL CARMEN"], "talla": ["M"]}),
+        "Resumen": pd.DataFrame({"talla": ["M"], "cantidad": [1]}),
+    }
+
+    escribir_excel(hojas, ruta, ajustar_anchos=True)
+
+    libro = load_workbook(ruta)
+    assert libro["Detalle"].column_dimensions["A"].width == len("MARIA DEL CARMEN") + ANCHO_MARGEN
+    assert libro["Resumen"].column_dimensions["A"].width == len("talla") + ANCHO_MARGEN
+    assert libro["Resumen"].column_dimensions["B"].width == len("cantidad") + ANCHO_MARGEN
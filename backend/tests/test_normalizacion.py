@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from app.database import normalizar_texto, normalizar_fecha
+from app.normalizacion import normalizar_texto_columna, normalizar_fecha_columna, normalizar_dataframe
+
+TEXTOS = ["  josé  pérez ", "NORTE", None, "norte", "  josé  pérez ", np.nan, "NORTE"]
+FECHAS = ["2024-01-05", None, "05/01/2024", "basura", "2024-01-05", np.nan]
+
+
+def _escalar(funcion, valores):
+    return [funcion(None if pd.isna(valor) else valor) for valor in valores]
+
+
+def test_texto_columna_igual_a_la_version_escalar():
+    resultado = normalizar_texto_columna(pd.Series(TEXTOS, index=range(10, 17), name="zona"))
+
+    assert resultado.tolist() == _escalar(normalizar_texto, TEXTOS)
+    assert list(resultado.index) == list(range(10, 17))
+    assert resultado.name == "zona"
+
+
+def test_fecha_columna_igual_a_la_version_escalar():
+    assert normalizar_fecha_columna(FECHAS).tolist() == _escalar(normalizar_fecha, FECHAS)
+
+
+def test_columna_vacia():
+    assert normalizar_texto_columna([]).tolist() == []
+
+
+def test_dataframe_solo_toca_las_columnas_indicadas():
+    df = pd.DataFrame({"zona": ["norte", None], "fecha": ["2024-01-05", None], "otra": [" x ", "y"]})
+
+    resultado = normalizar_dataframe(df, columnas_texto=["zona"], columnas_fecha=["fecha"])
+
+    assert resultado["zona"].tolist() == _escalar(normalizar_texto, df["zona"])
+    assert resultado["fecha"].tolist() == _escalar(normalizar_fecha, df["fecha"])
+    assert resultado["otra"].tolist() == [" x ", "y"]
+    assert df["zona"][0] == "norte"
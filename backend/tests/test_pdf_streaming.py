@@ -0,0 +1,59 @@
+import re
+import zlib
+
+from app.pdf_streaming import Lienzo, generar_pdf, dividir_texto, ancho_texto, _cadena
+
+
+def _pdf(paginas):
+    return b"".join(generar_pdf(paginas))
+
+
+def test_xref_apunta_al_inicio_de_cada_objeto():
+    lienzo = Lienzo()
+    lienzo.texto(10, 10, "Hola", 12)
+    pdf = _pdf([lienzo.contenido(), Lienzo().contenido()])
+
+    inicio_xref = int(re.search(rb"startxref\n(\d+)\n%%EOF\n$", pdf).group(1))
+    assert pdf[inicio_xref:].startswith(b"xref\n")
+
+    entradas = re.findall(rb"(\d{10}) 00000 n \n", pdf[inicio_xref:])
+    # Catálogo, árbol, dos fuentes y dos objetos por página
+    assert len(entradas) == 8
+    for numero, offset in enumerate(entradas, start=1):
+        assert pdf[int(offset):].startswith(f"{numero} 0 obj\n".encode())
+
+
+def test_pdf_sin_paginas_es_valido():
+    pdf = _pdf([])
+
+    assert pdf.startswith(b"%PDF-1.4")
+    assert b"/Count 0" in pdf
+    assert b"/Size 5" in pdf
+
+
+def test_cadena_escapa_parentesis_y_diagonales():
+    assert _cadena("a(b)c\\d") == b"(a\\(b\\)c\\\\d)"
+
+
+def test_cadena_usa_cp1252_y_reemplaza_lo_que_no_cabe():
+    assert _cadena("Constitución ✓") == b"(Constituci\xf3n ?)"
+
+
+def test_lienzo_comprime_el_texto_escapado():
+    lienzo = Lienzo()
+    lienzo.texto(0, 0, "Caja (1/2)", 10, negrita=True)
+
+    operaciones = zlib.decompress(lienzo.contenido())
+
+    assert operaciones.startswith(b"BT /F2 10 Tf")
+    assert b"(Caja \\(1/2\\)) Tj ET" in operaciones
+
+
+def test_dividir_texto_respeta_el_ancho():
+    texto = "Constitución 444 pte Col Centro, Monterrey, NL"
+
+    lineas = dividir_texto(texto, 40, 10)
+
+    assert len(lineas) > 1
+    assert " ".join(lineas) == texto
+    assert all(ancho_texto(linea, 10) <= 40 for linea in lineas if " " in linea)
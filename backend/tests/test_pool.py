@@ -0,0 +1,129 @@
+import types
+
+import psycopg2
+import pytest
+from fastapi import HTTPException
+from psycopg2 import extensions
+
+from app import database, pool
+from app.pool import PoolAgotadoError, PoolConexiones
+
+
+class ConexionPool:
+    def __init__(self):
+        self.closed = False
+        self.rollbacks = 0
+        self.ping_falla = False
+        self.info = types.SimpleNamespace(transaction_status=extensions.TRANSACTION_STATUS_IDLE)
+
+    def cursor(self):
+        conexion = self
+
+        class Cursor:
+            def execute(self, query):
+                if conexion.ping_falla:
+                    raise psycopg2.OperationalError("sin respuesta")
+
+            def close(self):
+                pass
+        return Cursor()
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = True
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def monotonic(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(pool, "time", reloj)
+    monkeypatch.setattr(pool.psycopg2, "connect", lambda dsn, cursor_factory=None: ConexionPool())
+    return reloj
+
+
+def _pool(**opciones):
+    valores = {"minconn": 0, "maxconn": 2, "timeout": 0.05, "recycle": 100, "ping_idle": 10}
+    valores.update(opciones)
+    return PoolConexiones("postgresql://prueba", **valores)
+
+
+def test_reutiliza_la_conexion_devuelta(reloj):
+    p = _pool()
+    conn = p.obtener()
+    p.devolver(conn)
+
+    assert p.obtener() is conn
+    assert p.estadisticas()["creadas"] == 1
+
+
+def test_agotado_lanza_error_tras_el_timeout(monkeypatch):
+    monkeypatch.setattr(pool.psycopg2, "connect", lambda dsn, cursor_factory=None: ConexionPool())
+    p = _pool(maxconn=1)
+    p.obtener()
+
+    with pytest.raises(PoolAgotadoError):
+        p.obtener()
+
+    estadisticas = p.estadisticas()
+    assert estadisticas["timeouts"] == 1 and estadisticas["en_uso"] == 1
+
+
+def test_devolver_deshace_la_transaccion_pendiente(reloj):
+    p = _pool()
+    conn = p.obtener()
+    conn.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+
+    p.devolver(conn)
+
+    assert conn.rollbacks == 1
+    assert p.estadisticas()["libres"] == 1
+
+
+def test_recicla_las_conexiones_viejas(reloj):
+    p = _pool()
+    vieja = p.obtener()
+    p.devolver(vieja)
+    reloj.ahora += 101
+
+    nueva = p.obtener()
+
+    assert nueva is not vieja and vieja.closed
+    assert p.estadisticas()["recicladas"] == 1
+    assert p.estadisticas()["abiertas"] == 1
+
+
+def test_ping_tras_inactividad_descarta_la_que_no_responde(reloj):
+    p = _pool()
+    conn = p.obtener()
+    p.devolver(conn)
+    reloj.ahora += 11
+    conn.ping_falla = True
+
+    nueva = p.obtener()
+
+    assert nueva is not conn and conn.closed
+    estadisticas = p.estadisticas()
+    assert estadisticas["pings"] == 1 and estadisticas["descartadas"] == 1
+
+
+def test_get_db_agotado_responde_503(monkeypatch):
+    class PoolAgotado:
+        def obtener(self):
+            raise PoolAgotadoError("No hay conexiones disponibles en el pool")
+
+    monkeypatch.setattr(database, "get_pool", lambda: PoolAgotado())
+
+    with pytest.raises(HTTPException) as error:
+        next(database.get_db())
+    assert error.value.status_code == 503
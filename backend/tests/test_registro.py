@@ -0,0 +1,82 @@
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app import registro
+
+
+@pytest.fixture
+def cliente(monkeypatch, caplog):
+    monkeypatch.setattr(registro, "LOG_MUESTREO", 1.0)
+    monkeypatch.setattr(registro, "LOG_CUERPO_RUTAS", ("/usuarios/login",))
+    monkeypatch.setattr(registro, "LOG_CUERPO_MAX", 40)
+    caplog.set_level(logging.INFO, logger="app.solicitudes")
+
+    app = FastAPI()
+
+    @app.post("/usuarios/login")
+    async def login(request: Request):
+        return {"leidos": len(await request.body())}
+
+    @app.get("/falla")
+    def falla():
+        raise RuntimeError("falla")
+
+    app.add_middleware(registro.MiddlewareRegistro)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def _registros(caplog):
+    return [r for r in caplog.records if r.name == "app.solicitudes"]
+
+
+def test_ocultar_sensibles():
+    assert registro.ocultar_sensibles('{"username": "ana", "password": "secreta"}') == '{"username": "ana", "password": "***"}'
+    assert registro.ocultar_sensibles("token=abc&x=1") == 'token="***"&x=1'
+
+
+def test_request_id_se_respeta_o_se_genera(cliente):
+    respuesta = cliente.post("/usuarios/login", json={}, headers={"X-Request-ID": "abc123"})
+    assert respuesta.headers["x-request-id"] == "abc123"
+
+    generado = cliente.post("/usuarios/login", json={}).headers["x-request-id"]
+    assert len(generado) == 16 and generado != "abc123"
+
+
+def test_cuerpo_capturado_truncado_y_sin_contrasena(cliente, caplog):
+    cuerpo = json.dumps({"password": "secreta", "username": "a" * 100})
+
+    respuesta = cliente.post("/usuarios/login", content=cuerpo, headers={"content-type": "application/json"})
+
+    # La app sigue recibiendo el cuerpo completo
+    assert respuesta.json() == {"leidos": len(cuerpo)}
+    registro_, = _registros(caplog)
+    assert registro_.cuerpo.startswith('{"password": "***"')
+    assert "secreta" not in registro_.cuerpo
+    assert "a" * 20 not in registro_.cuerpo
+    assert registro_.status == 200 and registro_.path == "/usuarios/login"
+
+
+def test_sin_muestreo_solo_se_registran_errores(cliente, caplog, monkeypatch):
+    monkeypatch.setattr(registro, "LOG_MUESTREO", 0.0)
+
+    cliente.post("/usuarios/login", json={})
+    cliente.get("/falla")
+
+    registro_, = _registros(caplog)
+    assert registro_.status == 500 and registro_.levelno == logging.WARNING
+    assert not hasattr(registro_, "cuerpo")
+
+
+def test_formato_json_incluye_los_campos_de_la_solicitud():
+    record = logging.LogRecord("app.solicitudes", logging.INFO, __file__, 1, "GET / 200", None, None)
+    record.request_id, record.status, record.duracion_ms = "abc", 200, 1.5
+
+    datos = json.loads(registro.FormatoJSON().format(record))
+
+    assert datos["mensaje"] == "GET / 200"
+    assert (datos["request_id"], datos["status"], datos["duracion_ms"]) == ("abc", 200, 1.5)
+    assert "cuerpo" not in datos
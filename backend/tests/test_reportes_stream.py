@@ -0,0 +1,105 @@
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import almacen_reportes
+from app.routes import reportes
+from tests.conftest import ConexionFalsa
+
+
+@pytest.fixture
+def cliente(tmp_path, monkeypatch):
+    monkeypatch.setattr(almacen_reportes, "REPORTS_DIR", tmp_path)
+    monkeypatch.setattr(almacen_reportes, "_indice", almacen_reportes.OrderedDict())
+    monkeypatch.setattr(almacen_reportes, "_cargado", False)
+    monkeypatch.setattr(reportes, "_streams", threading.BoundedSemaphore(1))
+
+    @contextmanager
+    def conexion():
+        yield ConexionFalsa()
+
+    monkeypatch.setattr(reportes, "conexion", conexion)
+    monkeypatch.setattr(reportes, "hojas_streaming", lambda cursor, tipo, bloque: [])
+    monkeypatch.setattr(reportes, "generar_xlsx", lambda hojas, copia: iter([b"PK", b"fin"]))
+
+    app = FastAPI()
+    app.include_router(reportes.router)
+    return TestClient(app)
+
+
+def test_stream_libera_su_lugar_al_terminar(cliente):
+    for _ in range(2):
+        respuesta = cliente.get("/reportes/excel/stream")
+        assert respuesta.status_code == 200
+        assert respuesta.content == b"PKfin"
+    assert reportes._streams.acquire(blocking=False)
+
+
+def test_stream_responde_503_si_no_hay_lugar(cliente):
+    assert reportes._streams.acquire(blocking=False)
+
+    respuesta = cliente.get("/reportes/excel/stream")
+
+    assert respuesta.status_code == 503
+    assert respuesta.headers["Retry-After"] == "5"
+
+
+def test_liberar_solo_tiene_efecto_una_vez(cliente):
+    liberar = reportes._reservar_stream()
+    assert reportes._reservar_stream() is None
+
+    liberar()
+    liberar()
+
+    assert reportes._streams.acquire(blocking=False)
+    assert not reportes._streams.acquire(blocking=False)
+
+
+def test_copias_parciales_distintas_en_el_mismo_segundo(cliente, tmp_path, monkeypatch):
+    rutas = []
+    abrir = open
+
+    def registrar_apertura(ruta, modo="r", *args, **kwargs):
+        rutas.append(ruta)
+        return abrir(ruta, modo, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", registrar_apertura)
+    for _ in range(2):
+        contenido = reportes._stream_reporte("completo", "reporte.xlsx", True, lambda: None)
+        next(contenido)
+        contenido.close()
+
+    assert len(set(rutas)) == 2
+    assert not list(tmp_path.glob("*.parcial"))
+
+
+def test_stream_guardado_queda_en_la_cache_por_version(cliente, monkeypatch):
+    from app import cache_reportes
+
+    db = ConexionFalsa([
+        ("FROM versiones_datos", [{"tabla": "empleados", "version": 4, "actualizado": datetime(2025, 1, 1)},
+                                  {"tabla": "sucursales", "version": 2, "actualizado": datetime(2025, 1, 2)}]),
+        ("INSERT INTO reportes", [{"id": 5}]),
+    ])
+
+    @contextmanager
+    def conexion():
+        yield db
+
+    monkeypatch.setattr(reportes, "conexion", conexion)
+    monkeypatch.setattr(cache_reportes, "_memo", cache_reportes.OrderedDict())
+
+    respuesta = cliente.get("/reportes/excel/stream", params={"tipo": "completo", "guardar": "true"})
+    assert respuesta.status_code == 200
+
+    clave = cache_reportes.clave_reporte("completo", "empleados:4;sucursales:2")
+    (_, parametros), = [e for e in db.ejecutadas if "INSERT INTO reportes" in e[0]]
+    assert parametros[2:] == ("excel_completo_local", clave)
+    assert parametros[2] in cache_reportes.TIPOS_REGISTRO["completo"]
+    # La siguiente solicitud de /reportes/supabase/excel con la misma versión lo reutiliza
+    resultado = cache_reportes.buscar(db.cursor(), "completo", clave)
+    assert resultado["id"] == 5 and resultado["cache"] is True
@@ -0,0 +1,139 @@
+# tests/test_sesiones.py
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pytest
+
+from app import sesiones
+from tests.conftest import ConexionFalsa
+
+
+def _sesion(usuario_id=1, expira_en=3600):
+    return {"usuario_id": usuario_id, "username": f"u{usuario_id}", "rol": "manager",
+            "sucursal_id": 3, "expira": time.time() + expira_en}
+
+
+def test_memoria_guarda_y_vence():
+    almacen = sesiones.AlmacenSesionesMemoria()
+    almacen.guardar("a", _sesion())
+    almacen.guardar("b", _sesion(expira_en=-1))
+    assert almacen.obtener("a")["username"] == "u1"
+    assert almacen.obtener("b") is None
+    assert almacen.obtener("x") is None
+
+
+def test_memoria_lru_descarta_la_menos_usada():
+    almacen = sesiones.AlmacenSesionesMemoria(maximo=2)
+    almacen.guardar("a", _sesion())
+    almacen.guardar("b", _sesion())
+    almacen.obtener("a")
+    almacen.guardar("c", _sesion())
+    assert almacen.obtener("b") is None
+    assert almacen.obtener("a") is not None
+
+
+def test_memoria_eliminar_usuario():
+    almacen = sesiones.AlmacenSesionesMemoria()
+    almacen.guardar("a", _sesion(1))
+    almacen.guardar("b", _sesion(1))
+    almacen.guardar("c", _sesion(2))
+    almacen.eliminar_usuario(1)
+    assert almacen.obtener("a") is None and almacen.obtener("b") is None
+    assert almacen.obtener("c") is not None
+
+
+@pytest.fixture
+def tabla(monkeypatch):
+    """Tabla sesiones compartida por varios 'workers' (almacenes distintos)"""
+    filas = {}
+
+    def responder(query, params):
+        if query.lstrip().startswith("INSERT"):
+            token_hash, usuario_id, username, rol, sucursal_id, expira = params
+            assert expira.tzinfo is not None
+            filas[token_hash] = {"usuario_id": usuario_id, "username": username, "rol": rol,
+                                 "sucursal_id": sucursal_id, "expira": expira}
+        elif query.lstrip().startswith("DELETE") and "usuario_id" in query:
+            for clave in [k for k, f in filas.items() if f["usuario_id"] == params[0]]:
+                del filas[clave]
+        elif query.lstrip().startswith("DELETE"):
+            filas.pop(params[0], None)
+        else:
+            fila = filas.get(params[0])
+            if fila and fila["expira"] > datetime.now(timezone.utc):
+                return [dict(fila)]
+        return []
+
+    db = ConexionFalsa([("sesiones", responder)])
+
+    @contextmanager
+    def conexion():
+        yield db
+
+    monkeypatch.setattr(sesiones, "conexion", conexion)
+    return db
+
+
+def test_db_logout_en_otro_worker_se_respeta_tras_el_plazo(tabla):
+    worker_a = sesiones.AlmacenSesionesDB(verificar_segundos=0)
+    worker_b = sesiones.AlmacenSesionesDB(verificar_segundos=0)
+    worker_a.guardar("tok", _sesion())
+    assert worker_b.obtener("tok")["username"] == "u1"
+
+    worker_a.eliminar("tok")
+    assert worker_b.obtener("tok") is None
+
+
+def test_db_usa_la_copia_local_dentro_del_plazo(tabla):
+    almacen = sesiones.AlmacenSesionesDB(verificar_segundos=60)
+    almacen.guardar("tok", _sesion())
+    consultas = len(tabla.ejecutadas)
+    assert almacen.obtener("tok") is not None
+    assert len(tabla.ejecutadas) == consultas
+
+
+def test_db_usuario_eliminado(tabla):
+    worker_a = sesiones.AlmacenSesionesDB(verificar_segundos=0)
+    worker_b = sesiones.AlmacenSesionesDB(verificar_segundos=0)
+    worker_a.guardar("tok", _sesion(5))
+    worker_b.obtener("tok")
+    worker_a.eliminar_usuario(5)
+    assert worker_b.obtener("tok") is None
+
+
+def test_db_token_rechazado_no_vuelve_a_consultar_la_tabla(tabla):
+    almacen = sesiones.AlmacenSesionesDB(verificar_segundos=0, rechazo_segundos=60)
+    assert almacen.obtener("falso") is None
+    consultas = len(tabla.ejecutadas)
+
+    assert almacen.obtener("falso") is None
+    assert len(tabla.ejecutadas) == consultas
+
+
+def test_db_rechazo_vence(tabla, monkeypatch):
+    almacen = sesiones.AlmacenSesionesDB(verificar_segundos=0, rechazo_segundos=5)
+    assert almacen.obtener("tok") is None
+    # Otro worker crea la sesión con ese token: se acepta cuando vence el rechazo
+    sesiones.AlmacenSesionesDB().guardar("tok", _sesion())
+    assert almacen.obtener("tok") is None
+
+    ahora = time.monotonic()
+    monkeypatch.setattr(sesiones.time, "monotonic", lambda: ahora + 10)
+    assert almacen.obtener("tok")["username"] == "u1"
+
+
+def test_memoria_con_varios_workers_no_arranca(monkeypatch):
+    monkeypatch.setattr(sesiones, "SESIONES_BACKEND", "memoria")
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    with pytest.raises(RuntimeError):
+        sesiones.verificar_configuracion()
+    monkeypatch.setenv("WEB_CONCURRENCY", "1")
+    sesiones.verificar_configuracion()
+
+
+def test_token_bearer():
+    assert sesiones._token("Bearer abc") == "abc"
+    assert sesiones._token("bearer  abc ") == "abc"
+    assert sesiones._token("Basic abc") is None
+    assert sesiones._token(None) is None
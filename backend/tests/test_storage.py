@@ -0,0 +1,80 @@
+import logging
+
+import pytest
+
+from app import storage
+
+
+def test_sin_supabase_avisa_una_sola_vez(monkeypatch, caplog):
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", "supabase")
+    monkeypatch.setattr(storage, "SUPABASE_URL", None)
+    monkeypatch.setattr(storage, "_storage", None)
+    monkeypatch.setattr(storage, "_aviso_sin_supabase", False)
+
+    with caplog.at_level(logging.WARNING, logger="app.storage"):
+        assert storage.get_storage() is None
+        assert storage.get_storage() is None
+
+    assert len([r for r in caplog.records if "SUPABASE_URL" in r.getMessage()]) == 1
+
+
+class _StorageQueFalla(storage.StorageLocal):
+    def __init__(self, raiz, fallas):
+        super().__init__(raiz)
+        self.fallas = fallas
+        self.intentos = 0
+
+    def subir(self, bucket, nombre, ruta, content_type):
+        self.intentos += 1
+        if self.intentos <= self.fallas:
+            raise ConnectionError("sin red")
+        super().subir(bucket, nombre, ruta, content_type)
+
+
+def _archivo(tmp_path):
+    ruta = tmp_path / "reporte.xlsx"
+    ruta.write_bytes(b"contenido")
+    return ruta
+
+
+def test_storage_local_sube_firma_y_elimina(tmp_path):
+    local = storage.StorageLocal(tmp_path / "store")
+    local.asegurar_bucket("reportes")
+
+    local.subir("reportes", "r.xlsx", _archivo(tmp_path), "application/octet-stream")
+
+    assert (tmp_path / "store" / "reportes" / "r.xlsx").read_bytes() == b"contenido"
+    assert local.url_firmada("reportes", "r.xlsx", 60).startswith("file://")
+    local.eliminar("reportes", ["r.xlsx", "no_existe.xlsx"])
+    assert not (tmp_path / "store" / "reportes" / "r.xlsx").exists()
+
+
+def test_subida_reintenta_con_espera_exponencial(tmp_path, monkeypatch):
+    esperas = []
+    monkeypatch.setattr(storage.time, "sleep", esperas.append)
+    monkeypatch.setattr(storage, "SUBIDAS_REINTENTOS", 3)
+    monkeypatch.setattr(storage, "SUBIDAS_ESPERA", 0.5)
+    falla_dos = _StorageQueFalla(tmp_path / "store", fallas=2)
+
+    url, _ = storage.subir_con_reintentos(falla_dos, "reportes", "r.xlsx", _archivo(tmp_path), "x", 60)
+
+    assert url.startswith("file://") and falla_dos.intentos == 3
+    assert esperas == [0.5, 1.0]
+
+    siempre_falla = _StorageQueFalla(tmp_path / "store", fallas=99)
+    with pytest.raises(ConnectionError):
+        storage.subir_con_reintentos(siempre_falla, "reportes", "r.xlsx", _archivo(tmp_path), "x", 60)
+    assert siempre_falla.intentos == 3
+
+
+def test_subida_en_segundo_plano_avisa_al_terminar(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "_storage", storage.StorageLocal(tmp_path / "store"))
+    monkeypatch.setattr(storage, "_executor", None)
+    avisos = []
+
+    futuro = storage.subir_en_segundo_plano(
+        "reportes", "r.xlsx", _archivo(tmp_path), "x", 60, lambda url, expiracion: avisos.append(url)
+    )
+
+    assert futuro.result(timeout=5) == avisos[0]
+    storage.cerrar_subidas()
@@ -0,0 +1,68 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import cache_sucursales
+from app.database import get_db
+from app.routes import sucursales
+from tests.conftest import ConexionFalsa
+
+EXISTENTES = {1, 2}
+
+
+def _actualizar(query, parametros):
+    # Parámetros: generales (SET) y luego los arreglos de unnest (FROM)
+    empaquetado_general, _, ids, empaquetados, seguimientos = parametros
+    return [
+        {"id": id_, "nombre": f"S{id_}", "manager": "Ana", "zona": "Centro",
+         "is_empaquetado": empaquetado if empaquetado is not None else empaquetado_general,
+         "numero_seguimiento": seguimiento}
+        for id_, empaquetado, seguimiento in zip(ids, empaquetados, seguimientos) if id_ in EXISTENTES
+    ]
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    monkeypatch.setattr(cache_sucursales, "guardar", lambda fila: None)
+    db = ConexionFalsa([("UPDATE sucursales", _actualizar)])
+    app = FastAPI()
+    app.include_router(sucursales.router)
+    app.dependency_overrides[get_db] = lambda: db
+    return TestClient(app), db
+
+
+def test_ids_repetidos_se_colapsan_y_gana_el_ultimo(cliente):
+    cliente, db = cliente
+
+    datos = cliente.patch("/sucursales/envio", json={"items": [
+        {"id": 1, "numero_seguimiento": "A"},
+        {"id": 2},
+        {"id": 1, "numero_seguimiento": "B"},
+        {"id": 7},
+    ], "is_empaquetado": True}).json()
+
+    (_, parametros), = db.ejecutadas
+    assert parametros[2] == [1, 2, 7]
+    assert parametros[4] == ["B", None, None]
+    assert datos["duplicados"] == [1]
+    assert datos["no_actualizadas"] == [7]
+    assert datos["actualizadas"] == 2
+    assert db.commits == 1
+
+
+def test_sin_repetidos_no_reporta_duplicados(cliente):
+    cliente, _ = cliente
+
+    datos = cliente.patch("/sucursales/envio", json={"items": [{"id": 1}, {"id": 2}], "is_empaquetado": False}).json()
+
+    assert datos["duplicados"] == []
+    assert datos["no_actualizadas"] == []
+
+
+def test_sin_campos_para_actualizar(cliente):
+    cliente, db = cliente
+
+    respuesta = cliente.patch("/sucursales/envio", json={"items": [{"id": 1}]})
+
+    assert respuesta.status_code == 400
+    assert db.ejecutadas == []
@@ -0,0 +1,78 @@
+import asyncio
+import threading
+
+import pytest
+
+from app import trabajos
+
+
+@pytest.fixture(autouse=True)
+def estado(monkeypatch):
+    monkeypatch.setattr(trabajos, "_trabajos", trabajos.OrderedDict())
+    monkeypatch.setattr(trabajos, "_en_curso", {})
+    monkeypatch.setattr(trabajos, "_executor", None)
+    yield
+    trabajos.cerrar_trabajos()
+
+
+def test_trabajo_completado_con_su_resultado():
+    trabajo_id = trabajos.enviar_trabajo("excel", lambda a, b=0: a + b, 2, b=3)
+
+    assert asyncio.run(trabajos.esperar_trabajo(trabajo_id)) == 5
+    trabajo = trabajos.obtener_trabajo(trabajo_id)
+    assert trabajo["estado"] == trabajos.COMPLETADO and trabajo["resultado"] == 5
+    assert trabajo["terminado"] >= trabajo["iniciado"]
+    assert "_future" not in trabajo
+
+
+def test_trabajo_con_error():
+    def falla():
+        raise RuntimeError("sin datos")
+
+    trabajo_id = trabajos.enviar_trabajo("excel", falla)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(trabajos.esperar_trabajo(trabajo_id))
+    trabajo = trabajos.obtener_trabajo(trabajo_id)
+    assert trabajo["estado"] == trabajos.ERROR and trabajo["error"] == "sin datos"
+
+
+def test_trabajo_inexistente():
+    assert trabajos.obtener_trabajo("nada") is None
+    with pytest.raises(KeyError):
+        asyncio.run(trabajos.esperar_trabajo("nada"))
+
+
+def test_historial_conserva_los_trabajos_sin_terminar(monkeypatch):
+    monkeypatch.setattr(trabajos, "TRABAJOS_HISTORIAL", 2)
+    liberar = threading.Event()
+    bloqueado = trabajos.enviar_trabajo("excel", liberar.wait, 5)
+    terminados = []
+    for _ in range(3):
+        terminados.append(trabajos.enviar_trabajo("excel", int))
+        asyncio.run(trabajos.esperar_trabajo(terminados[-1]))
+
+    assert trabajos.obtener_trabajo(bloqueado)["estado"] == trabajos.EN_PROCESO
+    assert [trabajos.obtener_trabajo(t) is not None for t in terminados] == [False, False, True]
+    liberar.set()
+
+
+def test_single_flight_reutiliza_el_trabajo_en_curso():
+    liberar = threading.Event()
+    llamadas = []
+
+    def construir():
+        llamadas.append(1)
+        liberar.wait(5)
+        return "archivo"
+
+    primero = trabajos.enviar_trabajo_unico("clave", "excel", construir)
+    segundo = trabajos.enviar_trabajo_unico("clave", "excel", construir)
+    otro = trabajos.enviar_trabajo_unico("otra", "excel", int)
+    liberar.set()
+
+    assert primero == segundo != otro
+    assert asyncio.run(trabajos.esperar_trabajo(segundo)) == "archivo"
+    assert llamadas == [1]
+    # Terminado, la misma clave vuelve a encolar
+    assert trabajos.enviar_trabajo_unico("clave", "excel", int) != primero
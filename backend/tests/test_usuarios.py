@@ -0,0 +1,99 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import contrasenas, sesiones
+from app.routes import usuarios
+from tests.conftest import ConexionFalsa
+
+
+def test_enviar_libera_el_lugar_si_el_pool_esta_cerrado(monkeypatch):
+    monkeypatch.setattr(contrasenas, "_executor", None)
+    executor = contrasenas._get_executor()
+    executor.shutdown()
+
+    with pytest.raises(RuntimeError):
+        contrasenas._enviar(str, 1)
+
+    assert contrasenas.estadisticas_hash()["en_vuelo"] == 0
+    monkeypatch.setattr(contrasenas, "_executor", None)
+
+
+def test_enviar_rechaza_al_superar_la_cola(monkeypatch):
+    monkeypatch.setattr(contrasenas, "_executor", None)
+    monkeypatch.setattr(contrasenas, "HASH_WORKERS", 1)
+    monkeypatch.setattr(contrasenas, "HASH_COLA_MAX", 1)
+    rechazadas = contrasenas.estadisticas_hash()["rechazadas"]
+    liberar = threading.Event()
+
+    en_curso = [contrasenas._enviar(liberar.wait, 5) for _ in range(2)]
+    with pytest.raises(contrasenas.HashSaturadoError):
+        contrasenas._enviar(liberar.wait, 5)
+
+    assert contrasenas.estadisticas_hash()["rechazadas"] == rechazadas + 1
+    liberar.set()
+    for future in en_curso:
+        future.result(timeout=5)
+    assert contrasenas.estadisticas_hash()["en_vuelo"] == 0
+    contrasenas.cerrar_hash()
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    db = ConexionFalsa([
+        ("SELECT id FROM usuarios", []),
+        ("INSERT INTO usuarios", [{"id": 7}]),
+    ])
+
+    @contextmanager
+    def conexion():
+        yield db
+
+    monkeypatch.setattr(usuarios, "conexion", conexion)
+    almacen = sesiones.AlmacenSesionesMemoria()
+    almacen.guardar("admin", {"usuario_id": 1, "username": "admin", "rol": "admin",
+                              "sucursal_id": None, "expira": time.time() + 60})
+    monkeypatch.setattr(sesiones, "_almacen", almacen)
+    app = FastAPI()
+    app.include_router(usuarios.router)
+    return TestClient(app, headers={"Authorization": "Bearer admin"}), db
+
+
+def test_crear_usuario_calcula_el_hash_fuera_del_threadpool(cliente, monkeypatch):
+    cliente, db = cliente
+    hilos = []
+
+    async def hash_falso(password):
+        hilos.append(threading.current_thread().name)
+        return f"hash:{password}"
+
+    monkeypatch.setattr(usuarios, "get_password_hash", hash_falso)
+
+    respuesta = cliente.post("/usuarios/", json={"username": "nuevo", "password": "secreta", "rol": "admin", "sucursal_id": 4})
+
+    assert respuesta.status_code == 200
+    assert respuesta.json() == {"id": 7, "username": "nuevo", "rol": "admin", "sucursal_id": None}
+    (_, parametros), = [e for e in db.ejecutadas if "INSERT INTO usuarios" in e[0]]
+    assert parametros == ("nuevo", "hash:secreta", "admin", None)
+    assert db.commits == 1
+    # El await corre en el event loop, no en un hilo del threadpool
+    assert not hilos[0].startswith("AnyIO")
+
+
+def test_crear_usuario_saturado_da_503(cliente, monkeypatch):
+    cliente, db = cliente
+
+    async def saturado(password):
+        raise contrasenas.HashSaturadoError()
+
+    monkeypatch.setattr(usuarios, "get_password_hash", saturado)
+
+    respuesta = cliente.post("/usuarios/", json={"username": "nuevo", "password": "x", "rol": "admin"})
+
+    assert respuesta.status_code == 503
+    assert respuesta.headers["Retry-After"] == "1"
+    assert not [e for e in db.ejecutadas if "INSERT INTO usuarios" in e[0]]
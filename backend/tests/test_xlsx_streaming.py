@@ -0,0 +1,46 @@
+import io
+from datetime import date
+
+import openpyxl
+
+from app import xlsx_streaming
+from app.xlsx_streaming import generar_xlsx, letra_columna
+
+
+def _leer(bloques):
+    return openpyxl.load_workbook(io.BytesIO(b"".join(bloques)))
+
+
+def test_letra_columna():
+    assert [letra_columna(i) for i in (0, 25, 26, 701, 702)] == ["A", "Z", "AA", "ZZ", "AAA"]
+
+
+def test_libro_legible_con_tipos_y_caracteres_especiales():
+    filas = iter([
+        (1, "José <&> \"Pérez\"\x01", True, date(2024, 1, 5)),
+        (2.5, None, False, float("nan")),
+    ])
+    libro = _leer(generar_xlsx([
+        ("Empleados con un nombre de hoja demasiado largo", ["id", "nombre", "activo", "fecha"], filas, lambda: [8, 30]),
+        ("Vacía", ["a"], []),
+    ]))
+
+    hoja = libro.worksheets[0]
+    assert libro.sheetnames == ["Empleados con un nombre de hoja", "Vacía"]
+    assert [c.value for c in hoja[1]] == ["id", "nombre", "activo", "fecha"]
+    assert hoja["A1"].font.b
+    assert [c.value for c in hoja[2]] == [1, 'José <&> "Pérez"', True, "2024-01-05"]
+    assert [c.value for c in hoja[3]] == [2.5, None, False, None]
+    assert hoja.column_dimensions["B"].width == 30
+    assert libro.worksheets[1].max_row == 1
+
+
+def test_entrega_por_bloques_y_copia_identica(monkeypatch):
+    monkeypatch.setattr(xlsx_streaming, "TAMANO_BLOQUE", 1024)
+    copia = io.BytesIO()
+
+    bloques = list(generar_xlsx([("Datos", ["n", "texto"], ((i, f"fila {i}" * 5) for i in range(5000)))], copia=copia))
+
+    assert len([b for b in bloques if b]) > 3
+    assert copia.getvalue() == b"".join(bloques)
+    assert _leer(bloques).worksheets[0].max_row == 5001
@@ -6,7 +6,7 @@ import AdminDashboard from './componentes/admin/AdminDashboard';
 import ManagerDashboard from './componentes/manager/ManagerDashboard';
 import SucursalDetalle from './componentes/admin/SucursalDetalle';
 import Navbar from './componentes/Navbar';
-import { fetchSucursales } from './api';
+import { fetchSucursales, logout, SESION_EXPIRADA } from './api';
 
 function App() {
   const [user, setUser] = useState(null);
@@ -35,6 +35,13 @@ function App() {
     loadSucursales();
   }, []);
 
+  // El servidor rechazó el token (sesión cerrada en otro lado o vencida): volver al login
+  useEffect(() => {
+    const alExpirar = () => setUser(null);
+    window.addEventListener(SESION_EXPIRADA, alExpirar);
+    return () => window.removeEventListener(SESION_EXPIRADA, alExpirar);
+  }, []);
+
   const handleLogin = (userData) => {
     setUser(userData);
     // Guardar sesión en localStorage
@@ -42,6 +49,8 @@ function App() {
   };
 
   const handleLogout = () => {
+    // Invalidar el token en el servidor; la sesión local se cierra aunque falle
+    logout().catch(() => {});
     setUser(null);
     localStorage.removeItem('uniformes_user');
   };
@@ -2,8 +2,16 @@
 const API_URL = import.meta.env.VITE_API_URL;
 
 
+// Evento que App escucha para volver al login cuando el servidor rechaza la sesión guardada
+export const SESION_EXPIRADA = 'uniformes:sesion-expirada';
+
 // Función genérica para manejar errores de fetch
 const handleFetchResponse = async (response) => {
+  if (response.status === 401 && localStorage.getItem('uniformes_user')) {
+    // Token cerrado, vencido o de un usuario eliminado: se descarta la sesión local
+    localStorage.removeItem('uniformes_user');
+    window.dispatchEvent(new Event(SESION_EXPIRADA));
+  }
   if (!response.ok) {
     const errorData = await response.json().catch(() => ({}));
     const errorMessage = errorData.detail || `Error ${response.status}: ${response.statusText}`;
@@ -12,6 +20,13 @@ const handleFetchResponse = async (response) => {
   return await response.json();
 };
 
+// Encabezado con el token de la sesión guardada al iniciar sesión
+const authHeaders = () => {
+  const savedUser = localStorage.getItem('uniformes_user');
+  const token = savedUser ? JSON.parse(savedUser).token : null;
+  return token ? { Authorization: `Bearer ${token}` } : {};
+};
+
 // Sucursales
 export const fetchSucursales = async () => {
   const response = await fetch(`${API_URL}/sucursales`);
@@ -50,6 +65,48 @@ export const updateSucursal = async (id, sucursal) => {
   return result;
 };
 
+// Estado de envío de muchas sucursales en una solicitud:
+// datos = { items: [{ id, is_empaquetado, numero_seguimiento }], zona, region, is_empaquetado, numero_seguimiento }
+export const updateEnvioSucursales = async (datos) => {
+  const response = await fetch(`${API_URL}/sucursales/envio`, {
+    method: 'PATCH',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify(datos),
+  });
+  return handleFetchResponse(response);
+};
+
+// Etiquetas de envío en PDF generadas en el servidor; `filtros` acepta ids, zona, region,
+// estado ('todas' | 'pendientes' | 'empaquetadas') y contenido
+export const downloadEtiquetasEnvio = async (filtros = {}) => {
+  const params = new URLSearchParams();
+  Object.entries(filtros).forEach(([clave, valor]) => {
+    if (valor === undefined || valor === null) return;
+    params.append(clave, Array.isArray(valor) ? valor.join(',') : valor);
+  });
+  const response = await fetch(`${API_URL}/sucursales/etiquetas?${params.toString()}`);
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(errorData.detail || `Error ${response.status}: ${response.statusText}`);
+  }
+
+  const disposition = response.headers.get('Content-Disposition') || '';
+  const coincidencia = disposition.match(/filename="([^"]+)"/);
+  const nombreArchivo = coincidencia ? coincidencia[1] : 'etiquetas_envio.pdf';
+
+  const url = window.URL.createObjectURL(await response.blob());
+  const enlace = document.createElement('a');
+  enlace.href = url;
+  enlace.download = nombreArchivo;
+  document.body.appendChild(enlace);
+  enlace.click();
+  enlace.remove();
+  window.URL.revokeObjectURL(url);
+  return nombreArchivo;
+};
+
 export const deleteSucursal = async (id) => {
   const response = await fetch(`${API_URL}/sucursales/${id}`, {
     method: 'DELETE',
@@ -66,6 +123,34 @@ export const fetchEmpleados = async (sucursalId = null) => {
   return handleFetchResponse(response);
 };
 
+// Búsqueda en el servidor por nombre, nómina, email o CEMEX ID (sin acentos, con coincidencias aproximadas).
+// Retorna los empleados ordenados por relevancia, con `coincidencia` y `puntaje`
+export const searchEmpleados = async (q, { sucursalId = null, limit = 20 } = {}) => {
+  const query = new URLSearchParams({ q, limit });
+  if (sucursalId) {
+    query.append('sucursal_id', sucursalId);
+  }
+  const response = await fetch(`${API_URL}/empleados/search?${query.toString()}`);
+  return handleFetchResponse(response);
+};
+
+// Página de empleados con cursor: params = { sucursal_id, talla, requiere_playera_administrativa, limit, after_id, fields }
+// Retorna { empleados, nextAfterId } donde nextAfterId es null en la última página
+export const fetchEmpleadosPagina = async (params = {}) => {
+  const query = new URLSearchParams();
+  Object.entries(params).forEach(([key, value]) => {
+    if (value !== null && value !== undefined && value !== '') {
+      query.append(key, Array.isArray(value) ? value.join(',') : value);
+    }
+  });
+  const response = await fetch(`${API_URL}/empleados?${query.toString()}`);
+  const empleados = await handleFetchResponse(response);
+  return {
+    empleados,
+    nextAfterId: response.headers.get('X-Next-After-Id'),
+  };
+};
+
 export const fetchEmpleado = async (id) => {
   const response = await fetch(`${API_URL}/empleados/${id}`);
   return handleFetchResponse(response);
@@ -100,6 +185,17 @@ export const deleteEmpleado = async (id) => {
   return handleFetchResponse(response);
 };
 
+// Importar el extracto mensual de RH (CSV en latin-1)
+export const importEmpleadosCsv = async (file, encoding = 'latin-1') => {
+  const formData = new FormData();
+  formData.append('archivo', file);
+  const response = await fetch(`${API_URL}/empleados/importar?encoding=${encoding}`, {
+    method: 'POST',
+    body: formData,
+  });
+  return handleFetchResponse(response);
+};
+
 // Función específica para actualizar solo la talla de un empleado
 export const updateEmpleadoTalla = async (id, tallaData) => {
   const response = await fetch(`${API_URL}/empleados/${id}/talla`, {
@@ -112,6 +208,28 @@ export const updateEmpleadoTalla = async (id, tallaData) => {
   return handleFetchResponse(response);
 };
 
+// Cambia las tallas de varios empleados en una sola solicitud: items = [{ id, talla, talla_administrativa }]
+// Retorna { actualizados, resultados } con el estado de cada elemento
+export const updateTallasLote = async (items) => {
+  const response = await fetch(`${API_URL}/empleados/tallas`, {
+    method: 'PATCH',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({ items }),
+  });
+  return handleFetchResponse(response);
+};
+
+// Estadísticas agregadas del dashboard (por sucursal, por zona y totales)
+export const fetchEstadisticasDashboard = async (sucursalId = null) => {
+  const url = sucursalId ?
+    `${API_URL}/estadisticas/dashboard?sucursal_id=${sucursalId}` :
+    `${API_URL}/estadisticas/dashboard`;
+  const response = await fetch(url);
+  return handleFetchResponse(response);
+};
+
 // Reportes
 export const generateExcelReport = async () => {
   const response = await fetch(`${API_URL}/reportes/excel`);
@@ -123,10 +241,38 @@ export const generateSupabaseExcelReport = async () => {
   return handleFetchResponse(response);
 };
 
+// Reportes como trabajos en segundo plano: tipo = 'excel' | 'completo'
+export const submitReportJob = async (tipo = 'excel') => {
+  const response = await fetch(`${API_URL}/reportes/trabajos?tipo=${tipo}`, {
+    method: 'POST',
+  });
+  return handleFetchResponse(response);
+};
+
+export const fetchReportJob = async (trabajoId) => {
+  const response = await fetch(`${API_URL}/reportes/trabajos/${trabajoId}`);
+  return handleFetchResponse(response);
+};
+
+export const downloadReportJobResult = (trabajoId) => {
+  window.open(`${API_URL}/reportes/trabajos/${trabajoId}/resultado`, '_blank');
+};
+
 export const downloadExcelReport = (nombreArchivo) => {
   window.open(`${API_URL}/reportes/excel/download/${nombreArchivo}`, '_blank');
 };
 
+// URL de descarga de un reporte; cambia a la de Supabase Storage cuando termina su subida
+export const fetchReporteUrl = async (reporteId) => {
+  const response = await fetch(`${API_URL}/reportes/${reporteId}/url`);
+  return handleFetchResponse(response);
+};
+
+// Descarga el reporte mientras se genera (tipo = 'excel' | 'completo')
+export const downloadExcelReportStream = (tipo = 'completo') => {
+  window.open(`${API_URL}/reportes/excel/stream?tipo=${tipo}`, '_blank');
+};
+
 // Generar reporte específico de una sucursal
 export const generateSucursalExcelReport = async (sucursalId) => {
   const response = await fetch(`${API_URL}/reportes/sucursal/${sucursalId}/excel`);
@@ -148,11 +294,20 @@ export const login = async (username, password) => {
   return handleFetchResponse(response);
 };
 
+export const logout = async () => {
+  const response = await fetch(`${API_URL}/usuarios/logout`, {
+    method: 'POST',
+    headers: authHeaders(),
+  });
+  return handleFetchResponse(response);
+};
+
 export const createUser = async (userData) => {
   const response = await fetch(`${API_URL}/usuarios`, {
     method: 'POST',
     headers: {
       'Content-Type': 'application/json',
+      ...authHeaders(),
     },
     body: JSON.stringify(userData),
   });
@@ -160,13 +315,16 @@ export const createUser = async (userData) => {
 };
 
 export const fetchUsers = async () => {
-  const response = await fetch(`${API_URL}/usuarios`);
+  const response = await fetch(`${API_URL}/usuarios`, {
+    headers: authHeaders(),
+  });
   return handleFetchResponse(response);
 };
 
 export const deleteUser = async (id) => {
   const response = await fetch(`${API_URL}/usuarios/${id}`, {
     method: 'DELETE',
+    headers: authHeaders(),
   });
   return handleFetchResponse(response);
 };
\ No newline at end of file
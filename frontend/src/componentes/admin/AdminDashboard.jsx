@@ -18,7 +18,7 @@ import {
   Package
 } from 'lucide-react';
 import {
-  fetchEmpleados,
+  fetchEstadisticasDashboard,
   generateExcelReport,
   generateSupabaseExcelReport,
   downloadExcelReport
@@ -32,7 +32,8 @@ import BulkShippingGenerator from './BulkShippingGenerator';
 const AdminDashboard = ({ sucursales: sucursalesIniciales, onSucursalUpdate: onSucursalUpdatePadre }) => {
   // Estado local de sucursales para manejar actualizaciones
   const [sucursales, setSucursales] = useState(sucursalesIniciales || []);
-  const [empleados, setEmpleados] = useState([]);
+  // Resúmenes agregados en el servidor (/estadisticas/dashboard): no se descarga la tabla de empleados
+  const [estadisticas, setEstadisticas] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [generating, setGenerating] = useState(false);
@@ -47,14 +48,6 @@ const AdminDashboard = ({ sucursales: sucursalesIniciales, onSucursalUpdate: onS
   const [searchTerm, setSearchTerm] = useState('');
   const [filterZona, setFilterZona] = useState('');
 
-  // Estadísticas
-  const [stats, setStats] = useState({
-    totalEmpleados: 0,
-    empleadosConTalla: 0,
-    totalSucursales: 0,
-    porDefinir: 0
-  });
-
   // Para manejar tabs en el dashboard
   const [activeTab, setActiveTab] = useState('resumen');
 
@@ -69,15 +62,9 @@ const AdminDashboard = ({ sucursales: sucursalesIniciales, onSucursalUpdate: onS
   }, [sucursalesIniciales]);
 
   useEffect(() => {
-    loadAllEmpleados();
+    loadEstadisticas();
   }, []);
 
-  useEffect(() => {
-    if (empleados.length > 0 && sucursales.length > 0) {
-      calculateStats();
-    }
-  }, [empleados, sucursales]);
-
   // Función para manejar actualizaciones de sucursales
   const handleSucursalUpdate = (sucursalActualizada) => {
     // Actualizar estado local
@@ -105,27 +92,21 @@ const AdminDashboard = ({ sucursales: sucursalesIniciales, onSucursalUpdate: onS
     setTimeout(() => setError(''), 5000);
   };
 
-  const calculateStats = () => {
-    const totalEmpleados = empleados.length;
-    const empleadosConTalla = empleados.filter(emp => emp.talla && emp.talla !== 'Por definir').length;
-    const porDefinir = empleados.filter(emp => !emp.talla || emp.talla === 'Por definir').length;
-
-    setStats({
-      totalEmpleados,
-      empleadosConTalla,
-      totalSucursales: sucursales.length,
-      porDefinir
-    });
+  const stats = {
+    totalEmpleados: estadisticas ? estadisticas.totales.total_empleados : 0,
+    empleadosConTalla: estadisticas ? estadisticas.totales.tallas_definidas : 0,
+    totalSucursales: sucursales.length,
+    porDefinir: estadisticas ? estadisticas.totales.por_definir : 0
   };
 
-  const loadAllEmpleados = async () => {
+  const loadEstadisticas = async () => {
     try {
       setLoading(true);
       setError('');
-      const data = await fetchEmpleados();
-      setEmpleados(data);
+      const data = await fetchEstadisticasDashboard();
+      setEstadisticas(data);
     } catch (err) {
-      setError('Error al cargar los empleados: ' + err.message);
+      setError('Error al cargar las estadísticas: ' + err.message);
     } finally {
       setLoading(false);
     }
@@ -181,19 +162,11 @@ const AdminDashboard = ({ sucursales: sucursalesIniciales, onSucursalUpdate: onS
     setTimeout(() => setError(''), 5000);
   };
 
-  // Filtrar empleados por sucursal
-  const empleadosPorSucursal = (sucursalId) => {
-    return empleados.filter(emp => emp.sucursal_id === sucursalId);
-  };
-
-  // Crear objeto con empleados agrupados por sucursal para el generador masivo
-  const createEmpleadosPorSucursalMap = () => {
-    const empleadosMap = {};
-    sucursales.forEach(sucursal => {
-      empleadosMap[sucursal.id] = empleados.filter(emp => emp.sucursal_id === sucursal.id);
-    });
-    return empleadosMap;
-  };
+  // Resumen de cada sucursal por id, para las tarjetas y el generador masivo
+  const resumenesPorSucursal = {};
+  (estadisticas ? estadisticas.sucursales : []).forEach(resumen => {
+    resumenesPorSucursal[resumen.id] = resumen;
+  });
 
   // Filtrado de sucursales
   const filteredSucursales = sucursales.filter(sucursal => {
@@ -233,7 +206,7 @@ const AdminDashboard = ({ sucursales: sucursalesIniciales, onSucursalUpdate: onS
     setCurrentPage(1);
   };
 
-  if (loading && empleados.length === 0) {
+  if (loading && !estadisticas) {
     return (
       <div className="flex items-center justify-center h-screen bg-gray-50">
         <div className="text-center">
@@ -357,9 +330,10 @@ const AdminDashboard = ({ sucursales: sucursalesIniciales, onSucursalUpdate: onS
           <div className="mb-6">
             <BulkShippingGenerator 
               sucursales={sucursales}
-              empleadosPorSucursal={createEmpleadosPorSucursalMap()}
+              resumenesPorSucursal={resumenesPorSucursal}
               onSuccess={handleBulkShippingSuccess}
               onError={handleBulkShippingError}
+              onSucursalesActualizadas={(actualizadas) => actualizadas.forEach(handleSucursalUpdate)}
             />
           </div>
         )}
@@ -487,10 +461,10 @@ const AdminDashboard = ({ sucursales: sucursalesIniciales, onSucursalUpdate: onS
                   </h2>
                 </div>
 
-                <TallasResumen empleados={empleados} />
+                {estadisticas && <TallasResumen resumen={estadisticas.totales} />}
               </div>
               <div className="bg-white p-6 rounded-lg shadow-sm border border-gray-100">
-                <CumplimientoPorSucursal sucursales={sucursales} empleados={empleados} />
+                <CumplimientoPorSucursal sucursales={sucursales} resumenes={estadisticas ? estadisticas.sucursales : []} />
               </div>
             </div>
           </>
@@ -577,7 +551,7 @@ const AdminDashboard = ({ sucursales: sucursalesIniciales, onSucursalUpdate: onS
                 <SucursalCard
                   key={sucursal.id}
                   sucursal={sucursal}
-                  empleados={empleadosPorSucursal(sucursal.id)}
+                  resumen={resumenesPorSucursal[sucursal.id]}
                   onSucursalUpdate={handleSucursalUpdate}  // ← AGREGADO
                   onError={handleError}                     // ← AGREGADO
                   onSuccess={handleSuccess}                 // ← AGREGADO
@@ -11,10 +11,11 @@ import {
   Eye,
   EyeOff
 } from 'lucide-react';
-import { jsPDF } from 'jspdf';
+import { updateEnvioSucursales, downloadEtiquetasEnvio } from '../../api';
 
-const BulkShippingGenerator = ({ sucursales, empleadosPorSucursal = {}, onSuccess, onError }) => {
+const BulkShippingGenerator = ({ sucursales, resumenesPorSucursal = {}, onSuccess, onError, onSucursalesActualizadas }) => {
   const [generating, setGenerating] = useState(false);
+  const [marcando, setMarcando] = useState(false);
   const [selectedSucursales, setSelectedSucursales] = useState([]);
   const [filterOptions, setFilterOptions] = useState({
     includeAll: true,
@@ -23,35 +24,8 @@ const BulkShippingGenerator = ({ sucursales, empleadosPorSucursal = {}, onSucces
   });
   const [showPackageContent, setShowPackageContent] = useState(true);
 
-  // Función para calcular el resumen de tallas de una sucursal (SOLO PLAYERAS DE SEGURIDAD)
-  const calcularResumenTallas = (empleados) => {
-    const TALLAS = ['XS', 'S', 'M', 'L', 'XL', 'XXL', 'XXXL'];
-    const emptyLabel = 'Por definir';
-    
-    let playerasSeguridad = 0;
-    const tallasSeguridad = {};
-
-    empleados.forEach(emp => {
-      if (emp.requiere_playera_administrativa) {
-        // Solo cuenta 1 playera de seguridad para empleados administrativos
-        if (emp.talla && emp.talla !== emptyLabel) {
-          playerasSeguridad += 1;
-          tallasSeguridad[emp.talla] = (tallasSeguridad[emp.talla] || 0) + 1;
-        }
-      } else {
-        // Cuenta 3 playeras de seguridad para empleados operativos
-        if (emp.talla && emp.talla !== emptyLabel) {
-          playerasSeguridad += 3;
-          tallasSeguridad[emp.talla] = (tallasSeguridad[emp.talla] || 0) + 3;
-        }
-      }
-    });
-
-    return {
-      playerasSeguridad,
-      tallasSeguridad
-    };
-  };
+  // Cajas (etiquetas) de una sucursal según el resumen del servidor, que usa la misma regla que el PDF
+  const cajasSucursal = (sucursal) => resumenesPorSucursal[sucursal.id]?.cajas || 1;
 
   // Filtrar sucursales según las opciones seleccionadas
   const getFilteredSucursales = () => {
@@ -80,74 +54,20 @@ const BulkShippingGenerator = ({ sucursales, empleadosPorSucursal = {}, onSucces
         onError('No hay sucursales seleccionadas para generar etiquetas');
         return;
       }
-      
-      // Calcular el número total de etiquetas considerando múltiples cajas
-      let totalEtiquetasGeneradas = 0;
-
-      // Crear documento PDF
-      const doc = new jsPDF();
-      
-      // Configuración de etiquetas por página (4 etiquetas: 2x2)
-      const labelsPerRow = 2;
-      const labelsPerColumn = 2;
-      const labelsPerPage = labelsPerRow * labelsPerColumn;
-      
-      // Dimensiones de las etiquetas
-      const pageWidth = 210; // A4 width in mm
-      const pageHeight = 297; // A4 height in mm
-      const labelWidth = pageWidth / labelsPerRow;
-      const labelHeight = pageHeight / labelsPerColumn;
-      
-      let currentPage = 0;
-      let labelCount = 0;
-
-      // Procesar cada sucursal y determinar cuántas cajas necesita
-      sucursalesToProcess.forEach((sucursal, index) => {
-        // Obtener empleados de la sucursal
-        const empleados = empleadosPorSucursal?.[sucursal.id] || [];
-        const resumen = calcularResumenTallas(empleados);
-        
-        // Calcular número de cajas necesarias (12 playeras por caja)
-        const PLAYERAS_POR_CAJA = 12;
-        const numCajas = Math.ceil(resumen.playerasSeguridad / PLAYERAS_POR_CAJA) || 1;
-        
-        // Generar una etiqueta por cada caja
-        for (let cajaNum = 1; cajaNum <= numCajas; cajaNum++) {
-          // Calcular posición en la página
-          const positionInPage = labelCount % labelsPerPage;
-          const row = Math.floor(positionInPage / labelsPerRow);
-          const col = positionInPage % labelsPerRow;
-          
-          // Si es el primer label de una nueva página
-          if (positionInPage === 0 && labelCount > 0) {
-            doc.addPage();
-            currentPage++;
-          }
-          
-          // Calcular offsets
-          const xOffset = col * labelWidth;
-          const yOffset = row * labelHeight;
-          
-          // Información de la caja
-          const cajaInfo = {
-            numeroActual: cajaNum,
-            totalCajas: numCajas,
-            playerasEnEstaCaja: cajaNum < numCajas ? PLAYERAS_POR_CAJA : (resumen.playerasSeguridad - (numCajas - 1) * PLAYERAS_POR_CAJA)
-          };
-          
-          // Generar etiqueta individual
-          generateSingleLabel(doc, sucursal, empleados, xOffset, yOffset, labelWidth, labelHeight, cajaInfo);
-          
-          labelCount++;
-          totalEtiquetasGeneradas++;
-        }
-      });
 
-      // Descargar el PDF
-      const fileName = `etiquetas_envio_masivo_${new Date().toISOString().split('T')[0]}.pdf`;
-      doc.save(fileName);
+      // El PDF se arma en el servidor con el resumen de tallas calculado en SQL; los filtros
+      // por estado se envían como tales para no mandar miles de ids en la URL
+      const filtros = { contenido: showPackageContent };
+      if (filterOptions.onlyPending) {
+        filtros.estado = 'pendientes';
+      } else if (filterOptions.onlyPackaged) {
+        filtros.estado = 'empaquetadas';
+      } else if (!filterOptions.includeAll) {
+        filtros.ids = sucursalesToProcess.map(s => s.id);
+      }
+      await downloadEtiquetasEnvio(filtros);
 
-      onSuccess(`Generadas ${totalEtiquetasGeneradas} etiquetas de envío para ${sucursalesToProcess.length} sucursales`);
+      onSuccess(`Generadas ${totalEtiquetas} etiquetas de envío para ${sucursalesToProcess.length} sucursales`);
 
     } catch (error) {
       console.error('Error generando etiquetas masivas:', error);
@@ -157,207 +77,28 @@ const BulkShippingGenerator = ({ sucursales, empleadosPorSucursal = {}, onSucces
     }
   };
 
-  const generateSingleLabel = (doc, sucursal, empleados = [], xOffset = 0, yOffset = 0, labelWidth = 105, labelHeight = 148.5, cajaInfo = null) => {
-    // Configurar fuente
-    doc.setFont('helvetica');
-    
-    const baseX = xOffset;
-    const baseY = yOffset;
-    const margin = 2;
-    const leftMargin = baseX + 5;
-    const rightMargin = baseX + labelWidth - 5;
-    const availableWidth = labelWidth - 10;
-
-    // Encabezado con título
-    let currentY = baseY + 10;
-    
-    // Título principal
-    doc.setFontSize(16);
-    doc.setFont('helvetica', 'bold');
-    doc.text('ETIQUETA DE ENVÍO', baseX + labelWidth/2, currentY, { align: 'center' });
-    currentY += 8;
-    
-    // Indicador de caja (si hay múltiples cajas) - Posicionado debajo del título
-    if (cajaInfo && cajaInfo.totalCajas > 1) {
-      doc.setFontSize(14);
-      doc.setFont('helvetica', 'bold');
-      doc.setTextColor(0, 0, 0); // Solo texto negro
-      doc.text(`CAJA ${cajaInfo.numeroActual}/${cajaInfo.totalCajas}`, baseX + labelWidth/2, currentY + 3, { align: 'center' });
-      currentY += 10;
-    }
-    
-    // Línea separadora principal
-    doc.setLineWidth(0.8);
-    doc.line(leftMargin, currentY, rightMargin, currentY);
-    currentY += 6;
-    
-    // SECCIÓN DESTINATARIO
-    doc.setFontSize(12);
-    doc.setFont('helvetica', 'bold');
-    doc.text('DESTINATARIO:', leftMargin, currentY);
-    currentY += 5;
-    
-    // Nombre de la sucursal
-    doc.setFontSize(16);
-    doc.setFont('helvetica', 'bold');
-    const nombreSucursal = sucursal.nombre || 'Sucursal';
-    doc.text(nombreSucursal, leftMargin, currentY);
-    currentY += 5;
-    
-    // Manager
-    if (sucursal.manager) {
-      doc.setFont('helvetica', 'normal');
-      doc.setFontSize(12);
-      doc.text(sucursal.manager, leftMargin, currentY);
-      currentY += 5;
-    }
-    
-    // Dirección del destinatario (más compacta)
-    doc.setFont('helvetica', 'normal');
-    doc.setFontSize(12);
-    const direccionDestinatario = sucursal.direccion || 'Dirección no especificada';
-    const direccionLines = doc.splitTextToSize(direccionDestinatario, availableWidth);
-    
-    // Limitar a máximo 3 líneas para la dirección
-    const maxDireccionLines = Math.min(direccionLines.length, 3);
-    for (let i = 0; i < maxDireccionLines; i++) {
-      doc.text(direccionLines[i], leftMargin, currentY);
-      currentY += 5;
+  // Cierra la ola de envío: marca como empaquetadas todas las sucursales procesadas en una sola solicitud
+  const marcarEmpaquetadas = async () => {
+    const pendientes = getFilteredSucursales().filter(s => !s.is_empaquetado);
+    if (pendientes.length === 0) {
+      onError('Todas las sucursales seleccionadas ya están empaquetadas');
+      return;
     }
-    
-    // Teléfono del destinatario
-    if (sucursal.telefono) {
-      doc.setFont('helvetica', 'bold');
-      doc.setFontSize(10);
-      doc.text(`Tel: ${sucursal.telefono}`, leftMargin, currentY);
-      currentY += 6;
-    }
-    
-    // Línea divisoria
-    doc.setLineWidth(0.5);
-    doc.line(leftMargin, currentY, rightMargin, currentY);
-    currentY += 5;
-    
-    // SECCIÓN REMITENTE (más compacta)
-    doc.setFontSize(12);
-    doc.setFont('helvetica', 'bold');
-    doc.text('REMITENTE:', leftMargin, currentY);
-    currentY += 5;
-    
-    doc.setFont('helvetica', 'bold');
-    doc.setFontSize(11);
-    doc.text('Rodrigo Isai Reyna R.', leftMargin, currentY);
-    currentY += 4;
-    
-    doc.setFont('helvetica', 'normal');
-    doc.setFontSize(9);
-    doc.text('Constitución 444 pte Col Centro, Monterrey, NL', leftMargin, currentY);
-    currentY += 4;
-    doc.text('CP 64000  Tel: 8126220306', leftMargin, currentY);
-    currentY += 8;
-    
-    // SECCIÓN CONTENIDO (si está habilitada y hay espacio)
-    if (showPackageContent && empleados && empleados.length > 0) {
-      const resumen = calcularResumenTallas(empleados);
-      
-      // Verificar si hay espacio suficiente (reservar al menos 20mm para el final)
-      const espacioRestante = (baseY + labelHeight - 20) - currentY;
-      
-      if (espacioRestante > 25) { // Solo mostrar si hay espacio suficiente
-        // Línea divisoria
-        doc.setLineWidth(0.5);
-        doc.line(leftMargin, currentY, rightMargin, currentY);
-        currentY += 5;
-        
-        // Título del contenido
-        doc.setFontSize(12);
-        doc.setFont('helvetica', 'bold');
-        doc.text('CONTENIDO:', leftMargin, currentY);
-        currentY += 7;
-        
-        // Información básica con fuente más grande
-        doc.setFont('helvetica', 'normal');
-        doc.setFontSize(12);
-        
-        const infoText = [`Empleados: ${empleados.length}`];
-        
-        // Mostrar playeras según la caja
-        if (cajaInfo && cajaInfo.totalCajas > 1) {
-          infoText.push(`Playeras: ${cajaInfo.playerasEnEstaCaja}`);
-          infoText.push(`(Total: ${resumen.playerasSeguridad})`);
-        } else if (resumen.playerasSeguridad > 0) {
-          infoText.push(`Playeras: ${resumen.playerasSeguridad}`);
-        }
-        
-        doc.text(infoText.join(' • '), leftMargin, currentY);
-        currentY += 7;
-        
-        // Tallas - Formato tabular profesional
-        if (Object.keys(resumen.tallasSeguridad).length > 0 && (!cajaInfo || cajaInfo.numeroActual === 1)) {
-          doc.setFont('helvetica', 'bold');
-          doc.setFontSize(12);
-          doc.text('TALLAS:', leftMargin, currentY);
-          currentY += 8;
-          
-          const tallasEntries = Object.entries(resumen.tallasSeguridad);
-          
-          // Crear formato de tabla/grid para las tallas
-          const columnWidth = 20; // Ancho de cada columna
-          const startX = leftMargin + 5;
-          let currentX = startX;
-          let rowCount = 0;
-          const maxColumns = Math.floor(availableWidth / columnWidth) - 1; // Máximo 4 columnas
-          
-          // Dibujar marco de tallas
-          const tallasBoxStartY = currentY - 4;
-          doc.setLineWidth(0.3);
-          doc.setFillColor(248, 248, 248); // Fondo gris muy claro
-          doc.rect(leftMargin + 2, tallasBoxStartY, availableWidth - 4, 14, 'FD');
-          
-          tallasEntries.forEach(([talla, cantidad], index) => {
-            // Si llegamos al límite de columnas, pasar a la siguiente fila
-            if (index > 0 && index % maxColumns === 0) {
-              currentY += 6;
-              currentX = startX;
-              rowCount++;
-              
-              // Máximo 2 filas para mantener el diseño compacto
-              if (rowCount >= 2) return;
-            }
-            
-            // Dibujar talla y cantidad con mejor formato
-            doc.setFont('helvetica', 'bold');
-            doc.setFontSize(11);
-            doc.text(talla, currentX, currentY);
-            
-            doc.setFont('helvetica', 'normal');
-            doc.setFontSize(11);
-            doc.text(`(${cantidad})`, currentX + 8, currentY);
-            
-            currentX += columnWidth;
-          });
-          
-          currentY += 8; // Espacio después de las tallas
-        }
+    try {
+      setMarcando(true);
+      const resultado = await updateEnvioSucursales({
+        items: pendientes.map(s => ({ id: s.id })),
+        is_empaquetado: true
+      });
+      if (onSucursalesActualizadas) {
+        onSucursalesActualizadas(resultado.sucursales);
       }
+      onSuccess(`${resultado.actualizadas} sucursales marcadas como empaquetadas`);
+    } catch (error) {
+      onError('Error al actualizar el estado de envío: ' + error.message);
+    } finally {
+      setMarcando(false);
     }
-    
-    // Número de seguimiento (si existe) - Posición fija en la parte inferior
-    if (sucursal.numero_seguimiento) {
-      const trackingY = baseY + labelHeight - 12;
-      
-      // Línea superior al número de seguimiento
-      doc.setLineWidth(0.5);
-      doc.line(leftMargin, trackingY - 4, rightMargin, trackingY - 4);
-      
-      doc.setFont('helvetica', 'bold');
-      doc.setFontSize(11);
-      doc.text(`SEGUIMIENTO: ${sucursal.numero_seguimiento}`, baseX + labelWidth/2, trackingY, { align: 'center' });
-    }
-    
-    // Borde exterior de la etiqueta
-    doc.setLineWidth(1);
-    doc.rect(baseX + margin, baseY + margin, labelWidth - (2 * margin), labelHeight - (2 * margin));
   };
 
   const handleFilterChange = (filterType) => {
@@ -374,10 +115,7 @@ const BulkShippingGenerator = ({ sucursales, empleadosPorSucursal = {}, onSucces
   const calcularTotalEtiquetas = () => {
     let total = 0;
     sucursalesToProcess.forEach(sucursal => {
-      const empleados = empleadosPorSucursal?.[sucursal.id] || [];
-      const resumen = calcularResumenTallas(empleados);
-      const numCajas = Math.ceil(resumen.playerasSeguridad / 12) || 1;
-      total += numCajas;
+      total += cajasSucursal(sucursal);
     });
     return total;
   };
@@ -503,28 +241,42 @@ const BulkShippingGenerator = ({ sucursales, empleadosPorSucursal = {}, onSucces
             </div>
           </div>
           
-          <button
-            onClick={generateBulkShippingLabels}
-            disabled={generating || sucursalesToProcess.length === 0}
-            className={`flex items-center px-6 py-3 rounded-md font-medium transition-colors ${
-              generating || sucursalesToProcess.length === 0
-                ? 'bg-gray-300 text-gray-500 cursor-not-allowed'
-                : 'bg-green-600 text-white hover:bg-green-700'
-            }`}
-          >
-            {generating ? (
-              <>
-                <div className="animate-spin rounded-full h-4 w-4 border-b-2 border-white mr-2"></div>
-                Generando...
-              </>
-            ) : (
-              <>
-                <Truck size={16} className="mr-2" />
-                <Download size={16} className="mr-1" />
-                Generar PDF
-              </>
-            )}
-          </button>
+          <div className="flex items-center space-x-2">
+            <button
+              onClick={marcarEmpaquetadas}
+              disabled={marcando || sucursalesToProcess.length === 0}
+              className={`flex items-center px-4 py-3 rounded-md font-medium transition-colors ${
+                marcando || sucursalesToProcess.length === 0
+                  ? 'bg-gray-300 text-gray-500 cursor-not-allowed'
+                  : 'bg-white text-green-700 border border-green-600 hover:bg-green-50'
+              }`}
+            >
+              <CheckCircle size={16} className="mr-2" />
+              {marcando ? 'Guardando...' : 'Marcar empaquetadas'}
+            </button>
+            <button
+              onClick={generateBulkShippingLabels}
+              disabled={generating || sucursalesToProcess.length === 0}
+              className={`flex items-center px-6 py-3 rounded-md font-medium transition-colors ${
+                generating || sucursalesToProcess.length === 0
+                  ? 'bg-gray-300 text-gray-500 cursor-not-allowed'
+                  : 'bg-green-600 text-white hover:bg-green-700'
+              }`}
+            >
+              {generating ? (
+                <>
+                  <div className="animate-spin rounded-full h-4 w-4 border-b-2 border-white mr-2"></div>
+                  Generando...
+                </>
+              ) : (
+                <>
+                  <Truck size={16} className="mr-2" />
+                  <Download size={16} className="mr-1" />
+                  Generar PDF
+                </>
+              )}
+            </button>
+          </div>
         </div>
       </div>
 
@@ -537,9 +289,7 @@ const BulkShippingGenerator = ({ sucursales, empleadosPorSucursal = {}, onSucces
           <div className="max-h-40 overflow-y-auto">
             <div className="grid grid-cols-1 md:grid-cols-2 gap-2">
               {sucursalesToProcess.map(sucursal => {
-                const empleados = empleadosPorSucursal?.[sucursal.id] || [];
-                const resumen = calcularResumenTallas(empleados);
-                const numCajas = Math.ceil(resumen.playerasSeguridad / 12) || 1;
+                const numCajas = cajasSucursal(sucursal);
                 
                 return (
                   <div key={sucursal.id} className="flex items-center justify-between p-2 bg-gray-50 rounded text-sm">
@@ -2,7 +2,8 @@
 import React, { useState } from 'react';
 import { AlertTriangle, Building, CheckCircle, CheckSquare, ChevronRight, Filter } from 'lucide-react';
 
-const CumplimientoPorSucursal = ({ sucursales, empleados }) => {
+// `resumenes` son los resúmenes por sucursal de /estadisticas/dashboard
+const CumplimientoPorSucursal = ({ sucursales, resumenes = [] }) => {
   const [filterZona, setFilterZona] = useState('');
   
   // Obtener zonas únicas para el filtro
@@ -10,22 +11,17 @@ const CumplimientoPorSucursal = ({ sucursales, empleados }) => {
 
   // Calcular porcentaje de cumplimiento por sucursal
   const calcularCumplimiento = () => {
+    const resumenPorId = new Map(resumenes.map(r => [r.id, r]));
     return sucursales.map(sucursal => {
-      const empleadosSucursal = empleados.filter(emp => emp.sucursal_id === sucursal.id);
-      const totalEmpleados = empleadosSucursal.length;
-      const empleadosConTalla = empleadosSucursal.filter(emp => 
-        emp.talla && emp.talla !== 'Por definir'
-      ).length;
-      
-      const porcentaje = totalEmpleados > 0 
-        ? Math.round((empleadosConTalla / totalEmpleados) * 100) 
-        : 0;
+      const resumen = resumenPorId.get(sucursal.id);
+      const totalEmpleados = resumen ? resumen.total_empleados : 0;
+      const empleadosConTalla = resumen ? resumen.tallas_definidas : 0;
         
       return {
         ...sucursal,
         totalEmpleados,
         empleadosConTalla,
-        porcentajeCumplimiento: porcentaje,
+        porcentajeCumplimiento: resumen ? resumen.porcentaje_cumplimiento : 0,
         empleadosPendientes: totalEmpleados - empleadosConTalla
       };
     });
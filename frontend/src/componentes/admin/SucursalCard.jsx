@@ -1,5 +1,5 @@
 // src/components/admin/SucursalCard.jsx
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { 
   Building, 
@@ -15,20 +15,44 @@ import {
   PackageCheck,
   Loader
 } from 'lucide-react';
-import { updateSucursal } from '../../api';
+import { updateSucursal, fetchEmpleadosPagina } from '../../api';
 import TallasResumen from '../common/TallasResumen';
 
-const SucursalCard = ({ sucursal, empleados, onSucursalUpdate, onError, onSuccess }) => {
+// Empleados sin talla que se listan al expandir la tarjeta
+const SIN_TALLA_VISIBLES = 5;
+
+// `resumen` es el de la sucursal en /estadisticas/dashboard; los empleados solo se piden al expandir
+const SucursalCard = ({ sucursal, resumen, onSucursalUpdate, onError, onSuccess }) => {
   const [expanded, setExpanded] = useState(false);
   const [updatingPackage, setUpdatingPackage] = useState(false);
+  const [sinTalla, setSinTalla] = useState(null);
   const navigate = useNavigate();
 
   // Calcular métricas clave
-  const totalEmpleados = empleados.length;
-  const empleadosConTalla = empleados.filter(emp => 
-    emp.talla && emp.talla !== 'Por definir'
-  ).length;
-  const porcentajeCompleto = totalEmpleados > 0 ? Math.round((empleadosConTalla / totalEmpleados) * 100) : 0;
+  const totalEmpleados = resumen ? resumen.total_empleados : 0;
+  const empleadosConTalla = resumen ? resumen.tallas_definidas : 0;
+  const empleadosSinTalla = totalEmpleados - empleadosConTalla;
+  const porcentajeCompleto = resumen ? resumen.porcentaje_cumplimiento : 0;
+
+  // Al expandir se piden solo los primeros empleados sin talla, no toda la sucursal
+  useEffect(() => {
+    if (!expanded || sinTalla !== null || empleadosSinTalla === 0) {
+      return;
+    }
+    fetchEmpleadosPagina({
+      sucursal_id: sucursal.id,
+      talla: 'Por definir',
+      limit: SIN_TALLA_VISIBLES,
+      fields: ['id', 'nombre', 'puesto_homologado', 'puesto_hc']
+    })
+      .then(({ empleados }) => setSinTalla(empleados))
+      .catch(err => console.error('Error cargando empleados sin talla:', err));
+  }, [expanded, sinTalla, empleadosSinTalla, sucursal.id]);
+
+  // Con otro resumen (p. ej. tras recargar estadísticas) la lista se vuelve a pedir
+  useEffect(() => {
+    setSinTalla(null);
+  }, [resumen]);
   
   // Estado general
   const estaCompleto = porcentajeCompleto === 100;
@@ -239,33 +263,29 @@ const SucursalCard = ({ sucursal, empleados, onSucursalUpdate, onError, onSucces
               <h4 className="text-xs font-medium text-gray-700 mb-2 uppercase tracking-wide">
                 Distribución de Tallas
               </h4>
-              <TallasResumen empleados={empleados} compact={true} />
+              {resumen && <TallasResumen resumen={resumen} compact={true} />}
             </div>
 
             {/* Empleados sin talla - Solo los críticos */}
-            {empleados.length > empleadosConTalla && (
+            {empleadosSinTalla > 0 && (
               <div>
                 <h4 className="text-xs font-medium text-red-700 mb-2 uppercase tracking-wide flex items-center">
                   <AlertCircle size={12} className="mr-1" />
-                  Sin Talla ({empleados.length - empleadosConTalla})
+                  Sin Talla ({empleadosSinTalla})
                 </h4>
                 <div className="bg-white rounded-lg border border-red-100 p-2 max-h-32 overflow-y-auto">
                   <div className="space-y-1">
-                    {empleados
-                      .filter(emp => !emp.talla || emp.talla === 'Por definir')
-                      .slice(0, 5) // Solo mostrar primeros 5
-                      .map(empleado => (
-                        <div key={empleado.id} className="flex justify-between items-center text-xs">
-                          <span className="text-gray-800 font-medium truncate">{empleado.nombre}</span>
-                          <span className="text-gray-500 text-xs ml-2 flex-shrink-0">
-                            {(empleado.puesto_homologado || empleado.puesto_hc || '').slice(0, 15)}...
-                          </span>
-                        </div>
-                      ))
-                    }
-                    {(empleados.length - empleadosConTalla) > 5 && (
+                    {(sinTalla || []).map(empleado => (
+                      <div key={empleado.id} className="flex justify-between items-center text-xs">
+                        <span className="text-gray-800 font-medium truncate">{empleado.nombre}</span>
+                        <span className="text-gray-500 text-xs ml-2 flex-shrink-0">
+                          {(empleado.puesto_homologado || empleado.puesto_hc || '').slice(0, 15)}...
+                        </span>
+                      </div>
+                    ))}
+                    {empleadosSinTalla > SIN_TALLA_VISIBLES && (
                       <div className="text-xs text-gray-500 text-center pt-1 border-t">
-                        +{(empleados.length - empleadosConTalla) - 5} más...
+                        +{empleadosSinTalla - SIN_TALLA_VISIBLES} más...
                       </div>
                     )}
                   </div>
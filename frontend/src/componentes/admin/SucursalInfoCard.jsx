@@ -11,8 +11,7 @@ import {
   EyeOff,
   Package
 } from 'lucide-react';
-import { updateSucursal } from '../../api';
-import { jsPDF } from 'jspdf';
+import { updateSucursal, downloadEtiquetasEnvio, fetchEstadisticasDashboard } from '../../api';
 
 const SucursalInfoCard = ({ sucursal, empleados = [], onSucursalUpdate, onError, onSuccess }) => {
   // Estados para edición
@@ -41,35 +40,27 @@ const SucursalInfoCard = ({ sucursal, empleados = [], onSucursalUpdate, onError,
     }
   }, [sucursal]);
 
-  // Función para calcular el resumen de tallas (SOLO PLAYERAS DE SEGURIDAD)
-  const calcularResumenTallas = () => {
-    const TALLAS = ['XS', 'S', 'M', 'L', 'XL', 'XXL', 'XXXL'];
-    const emptyLabel = 'Por definir';
-    
-    let playerasSeguridad = 0;
-    const tallasSeguridad = {};
+  // Playeras, tallas y cajas de esta sucursal calculadas en el servidor con la misma regla
+  // que el PDF de etiquetas; se vuelven a pedir cuando cambian los empleados (p. ej. una talla)
+  const [resumen, setResumen] = useState(null);
+  const [generating, setGenerating] = useState(false);
 
-    empleados.forEach(emp => {
-      if (emp.requiere_playera_administrativa) {
-        // Solo cuenta 1 playera de seguridad para empleados administrativos
-        if (emp.talla && emp.talla !== emptyLabel) {
-          playerasSeguridad += 1;
-          tallasSeguridad[emp.talla] = (tallasSeguridad[emp.talla] || 0) + 1;
-        }
-      } else {
-        // Cuenta 3 playeras de seguridad para empleados operativos
-        if (emp.talla && emp.talla !== emptyLabel) {
-          playerasSeguridad += 3;
-          tallasSeguridad[emp.talla] = (tallasSeguridad[emp.talla] || 0) + 3;
+  React.useEffect(() => {
+    if (!sucursal?.id) {
+      return;
+    }
+    let vigente = true;
+    fetchEstadisticasDashboard(sucursal.id)
+      .then(datos => {
+        if (vigente) {
+          setResumen(datos.sucursales[0] || null);
         }
-      }
-    });
-
-    return {
-      playerasSeguridad,
-      tallasSeguridad
+      })
+      .catch(err => console.error('Error cargando resumen de envío:', err));
+    return () => {
+      vigente = false;
     };
-  };
+  }, [sucursal?.id, empleados]);
 
   const handleSaveField = async (field) => {
     try {
@@ -132,267 +123,12 @@ const SucursalInfoCard = ({ sucursal, empleados = [], onSucursalUpdate, onError,
     setEditingField(field);
   };
 
-  const generateSingleLabel = (doc, sucursal, empleados = [], xOffset = 0, yOffset = 0, labelWidth = 200, labelHeight = 280, cajaInfo = null) => {
-    // Configurar fuente
-    doc.setFont('helvetica');
-    
-    const baseX = xOffset;
-    const baseY = yOffset;
-    const margin = 2;
-    const leftMargin = baseX + 5;
-    const rightMargin = baseX + labelWidth - 5;
-    const availableWidth = labelWidth - 10;
-
-    // Encabezado con título
-    let currentY = baseY + 15;
-    
-    // Título principal
-    doc.setFontSize(18);
-    doc.setFont('helvetica', 'bold');
-    doc.text('ETIQUETA DE ENVÍO', baseX + labelWidth/2, currentY, { align: 'center' });
-    currentY += 10;
-    
-    // Indicador de caja (si hay múltiples cajas) - Posicionado debajo del título
-    if (cajaInfo && cajaInfo.totalCajas > 1) {
-      doc.setFontSize(16);
-      doc.setFont('helvetica', 'bold');
-      doc.setTextColor(0, 0, 0); // Solo texto negro
-      doc.text(`CAJA ${cajaInfo.numeroActual}/${cajaInfo.totalCajas}`, baseX + labelWidth/2, currentY + 3, { align: 'center' });
-      currentY += 12;
-    }
-    
-    // Línea separadora principal
-    doc.setLineWidth(0.8);
-    doc.line(leftMargin, currentY, rightMargin, currentY);
-    currentY += 8;
-    
-    // SECCIÓN DESTINATARIO
-    doc.setFontSize(14);
-    doc.setFont('helvetica', 'bold');
-    doc.text('DESTINATARIO:', leftMargin, currentY);
-    currentY += 8;
-    
-    // Nombre de la sucursal
-    doc.setFontSize(18);
-    doc.setFont('helvetica', 'bold');
-    const nombreSucursal = sucursal.nombre || 'Sucursal';
-    doc.text(nombreSucursal, leftMargin, currentY);
-    currentY += 8;
-    
-    // Manager
-    if (sucursal.manager) {
-      doc.setFont('helvetica', 'normal');
-      doc.setFontSize(14);
-      doc.text(sucursal.manager, leftMargin, currentY);
-      currentY += 7;
-    }
-    
-    // Dirección del destinatario (más compacta)
-    doc.setFont('helvetica', 'normal');
-    doc.setFontSize(13);
-    const direccionDestinatario = sucursal.direccion || 'Dirección no especificada';
-    const direccionLines = doc.splitTextToSize(direccionDestinatario, availableWidth);
-    
-    // Limitar a máximo 3 líneas para la dirección
-    const maxDireccionLines = Math.min(direccionLines.length, 3);
-    for (let i = 0; i < maxDireccionLines; i++) {
-      doc.text(direccionLines[i], leftMargin, currentY);
-      currentY += 6;
-    }
-    
-    // Teléfono del destinatario
-    if (sucursal.telefono) {
-      doc.setFont('helvetica', 'bold');
-      doc.setFontSize(12);
-      doc.text(`Tel: ${sucursal.telefono}`, leftMargin, currentY);
-      currentY += 8;
-    }
-    
-    // Línea divisoria
-    doc.setLineWidth(0.5);
-    doc.line(leftMargin, currentY, rightMargin, currentY);
-    currentY += 7;
-    
-    // SECCIÓN REMITENTE (más compacta)
-    doc.setFontSize(14);
-    doc.setFont('helvetica', 'bold');
-    doc.text('REMITENTE:', leftMargin, currentY);
-    currentY += 8;
-    
-    doc.setFont('helvetica', 'bold');
-    doc.setFontSize(13);
-    doc.text('Rodrigo Isai Reyna R.', leftMargin, currentY);
-    currentY += 6;
-    
-    doc.setFont('helvetica', 'normal');
-    doc.setFontSize(11);
-    doc.text('Constitución 444 pte Col Centro, Monterrey, NL', leftMargin, currentY);
-    currentY += 6;
-    doc.text('CP 64000  Tel: 8126220306', leftMargin, currentY);
-    currentY += 12;
-    
-    // SECCIÓN CONTENIDO (si está habilitada y hay espacio)
-    if (showPackageContent && empleados && empleados.length > 0) {
-      const resumen = calcularResumenTallas();
-      
-      // Verificar si hay espacio suficiente (reservar al menos 30mm para el final)
-      const espacioRestante = (baseY + labelHeight - 30) - currentY;
-      
-      if (espacioRestante > 30) { // Solo mostrar si hay espacio suficiente
-        // Línea divisoria
-        doc.setLineWidth(0.5);
-        doc.line(leftMargin, currentY, rightMargin, currentY);
-        currentY += 7;
-        
-        // Título del contenido
-        doc.setFontSize(14);
-        doc.setFont('helvetica', 'bold');
-        doc.text('CONTENIDO:', leftMargin, currentY);
-        currentY += 10;
-        
-        // Información básica con fuente más grande
-        doc.setFont('helvetica', 'normal');
-        doc.setFontSize(13);
-        
-        const infoText = [`Empleados: ${empleados.length}`];
-        
-        // Mostrar playeras según la caja
-        if (cajaInfo && cajaInfo.totalCajas > 1) {
-          infoText.push(`Playeras: ${cajaInfo.playerasEnEstaCaja}`);
-          infoText.push(`(Total: ${resumen.playerasSeguridad})`);
-        } else if (resumen.playerasSeguridad > 0) {
-          infoText.push(`Playeras: ${resumen.playerasSeguridad}`);
-        }
-        
-        doc.text(infoText.join(' • '), leftMargin, currentY);
-        currentY += 10;
-        
-        // Tallas - Formato tabular profesional
-        if (Object.keys(resumen.tallasSeguridad).length > 0 && (!cajaInfo || cajaInfo.numeroActual === 1)) {
-          doc.setFont('helvetica', 'bold');
-          doc.setFontSize(13);
-          doc.text('TALLAS:', leftMargin, currentY);
-          currentY += 10;
-          
-          const tallasEntries = Object.entries(resumen.tallasSeguridad);
-          
-          // Crear formato de tabla/grid para las tallas
-          const columnWidth = 30; // Ancho de cada columna
-          const startX = leftMargin + 5;
-          let currentX = startX;
-          let rowCount = 0;
-          const maxColumns = Math.floor(availableWidth / columnWidth) - 1; // Máximo columnas según el ancho
-          
-          // Dibujar marco de tallas
-          const tallasBoxStartY = currentY - 6;
-          doc.setLineWidth(0.3);
-          doc.setFillColor(248, 248, 248); // Fondo gris muy claro
-          doc.rect(leftMargin + 2, tallasBoxStartY, availableWidth - 4, 20, 'FD');
-          
-          tallasEntries.forEach(([talla, cantidad], index) => {
-            // Si llegamos al límite de columnas, pasar a la siguiente fila
-            if (index > 0 && index % maxColumns === 0) {
-              currentY += 8;
-              currentX = startX;
-              rowCount++;
-              
-              // Máximo 2 filas para mantener el diseño compacto
-              if (rowCount >= 2) return;
-            }
-            
-            // Dibujar talla y cantidad con mejor formato
-            doc.setFont('helvetica', 'bold');
-            doc.setFontSize(12);
-            doc.text(talla, currentX, currentY);
-            
-            doc.setFont('helvetica', 'normal');
-            doc.setFontSize(12);
-            doc.text(`(${cantidad})`, currentX + 12, currentY);
-            
-            currentX += columnWidth;
-          });
-          
-          currentY += 12; // Espacio después de las tallas
-        }
-      }
-    }
-    
-    // Número de seguimiento (si existe) - Posición fija en la parte inferior
-    if (sucursal.numero_seguimiento) {
-      const trackingY = baseY + labelHeight - 15;
-      
-      // Línea superior al número de seguimiento
-      doc.setLineWidth(0.5);
-      doc.line(leftMargin, trackingY - 6, rightMargin, trackingY - 6);
-      
-      doc.setFont('helvetica', 'bold');
-      doc.setFontSize(12);
-      doc.text(`SEGUIMIENTO: ${sucursal.numero_seguimiento}`, baseX + labelWidth/2, trackingY, { align: 'center' });
-    }
-    
-    // Borde exterior de la etiqueta
-    doc.setLineWidth(1);
-    doc.rect(baseX + margin, baseY + margin, labelWidth - (2 * margin), labelHeight - (2 * margin));
-  };
-
-  const generateShippingLabel = () => {
+  // El PDF (una etiqueta por caja, 4 por hoja) se genera en el servidor
+  const generateShippingLabel = async () => {
     try {
-      // Calcular resumen para determinar número de cajas
-      const resumen = calcularResumenTallas();
-      const PLAYERAS_POR_CAJA = 12;
-      const numCajas = Math.ceil(resumen.playerasSeguridad / PLAYERAS_POR_CAJA) || 1;
-      
-      // Crear documento PDF
-      const doc = new jsPDF();
-      
-      // Configuración de etiquetas por página (4 etiquetas: 2x2) - IGUAL AL GENERADOR MASIVO
-      const labelsPerRow = 2;
-      const labelsPerColumn = 2;
-      const labelsPerPage = labelsPerRow * labelsPerColumn;
-      
-      // Dimensiones de las etiquetas - IGUALES AL GENERADOR MASIVO
-      const pageWidth = 210; // A4 width in mm
-      const pageHeight = 297; // A4 height in mm
-      const labelWidth = pageWidth / labelsPerRow;
-      const labelHeight = pageHeight / labelsPerColumn;
-      
-      let currentPage = 0;
-      let labelCount = 0;
-      
-      // Generar etiquetas para cada caja
-      for (let cajaNum = 1; cajaNum <= numCajas; cajaNum++) {
-        // Calcular posición en la página
-        const positionInPage = labelCount % labelsPerPage;
-        const row = Math.floor(positionInPage / labelsPerRow);
-        const col = positionInPage % labelsPerRow;
-        
-        // Si es el primer label de una nueva página
-        if (positionInPage === 0 && labelCount > 0) {
-          doc.addPage();
-          currentPage++;
-        }
-        
-        // Calcular offsets
-        const xOffset = col * labelWidth;
-        const yOffset = row * labelHeight;
-        
-        // Información de la caja
-        const cajaInfo = numCajas > 1 ? {
-          numeroActual: cajaNum,
-          totalCajas: numCajas,
-          playerasEnEstaCaja: cajaNum < numCajas ? PLAYERAS_POR_CAJA : (resumen.playerasSeguridad - (numCajas - 1) * PLAYERAS_POR_CAJA)
-        } : null;
-        
-        // Generar etiqueta individual
-        generateSingleLabel(doc, sucursal, empleados, xOffset, yOffset, labelWidth, labelHeight, cajaInfo);
-        
-        labelCount++;
-      }
-      
-      // Descargar el PDF
-      const fileName = `etiqueta_envio_${sucursal.nombre?.replace(/\s+/g, '_') || 'sucursal'}_${new Date().toISOString().split('T')[0]}.pdf`;
-      doc.save(fileName);
-      
+      setGenerating(true);
+      await downloadEtiquetasEnvio({ ids: [sucursal.id], contenido: showPackageContent });
+
       const mensaje = numCajas > 1 
         ? `Etiquetas de envío generadas correctamente (${numCajas} cajas)`
         : 'Etiqueta de envío generada correctamente';
@@ -402,6 +138,8 @@ const SucursalInfoCard = ({ sucursal, empleados = [], onSucursalUpdate, onError,
     } catch (error) {
       console.error('Error generando etiqueta:', error);
       onError('Error al generar la etiqueta de envío: ' + error.message);
+    } finally {
+      setGenerating(false);
     }
   };
 
@@ -409,9 +147,10 @@ const SucursalInfoCard = ({ sucursal, empleados = [], onSucursalUpdate, onError,
     return null;
   }
 
-  // Calcular resumen para mostrar en la UI
-  const resumen = empleados.length > 0 ? calcularResumenTallas() : null;
-  const numCajas = resumen ? Math.ceil(resumen.playerasSeguridad / 12) || 1 : 1;
+  const numCajas = resumen ? resumen.cajas : 1;
+  const tallasSeguridad = resumen
+    ? Object.entries(resumen.playeras_por_talla).filter(([, cantidad]) => cantidad > 0)
+    : [];
 
   return (
     <div className="bg-white p-6 rounded-lg shadow-sm border border-gray-100">
@@ -423,7 +162,8 @@ const SucursalInfoCard = ({ sucursal, empleados = [], onSucursalUpdate, onError,
         
         <button
           onClick={generateShippingLabel}
-          className="flex items-center px-4 py-2 bg-green-600 text-white rounded-md hover:bg-green-700 transition-colors text-sm font-medium"
+          disabled={generating}
+          className={`flex items-center px-4 py-2 bg-green-600 text-white rounded-md hover:bg-green-700 transition-colors text-sm font-medium ${generating ? 'opacity-50 cursor-not-allowed' : ''}`}
           title="Generar etiqueta de envío PDF"
         >
           <Truck size={16} className="mr-2" />
@@ -478,10 +218,10 @@ const SucursalInfoCard = ({ sucursal, empleados = [], onSucursalUpdate, onError,
               <div className="text-sm text-gray-700">
                 <div className="grid grid-cols-1 md:grid-cols-3 gap-2">
                   <div>
-                    <strong>Empleados:</strong> {empleados.length}
+                    <strong>Empleados:</strong> {resumen.total_empleados}
                   </div>
                   <div>
-                    <strong>Playeras Seguridad:</strong> {resumen.playerasSeguridad}
+                    <strong>Playeras Seguridad:</strong> {resumen.playeras}
                   </div>
                   {numCajas > 1 && (
                     <div>
@@ -489,10 +229,10 @@ const SucursalInfoCard = ({ sucursal, empleados = [], onSucursalUpdate, onError,
                     </div>
                   )}
                 </div>
-                {Object.keys(resumen.tallasSeguridad).length > 0 && (
+                {tallasSeguridad.length > 0 && (
                   <div className="mt-2">
                     <strong>Tallas:</strong> {
-                      Object.entries(resumen.tallasSeguridad)
+                      tallasSeguridad
                         .map(([talla, cantidad]) => `${talla}:${cantidad}`)
                         .join(', ')
                     }
@@ -4,84 +4,65 @@ import React, { useMemo } from 'react';
 const TALLAS = ['XS', 'S', 'M', 'L', 'XL', 'XXL', 'XXXL', 'Por definir'];
 const COLORS = ['#8884d8', '#82ca9d', '#ffc658', '#ff8042', '#0088FE', '#00C49F', '#FFBB28', '#FF8042'];
 
-const TallasResumen = ({ empleados, compact = false }) => {
-  const emptyLabel = 'Por definir';
+const emptyLabel = 'Por definir';
 
-  const datosTallasSeguridadConteoPlayeras = useMemo(() => {
-    const resultado = [];
-    TALLAS.forEach(tallaValue => {
-      let employeeCount = 0;
-      let shirtCount = 0;
-      empleados.forEach(emp => {
-        if (emp.talla === tallaValue && emp.talla !== emptyLabel) {
-          employeeCount++;
-          if (emp.requiere_playera_administrativa) {
-            shirtCount += 1;
-          } else {
-            shirtCount += 3;
-          }
-        }
-      });
-      if (employeeCount > 0) {
-        resultado.push({
-          name: tallaValue,
-          employeeCount: employeeCount,
-          value: shirtCount // value es el número total de playeras para esta talla
-        });
-      }
-    });
-    return resultado;
-  }, [empleados, emptyLabel]);
-
-  const datosTallasAdministrativasDetallado = useMemo(() => {
-    const resultado = [];
-    TALLAS.forEach(tallaValue => {
-      let employeeCount = 0;
-      empleados.forEach(emp => {
-        if (
-          emp.requiere_playera_administrativa &&
-          emp.talla_administrativa === tallaValue &&
-          emp.talla_administrativa !== emptyLabel
-        ) {
-          employeeCount++;
-        }
-      });
+// Resume una lista de empleados con la misma forma que cada resumen de /estadisticas/dashboard
+const resumirEmpleados = (empleados) => {
+  const resumen = {
+    tallas: {},
+    tallas_administrativas: {},
+    playeras: 0,
+    playeras_por_talla: {},
+    administrativos_definidos: 0
+  };
+  empleados.forEach(emp => {
+    if (emp.talla && emp.talla !== emptyLabel) {
+      // 1 playera de seguridad para administrativos, 3 para operativos
+      const playeras = emp.requiere_playera_administrativa ? 1 : 3;
+      resumen.tallas[emp.talla] = (resumen.tallas[emp.talla] || 0) + 1;
+      resumen.playeras_por_talla[emp.talla] = (resumen.playeras_por_talla[emp.talla] || 0) + playeras;
+      resumen.playeras += playeras;
+    }
+    if (emp.requiere_playera_administrativa && emp.talla_administrativa && emp.talla_administrativa !== emptyLabel) {
+      resumen.tallas_administrativas[emp.talla_administrativa] = (resumen.tallas_administrativas[emp.talla_administrativa] || 0) + 1;
+      resumen.administrativos_definidos += 1;
+    }
+  });
+  return resumen;
+};
 
-      if (employeeCount > 0) {
-        resultado.push({
-          name: tallaValue,
-          employeeCount: employeeCount,
-          value: employeeCount * 3 // value es total de items admin (2 polos + 1 camisa)
-        });
-      }
-    });
-    return resultado;
-  }, [empleados, emptyLabel]);
+// Recibe `empleados` o, para no descargar la tabla completa, un `resumen` del servidor
+const TallasResumen = ({ empleados = [], resumen: resumenServidor = null, compact = false }) => {
+  const resumen = useMemo(
+    () => resumenServidor || resumirEmpleados(empleados),
+    [resumenServidor, empleados]
+  );
 
-  const calcularItemsNecesarios = () => {
-    let playerasSeguridad = 0;
-    let polosConstrurama = 0;
-    let camisasMezclilla = 0;
+  const datosTallasSeguridadConteoPlayeras = useMemo(() => {
+    return TALLAS
+      .filter(tallaValue => tallaValue !== emptyLabel && resumen.tallas[tallaValue] > 0)
+      .map(tallaValue => ({
+        name: tallaValue,
+        employeeCount: resumen.tallas[tallaValue],
+        value: resumen.playeras_por_talla[tallaValue] || 0 // value es el número total de playeras para esta talla
+      }));
+  }, [resumen]);
 
-    empleados.forEach(emp => {
-      if (emp.requiere_playera_administrativa) {
-        if (emp.talla && emp.talla !== emptyLabel) {
-          playerasSeguridad += 1;
-        }
-        if (emp.talla_administrativa && emp.talla_administrativa !== emptyLabel) {
-          polosConstrurama += 2;
-          camisasMezclilla += 1;
-        }
-      } else {
-        if (emp.talla && emp.talla !== emptyLabel) {
-          playerasSeguridad += 3;
-        }
-      }
-    });
-    return { playerasSeguridad, polosConstrurama, camisasMezclilla };
-  };
+  const datosTallasAdministrativasDetallado = useMemo(() => {
+    return TALLAS
+      .filter(tallaValue => tallaValue !== emptyLabel && resumen.tallas_administrativas[tallaValue] > 0)
+      .map(tallaValue => ({
+        name: tallaValue,
+        employeeCount: resumen.tallas_administrativas[tallaValue],
+        value: resumen.tallas_administrativas[tallaValue] * 3 // value es total de items admin (2 polos + 1 camisa)
+      }));
+  }, [resumen]);
 
-  const itemsNecesarios = useMemo(calcularItemsNecesarios, [empleados]);
+  const itemsNecesarios = useMemo(() => ({
+    playerasSeguridad: resumen.playeras,
+    polosConstrurama: resumen.administrativos_definidos * 2,
+    camisasMezclilla: resumen.administrativos_definidos
+  }), [resumen]);
 
   const renderResumenSeccion = (titulo, datosTallas, totalItemsGlobal, nombreItemSingular, nombreItemPlural, isAdmin = false) => {
     const hayDatos = datosTallas.some(item => item.employeeCount > 0);
@@ -2,12 +2,18 @@
 
 import { useState, useEffect } from "react"
 import { Edit, Trash2, Search, Filter, Download, ArrowUpDown, AlertCircle, Shirt } from "lucide-react"
+import { searchEmpleados } from "../../api"
 
 // Lista ampliada de tallas considerando las necesidades de uniformes
 const TALLAS = ["XS", "S", "M", "L", "XL", "XXL", "XXXL", "Por definir"]
 
-const EmpleadosList = ({ empleados, onEditEmpleado, onDeleteEmpleado, onUpdateTalla }) => {
+// Espera tras la última tecla antes de consultar la búsqueda del servidor
+const BUSQUEDA_DEBOUNCE_MS = 250
+
+const EmpleadosList = ({ empleados, sucursalId, onEditEmpleado, onDeleteEmpleado, onUpdateTalla, onUpdateTallasLote }) => {
   const [searchTerm, setSearchTerm] = useState("")
+  // Ids encontrados por el servidor para searchTerm; null mientras no hay resultado
+  const [idsBusqueda, setIdsBusqueda] = useState(null)
   const [filteredEmpleados, setFilteredEmpleados] = useState([])
   const [sortConfig, setSortConfig] = useState({ key: "nombre", direction: "ascending" })
   const [filterByTalla, setFilterByTalla] = useState("")
@@ -19,12 +25,38 @@ const EmpleadosList = ({ empleados, onEditEmpleado, onDeleteEmpleado, onUpdateTa
   const [editingTallaId, setEditingTallaId] = useState(null)
   const [editingTallaType, setEditingTallaType] = useState("regular") // 'regular' o 'administrativa'
 
+  // Búsqueda en el servidor (nombre, nómina, email, CEMEX ID; ignora acentos y tolera errores)
+  useEffect(() => {
+    const termino = searchTerm.trim()
+    setIdsBusqueda(null)
+    if (termino.length < 2) return
+
+    let cancelado = false
+    const timer = setTimeout(async () => {
+      try {
+        const resultados = await searchEmpleados(termino, { sucursalId, limit: 100 })
+        if (!cancelado) setIdsBusqueda(new Set(resultados.map((emp) => emp.id)))
+      } catch (error) {
+        // Si falla se queda el filtro local por nombre
+        console.error("Error en la búsqueda de empleados:", error)
+      }
+    }, BUSQUEDA_DEBOUNCE_MS)
+    return () => {
+      cancelado = true
+      clearTimeout(timer)
+    }
+  }, [searchTerm, sucursalId])
+
   useEffect(() => {
     let result = [...empleados]
 
-    // Aplicar búsqueda
+    // Aplicar búsqueda: resultados del servidor o, mientras llegan, filtro local por nombre
     if (searchTerm) {
-      result = result.filter((emp) => emp.nombre.toLowerCase().includes(searchTerm.toLowerCase()))
+      if (idsBusqueda) {
+        result = result.filter((emp) => idsBusqueda.has(emp.id))
+      } else {
+        result = result.filter((emp) => emp.nombre.toLowerCase().includes(searchTerm.toLowerCase()))
+      }
     }
 
     // Aplicar filtro por talla
@@ -46,7 +78,7 @@ const EmpleadosList = ({ empleados, onEditEmpleado, onDeleteEmpleado, onUpdateTa
     }
 
     setFilteredEmpleados(result)
-  }, [empleados, searchTerm, sortConfig, filterByTalla])
+  }, [empleados, searchTerm, idsBusqueda, sortConfig, filterByTalla])
 
   const requestSort = (key) => {
     let direction = "ascending"
@@ -79,16 +111,24 @@ const EmpleadosList = ({ empleados, onEditEmpleado, onDeleteEmpleado, onUpdateTa
   }
 
   const bulkUpdateTalla = (talla, type = "regular") => {
+    const items = []
     selectedEmpleados.forEach((id) => {
       const empleado = empleados.find((emp) => emp.id === id)
       if (empleado) {
         if (type === "regular") {
-          onUpdateTalla(id, { ...empleado, talla })
+          items.push({ id, talla })
         } else if (type === "administrativa" && empleado.requiere_playera_administrativa) {
-          onUpdateTalla(id, { ...empleado, talla_administrativa: talla })
+          items.push({ id, talla_administrativa: talla })
         }
       }
     })
+    if (items.length > 0) {
+      if (onUpdateTallasLote) {
+        onUpdateTallasLote(items)
+      } else {
+        items.forEach(({ id, ...cambio }) => onUpdateTalla(id, cambio))
+      }
+    }
     setSelectedEmpleados([])
     setShowBulkActions(false)
   }
@@ -142,10 +182,10 @@ const EmpleadosList = ({ empleados, onEditEmpleado, onDeleteEmpleado, onUpdateTa
 
     if (type === "regular") {
       // Para actualizaciones de talla principal
-      onUpdateTalla(id, { ...empleado, talla: value })
+      onUpdateTalla(id, { talla: value })
     } else if (type === "administrativa") {
       // Para actualizaciones de talla administrativa
-      onUpdateTalla(id, { ...empleado, talla_administrativa: value })
+      onUpdateTalla(id, { talla_administrativa: value })
     }
 
     // Cerrar el editor inline después de la actualización
@@ -207,7 +247,7 @@ const EmpleadosList = ({ empleados, onEditEmpleado, onDeleteEmpleado, onUpdateTa
             </div>
             <input
               type="text"
-              placeholder="Buscar empleado..."
+              placeholder="Buscar por nombre, nómina, email o CEMEX ID..."
               value={searchTerm}
               onChange={(e) => setSearchTerm(e.target.value)}
               className="pl-9 p-2 w-full border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500 text-sm"
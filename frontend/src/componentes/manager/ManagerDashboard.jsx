@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { PlusCircle, Trash2, Save, AlertTriangle, ChevronDown, ChevronUp } from 'lucide-react';
-import { fetchEmpleados, createEmpleado, updateEmpleado, deleteEmpleado } from '../../api';
+import { fetchEmpleados, createEmpleado, updateEmpleado, deleteEmpleado, updateEmpleadoTalla, updateTallasLote } from '../../api';
 import EmpleadoForm from './EmpleadoForm';
 import EmpleadosList from './EmpleadosList';
 import TallasResumen from '../common/TallasResumen';
@@ -118,17 +118,21 @@ const ManagerDashboard = ({ sucursalId, sucursales }) => {
       if (!empleado) return;
 
       // datosActualizados puede ser un objeto completo o solo un valor de talla
-      let datosAEnviar;
-      
-      if (typeof datosActualizados === 'string') {
-        // Si es un string, asumimos que es la talla principal
-        datosAEnviar = { ...empleado, talla: datosActualizados };
-      } else {
-        // Si es un objeto, lo usamos directamente
-        datosAEnviar = { ...empleado, ...datosActualizados };
-      }
+      const datos = typeof datosActualizados === 'string'
+        ? { talla: datosActualizados }
+        : datosActualizados;
+
+      // Solo se envía la talla que cambió (como en el lote): mandar también la otra
+      // con el valor que tenía esta vista pisaría un cambio hecho desde otra sesión
+      const cambios = {};
+      ['talla', 'talla_administrativa'].forEach(campo => {
+        if (campo in datos && datos[campo] !== empleado[campo]) {
+          cambios[campo] = datos[campo];
+        }
+      });
+      if (Object.keys(cambios).length === 0) return;
 
-      const updated = await updateEmpleado(id, datosAEnviar);
+      const updated = await updateEmpleadoTalla(id, cambios);
       setEmpleados(empleados.map(emp => emp.id === id ? updated : emp));
       setHasChanges(true);
     } catch (err) {
@@ -136,6 +140,30 @@ const ManagerDashboard = ({ sucursalId, sucursales }) => {
     }
   };
 
+  // Cambios de talla de la selección múltiple: una sola solicitud para todos
+  const handleUpdateTallasLote = async (items) => {
+    try {
+      const { resultados } = await updateTallasLote(items);
+      const actualizados = new Map(
+        resultados.filter(r => r.estado === 'actualizado').map(r => [r.id, r])
+      );
+      setEmpleados(empleados.map(emp => {
+        const r = actualizados.get(emp.id);
+        return r ? { ...emp, talla: r.talla, talla_administrativa: r.talla_administrativa } : emp;
+      }));
+      setHasChanges(true);
+
+      const fallidos = resultados.filter(r => r.estado !== 'actualizado' && r.estado !== 'duplicado');
+      if (fallidos.length > 0) {
+        setError(`No se pudieron actualizar ${fallidos.length} empleado(s)`);
+      } else {
+        showSuccess(`Tallas actualizadas para ${actualizados.size} empleado(s)`);
+      }
+    } catch (err) {
+      setError('Error al actualizar las tallas: ' + err.message);
+    }
+  };
+
   const showSuccess = (message) => {
     setSuccessMessage(message);
     setTimeout(() => {
@@ -241,9 +269,11 @@ const ManagerDashboard = ({ sucursalId, sucursales }) => {
             
             <EmpleadosList
               empleados={empleados}
+              sucursalId={sucursalId}
               onEditEmpleado={handleEditEmpleado}
               onDeleteEmpleado={handleDeleteEmpleado}
               onUpdateTalla={handleUpdateTalla}
+              onUpdateTallasLote={handleUpdateTallasLote}
             />
           </div>
         </div>